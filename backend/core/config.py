@@ -118,6 +118,121 @@ class Config:
         },
     }
 
+    # Устойчивость LLM вызовов (retry, backoff, circuit breaker)
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+    LLM_RETRY_MAX_DELAY: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "30.0"))
+    LLM_RETRY_BUDGET_RATIO: float = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))
+    LLM_RETRY_BUDGET_MIN_RETRIES: int = int(
+        os.getenv("LLM_RETRY_BUDGET_MIN_RETRIES", "3")
+    )
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = int(
+        os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5")
+    )
+    LLM_CIRCUIT_RESET_TIMEOUT: float = float(
+        os.getenv("LLM_CIRCUIT_RESET_TIMEOUT", "60.0")
+    )
+
+    # Запросы-продолжения при обрыве ответа по max_tokens (0 - отключено)
+    LLM_MAX_CONTINUATIONS: int = int(os.getenv("LLM_MAX_CONTINUATIONS", "2"))
+
+    # Режим генерации профиля: single (один completion) или sectional (параллельные секции)
+    PROFILE_GENERATION_MODE: str = os.getenv("PROFILE_GENERATION_MODE", "single")
+
+    # Пакетная генерация должностей одного подразделения (один запрос на N должностей)
+    MULTI_POSITION_BATCH_SIZE: int = int(os.getenv("MULTI_POSITION_BATCH_SIZE", "5"))
+    MULTI_POSITION_MAX_TOKENS: int = int(os.getenv("MULTI_POSITION_MAX_TOKENS", "60000"))
+
+    # Очередь генерации в SQLite (generation_tasks) и пул воркеров
+    GENERATION_WORKER_CONCURRENCY: int = int(os.getenv("GENERATION_WORKER_CONCURRENCY", "4"))
+    GENERATION_LEASE_SECONDS: float = float(os.getenv("GENERATION_LEASE_SECONDS", "120"))
+    GENERATION_MAX_ATTEMPTS: int = int(os.getenv("GENERATION_MAX_ATTEMPTS", "3"))
+    GENERATION_RETRY_DELAY: float = float(os.getenv("GENERATION_RETRY_DELAY", "15"))
+    GENERATION_POLL_INTERVAL: float = float(os.getenv("GENERATION_POLL_INTERVAL", "1.0"))
+    # false - API только ставит задачи, выполняют их процессы python -m backend.worker
+    GENERATION_EMBEDDED_WORKERS: bool = (
+        os.getenv("GENERATION_EMBEDDED_WORKERS", "true").lower() == "true"
+    )
+    GENERATION_WORKER_PROCESSES: int = int(os.getenv("GENERATION_WORKER_PROCESSES", "1"))
+    GENERATION_WORKER_HEALTH_INTERVAL: float = float(
+        os.getenv("GENERATION_WORKER_HEALTH_INTERVAL", "10")
+    )
+    GENERATION_DRAIN_TIMEOUT: float = float(os.getenv("GENERATION_DRAIN_TIMEOUT", "120"))
+    # Планировщик: веса классов приоритета (доля слотов) и лимиты одновременных задач класса
+    # (0 - без лимита). Лимит bulk меньше общего числа слотов оставляет место interactive задачам
+    GENERATION_INTERACTIVE_WEIGHT: int = int(os.getenv("GENERATION_INTERACTIVE_WEIGHT", "4"))
+    GENERATION_BULK_WEIGHT: int = int(os.getenv("GENERATION_BULK_WEIGHT", "1"))
+    GENERATION_INTERACTIVE_MAX_CONCURRENCY: int = int(
+        os.getenv("GENERATION_INTERACTIVE_MAX_CONCURRENCY", "0")
+    )
+    GENERATION_BULK_MAX_CONCURRENCY: int = int(os.getenv("GENERATION_BULK_MAX_CONCURRENCY", "3"))
+    # Кеш результатов задач в памяти процесса API (бюджет, TTL) и порог сжатия в БД
+    GENERATION_RESULT_CACHE_MB: int = int(os.getenv("GENERATION_RESULT_CACHE_MB", "64"))
+    GENERATION_RESULT_CACHE_TTL: float = float(os.getenv("GENERATION_RESULT_CACHE_TTL", "3600"))
+    GENERATION_RESULT_SPILL_BYTES: int = int(
+        os.getenv("GENERATION_RESULT_SPILL_BYTES", "65536")
+    )
+    # Как часто воркер проверяет отмену выполняемых задач (секунды)
+    GENERATION_CANCEL_POLL_INTERVAL: float = float(
+        os.getenv("GENERATION_CANCEL_POLL_INTERVAL", "1.0")
+    )
+    # Сколько секунд ключ идемпотентности POST /api/generation/start указывает на созданную задачу
+    GENERATION_IDEMPOTENCY_TTL: float = float(os.getenv("GENERATION_IDEMPOTENCY_TTL", "86400"))
+    # Максимум задач в одном пакете POST /api/generation/batch
+    GENERATION_BATCH_MAX_TASKS: int = int(os.getenv("GENERATION_BATCH_MAX_TASKS", "2000"))
+    # SSE /api/generation/events: такт проверки изменений задач и интервал keepalive
+    GENERATION_EVENTS_POLL_INTERVAL: float = float(
+        os.getenv("GENERATION_EVENTS_POLL_INTERVAL", "0.5")
+    )
+    GENERATION_EVENTS_KEEPALIVE: float = float(os.getenv("GENERATION_EVENTS_KEEPALIVE", "15"))
+
+    # Рендеринг файлов профиля (MD/DOCX/JSON) вне event loop: пул thread или process,
+    # RENDER_QUEUE_SIZE - сколько задач ждут свободного воркера сверх выполняемых
+    RENDER_EXECUTOR_MODE: str = os.getenv("RENDER_EXECUTOR_MODE", "thread")
+    RENDER_WORKERS: int = int(os.getenv("RENDER_WORKERS", "2"))
+    RENDER_QUEUE_SIZE: int = int(os.getenv("RENDER_QUEUE_SIZE", "8"))
+    # Ленивый рендеринг: генерация сохраняет только JSON, MD/DOCX создаются при первом
+    # скачивании и кешируются в RENDER_CACHE_DIR по (хеш содержимого, версия рендерера)
+    LAZY_DOCUMENT_RENDERING: bool = (
+        os.getenv("LAZY_DOCUMENT_RENDERING", "true").lower() == "true"
+    )
+    RENDER_CACHE_DIR: str = os.getenv(
+        "RENDER_CACHE_DIR", os.path.join(BASE_DATA_PATH, "render_cache")
+    )
+    # Отложенная запись файлов профилей: пачки до FILE_WRITE_BATCH_SIZE файлов, ожидание
+    # пополнения пачки FILE_WRITE_BATCH_WINDOW секунд, fsync файлов и директорий
+    FILE_WRITE_FSYNC: bool = os.getenv("FILE_WRITE_FSYNC", "true").lower() == "true"
+    FILE_WRITE_BATCH_SIZE: int = int(os.getenv("FILE_WRITE_BATCH_SIZE", "64"))
+    FILE_WRITE_BATCH_WINDOW: float = float(os.getenv("FILE_WRITE_BATCH_WINDOW", "0.005"))
+    # Максимум профилей в одной потоковой ZIP выгрузке POST /api/profiles/export
+    PROFILE_EXPORT_MAX_PROFILES: int = int(os.getenv("PROFILE_EXPORT_MAX_PROFILES", "5000"))
+    # Массовый перерендеринг POST /api/profiles/rerender: размер отдельного пула процессов
+    # и время без прогресса (секунды), после которого задание считается прерванным
+    PROFILE_RERENDER_WORKERS: int = int(os.getenv("PROFILE_RERENDER_WORKERS", "2"))
+    PROFILE_RERENDER_STALE_AFTER: float = float(
+        os.getenv("PROFILE_RERENDER_STALE_AFTER", "600")
+    )
+
+    # Готовность системы: проверка изменений источников данных (секунды) и
+    # максимальный возраст вердикта, после которого система перепроверяется
+    READINESS_POLL_INTERVAL: float = float(os.getenv("READINESS_POLL_INTERVAL", "10"))
+    READINESS_MAX_AGE: float = float(os.getenv("READINESS_MAX_AGE", "300"))
+
+    # Трейсинг вне горячего пути: langfuse (фоновая отправка пачками) или null (нагрузочные тесты)
+    TRACING_MODE: str = os.getenv("TRACING_MODE", "langfuse")
+    TRACING_QUEUE_SIZE: int = int(os.getenv("TRACING_QUEUE_SIZE", "1000"))
+    TRACING_BATCH_SIZE: int = int(os.getenv("TRACING_BATCH_SIZE", "50"))
+    TRACING_FLUSH_INTERVAL: float = float(os.getenv("TRACING_FLUSH_INTERVAL", "2.0"))
+    TRACING_SUCCESS_SAMPLE_RATE: float = float(
+        os.getenv("TRACING_SUCCESS_SAMPLE_RATE", "1.0")
+    )
+    TRACING_FAILURE_SAMPLE_RATE: float = float(
+        os.getenv("TRACING_FAILURE_SAMPLE_RATE", "1.0")
+    )
+    TRACING_PROMPT_FETCH_TIMEOUT: float = float(
+        os.getenv("TRACING_PROMPT_FETCH_TIMEOUT", "2.0")
+    )
+
     @property
     def openrouter_configured(self) -> bool:
         """Проверка, настроен ли OpenRouter API."""
@@ -0,0 +1,80 @@
+"""
+@doc
+Продолжение оборванных ответов LLM (finish_reason == "length").
+
+Когда профиль не помещается в max_tokens, ответ модели обрывается на
+середине JSON. Вместо полной перегенерации (100K+ входных токенов) клиент
+отправляет запрос-продолжение: исходные messages без изменений (префикс
+попадает в кеш провайдера), оборванный ответ как сообщение assistant и
+короткую инструкцию продолжить с места остановки. Куски склеиваются
+(с удалением повтора на стыке), итоговый объект парсится и валидируется.
+
+Examples:
+  python> messages = build_continuation_messages(base_messages, partial_text)
+  python> full_text = stitch_continuation(partial_text, continuation_text)
+"""
+
+from typing import Any, Dict, List
+
+CONTINUATION_INSTRUCTION = (
+    "Твой предыдущий ответ оборвался из-за ограничения длины. "
+    "Продолжи JSON ровно с того символа, на котором он остановился. "
+    "Не повторяй уже выведенный текст, не начинай объект заново, "
+    "не добавляй пояснений и markdown - только недостающее продолжение."
+)
+
+# Границы длины повтора на стыке: короткие совпадения (например "]]" или ", ")
+# могут быть легитимным продолжением и не удаляются
+MIN_OVERLAP_CHARS = 8
+MAX_OVERLAP_CHARS = 200
+
+
+def build_continuation_messages(
+    messages: List[Dict[str, Any]], partial_text: str
+) -> List[Dict[str, Any]]:
+    """
+    Messages запроса-продолжения: исходный префикс + оборванный ответ + инструкция.
+
+    Args:
+        messages: Исходные messages генерации (не изменяются)
+        partial_text: Весь уже полученный текст ответа
+
+    Returns:
+        Новый список messages
+    """
+    return [
+        *messages,
+        {"role": "assistant", "content": partial_text},
+        {"role": "user", "content": CONTINUATION_INSTRUCTION},
+    ]
+
+
+def _strip_fences(text: str) -> str:
+    if text.lstrip().startswith("```"):
+        text = text.lstrip()
+        newline = text.find("\n")
+        text = text[newline + 1 :] if newline >= 0 else ""
+    if text.rstrip().endswith("```"):
+        text = text.rstrip()[:-3].rstrip()
+    return text
+
+
+def stitch_continuation(partial_text: str, continuation_text: str) -> str:
+    """
+    Склейка оборванного ответа и продолжения.
+
+    Модели иногда повторяют последние символы перед продолжением -
+    самый длинный общий фрагмент "хвост partial == начало continuation"
+    удаляется. Markdown fence в продолжении отбрасывается.
+    """
+    continuation = _strip_fences(continuation_text or "")
+    if not continuation:
+        return partial_text
+
+    overlap = 0
+    limit = min(MAX_OVERLAP_CHARS, len(partial_text), len(continuation))
+    for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+        if partial_text.endswith(continuation[:size]):
+            overlap = size
+            break
+    return partial_text + continuation[overlap:]
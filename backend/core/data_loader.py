@@ -8,7 +8,7 @@ DataLoader с детерминированной логикой для сист
 import json
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import logging
 
 from .data_mapper import OrganizationMapper, KPIMapper
@@ -16,6 +16,15 @@ from .organization_cache import organization_cache
 
 logger = logging.getLogger(__name__)
 
+# Источники данных, проверяемые validate_data_sources (пути относительно корня проекта)
+DATA_SOURCE_PATHS = {
+    "company_map": Path("data") / "Карта Компании А101.md",
+    "org_structure": Path("data") / "structure.json",
+    "it_systems": Path("data") / "anonymized_digitization_map.md",
+    "json_schema": Path("templates") / "job_profile_schema.json",
+}
+KPI_DIR = Path("data") / "KPI"
+
 
 class DataLoader:
     """
@@ -34,12 +43,7 @@ class DataLoader:
         self._cache = {}
 
         # Пути к статическим файлам - все в ./data
-        self.paths = {
-            "company_map": Path("data") / "Карта Компании А101.md",
-            "org_structure": Path("data") / "structure.json",
-            "it_systems": Path("data") / "anonymized_digitization_map.md",
-            "json_schema": Path("templates") / "job_profile_schema.json",
-        }
+        self.paths = dict(DATA_SOURCE_PATHS)
 
     def prepare_langfuse_variables(
         self, department: str, position: str, employee_name: Optional[str] = None
@@ -72,13 +76,15 @@ class DataLoader:
             # 🎯 НОВОЕ: ИЗВЛЕЧЕНИЕ ПОЛНОЙ ИЕРАРХИИ ДО ПОЗИЦИИ (принимает полный путь или короткое имя)
             hierarchy_info = self._extract_full_position_path(department, position)
             department_path = hierarchy_info.get("department_path_legacy", department)
+            position_variables = self._build_position_variables(
+                department, department_short_name, position, hierarchy_info
+            )
 
             # 🎯 ДЕТЕРМИНИРОВАННЫЙ ВЫБОР KPI ФАЙЛА (использует короткое имя)
             kpi_content = self.kpi_mapper.load_kpi_content(department_short_name)
 
             # 🎯 ИЗВЛЕЧЕНИЕ ДАННЫХ О ЧИСЛЕННОСТИ (использует короткое имя)
             headcount_info = self.org_mapper.get_headcount_info(department_short_name)
-            subordinates_count = self.org_mapper.calculate_subordinates_count(department_short_name, position)
 
             # Подготовка всех переменных
             variables = {
@@ -99,35 +105,18 @@ class DataLoader:
                     indent=2,
                 ),  # ~229K символов - полная структура с выделением
                 # ПОЗИЦИОННЫЕ ДАННЫЕ
-                "position": position,
                 "department": department,  # Полный путь (как передано генератором)
                 "department_name": department_short_name,  # Короткое имя для логики в промпте
                 "employee_name": employee_name or "",
                 # ДИНАМИЧЕСКИЙ КОНТЕКСТ (детерминированно найденный)
                 "kpi_data": kpi_content,  # 0-15K токенов
                 "it_systems": self._load_it_systems_cached(),  # ~15K токенов
-                # ДАННЫЕ О ЧИСЛЕННОСТИ И ПОДЧИНЕННЫХ
+                # ДАННЫЕ О ЧИСЛЕННОСТИ
                 "headcount_info": headcount_info,  # Полная информация о численности департамента
-                "subordinates_calculation": subordinates_count,  # Расчет подчиненных на основе реальных данных
                 "department_headcount": headcount_info.get("headcount"),  # Прямое значение для удобства
                 "headcount_source": headcount_info.get("headcount_source"),  # Источник данных о численности
-                # ПЛОСКИЕ ПЕРЕМЕННЫЕ ДЛЯ ПОДЧИНЕННОСТИ (без точек для Langfuse)
-                "subordinates_departments": subordinates_count.get("departments", 0),
-                "subordinates_direct_reports": subordinates_count.get("direct_reports", 0),
-                # НОВЫЕ ПЕРЕМЕННЫЕ ИЕРАРХИИ (Блок-Департамент-Управление-Отдел-ПодОтдел-Группа)
-                "business_block": hierarchy_info.get("business_block", ""),  # Уровень 1: Блок
-                "department_unit": hierarchy_info.get("department_unit", ""),  # Уровень 2: Департамент
-                "section_unit": hierarchy_info.get("section_unit", ""),  # Уровень 3: Управление/Отдел
-                "group_unit": hierarchy_info.get("group_unit", ""),  # Уровень 4: Отдел
-                "sub_section_unit": hierarchy_info.get("sub_section_unit", ""),  # Уровень 5: Под-отдел
-                "final_group_unit": hierarchy_info.get("final_group_unit", ""),  # Уровень 6: Группа
-                "hierarchy_level": hierarchy_info.get("hierarchy_level", 1),  # Номер уровня в иерархии
-                "full_hierarchy_path": hierarchy_info.get("full_hierarchy_path", department),  # Полный путь с разделителями
-                # РАЗЛОЖЕНИЕ ИЕРАРХИИ (плоские переменные для Langfuse)
-                "hierarchy_levels_list": ", ".join(hierarchy_info.get("full_path_parts", [department])),
-                "hierarchy_current_level": hierarchy_info.get("hierarchy_level", 1),
-                "hierarchy_final_unit": hierarchy_info.get("final_unit", department),
-                "position_location": f"{hierarchy_info.get('final_unit', department)}/{position}",
+                # ДОЛЖНОСТЬ, ПОДЧИНЕННОСТЬ И ИЕРАРХИЯ (см. _build_position_variables)
+                **position_variables,
                 # МЕТАДАННЫЕ
                 "generation_timestamp": datetime.now().isoformat(),
                 "data_version": "v1.2",  # Увеличена версия из-за добавления иерархических данных
@@ -146,6 +135,99 @@ class DataLoader:
             logger.error(f"Error preparing Langfuse variables: {e}")
             raise
 
+    def prepare_unit_variables(
+        self,
+        department: str,
+        positions: List[str],
+        employee_name: Optional[str] = None,
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Подготовка переменных для пакетной генерации нескольких должностей подразделения.
+
+        Тяжелый общий контекст (карта компании, OrgStructure, KPI, ИТ-системы)
+        собирается один раз, позиционные данные - для каждой должности отдельно.
+        OrgStructure выделяет подразделение целиком, а не одну должность.
+
+        Args:
+            department: Название департамента (полный путь или короткое имя)
+            positions: Должности подразделения (непустой список)
+            employee_name: ФИО сотрудника (опционально)
+
+        Returns:
+            Tuple из (полные переменные первой должности, позиционные переменные каждой должности)
+        """
+        if not positions:
+            raise ValueError("At least one position is required for unit generation")
+
+        logger.info(f"Preparing unit variables for {department}: {len(positions)} positions")
+
+        base_variables = self.prepare_langfuse_variables(
+            department=department, position=positions[0], employee_name=employee_name
+        )
+        department_short_name = base_variables["department_name"]
+
+        # Общая структура с выделением подразделения (одна на весь пакет)
+        base_variables["OrgStructure"] = json.dumps(
+            self._get_organization_structure_with_target(
+                base_variables.get("department_path") or department
+            ),
+            ensure_ascii=False,
+            indent=2,
+        )
+
+        positions_context = [
+            self._build_position_variables(department, department_short_name, position)
+            for position in positions
+        ]
+        return base_variables, positions_context
+
+    def _build_position_variables(
+        self,
+        department: str,
+        department_short_name: str,
+        position: str,
+        hierarchy_info: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Переменные промпта, зависящие от конкретной должности.
+
+        Args:
+            department: Название департамента (как передано генератором)
+            department_short_name: Короткое имя департамента
+            position: Название должности
+            hierarchy_info: Уже вычисленная иерархия (иначе вычисляется здесь)
+
+        Returns:
+            Словарь позиционных переменных (должность, подчиненность, иерархия)
+        """
+        if hierarchy_info is None:
+            hierarchy_info = self._extract_full_position_path(department, position)
+        subordinates_count = self.org_mapper.calculate_subordinates_count(
+            department_short_name, position
+        )
+
+        return {
+            "position": position,
+            "subordinates_calculation": subordinates_count,  # Расчет подчиненных на основе реальных данных
+            # ПЛОСКИЕ ПЕРЕМЕННЫЕ ДЛЯ ПОДЧИНЕННОСТИ (без точек для Langfuse)
+            "subordinates_departments": subordinates_count.get("departments", 0),
+            "subordinates_direct_reports": subordinates_count.get("direct_reports", 0),
+            # НОВЫЕ ПЕРЕМЕННЫЕ ИЕРАРХИИ (Блок-Департамент-Управление-Отдел-ПодОтдел-Группа)
+            "business_block": hierarchy_info.get("business_block", ""),  # Уровень 1: Блок
+            "department_unit": hierarchy_info.get("department_unit", ""),  # Уровень 2: Департамент
+            "section_unit": hierarchy_info.get("section_unit", ""),  # Уровень 3: Управление/Отдел
+            "group_unit": hierarchy_info.get("group_unit", ""),  # Уровень 4: Отдел
+            "sub_section_unit": hierarchy_info.get("sub_section_unit", ""),  # Уровень 5: Под-отдел
+            "final_group_unit": hierarchy_info.get("final_group_unit", ""),  # Уровень 6: Группа
+            "hierarchy_level": hierarchy_info.get("hierarchy_level", 1),  # Номер уровня в иерархии
+            "full_hierarchy_path": hierarchy_info.get("full_hierarchy_path", department),  # Полный путь с разделителями
+            # РАЗЛОЖЕНИЕ ИЕРАРХИИ (плоские переменные для Langfuse)
+            "hierarchy_levels_list": ", ".join(hierarchy_info.get("full_path_parts", [department])),
+            "hierarchy_current_level": hierarchy_info.get("hierarchy_level", 1),
+            "hierarchy_final_unit": hierarchy_info.get("final_unit", department),
+            "position_location": f"{hierarchy_info.get('final_unit', department)}/{position}",
+        }
+
     def _load_company_map_cached(self) -> str:
         """Загрузка карты компании А101 с кешированием"""
         cache_key = "company_map"
@@ -679,7 +761,7 @@ class DataLoader:
             "json_schema": self.paths["json_schema"].exists(),
             "it_systems": self.paths["it_systems"].exists(),
             "org_structure": self.paths["org_structure"].exists(),
-            "kpi_file": Path("data/KPI/KPI_DIT.md").exists(),
+            "kpi_file": (KPI_DIR / "KPI_DIT.md").exists(),
         }
 
         # Проверяем KPI файлы
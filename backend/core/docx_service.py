@@ -8,24 +8,37 @@ Core service для генерации DOCX документов из JSON пр
 Конвертирует структурированные JSON профили в красиво отформатированные
 DOCX документы с таблицами, разделами и корпоративным стилем.
 
+Быстрый путь (fast_render, по умолчанию): документ клонируется из
+стилизованного шаблона, собранного один раз на процесс и хранящегося в
+памяти как байты, а таблицы и маркированные списки добавляются готовыми
+XML фрагментами вместо поячеечных вызовов python-docx. fast_render=False -
+прежний путь через объектную модель (для сравнения, см.
+scripts/benchmark_docx_rendering.py).
+
 Examples:
   python> service = initialize_docx_service()
   python> docx_path = service.create_docx_from_json(profile_data, "profile.docx")
 """
 
+import io
 import os
 import logging
+import threading
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Sequence
+from xml.sax.saxutils import escape
 
 logger = logging.getLogger(__name__)
 
 try:
     from docx import Document
-    from docx.shared import Inches, Pt, RGBColor
+    from docx.shared import Emu, Inches, Pt, RGBColor
     from docx.enum.text import WD_ALIGN_PARAGRAPH
     from docx.enum.table import WD_ALIGN_VERTICAL
     from docx.oxml.shared import OxmlElement, qn
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
     DOCX_AVAILABLE = True
 except ImportError:
     logger.warning("⚠️ python-docx not installed. DOCX generation will be disabled.")
@@ -46,11 +59,18 @@ class ProfileDocxService:
     Examples:
       python> service = ProfileDocxService()
       python> path = service.create_docx_from_json(json_data, "output.docx")
+      python> legacy = ProfileDocxService(fast_render=False)  # без шаблона и XML фрагментов
     """
 
-    def __init__(self):
+    # Стилизованный пустой документ (DOCX байты), общий для экземпляров процесса
+    _template: Optional[bytes] = None
+    _template_lock = threading.Lock()
+
+    def __init__(self, fast_render: bool = True):
         """Инициализация сервиса"""
         self.available = DOCX_AVAILABLE
+        self.fast_render = fast_render
+        self._style_ids: Dict[str, str] = {}
         if not self.available:
             logger.warning("DOCX service initialized but python-docx is not available")
 
@@ -79,11 +99,8 @@ class ProfileDocxService:
             else:
                 profile = json_data
 
-            # Создаем новый документ
-            doc = Document()
-
-            # Настраиваем стили документа
-            self._setup_document_styles(doc)
+            # Создаем новый документ со стилями
+            doc = self._new_document()
 
             # Генерируем содержание документа
             self._add_header(doc, profile)
@@ -109,6 +126,89 @@ class ProfileDocxService:
             logger.error(f"❌ Ошибка создания DOCX: {e}")
             raise
 
+    def _new_document(self) -> "Document":
+        """Новый документ: клон шаблона из памяти или Document() + настройка стилей"""
+        if not self.fast_render:
+            doc = Document()
+            self._setup_document_styles(doc)
+            return doc
+        return Document(io.BytesIO(self._base_template()))
+
+    def _base_template(self) -> bytes:
+        """Шаблон документа со стилями (строится при первом вызове в процессе)"""
+        if ProfileDocxService._template is None:
+            with ProfileDocxService._template_lock:
+                if ProfileDocxService._template is None:
+                    doc = Document()
+                    self._setup_document_styles(doc)
+                    buffer = io.BytesIO()
+                    doc.save(buffer)
+                    ProfileDocxService._template = buffer.getvalue()
+        return ProfileDocxService._template
+
+    def _style_id(self, doc: "Document", style: str) -> str:
+        """
+        ID стиля по имени. Поиск по имени в python-docx перебирает все стили
+        документа, поэтому ID кешируются (во всех клонах шаблона они одинаковые).
+        """
+        style_id = self._style_ids.get(style)
+        if style_id is None:
+            style_id = self._style_ids[style] = doc.styles[style].style_id
+        return style_id
+
+    def _add_table(
+        self, doc: "Document", headers: Sequence[str], rows: Iterable[Sequence[Any]]
+    ) -> None:
+        """Таблица 'Table Grid' с заголовком: одним XML фрагментом или по ячейкам"""
+        if not self.fast_render:
+            table = doc.add_table(rows=1, cols=len(headers))
+            table.style = 'Table Grid'
+            for cell, header in zip(table.rows[0].cells, headers):
+                cell.text = header
+            for row in rows:
+                for cell, value in zip(table.add_row().cells, row):
+                    cell.text = str(value)
+            return
+
+        section = doc.sections[-1]
+        block_width = section.page_width - section.left_margin - section.right_margin
+        col_width = Emu(block_width // len(headers)).twips
+        doc.element.body._insert_tbl(
+            parse_xml(
+                _table_xml(
+                    self._style_id(doc, 'Table Grid'),
+                    [headers, *[[str(value) for value in row] for row in rows]],
+                    col_width,
+                )
+            )
+        )
+
+    def _add_paragraphs(self, doc: "Document", style: str, texts: Iterable[Any]) -> None:
+        """Абзацы одного стиля: одним XML фрагментом или по одному через python-docx"""
+        if not self.fast_render:
+            for text in texts:
+                p = doc.add_paragraph(style=style)
+                p.add_run(str(text))
+            return
+
+        style_id = self._style_id(doc, style)
+        paragraphs = "".join(
+            f'<w:p><w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>{_run_xml(str(text))}</w:p>'
+            for text in texts
+        )
+        if paragraphs:
+            body = doc.element.body
+            for p in parse_xml(f"<w:body {nsdecls('w')}>{paragraphs}</w:body>"):
+                body._insert_p(p)
+
+    def _add_bullets(self, doc: "Document", items: Iterable[Any]) -> None:
+        """Маркированный список 'List Bullet'"""
+        self._add_paragraphs(doc, 'List Bullet', items)
+
+    def _add_heading(self, doc: "Document", text: str, level: int) -> None:
+        """Заголовок раздела (как doc.add_heading)"""
+        self._add_paragraphs(doc, f'Heading {level}', [text])
+
     def _setup_document_styles(self, doc: "Document") -> None:
         """Настраивает стили документа"""
         try:
@@ -127,6 +227,12 @@ class ProfileDocxService:
                 heading2.font.size = Pt(14)
                 heading2.font.color.rgb = RGBColor(0, 102, 204)  # Синий
 
+            # Стиль пометок "не определено" (в шаблоне Document() его нет)
+            if 'Italic' not in styles:
+                italic = styles.add_style('Italic', WD_STYLE_TYPE.PARAGRAPH)
+                italic.base_style = styles['Normal']
+                italic.font.italic = True
+
         except Exception as e:
             logger.warning(f"⚠️ Не удалось настроить стили: {e}")
 
@@ -148,16 +254,7 @@ class ProfileDocxService:
 
     def _add_basic_info(self, doc: "Document", profile: Dict[str, Any]) -> None:
         """Добавляет основную информацию"""
-        doc.add_heading("📊 Основная информация", level=2)
-
-        # Создаем таблицу
-        table = doc.add_table(rows=1, cols=2)
-        table.style = 'Table Grid'
-
-        # Заголовки таблицы
-        hdr_cells = table.rows[0].cells
-        hdr_cells[0].text = 'Параметр'
-        hdr_cells[1].text = 'Значение'
+        self._add_heading(doc, "📊 Основная информация", 2)
 
         # Данные для таблицы
         basic_info = [
@@ -179,19 +276,15 @@ class ProfileDocxService:
             subordinates_text = str(subordinates)
         basic_info.append(("Подчиненные", subordinates_text))
 
-        # Заполняем таблицу
-        for param, value in basic_info:
-            row_cells = table.add_row().cells
-            row_cells[0].text = param
-            row_cells[1].text = str(value)
+        self._add_table(doc, ('Параметр', 'Значение'), basic_info)
 
     def _add_responsibilities(self, doc: "Document", profile: Dict[str, Any]) -> None:
         """Добавляет области ответственности"""
-        doc.add_heading("🎯 Области ответственности", level=2)
+        self._add_heading(doc, "🎯 Области ответственности", 2)
 
         responsibilities = profile.get("responsibility_areas", [])
         if not responsibilities:
-            doc.add_paragraph("Области ответственности не определены", style='Italic')
+            self._add_paragraphs(doc, 'Italic', ["Области ответственности не определены"])
             return
 
         for i, area in enumerate(responsibilities, 1):
@@ -202,42 +295,32 @@ class ProfileDocxService:
                 elif isinstance(area_name, list):
                     area_name = area_name[0] if area_name else f"Область {i}"
 
-                doc.add_heading(f"{i}. {area_name}", level=3)
+                self._add_heading(doc, f"{i}. {area_name}", 3)
 
                 # Задачи
                 tasks = area.get("tasks", [])
                 if tasks:
-                    for task in tasks:
-                        p = doc.add_paragraph(style='List Bullet')
-                        p.add_run(str(task))
+                    self._add_bullets(doc, tasks)
 
     def _add_skills(self, doc: "Document", profile: Dict[str, Any]) -> None:
         """Добавляет профессиональные навыки"""
-        doc.add_heading("🛠️ Профессиональные навыки", level=2)
+        self._add_heading(doc, "🛠️ Профессиональные навыки", 2)
 
         skills = profile.get("professional_skills", [])
         if not skills:
-            doc.add_paragraph("Профессиональные навыки не определены", style='Italic')
+            self._add_paragraphs(doc, 'Italic', ["Профессиональные навыки не определены"])
             return
 
         for skill_category in skills:
             if isinstance(skill_category, dict):
                 category_name = skill_category.get("skill_category", skill_category.get("category", "Неизвестная категория"))
-                doc.add_heading(category_name, level=3)
+                self._add_heading(doc, category_name, 3)
 
                 specific_skills = skill_category.get("specific_skills", skill_category.get("skills", []))
 
                 if specific_skills and len(specific_skills) > 0 and isinstance(specific_skills[0], dict):
                     # Детальные навыки с уровнями - создаем таблицу
-                    table = doc.add_table(rows=1, cols=3)
-                    table.style = 'Table Grid'
-
-                    # Заголовки
-                    hdr_cells = table.rows[0].cells
-                    hdr_cells[0].text = 'Навык'
-                    hdr_cells[1].text = 'Уровень'
-                    hdr_cells[2].text = 'Описание'
-
+                    skill_rows = []
                     for skill in specific_skills:
                         name = skill.get("skill_name", "Неизвестный навык")
                         level = skill.get("proficiency_level", skill.get("target_level", "Не указан"))
@@ -250,70 +333,62 @@ class ProfileDocxService:
                         else:
                             level_text = str(level)
 
-                        row_cells = table.add_row().cells
-                        row_cells[0].text = name
-                        row_cells[1].text = level_text
-                        row_cells[2].text = description
+                        skill_rows.append((name, level_text, description))
+
+                    self._add_table(doc, ('Навык', 'Уровень', 'Описание'), skill_rows)
                 else:
                     # Простой список навыков
-                    for skill in specific_skills:
-                        p = doc.add_paragraph(style='List Bullet')
-                        p.add_run(str(skill))
+                    self._add_bullets(doc, specific_skills)
 
     def _add_personal_qualities(self, doc: "Document", profile: Dict[str, Any]) -> None:
         """Добавляет личностные качества"""
-        doc.add_heading("👤 Личностные качества", level=2)
+        self._add_heading(doc, "👤 Личностные качества", 2)
 
         qualities = profile.get("personal_qualities", [])
         if not qualities:
-            doc.add_paragraph("Личностные качества не определены", style='Italic')
+            self._add_paragraphs(doc, 'Italic', ["Личностные качества не определены"])
             return
 
         # Добавляем качества списком
-        for quality in qualities:
-            p = doc.add_paragraph(style='List Bullet')
-            if isinstance(quality, dict):
-                quality_name = quality.get("quality", quality.get("name", "Качество"))
-                p.add_run(quality_name.capitalize())
-            else:
-                p.add_run(str(quality).capitalize())
+        self._add_bullets(
+            doc,
+            (
+                quality.get("quality", quality.get("name", "Качество")).capitalize()
+                if isinstance(quality, dict)
+                else str(quality).capitalize()
+                for quality in qualities
+            ),
+        )
 
     def _add_corporate_competencies(self, doc: "Document", profile: Dict[str, Any]) -> None:
         """Добавляет корпоративные компетенции"""
-        doc.add_heading("🏢 Корпоративные компетенции", level=2)
+        self._add_heading(doc, "🏢 Корпоративные компетенции", 2)
 
         competencies = profile.get("corporate_competencies", [])
         if not competencies:
-            doc.add_paragraph("Корпоративные компетенции не определены", style='Italic')
+            self._add_paragraphs(doc, 'Italic', ["Корпоративные компетенции не определены"])
             return
 
         # Добавляем компетенции списком
-        for competency in competencies:
-            p = doc.add_paragraph(style='List Bullet')
-            if isinstance(competency, dict):
-                comp_name = competency.get("competency", competency.get("name", "Компетенция"))
-                p.add_run(comp_name)
-            else:
-                p.add_run(str(competency))
+        self._add_bullets(
+            doc,
+            (
+                competency.get("competency", competency.get("name", "Компетенция"))
+                if isinstance(competency, dict)
+                else competency
+                for competency in competencies
+            ),
+        )
 
     def _add_education(self, doc: "Document", profile: Dict[str, Any]) -> None:
         """Добавляет требования к образованию"""
-        doc.add_heading("🎓 Образование и опыт работы", level=2)
+        self._add_heading(doc, "🎓 Образование и опыт работы", 2)
 
         education = profile.get("experience_and_education", profile.get("education_requirements", profile.get("education", {})))
         if not education:
-            doc.add_paragraph("Требования к образованию не определены", style='Italic')
+            self._add_paragraphs(doc, 'Italic', ["Требования к образованию не определены"])
             return
 
-        # Создаем таблицу для основной информации
-        table = doc.add_table(rows=1, cols=2)
-        table.style = 'Table Grid'
-
-        # Заголовки
-        hdr_cells = table.rows[0].cells
-        hdr_cells[0].text = 'Требование'
-        hdr_cells[1].text = 'Описание'
-
         edu_info = []
 
         # Собираем информацию
@@ -328,72 +403,63 @@ class ProfileDocxService:
         if total_work_experience:
             edu_info.append(("Общий опыт работы", total_work_experience))
 
-        # Заполняем таблицу
-        for req, desc in edu_info:
-            row_cells = table.add_row().cells
-            row_cells[0].text = req
-            row_cells[1].text = str(desc)
+        # Таблица основной информации
+        self._add_table(doc, ('Требование', 'Описание'), edu_info)
 
     def _add_career_development(self, doc: "Document", profile: Dict[str, Any]) -> None:
         """Добавляет карьерограмму"""
-        doc.add_heading("📈 Карьерограмма", level=2)
+        self._add_heading(doc, "📈 Карьерограмма", 2)
 
         careerogram = profile.get("careerogram", {})
         career_legacy = profile.get("career_development", profile.get("career_path", {}))
         career_data = {**career_legacy, **careerogram}
 
         if not career_data:
-            doc.add_paragraph("Информация о карьерном развитии не определена", style='Italic')
+            self._add_paragraphs(doc, 'Italic', ["Информация о карьерном развитии не определена"])
             return
 
         # Входные позиции
         source_positions = career_data.get("source_positions", {})
         if source_positions:
-            doc.add_heading("🚪 Входные позиции", level=3)
+            self._add_heading(doc, "🚪 Входные позиции", 3)
 
             if isinstance(source_positions, list):
-                for pos in source_positions:
-                    p = doc.add_paragraph(style='List Bullet')
-                    p.add_run(str(pos))
+                self._add_bullets(doc, source_positions)
             elif isinstance(source_positions, dict):
                 direct_predecessors = source_positions.get("direct_predecessors", [])
                 if direct_predecessors:
-                    doc.add_paragraph("Прямые предшественники:", style='Intense Quote')
-                    for pos in direct_predecessors:
-                        p = doc.add_paragraph(style='List Bullet')
-                        p.add_run(str(pos))
+                    self._add_paragraphs(doc, 'Intense Quote', ["Прямые предшественники:"])
+                    self._add_bullets(doc, direct_predecessors)
 
     def _add_workplace_provisioning(self, doc: "Document", profile: Dict[str, Any]) -> None:
         """Добавляет обеспечение рабочего места"""
-        doc.add_heading("💻 Обеспечение рабочего места", level=2)
+        self._add_heading(doc, "💻 Обеспечение рабочего места", 2)
 
         workplace = profile.get("workplace_provisioning", {})
         tech_req_legacy = profile.get("technical_requirements", {})
         provisioning_data = {**tech_req_legacy, **workplace}
 
         if not provisioning_data:
-            doc.add_paragraph("Требования к обеспечению рабочего места не определены", style='Italic')
+            self._add_paragraphs(doc, 'Italic', ["Требования к обеспечению рабочего места не определены"])
             return
 
         # Программное обеспечение
         software_info = provisioning_data.get("software", {})
         if software_info:
-            doc.add_heading("📱 Программное обеспечение", level=3)
+            self._add_heading(doc, "📱 Программное обеспечение", 3)
 
             standard_package = software_info.get("standard_package", [])
             if standard_package:
-                doc.add_paragraph("Стандартный пакет:", style='Intense Quote')
-                for sw in standard_package:
-                    p = doc.add_paragraph(style='List Bullet')
-                    p.add_run(str(sw))
+                self._add_paragraphs(doc, 'Intense Quote', ["Стандартный пакет:"])
+                self._add_bullets(doc, standard_package)
 
     def _add_performance_metrics(self, doc: "Document", profile: Dict[str, Any]) -> None:
         """Добавляет показатели эффективности"""
-        doc.add_heading("📊 Показатели эффективности", level=2)
+        self._add_heading(doc, "📊 Показатели эффективности", 2)
 
         metrics = profile.get("performance_metrics", {})
         if not metrics:
-            doc.add_paragraph("Показатели эффективности не определены", style='Italic')
+            self._add_paragraphs(doc, 'Italic', ["Показатели эффективности не определены"])
             return
 
         # Методология оценки
@@ -406,24 +472,22 @@ class ProfileDocxService:
         # Показатели успеха
         success_indicators = metrics.get("success_indicators", [])
         if success_indicators:
-            doc.add_heading("🎯 Показатели успеха", level=3)
-            for indicator in success_indicators:
-                p = doc.add_paragraph(style='List Bullet')
-                p.add_run(str(indicator))
+            self._add_heading(doc, "🎯 Показатели успеха", 3)
+            self._add_bullets(doc, success_indicators)
 
     def _add_additional_info(self, doc: "Document", profile: Dict[str, Any]) -> None:
         """Добавляет дополнительную информацию"""
-        doc.add_heading("ℹ️ Дополнительная информация", level=2)
+        self._add_heading(doc, "ℹ️ Дополнительная информация", 2)
 
         additional = profile.get("additional_information", {})
         if not additional:
-            doc.add_paragraph("Дополнительная информация отсутствует", style='Italic')
+            self._add_paragraphs(doc, 'Italic', ["Дополнительная информация отсутствует"])
             return
 
         # Условия работы
         working_conditions = additional.get("working_conditions", {})
         if working_conditions:
-            doc.add_heading("🏢 Условия работы", level=3)
+            self._add_heading(doc, "🏢 Условия работы", 3)
 
             schedule = working_conditions.get("work_schedule")
             if schedule:
@@ -433,19 +497,10 @@ class ProfileDocxService:
 
     def _add_metadata(self, doc: "Document", json_data: Dict[str, Any]) -> None:
         """Добавляет метаданные"""
-        doc.add_heading("📋 Метаданные", level=2)
+        self._add_heading(doc, "📋 Метаданные", 2)
 
         generation_meta = json_data.get("metadata", {})
 
-        # Создаем таблицу для метаданных
-        table = doc.add_table(rows=1, cols=2)
-        table.style = 'Table Grid'
-
-        # Заголовки
-        hdr_cells = table.rows[0].cells
-        hdr_cells[0].text = 'Параметр'
-        hdr_cells[1].text = 'Значение'
-
         metadata_info = []
 
         # Информация о генерации
@@ -463,17 +518,47 @@ class ProfileDocxService:
             if "model" in llm_info:
                 metadata_info.append(("Модель LLM", llm_info["model"]))
 
-        # Заполняем таблицу
-        for param, value in metadata_info:
-            row_cells = table.add_row().cells
-            row_cells[0].text = param
-            row_cells[1].text = str(value)
-
         # Дата создания DOCX
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        row_cells = table.add_row().cells
-        row_cells[0].text = "DOCX создан"
-        row_cells[1].text = current_time
+        metadata_info.append(("DOCX создан", current_time))
+
+        self._add_table(doc, ('Параметр', 'Значение'), metadata_info)
+
+
+def _run_xml(text: str) -> str:
+    """XML абзаца для текста: как Run.text в python-docx (\t - w:tab, переводы строк - w:br)"""
+    body = escape(text)
+    for separator, element in (("\t", "<w:tab/>"), ("\r\n", "<w:br/>"), ("\n", "<w:br/>"), ("\r", "<w:br/>")):
+        body = body.replace(separator, f'</w:t>{element}<w:t xml:space="preserve">')
+    return f'<w:r><w:t xml:space="preserve">{body}</w:t></w:r>'
+
+
+def _table_xml(style_id: str, rows: List[Sequence[str]], col_width: int) -> str:
+    """
+    XML таблицы целиком (та же разметка, что у Document.add_table + cell.text).
+
+    Args:
+      style_id: ID стиля таблицы ("TableGrid")
+      rows: Строки таблицы, первая - заголовок
+      col_width: Ширина колонки в twips
+    """
+    cols = len(rows[0])
+    grid_col = f'<w:gridCol w:w="{col_width}"/>'
+    cell_props = f'<w:tcPr><w:tcW w:type="dxa" w:w="{col_width}"/></w:tcPr>'
+    trs = "".join(
+        "<w:tr>"
+        + "".join(f"<w:tc>{cell_props}<w:p>{_run_xml(text)}</w:p></w:tc>" for text in row)
+        + "</w:tr>"
+        for row in rows
+    )
+    return (
+        f"<w:tbl {nsdecls('w')}>"
+        f'<w:tblPr><w:tblStyle w:val="{style_id}"/><w:tblW w:type="auto" w:w="0"/>'
+        f'<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+        f'w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>'
+        f"<w:tblGrid>{grid_col * cols}</w:tblGrid>"
+        f"{trs}</w:tbl>"
+    )
 
 
 def initialize_docx_service() -> Optional[ProfileDocxService]:
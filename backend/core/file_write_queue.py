@@ -0,0 +1,321 @@
+"""
+@doc
+Отложенная (write-behind) запись файлов профилей с атомарной заменой.
+
+Рендеринг возвращает содержимое файлов в памяти, а запись на диск идет в
+фоновом потоке: генерация не ждет диск. Поток забирает задания пачками
+(до FILE_WRITE_BATCH_SIZE, ожидание FILE_WRITE_BATCH_WINDOW секунд) и для
+пачки:
+
+1. создает недостающие директории один раз;
+2. пишет временные файлы рядом с целевыми и (FILE_WRITE_FSYNC) делает fsync;
+3. атомарно переименовывает их в целевые (os.replace);
+4. делает fsync каждой затронутой директории один раз на пачку.
+
+Барьер durability: save_generation_to_db ждет (barrier) запись файлов
+профиля перед INSERT, поэтому БД и индекс profile_files никогда не ссылаются
+на недописанные файлы, а сбой процесса оставляет либо старые, либо целые файлы.
+
+Examples:
+  python> file_write_queue.submit({"json": (path, payload)})
+  python> failed = await file_write_queue.barrier([str(path)])  # {} - все записано
+  python> await file_write_queue.discard([str(path)])           # отмена: удалить записанное
+  python> file_write_queue.shutdown()                           # дописать очередь при остановке
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних ошибок записи хранится для barrier (запись без ожидающих)
+FAILED_WRITES_KEEP = 1000
+
+_STOP = object()
+
+
+class _WriteJob:
+    __slots__ = ("path", "data", "future", "temp_path")
+
+    def __init__(self, path: Path, data: bytes):
+        self.path = path
+        self.data = data
+        self.future: Future = Future()
+        self.temp_path: Optional[Path] = None
+
+
+class FileWriteQueue:
+    """
+    @doc Фоновая пакетная атомарная запись файлов с барьером ожидания.
+
+    Examples:
+        python>
+        writes = FileWriteQueue(fsync=True)
+        writes.submit({"json": (Path("a.json"), b"{}")})
+        assert await writes.barrier(["a.json"]) == {}
+        writes.shutdown()
+    """
+
+    def __init__(
+        self,
+        fsync: Optional[bool] = None,
+        batch_size: Optional[int] = None,
+        batch_window: Optional[float] = None,
+    ):
+        self.fsync = config.FILE_WRITE_FSYNC if fsync is None else fsync
+        self.batch_size = max(1, batch_size or config.FILE_WRITE_BATCH_SIZE)
+        self.batch_window = (
+            config.FILE_WRITE_BATCH_WINDOW if batch_window is None else batch_window
+        )
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._pending: Dict[str, Future] = {}
+        self._failed: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.bytes_written = 0
+
+    def submit(self, files: Dict[str, Tuple[Any, bytes]]) -> List[Future]:
+        """
+        Постановка файлов в очередь записи (kind -> (путь, содержимое)).
+        Возвращает futures записи; ждать их не обязательно (см. barrier).
+        """
+        jobs = []
+        with self._lock:
+            for path, data in files.values():
+                job = _WriteJob(Path(path).resolve(), data)
+                key = str(job.path)
+                self._pending[key] = job.future
+                self._failed.pop(key, None)
+                jobs.append(job)
+            self._ensure_thread()
+        for job in jobs:
+            self._queue.put(job)
+        return [job.future for job in jobs]
+
+    async def barrier(self, paths: Iterable[str], timeout: Optional[float] = None) -> Dict[str, str]:
+        """
+        Ожидание записи указанных файлов на диск.
+
+        Returns:
+          Dict[str, str]: путь -> ошибка для файлов, которые записать не удалось
+        """
+        keys = [str(Path(path).resolve()) for path in paths]
+        with self._lock:
+            waits = {key: self._pending[key] for key in keys if key in self._pending}
+        if waits:
+            await asyncio.wait(
+                [asyncio.wrap_future(future) for future in waits.values()], timeout=timeout
+            )
+        failed = {}
+        with self._lock:
+            for key in keys:
+                future = waits.get(key)
+                if future is not None and not future.done():
+                    failed[key] = "write did not complete in time"
+                elif future is not None and future.exception() is not None:
+                    failed[key] = str(future.exception())
+                elif key in self._failed:
+                    failed[key] = self._failed[key]
+        return failed
+
+    async def discard(self, paths: Iterable[str]) -> int:
+        """
+        Удаление файлов, поставленных в очередь для профиля, который не будет
+        сохранен в БД (отмена задачи, ошибка INSERT): дожидается их записи и
+        удаляет, чтобы на диске не оставалось файлов без записи в profiles.
+
+        Returns:
+          int: Количество удаленных файлов
+        """
+        keys = [str(Path(path).resolve()) for path in paths]
+        await self.barrier(keys)
+        removed = 0
+        for key in keys:
+            try:
+                Path(key).unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"⚠️ Failed to remove discarded file {key}: {e}")
+        if removed:
+            logger.info(f"🗑️ Discarded {removed} files of an unsaved profile")
+        return removed
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Синхронное ожидание записи всего, что уже в очереди"""
+        with self._lock:
+            futures = list(self._pending.values())
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for future in futures:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                future.exception(timeout=remaining)
+            except Exception:
+                return False
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "fsync": self.fsync,
+            "queued": self._queue.qsize(),
+            "pending": len(self._pending),
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "bytes_written": self.bytes_written,
+        }
+
+    def shutdown(self, timeout: Optional[float] = 30.0) -> None:
+        """Дописать очередь и остановить поток записи"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning(f"⚠️ File write queue did not drain in {timeout}s")
+        else:
+            logger.info(f"✅ File write queue drained: {self.written} files written")
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="profile-file-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._write_batch(batch)
+            except Exception as e:  # защита потока от непредвиденных ошибок
+                logger.error(f"❌ File write batch failed: {e}")
+                for job in batch:
+                    if not job.future.done():
+                        self._finish(job, e)
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[_WriteJob]) -> None:
+        # 1. Директории - один раз на пачку
+        broken_dirs: Dict[Path, Exception] = {}
+        for directory in {job.path.parent for job in batch}:
+            try:
+                directory.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                broken_dirs[directory] = e
+
+        # 2. Временные файлы рядом с целевыми (+ fsync данных)
+        written: List[_WriteJob] = []
+        for job in batch:
+            if job.path.parent in broken_dirs:
+                self._finish(job, broken_dirs[job.path.parent])
+                continue
+            job.temp_path = job.path.with_name(f".{job.path.name}.{os.getpid()}.wbq.tmp")
+            try:
+                with open(job.temp_path, "wb") as f:
+                    f.write(job.data)
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+                written.append(job)
+            except OSError as e:
+                self._discard_temp(job)
+                self._finish(job, e)
+
+        # 3. Атомарная замена
+        renamed_dirs: Set[Path] = set()
+        done: List[_WriteJob] = []
+        for job in written:
+            try:
+                os.replace(job.temp_path, job.path)
+                renamed_dirs.add(job.path.parent)
+                done.append(job)
+            except OSError as e:
+                self._discard_temp(job)
+                self._finish(job, e)
+
+        # 4. fsync директорий (rename становится durable) - один раз на директорию
+        if self.fsync:
+            for directory in renamed_dirs:
+                _fsync_directory(directory)
+
+        for job in done:
+            self.bytes_written += len(job.data)
+            self._finish(job, None)
+        self.batches += 1
+
+    def _finish(self, job: _WriteJob, error: Optional[BaseException]) -> None:
+        key = str(job.path)
+        with self._lock:
+            if self._pending.get(key) is job.future:
+                del self._pending[key]
+            if error is None:
+                self.written += 1
+            else:
+                self.failed += 1
+                self._failed[key] = str(error)
+                while len(self._failed) > FAILED_WRITES_KEEP:
+                    self._failed.popitem(last=False)
+        if error is None:
+            job.future.set_result(key)
+        else:
+            logger.error(f"❌ Failed to persist {job.path}: {error}")
+            job.future.set_exception(error)
+        job.data = b""  # содержимое больше не нужно
+
+    @staticmethod
+    def _discard_temp(job: _WriteJob) -> None:
+        try:
+            if job.temp_path is not None and job.temp_path.exists():
+                job.temp_path.unlink()
+        except OSError:
+            pass
+
+
+def _fsync_directory(directory: Path) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # платформы без fsync директорий (Windows)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# Глобальная очередь записи процесса (API и каждый backend.worker)
+file_write_queue = FileWriteQueue()
@@ -8,18 +8,40 @@ LLM клиент для интеграции с Gemini 2.5 Flash через Lang
 - Автоматический трейсинг и логирование
 """
 
+import asyncio
 import json
 import logging
 import time
 from datetime import datetime
+from types import SimpleNamespace
 from typing import Any, Dict, List, Optional
 
 import httpx
 from langfuse import Langfuse
 from langfuse.openai import AsyncOpenAI
+from openai import AsyncOpenAI as PlainAsyncOpenAI
 
 from .config import config
+from .continuation import build_continuation_messages, stitch_continuation
+from .json_repair import JSONParseResult, JSONRepairError, parse_llm_json
+from .llm_resilience import LLMResilienceManager, llm_resilience_manager
+from .metrics import LLM_REQUEST_SECONDS, LLM_REQUESTS_IN_FLIGHT, LLM_TOKENS_TOTAL
+from .profile_schema import load_profile_schema, unwrap_schema, validate_against_schema
+from .multi_position_generation import (
+    build_batch_messages,
+    build_batch_response_format,
+    merge_shared_variables,
+    split_batch_profiles,
+)
 from .prompt_manager import PromptManager
+from .sectional_generation import (
+    SectionPlan,
+    build_section_messages,
+    merge_sections,
+    plan_sections,
+)
+from .tracing import TraceEvent, TracingFacade, fetch_prompt_nonblocking, tracing
+from .usage_ledger import UsageLedger, UsageRecord, usage_ledger
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +60,9 @@ class LLMClient:
         langfuse_public_key: Optional[str] = None,
         langfuse_secret_key: Optional[str] = None,
         langfuse_host: Optional[str] = None,
+        resilience_manager: Optional[LLMResilienceManager] = None,
+        ledger: Optional[UsageLedger] = None,
+        tracing_facade: Optional[TracingFacade] = None,
     ):
         """
         Инициализация LLM клиента с Langfuse интеграцией.
@@ -48,6 +73,9 @@ class LLMClient:
             langfuse_public_key: Langfuse public key (или из config)
             langfuse_secret_key: Langfuse secret key (или из config)
             langfuse_host: Langfuse host URL (или из config)
+            resilience_manager: Retry/circuit breaker координатор (или общий на процесс)
+            ledger: Журнал использования LLM (или общий на процесс)
+            tracing_facade: Фасад фонового трейсинга (или общий на процесс)
         """
         # Получаем настройки из config если не переданы
         self.openrouter_api_key = openrouter_api_key or config.OPENROUTER_API_KEY
@@ -58,8 +86,15 @@ class LLMClient:
         if not self.openrouter_api_key:
             raise ValueError("OPENROUTER_API_KEY не найден в .env или параметрах")
 
+        # Фоновый трейсинг: в режиме null Langfuse не используется вовсе
+        self.tracing = tracing_facade or tracing
+        self.langfuse_instrumented = self.tracing.mode != "null"
+
         # Инициализируем Langfuse
-        if self.langfuse_public_key and self.langfuse_secret_key:
+        if not self.langfuse_instrumented:
+            logger.info("ℹ️ TRACING_MODE=null - Langfuse tracing and prompt fetch disabled")
+            self.langfuse = None
+        elif self.langfuse_public_key and self.langfuse_secret_key:
             self.langfuse = Langfuse(
                 public_key=self.langfuse_public_key,
                 secret_key=self.langfuse_secret_key,
@@ -71,6 +106,7 @@ class LLMClient:
                 "⚠️ Langfuse credentials not found in config - tracing disabled"
             )
             self.langfuse = None
+        self.tracing.attach_langfuse(self.langfuse)
 
         # 🔥 НОВАЯ ФИЧА: Инициализируем PromptManager для fallback и синхронизации
         self.prompt_manager = PromptManager(
@@ -80,10 +116,16 @@ class LLMClient:
         )
         logger.info("✅ PromptManager initialized with Langfuse sync")
 
+        # Повторы, backoff и circuit breaker управляются здесь, а не внутри SDK
+        self.resilience = resilience_manager or llm_resilience_manager
+        self.ledger = ledger or usage_ledger
+
         # Инициализируем AsyncOpenAI клиент через Langfuse для параллельной работы
-        self.client = AsyncOpenAI(
+        client_class = AsyncOpenAI if self.langfuse_instrumented else PlainAsyncOpenAI
+        self.client = client_class(
             api_key=self.openrouter_api_key,
             base_url=config.OPENROUTER_BASE_URL,
+            max_retries=0,  # Встроенные повторы SDK отключены - см. llm_resilience
             default_headers={
                 "HTTP-Referer": "https://a101-hr-profiles.local",
                 "X-Title": "A101 HR Profile Generator",
@@ -145,15 +187,24 @@ class LLMClient:
             **(trace_metadata or {}),
         }
 
+        # Параметры langfuse.openai обертки (в режиме TRACING_MODE=null клиент - обычный OpenAI)
+        instrumentation = (
+            {
+                "langfuse_prompt": prompt,  # 🔗 КЛЮЧЕВАЯ связка с промптом!
+                "metadata": enriched_metadata,
+            }
+            if self.langfuse_instrumented
+            else {}
+        )
+
         # Правильная связка промпта согласно документации 2025 года (асинхронный вызов)
         response = await self.client.chat.completions.create(
             model=model,
             messages=messages,
             temperature=temperature,
             max_tokens=max_tokens,
-            response_format=response_format,
-            langfuse_prompt=prompt,  # 🔗 КЛЮЧЕВАЯ связка с промптом!
-            metadata=enriched_metadata,
+            **({"response_format": response_format} if response_format else {}),
+            **instrumentation,
         )
 
         # Дополнительное обогащение metadata после получения ответа
@@ -224,29 +275,218 @@ class LLMClient:
             except Exception as e:
                 logger.warning(f"⚠️ Failed to extract detailed token info: {e}")
 
-            # Обновляем generation с обогащенными метаданными (если возможно)
+            # Обогащенные метаданные отправляются в фоне - генерация не ждет Langfuse
+            self._emit_trace_event(
+                "llm_generation_metadata",
+                success=True,
+                metadata=post_metadata,
+                usage_details={
+                    "prompt_tokens": usage.prompt_tokens,
+                    "completion_tokens": usage.completion_tokens,
+                    "total_tokens": usage.total_tokens,
+                },
+            )
+
+        return response
+
+    async def _execute_llm_call(
+        self, model: str, call: Any, usage_fields: Dict[str, Any]
+    ) -> tuple[Any, int]:
+        """
+        Вызов модели через resilience координатор с записью в журнал использования.
+
+        Args:
+            model: Имя модели (ключ circuit breaker)
+            call: Фабрика корутины HTTP вызова
+            usage_fields: Поля записи журнала (промпт, подразделение, режим...)
+
+        Returns:
+            Tuple из (ответ модели, количество повторов)
+        """
+        call_start = time.time()
+        try:
+            with LLM_REQUESTS_IN_FLIGHT.track():
+                response, retries = await self.resilience.execute(model, call)
+        except asyncio.CancelledError:
+            LLM_REQUEST_SECONDS.observe(time.time() - call_start, model=model, outcome="cancelled")
+            # Генерация отменена: HTTP запрос к провайдеру прерван вместе с корутиной
+            self.ledger.record(
+                UsageRecord(
+                    model=model,
+                    latency_ms=round((time.time() - call_start) * 1000, 1),
+                    success=False,
+                    error_type="CancelledError",
+                    **usage_fields,
+                )
+            )
+            self._emit_trace_event(
+                "llm_call_cancelled",
+                success=False,
+                metadata={**usage_fields, "model": model},
+                status_message="Generation cancelled",
+            )
+            raise
+        except Exception as e:
+            LLM_REQUEST_SECONDS.observe(time.time() - call_start, model=model, outcome="error")
+            self.ledger.record(
+                UsageRecord(
+                    model=model,
+                    latency_ms=round((time.time() - call_start) * 1000, 1),
+                    success=False,
+                    error_type=type(e).__name__,
+                    **usage_fields,
+                )
+            )
+            self._emit_trace_event(
+                "llm_call_failed",
+                success=False,
+                metadata={**usage_fields, "model": model, "error_type": type(e).__name__},
+                status_message=str(e)[:500],
+            )
+            raise
+
+        record = UsageRecord.from_response(
+            response, model, time.time() - call_start, retries, **usage_fields
+        )
+        self.ledger.record(record)
+        LLM_REQUEST_SECONDS.observe(record.latency_ms / 1000, model=model, outcome="success")
+        for kind in ("prompt", "cached", "completion", "reasoning"):
+            tokens = getattr(record, f"{kind}_tokens")
+            if tokens:
+                LLM_TOKENS_TOTAL.inc(tokens, model=model, kind=kind)
+        return response, retries
+
+    async def _continue_truncated_response(
+        self,
+        response: Any,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        prompt_obj: Optional[Any],
+        trace_metadata: Dict[str, Any],
+        usage_fields: Dict[str, Any],
+    ) -> tuple[str, Optional[str], Any, Dict[str, Any]]:
+        """
+        Дозапрос продолжений, пока ответ обрывается по max_tokens (см. continuation).
+
+        Запросы-продолжения используют тот же префикс messages (кешируется провайдером)
+        и не передают response_format - модель дописывает текст, а не начинает объект заново.
+        При ошибке продолжения возвращается накопленный текст (его спасает json_repair).
+
+        Returns:
+            Tuple из (склеенный текст, итоговый finish_reason, суммарный usage,
+            {"continuations": N, "retries": M})
+        """
+        text = (response.choices[0].message.content if response.choices else None) or ""
+        finish_reason = response.choices[0].finish_reason if response.choices else None
+        usage = response.usage
+        totals = SimpleNamespace(
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+            total_tokens=usage.total_tokens if usage else 0,
+        )
+        meta = {"continuations": 0, "retries": 0}
+
+        while finish_reason == "length" and meta["continuations"] < config.LLM_MAX_CONTINUATIONS:
+            meta["continuations"] += 1
+            logger.warning(
+                f"✂️ Response truncated at max_tokens={max_tokens}, "
+                f"continuation {meta['continuations']}/{config.LLM_MAX_CONTINUATIONS}"
+            )
+            continuation_messages = build_continuation_messages(messages, text)
             try:
-                if self.langfuse:
-                    self.langfuse.update_current_generation(
-                        metadata=post_metadata,
-                        usage_details={
-                            "prompt_tokens": usage.prompt_tokens,
-                            "completion_tokens": usage.completion_tokens,
-                            "total_tokens": usage.total_tokens,
-                        },
-                    )
+                continuation, retries = await self._execute_llm_call(
+                    model,
+                    lambda msgs=continuation_messages: self._create_generation_with_prompt(
+                        prompt=prompt_obj,
+                        messages=msgs,
+                        model=model,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        response_format=None,
+                        trace_metadata={**trace_metadata, "continuation": meta["continuations"]},
+                    ),
+                    {**usage_fields, "generation_mode": f"{usage_fields['generation_mode']}+continuation"},
+                )
             except Exception as e:
-                # Логируем но не прерываем выполнение
-                logger.warning(f"⚠️ Failed to update generation metadata: {e}")
+                logger.error(f"❌ Continuation request failed, keeping partial response: {e}")
+                break
+
+            meta["retries"] += retries
+            continuation_text = (
+                continuation.choices[0].message.content if continuation.choices else None
+            ) or ""
+            text = stitch_continuation(text, continuation_text)
+            finish_reason = (
+                continuation.choices[0].finish_reason if continuation.choices else None
+            )
+            if continuation.usage:
+                totals.prompt_tokens += continuation.usage.prompt_tokens
+                totals.completion_tokens += continuation.usage.completion_tokens
+                totals.total_tokens += continuation.usage.total_tokens
 
-        return response
+        return text, finish_reason, totals, meta
+
+    def _emit_trace_event(
+        self,
+        name: str,
+        success: bool,
+        metadata: Dict[str, Any],
+        usage_details: Optional[Dict[str, int]] = None,
+        status_message: Optional[str] = None,
+    ) -> None:
+        """Постановка события трейсинга в фоновую очередь (не блокирует и не бросает)"""
+        if not self.tracing.enabled:
+            return
+        try:
+            trace_id = observation_id = None
+            if self.langfuse:
+                trace_id = self.langfuse.get_current_trace_id()
+                observation_id = self.langfuse.get_current_observation_id()
+            self.tracing.emit(
+                TraceEvent(
+                    name=name,
+                    success=success,
+                    metadata=metadata,
+                    usage_details=usage_details,
+                    trace_id=trace_id,
+                    parent_observation_id=observation_id,
+                    level="DEFAULT" if success else "ERROR",
+                    status_message=status_message,
+                )
+            )
+        except Exception as e:
+            logger.debug(f"Tracing event skipped: {e}")
 
-    def _get_prompt_and_config(
+    def _build_usage_fields(
+        self,
+        prompt_name: str,
+        prompt_obj: Optional[Any],
+        variables: Dict[str, Any],
+        generation_mode: str,
+        section: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Поля записи журнала использования для вызова модели"""
+        return {
+            "prompt_name": prompt_name,
+            "prompt_version": str(getattr(prompt_obj, "version", "local_fallback")),
+            "generation_mode": generation_mode,
+            "section": section,
+            "department": variables.get("department"),
+            "department_path": variables.get("department_path"),
+            "position": variables.get("position"),
+        }
+
+    async def _get_prompt_and_config(
         self, prompt_name: str
     ) -> tuple[Optional[Any], Dict[str, Any]]:
         """
         Получение промпта из Langfuse и конфигурации с fallback.
 
+        Запрос к Langfuse выполняется в отдельном потоке с таймаутом
+        TRACING_PROMPT_FETCH_TIMEOUT - медленный Langfuse не задерживает генерацию.
+
         Args:
             prompt_name: Имя промпта в Langfuse
 
@@ -255,23 +495,11 @@ class LLMClient:
         """
         prompt_obj = None
         if self.langfuse:
-            try:
-                prompt_obj = self.langfuse.get_prompt(prompt_name, label="production")
+            prompt_obj = await fetch_prompt_nonblocking(
+                self.langfuse, prompt_name, label="production"
+            )
+            if prompt_obj is not None:
                 logger.info(f"✅ Retrieved prompt from Langfuse directly: {prompt_name}")
-            except (httpx.HTTPError, ConnectionError, TimeoutError) as langfuse_error:
-                logger.warning(
-                    "Failed to get prompt from Langfuse",
-                    extra={
-                        "error": str(langfuse_error),
-                        "prompt_name": prompt_name,
-                        "error_type": type(langfuse_error).__name__
-                    }
-                )
-            except Exception as e:
-                logger.exception(
-                    "Unexpected error getting prompt from Langfuse",
-                    extra={"prompt_name": prompt_name}
-                )
 
         # Извлекаем конфигурацию с fallback через PromptManager
         config = self.prompt_manager.get_prompt_config(
@@ -361,6 +589,7 @@ class LLMClient:
         prompt_obj: Optional[Any],
         prompt_name: str,
         variables: Dict[str, Any],
+        retries: int = 0,
     ) -> Dict[str, Any]:
         """
         Построение успешного ответа генерации.
@@ -374,6 +603,7 @@ class LLMClient:
             prompt_obj: Объект промпта
             prompt_name: Имя промпта
             variables: Переменные генерации
+            retries: Количество повторов HTTP вызова
 
         Returns:
             Словарь с результатом генерации
@@ -413,6 +643,7 @@ class LLMClient:
                 "tracing_mode": "decorator_based",
                 "department": variables.get("department"),
                 "position": variables.get("position"),
+                "retries": retries,
             },
             "raw_response": generated_text,
         }
@@ -448,7 +679,7 @@ class LLMClient:
 
         try:
             # Получаем промпт и конфигурацию
-            prompt_obj, config = self._get_prompt_and_config(prompt_name)
+            prompt_obj, config = await self._get_prompt_and_config(prompt_name)
 
             model = config.get("model", "google/gemini-2.5-flash")
             temperature = config.get("temperature", 0.1)
@@ -467,18 +698,25 @@ class LLMClient:
                 prompt_name, prompt_obj, variables, user_id, session_id
             )
 
-            # Выполняем асинхронный запрос через правильную функцию с декоратором для связки промптов
+            # Выполняем асинхронный запрос через правильную функцию с декоратором для связки промптов.
+            # При транзиентных ошибках повторяется только HTTP вызов с теми же messages.
             try:
-                response = await self._create_generation_with_prompt(
-                    prompt=prompt_obj,  # Может быть None при fallback
-                    messages=messages,
-                    model=model,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    response_format=response_format,
-                    trace_metadata=trace_metadata,
+                response, retries = await self._execute_llm_call(
+                    model,
+                    lambda: self._create_generation_with_prompt(
+                        prompt=prompt_obj,  # Может быть None при fallback
+                        messages=messages,
+                        model=model,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        response_format=response_format,
+                        trace_metadata=trace_metadata,
+                    ),
+                    self._build_usage_fields(prompt_name, prompt_obj, variables, "single"),
+                )
+                logger.info(
+                    f"✅ Generation with prompt linking completed (retries: {retries})"
                 )
-                logger.info("✅ Generation with prompt linking completed")
             except httpx.HTTPStatusError as e:
                 logger.error(
                     "OpenAI API HTTP error",
@@ -521,87 +759,488 @@ class LLMClient:
                 )
                 raise
 
-            # Извлекаем ответ и парсим JSON
-            generated_text = response.choices[0].message.content
-            profile_json = self._extract_and_parse_json(generated_text)
+            # Извлекаем ответ (дописывая оборванный по max_tokens) и парсим JSON
+            generated_text, finish_reason, usage, continuation_meta = (
+                await self._continue_truncated_response(
+                    response,
+                    messages,
+                    model,
+                    temperature,
+                    max_tokens,
+                    prompt_obj,
+                    trace_metadata,
+                    self._build_usage_fields(prompt_name, prompt_obj, variables, "single"),
+                )
+            )
+            profile_json, parse_report = self._parse_json_with_report(
+                generated_text, response_format, finish_reason
+            )
 
             generation_time = time.time() - start_time
             logger.info(f"Langfuse generation completed in {generation_time:.2f}s")
 
             # Строим и возвращаем успешный ответ
-            return self._build_success_response(
+            result = self._build_success_response(
                 profile_json,
                 generated_text,
                 model,
                 generation_time,
-                response.usage,
+                usage,
                 prompt_obj,
                 prompt_name,
                 variables,
+                retries=retries + continuation_meta["retries"],
             )
+            result["metadata"]["finish_reason"] = finish_reason
+            if continuation_meta["continuations"]:
+                result["metadata"]["continuations"] = continuation_meta["continuations"]
+                if isinstance(response_format, dict) and "error" not in profile_json:
+                    result["metadata"]["schema_errors"] = validate_against_schema(
+                        profile_json, unwrap_schema(response_format)
+                    )
+            if parse_report and parse_report.repaired:
+                result["metadata"]["json_repair"] = parse_report.report()
+            return result
 
         except Exception as e:
             generation_time = time.time() - start_time
             logger.error(
                 f"Langfuse generation failed after {generation_time:.2f}s: {e}"
             )
+            return self._build_error_response(e, generation_time)
 
-            # Получаем trace_id даже при ошибке (если доступно)
-            try:
-                from langfuse.decorators import langfuse_context
+    def _build_error_response(
+        self, error: Exception, generation_time: float
+    ) -> Dict[str, Any]:
+        """
+        Построение ответа при неуспешной генерации.
 
-                trace_id = langfuse_context.get_current_trace_id()
-            except (ImportError, NameError):
-                trace_id = None
+        Args:
+            error: Исключение, прервавшее генерацию
+            generation_time: Время до ошибки
 
-            return {
-                "profile": None,
-                "metadata": {
-                    "model": "unknown",
-                    "generation_time": generation_time,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat(),
-                    "success": False,
-                    "langfuse_trace_id": trace_id,
-                },
-                "raw_response": None,
-            }
+        Returns:
+            Словарь с результатом генерации (profile=None)
+        """
+        # Получаем trace_id даже при ошибке (если доступно)
+        try:
+            from langfuse.decorators import langfuse_context
+
+            trace_id = langfuse_context.get_current_trace_id()
+        except (ImportError, NameError):
+            trace_id = None
+
+        return {
+            "profile": None,
+            "metadata": {
+                "model": "unknown",
+                "generation_time": generation_time,
+                "error": str(error),
+                "timestamp": datetime.now().isoformat(),
+                "success": False,
+                "langfuse_trace_id": trace_id,
+            },
+            "raw_response": None,
+        }
+
+    async def generate_profile_sectional(
+        self,
+        prompt_name: str,
+        variables: Dict[str, Any],
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        @doc Секционная генерация профиля параллельными запросами
+
+        Схема structured output разбивается на независимые группы секций
+        (см. sectional_generation.SECTION_GROUPS). Все запросы используют
+        одинаковый префикс messages, выполняются конкурентно, а результаты
+        объединяются и валидируются по templates/job_profile_schema.json.
+
+        Args:
+            prompt_name: Имя промпта в Langfuse
+            variables: Переменные для подстановки в промпт
+            user_id: ID пользователя для трейсинга
+            session_id: ID сессии для трейсинга
+
+        Returns:
+            Словарь с результатом генерации (формат как у generate_profile_from_langfuse)
+
+        Examples:
+            python>
+            result = await client.generate_profile_sectional(
+                prompt_name="a101-hr-profile-gemini-v3-simple",
+                variables=variables,
+            )
+            print(result["metadata"]["sections"])
+        """
+        start_time = time.time()
+
+        try:
+            prompt_obj, config = await self._get_prompt_and_config(prompt_name)
+
+            model = config.get("model", "google/gemini-2.5-flash")
+            temperature = config.get("temperature", 0.1)
+            max_tokens = config.get("max_tokens", 4000)
+            response_format = config.get("response_format")
+
+            # Контекст компилируется один раз и служит общим префиксом всех секций
+            messages = self._compile_prompt_to_messages(prompt_obj, variables)
+            trace_metadata = self._build_trace_metadata(
+                prompt_name, prompt_obj, variables, user_id, session_id
+            )
+            sections = plan_sections(response_format)
+            logger.info(
+                f"Starting sectional generation: {len(sections)} sections, model: {model}"
+            )
+
+            section_outcomes = await asyncio.gather(
+                *[
+                    self._generate_section(
+                        section,
+                        messages,
+                        prompt_obj,
+                        model,
+                        temperature,
+                        max_tokens,
+                        trace_metadata,
+                        self._build_usage_fields(
+                            prompt_name, prompt_obj, variables, "sectional", section.name
+                        ),
+                    )
+                    for section in sections
+                ]
+            )
+
+            section_results: Dict[str, Dict[str, Any]] = {}
+            sections_metadata: Dict[str, Dict[str, Any]] = {}
+            failed_sections: List[str] = []
+            for section, (profile_part, section_meta) in zip(sections, section_outcomes):
+                sections_metadata[section.name] = section_meta
+                if not profile_part or "error" in profile_part:
+                    failed_sections.append(section.name)
+                else:
+                    section_results[section.name] = profile_part
+
+            if failed_sections:
+                raise ValueError(
+                    f"Sectional generation failed for sections: {', '.join(failed_sections)}"
+                )
+
+            profile_json = merge_sections(section_results, sections)
+            schema_errors = validate_against_schema(profile_json, load_profile_schema())
+            if schema_errors:
+                logger.warning(
+                    f"⚠️ Merged profile has {len(schema_errors)} schema deviations",
+                    extra={"schema_errors": schema_errors[:10]},
+                )
+
+            generation_time = time.time() - start_time
+            logger.info(f"Sectional generation completed in {generation_time:.2f}s")
+
+            usage = SimpleNamespace(
+                prompt_tokens=sum(m["tokens"]["input"] for m in sections_metadata.values()),
+                completion_tokens=sum(m["tokens"]["output"] for m in sections_metadata.values()),
+                total_tokens=sum(m["tokens"]["total"] for m in sections_metadata.values()),
+            )
+            result = self._build_success_response(
+                profile_json,
+                json.dumps(section_results, ensure_ascii=False),
+                model,
+                generation_time,
+                usage,
+                prompt_obj,
+                prompt_name,
+                variables,
+                retries=sum(m["retries"] for m in sections_metadata.values()),
+            )
+            result["metadata"]["generation_mode"] = "sectional"
+            result["metadata"]["sections"] = sections_metadata
+            result["metadata"]["schema_errors"] = schema_errors
+            return result
+
+        except Exception as e:
+            generation_time = time.time() - start_time
+            logger.error(f"Sectional generation failed after {generation_time:.2f}s: {e}")
+            return self._build_error_response(e, generation_time)
+
+    async def generate_profiles_batch(
+        self,
+        prompt_name: str,
+        variables: Dict[str, Any],
+        positions_context: List[Dict[str, Any]],
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        @doc Генерация профилей нескольких должностей подразделения одним запросом
+
+        Общий контекст (карта компании, OrgStructure, KPI, ИТ-системы) отправляется
+        один раз, модель возвращает {"profiles": [...]} - по профилю на должность.
+        Каждый профиль валидируется по templates/job_profile_schema.json отдельно.
+
+        Args:
+            prompt_name: Имя промпта в Langfuse
+            variables: Общие переменные подразделения (см. DataLoader.prepare_unit_variables)
+            positions_context: Позиционные переменные каждой должности пакета
+            user_id: ID пользователя для трейсинга
+            session_id: ID сессии для трейсинга
+
+        Returns:
+            Словарь с "profiles" (список по порядку positions_context, None - профиль
+            не получен), "schema_errors" по должностям и общими "metadata"
+
+        Examples:
+            python>
+            variables, positions_context = data_loader.prepare_unit_variables(dept, positions)
+            result = await client.generate_profiles_batch(
+                prompt_name="a101-hr-profile-gemini-v3-simple",
+                variables=variables,
+                positions_context=positions_context,
+            )
+        """
+        start_time = time.time()
+        positions = [context["position"] for context in positions_context]
 
-    def _extract_and_parse_json(self, generated_text: str) -> Dict[str, Any]:
-        """Извлечение и парсинг JSON из ответа LLM"""
         try:
-            # Ищем JSON в тексте (между ``` или в чистом виде)
-            json_text = generated_text.strip()
+            prompt_obj, config_data = await self._get_prompt_and_config(prompt_name)
 
-            # Убираем markdown code blocks если есть
-            if json_text.startswith("```"):
-                json_text = json_text.split("```")[1]
-                if json_text.startswith("json"):
-                    json_text = json_text[4:]
-                json_text = json_text.strip()
+            model = config_data.get("model", "google/gemini-2.5-flash")
+            temperature = config_data.get("temperature", 0.1)
+            max_tokens = min(
+                config_data.get("max_tokens", 4000) * len(positions),
+                config.MULTI_POSITION_MAX_TOKENS,
+            )
+            response_format = build_batch_response_format(
+                config_data.get("response_format"), len(positions)
+            )
 
-            if json_text.endswith("```"):
-                json_text = json_text[:-3].strip()
+            shared_variables = merge_shared_variables(variables, positions_context)
+            messages = build_batch_messages(
+                self._compile_prompt_to_messages(prompt_obj, shared_variables),
+                positions_context,
+            )
+            trace_metadata = self._build_trace_metadata(
+                prompt_name, prompt_obj, shared_variables, user_id, session_id
+            )
+            trace_metadata["batch_positions"] = positions
+            logger.info(
+                f"Starting multi-position generation: {len(positions)} positions, model: {model}"
+            )
 
-            # Парсим JSON
-            profile_data = json.loads(json_text)
+            usage_fields = self._build_usage_fields(
+                prompt_name, prompt_obj, shared_variables, "multi_position"
+            )
+            response, retries = await self._execute_llm_call(
+                model,
+                lambda: self._create_generation_with_prompt(
+                    prompt=prompt_obj,
+                    messages=messages,
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    response_format=response_format,
+                    trace_metadata=trace_metadata,
+                ),
+                usage_fields,
+            )
+
+            generated_text, finish_reason, usage, continuation_meta = (
+                await self._continue_truncated_response(
+                    response,
+                    messages,
+                    model,
+                    temperature,
+                    max_tokens,
+                    prompt_obj,
+                    trace_metadata,
+                    usage_fields,
+                )
+            )
+            batch_json = self._extract_and_parse_json(
+                generated_text, response_format, finish_reason
+            )
+            if "error" in batch_json:
+                raise ValueError(batch_json.get("parse_error", batch_json["error"]))
+
+            profiles = split_batch_profiles(batch_json, positions)
+            profile_schema = load_profile_schema()
+            schema_errors = [
+                validate_against_schema(profile, profile_schema) if profile else []
+                for profile in profiles
+            ]
+
+            generation_time = time.time() - start_time
+            logger.info(
+                f"Multi-position generation completed in {generation_time:.2f}s: "
+                f"{sum(1 for p in profiles if p)}/{len(positions)} profiles"
+            )
+
+            result = self._build_success_response(
+                batch_json,
+                generated_text,
+                model,
+                generation_time,
+                usage,
+                prompt_obj,
+                prompt_name,
+                shared_variables,
+                retries=retries + continuation_meta["retries"],
+            )
+            result.pop("profile")
+            result["profiles"] = profiles
+            result["schema_errors"] = schema_errors
+            result["metadata"]["generation_mode"] = "multi_position"
+            result["metadata"]["batch_positions"] = positions
+            result["metadata"]["finish_reason"] = finish_reason
+            result["metadata"]["continuations"] = continuation_meta["continuations"]
+            return result
 
-            if not isinstance(profile_data, dict):
-                raise ValueError("Response is not a JSON object")
+        except Exception as e:
+            generation_time = time.time() - start_time
+            logger.error(
+                f"Multi-position generation failed after {generation_time:.2f}s: {e}"
+            )
+            result = self._build_error_response(e, generation_time)
+            result.pop("profile")
+            result["profiles"] = [None] * len(positions)
+            result["schema_errors"] = [[] for _ in positions]
+            return result
+
+    async def _generate_section(
+        self,
+        section: SectionPlan,
+        messages: List[Dict[str, str]],
+        prompt_obj: Optional[Any],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        trace_metadata: Dict[str, Any],
+        usage_fields: Dict[str, Any],
+    ) -> tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Генерация одной группы секций.
+
+        Returns:
+            Tuple из (распарсенная часть профиля или None, метаданные секции)
+        """
+        section_start = time.time()
+        section_messages = build_section_messages(messages, section)
+        section_meta: Dict[str, Any] = {
+            "properties": section.properties,
+            "tokens": {"input": 0, "output": 0, "total": 0},
+            "retries": 0,
+            "finish_reason": None,
+        }
 
+        try:
+            response, retries = await self._execute_llm_call(
+                model,
+                lambda: self._create_generation_with_prompt(
+                    prompt=prompt_obj,
+                    messages=section_messages,
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    response_format=section.response_format,
+                    trace_metadata={**trace_metadata, "section": section.name},
+                ),
+                usage_fields,
+            )
+        except Exception as e:
+            logger.error(f"❌ Section '{section.name}' failed: {e}")
+            section_meta["error"] = str(e)
+            section_meta["duration"] = time.time() - section_start
+            return None, section_meta
+
+        # Оборванную по max_tokens секцию (например, careerogram) дописываем продолжениями
+        generated_text, finish_reason, usage, continuation_meta = (
+            await self._continue_truncated_response(
+                response,
+                section_messages,
+                model,
+                temperature,
+                max_tokens,
+                prompt_obj,
+                {**trace_metadata, "section": section.name},
+                usage_fields,
+            )
+        )
+        section_meta["retries"] = retries + continuation_meta["retries"]
+        section_meta["finish_reason"] = finish_reason
+        section_meta["tokens"] = {
+            "input": usage.prompt_tokens,
+            "output": usage.completion_tokens,
+            "total": usage.total_tokens,
+        }
+        if continuation_meta["continuations"]:
+            section_meta["continuations"] = continuation_meta["continuations"]
+
+        if finish_reason == "length":
+            # Частичные данные секции не сливаются в профиль
+            logger.error(
+                f"❌ Section '{section.name}' is still truncated after "
+                f"{continuation_meta['continuations']} continuations"
+            )
+            section_meta["error"] = f"Section truncated at max_tokens={max_tokens}"
+            section_meta["duration"] = time.time() - section_start
+            return None, section_meta
+
+        profile_part, parse_report = self._parse_json_with_report(
+            generated_text,
+            section.response_format,
+            finish_reason,
+        )
+        section_meta["duration"] = time.time() - section_start
+        if "error" in profile_part:
+            section_meta["error"] = profile_part.get("parse_error")
+        elif parse_report and parse_report.repaired:
+            section_meta["json_repair"] = parse_report.report()
+        return profile_part, section_meta
+
+    def _extract_and_parse_json(
+        self,
+        generated_text: str,
+        response_format: Optional[Dict[str, Any]] = None,
+        finish_reason: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Извлечение и парсинг JSON из ответа LLM"""
+        return self._parse_json_with_report(generated_text, response_format, finish_reason)[0]
+
+    def _parse_json_with_report(
+        self,
+        generated_text: str,
+        response_format: Optional[Dict[str, Any]] = None,
+        finish_reason: Optional[str] = None,
+    ) -> tuple[Dict[str, Any], Optional[JSONParseResult]]:
+        """
+        Извлечение JSON с восстановлением (см. json_repair) и отчетом о спасенных полях.
+
+        Args:
+            generated_text: Сырой текст ответа модели
+            response_format: Запрошенный response_format (схема для отчета о полях)
+            finish_reason: finish_reason ответа
+
+        Returns:
+            Tuple из (данные или fallback структура с "error", отчет или None)
+        """
+        schema = unwrap_schema(response_format) if isinstance(response_format, dict) else None
+        try:
+            result = parse_llm_json(generated_text, schema=schema, finish_reason=finish_reason)
             logger.info("JSON successfully parsed from LLM response")
-            return profile_data
+            return result.data, result
 
-        except json.JSONDecodeError as e:
+        except JSONRepairError as e:
             logger.error(f"Failed to parse JSON from LLM response: {e}")
-            logger.debug(f"Raw response text: {generated_text[:500]}...")
+            logger.debug(f"Raw response text: {(generated_text or '')[:500]}...")
 
             # Возвращаем fallback структуру
             return {
                 "error": "Failed to parse JSON from LLM response",
                 "raw_response": generated_text,
                 "parse_error": str(e),
-            }
+            }, None
 
         except Exception as e:
             logger.error(f"Unexpected error while parsing response: {e}")
@@ -609,7 +1248,7 @@ class LLMClient:
                 "error": "Unexpected error during response parsing",
                 "raw_response": generated_text,
                 "parse_error": str(e),
-            }
+            }, None
 
     def validate_profile_structure(self, profile: Dict[str, Any]) -> Dict[str, Any]:
         """
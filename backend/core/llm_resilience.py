@@ -0,0 +1,440 @@
+"""
+@doc
+Устойчивость LLM вызовов на стороне backend.
+
+Повторяет вызов к OpenRouter только на уровне одного HTTP запроса -
+подготовленные messages (контекст ~100K токенов) переиспользуются как есть,
+поэтому транзиентная ошибка провайдера стоит один дополнительный HTTP вызов,
+а не полный перезапуск pipeline генерации.
+
+Компоненты:
+- LLMRetryPolicy: jittered exponential backoff (full jitter) с учетом Retry-After
+- ModelCircuitBreaker: circuit breaker на каждую модель (CLOSED/OPEN/HALF_OPEN)
+- RetryBudget: ограничение доли повторов от общего трафика в скользящем окне
+- LLMResilienceManager: координатор, через который LLMClient выполняет вызовы
+
+Examples:
+  python> manager = LLMResilienceManager()
+  python> response, retries = await manager.execute(
+  ...     "google/gemini-2.5-flash", lambda: client.chat.completions.create(...)
+  ... )
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+import httpx
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import openai
+
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+# HTTP статусы, при которых повтор запроса имеет смысл
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMCircuitOpenError(Exception):
+    """Вызов модели заблокирован открытым circuit breaker"""
+
+    def __init__(self, model: str, retry_in_seconds: float):
+        self.model = model
+        self.retry_in_seconds = retry_in_seconds
+        super().__init__(
+            f"Circuit breaker for model '{model}' is OPEN, "
+            f"retry in {retry_in_seconds:.0f}s"
+        )
+
+
+class CircuitState(Enum):
+    """Состояния circuit breaker"""
+
+    CLOSED = "CLOSED"  # Нормальная работа
+    OPEN = "OPEN"  # Вызовы блокируются
+    HALF_OPEN = "HALF_OPEN"  # Пробный вызов после таймаута
+
+
+@dataclass
+class LLMRetryPolicy:
+    """Политика повторов с экспоненциальной задержкой и full jitter"""
+
+    max_retries: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    backoff_factor: float = 2.0
+    jitter: bool = True
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Задержка перед повтором номер attempt (нумерация с 0).
+
+        Retry-After от провайдера имеет приоритет, но ограничен max_delay.
+        """
+        if retry_after is not None and retry_after >= 0:
+            return min(retry_after, self.max_delay)
+
+        delay = min(self.max_delay, self.base_delay * (self.backoff_factor**attempt))
+        if self.jitter:
+            # Full jitter разносит повторы параллельных генераций во времени
+            delay = random.uniform(0, delay)
+        return delay
+
+
+@dataclass
+class ModelCircuitConfig:
+    """Конфигурация circuit breaker для одной модели"""
+
+    failure_threshold: int = 5
+    reset_timeout_seconds: float = 60.0
+    failures_window_seconds: float = 120.0
+
+
+class ModelCircuitBreaker:
+    """
+    @doc
+    Circuit breaker для одной LLM модели.
+
+    Считает только ошибки провайдера (5xx, 429, таймауты, обрывы соединения).
+    Ошибки запроса (400, 401) не открывают цепь - они не говорят о здоровье модели.
+
+    Examples:
+      python> breaker = ModelCircuitBreaker("google/gemini-2.5-flash")
+      python> breaker.before_call()  # raises LLMCircuitOpenError when OPEN
+      python> breaker.record_success()
+    """
+
+    def __init__(self, model: str, circuit_config: Optional[ModelCircuitConfig] = None):
+        self.model = model
+        self.config = circuit_config or ModelCircuitConfig()
+        self.state = CircuitState.CLOSED
+        self.opened_at: Optional[float] = None
+        self.failure_timestamps: Deque[float] = deque()
+        self._half_open_probe_in_flight = False
+        self._lock = threading.Lock()
+
+        # Статистика
+        self.total_failures = 0
+        self.total_successes = 0
+        self.times_opened = 0
+
+    def before_call(self) -> None:
+        """Проверка перед вызовом. Переводит OPEN -> HALF_OPEN по таймауту."""
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                return
+
+            now = time.monotonic()
+            elapsed = now - (self.opened_at or now)
+
+            if self.state == CircuitState.OPEN:
+                if elapsed < self.config.reset_timeout_seconds:
+                    raise LLMCircuitOpenError(
+                        self.model, self.config.reset_timeout_seconds - elapsed
+                    )
+                self.state = CircuitState.HALF_OPEN
+                self._half_open_probe_in_flight = False
+                logger.info(f"🔌 Circuit breaker '{self.model}' moving to HALF_OPEN")
+
+            # HALF_OPEN: пропускаем только один пробный вызов
+            if self._half_open_probe_in_flight:
+                raise LLMCircuitOpenError(self.model, 1.0)
+            self._half_open_probe_in_flight = True
+
+    def record_success(self) -> None:
+        """Успешный вызов закрывает цепь"""
+        with self._lock:
+            self.total_successes += 1
+            if self.state != CircuitState.CLOSED:
+                logger.info(f"✅ Circuit breaker '{self.model}' RESET - state: CLOSED")
+            self.state = CircuitState.CLOSED
+            self.opened_at = None
+            self._half_open_probe_in_flight = False
+            self.failure_timestamps.clear()
+
+    def record_failure(self) -> None:
+        """Ошибка провайдера; в HALF_OPEN сразу снова открывает цепь"""
+        with self._lock:
+            now = time.monotonic()
+            self.total_failures += 1
+            self.failure_timestamps.append(now)
+
+            cutoff = now - self.config.failures_window_seconds
+            while self.failure_timestamps and self.failure_timestamps[0] < cutoff:
+                self.failure_timestamps.popleft()
+
+            if self.state == CircuitState.HALF_OPEN or (
+                self.state == CircuitState.CLOSED
+                and len(self.failure_timestamps) >= self.config.failure_threshold
+            ):
+                self.state = CircuitState.OPEN
+                self.opened_at = now
+                self.times_opened += 1
+                self._half_open_probe_in_flight = False
+                logger.warning(f"⚠️ Circuit breaker '{self.model}' TRIPPED - state: OPEN")
+
+    def release_probe(self) -> None:
+        """Освобождение пробного слота HALF_OPEN без вердикта (ошибка запроса)"""
+        with self._lock:
+            self._half_open_probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика circuit breaker"""
+        return {
+            "model": self.model,
+            "state": self.state.value,
+            "failures_in_window": len(self.failure_timestamps),
+            "total_failures": self.total_failures,
+            "total_successes": self.total_successes,
+            "times_opened": self.times_opened,
+        }
+
+
+class RetryBudget:
+    """
+    @doc
+    Retry budget: повторы не должны превышать долю ratio от всех запросов в окне.
+
+    Защищает провайдера от retry storm при массовом сбое - когда бюджет исчерпан,
+    ошибки возвращаются сразу. min_retries гарантирует возможность повтора
+    при низком трафике (одиночная генерация из UI).
+
+    Examples:
+      python> budget = RetryBudget(ratio=0.2, min_retries=3, window_seconds=60)
+      python> budget.record_request()
+      python> if budget.try_acquire_retry(): ...
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 3, window_seconds: float = 60.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window_seconds = window_seconds
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+        self._lock = threading.Lock()
+        self.exhausted_count = 0
+
+    def _evict(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        for timestamps in (self._requests, self._retries):
+            while timestamps and timestamps[0] < cutoff:
+                timestamps.popleft()
+
+    def record_request(self) -> None:
+        """Учет первичного запроса (не повтора)"""
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            self._requests.append(now)
+
+    def try_acquire_retry(self) -> bool:
+        """Попытка взять повтор из бюджета"""
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            allowed = max(self.min_retries, int(len(self._requests) * self.ratio))
+            if len(self._retries) >= allowed:
+                self.exhausted_count += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика бюджета в текущем окне"""
+        with self._lock:
+            self._evict(time.monotonic())
+            return {
+                "requests_in_window": len(self._requests),
+                "retries_in_window": len(self._retries),
+                "ratio": self.ratio,
+                "exhausted_count": self.exhausted_count,
+            }
+
+
+def _extract_status_code(error: BaseException) -> Optional[int]:
+    """HTTP статус из ошибки openai SDK или httpx"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _extract_retry_after(error: BaseException) -> Optional[float]:
+    """Заголовок Retry-After (в секундах) из ответа провайдера"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Является ли ошибка транзиентной (имеет смысл повторить тот же запрос).
+
+    Args:
+        error: Исключение из openai SDK или httpx
+
+    Returns:
+        True для таймаутов, обрывов соединения, 429 и 5xx
+    """
+    if isinstance(
+        error,
+        (httpx.TimeoutException, httpx.ConnectError, httpx.RemoteProtocolError, httpx.ReadError),
+    ):
+        return True
+
+    if OPENAI_AVAILABLE and isinstance(error, openai.APIConnectionError):
+        # APITimeoutError наследуется от APIConnectionError
+        return True
+
+    status = _extract_status_code(error)
+    return status in RETRYABLE_STATUS_CODES
+
+
+class LLMResilienceManager:
+    """
+    @doc
+    Координатор retry policy, retry budget и circuit breakers по моделям.
+
+    Один экземпляр на процесс (llm_resilience_manager): ProfileGenerator
+    создается на каждую задачу, а состояние circuit breaker должно переживать
+    отдельные генерации.
+
+    Examples:
+      python> response, retries = await llm_resilience_manager.execute(
+      ...     model, lambda: self._create_generation_with_prompt(...)
+      ... )
+    """
+
+    def __init__(
+        self,
+        retry_policy: Optional[LLMRetryPolicy] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        circuit_config: Optional[ModelCircuitConfig] = None,
+    ):
+        self.retry_policy = retry_policy or LLMRetryPolicy(
+            max_retries=config.LLM_MAX_RETRIES,
+            base_delay=config.LLM_RETRY_BASE_DELAY,
+            max_delay=config.LLM_RETRY_MAX_DELAY,
+        )
+        self.retry_budget = retry_budget or RetryBudget(
+            ratio=config.LLM_RETRY_BUDGET_RATIO,
+            min_retries=config.LLM_RETRY_BUDGET_MIN_RETRIES,
+        )
+        self.circuit_config = circuit_config or ModelCircuitConfig(
+            failure_threshold=config.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout_seconds=config.LLM_CIRCUIT_RESET_TIMEOUT,
+        )
+        self._breakers: Dict[str, ModelCircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
+
+    def get_breaker(self, model: str) -> ModelCircuitBreaker:
+        """Circuit breaker для модели (создается лениво)"""
+        with self._breakers_lock:
+            if model not in self._breakers:
+                self._breakers[model] = ModelCircuitBreaker(model, self.circuit_config)
+            return self._breakers[model]
+
+    async def execute(
+        self, model: str, call: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, int]:
+        """
+        Выполнение LLM вызова с повторами.
+
+        call должен быть идемпотентным: он вызывается повторно с теми же
+        подготовленными messages, без пересборки контекста.
+
+        Args:
+            model: Имя модели (ключ circuit breaker)
+            call: Фабрика корутины одного HTTP вызова
+
+        Returns:
+            Tuple из (результат вызова, количество выполненных повторов)
+
+        Raises:
+            LLMCircuitOpenError: Если цепь модели открыта
+            Exception: Исходная ошибка, если она не транзиентная или повторы исчерпаны
+        """
+        breaker = self.get_breaker(model)
+        self.retry_budget.record_request()
+        attempt = 0
+
+        while True:
+            breaker.before_call()
+            try:
+                result = await call()
+            except asyncio.CancelledError:
+                breaker.release_probe()
+                raise
+            except Exception as error:
+                if not is_retryable_error(error):
+                    breaker.release_probe()
+                    raise
+
+                breaker.record_failure()
+
+                if attempt >= self.retry_policy.max_retries:
+                    logger.error(
+                        f"❌ LLM call failed after {attempt} retries",
+                        extra={"model": model, "error_type": type(error).__name__},
+                    )
+                    raise
+
+                if not self.retry_budget.try_acquire_retry():
+                    logger.warning(
+                        "⚠️ Retry budget exhausted, failing fast",
+                        extra={"model": model, "error_type": type(error).__name__},
+                    )
+                    raise
+
+                delay = self.retry_policy.compute_delay(
+                    attempt, _extract_retry_after(error)
+                )
+                logger.warning(
+                    f"🔁 Transient LLM error ({type(error).__name__}, "
+                    f"status={_extract_status_code(error)}), "
+                    f"retry {attempt + 1}/{self.retry_policy.max_retries} in {delay:.2f}s",
+                    extra={"model": model},
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            breaker.record_success()
+            return result, attempt
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика для мониторинга"""
+        with self._breakers_lock:
+            breakers = {name: b.get_stats() for name, b in self._breakers.items()}
+        return {
+            "retry_policy": {
+                "max_retries": self.retry_policy.max_retries,
+                "base_delay": self.retry_policy.base_delay,
+                "max_delay": self.retry_policy.max_delay,
+            },
+            "retry_budget": self.retry_budget.get_stats(),
+            "circuit_breakers": breakers,
+        }
+
+
+# Глобальный экземпляр (состояние circuit breakers общее для всех LLMClient процесса)
+llm_resilience_manager = LLMResilienceManager()
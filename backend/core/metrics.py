@@ -0,0 +1,332 @@
+"""
+@doc
+Метрики конвейера генерации в формате Prometheus (без внешних зависимостей).
+
+Гистограммы длительности стадий (подготовка данных, LLM, валидация,
+рендеринг, сохранение в БД), ожидание в очереди, gauges выполняемых задач и
+запросов к LLM, счетчики токенов. Экспортируются через GET /metrics.
+
+Стадии одной генерации дополнительно собираются в разбивку задачи
+(track_stages), которая попадает в metadata.generation.stages и в статус
+задачи. Контекст передается через contextvars, поэтому стадии параллельных
+корутин (sectional, пакеты) суммируются в разбивку той же задачи.
+
+Метрики хранятся в памяти процесса: у API и каждого процесса backend.worker
+свой /metrics (собираются Prometheus по отдельности).
+
+Examples:
+  python> with track_stages() as stages:
+  python>     with stage("llm"):
+  python>         await llm_client.generate_profile_from_langfuse(...)
+  python> stages  # {"llm": 12.34}
+  python> metrics_registry.render()  # текст для /metrics
+"""
+
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Границы гистограмм (секунды): от быстрых стадий до длинных LLM вызовов
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(header + self.samples())
+
+
+class Counter(_Metric):
+    """Монотонный счетчик"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]  # метрика без меток видна со значением 0 до первого изменения
+        return [
+            f"{self.name}{_labels_text(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """Текущее значение (выполняемые задачи, запросы в полете)"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """+1 на время выполнения блока"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]  # метрика без меток видна со значением 0 до первого изменения
+        return [
+            f"{self.name}{_labels_text(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Распределение длительностей (кумулятивные bucket-ы, sum, count)"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # key -> (счетчики по bucket-ам (не кумулятивные), сумма)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _labels_text(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels_text(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    @doc Реестр метрик процесса и рендеринг в text exposition format Prometheus.
+
+    Examples:
+        python>
+        registry = MetricsRegistry()
+        requests = registry.counter("app_requests_total", "Requests", ["status"])
+        requests.inc(status="ok")
+        registry.render()
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# Глобальный реестр процесса
+metrics_registry = MetricsRegistry()
+
+STAGE_SECONDS = metrics_registry.histogram(
+    "profile_generation_stage_seconds",
+    "Duration of profile generation pipeline stages",
+    ["stage"],
+)
+QUEUE_WAIT_SECONDS = metrics_registry.histogram(
+    "generation_queue_wait_seconds",
+    "Time a generation task waited in the queue before a worker claimed it",
+    ["priority_class"],
+)
+TASK_SECONDS = metrics_registry.histogram(
+    "generation_task_seconds",
+    "Total execution time of generation tasks (claim to completion)",
+    ["status"],
+)
+TASKS_TOTAL = metrics_registry.counter(
+    "generation_tasks_total", "Finished generation tasks", ["status"]
+)
+TASKS_IN_FLIGHT = metrics_registry.gauge(
+    "generation_tasks_in_flight", "Generation tasks currently executed by this process"
+)
+LLM_REQUESTS_IN_FLIGHT = metrics_registry.gauge(
+    "llm_requests_in_flight", "LLM requests currently awaiting a response"
+)
+LLM_REQUEST_SECONDS = metrics_registry.histogram(
+    "llm_request_seconds", "LLM request latency including retries", ["model", "outcome"]
+)
+LLM_TOKENS_TOTAL = metrics_registry.counter(
+    "llm_tokens_total", "LLM tokens by model and kind", ["model", "kind"]
+)
+QUEUE_TASKS = metrics_registry.gauge(
+    "generation_queue_tasks", "Generation tasks in the shared queue by status", ["status"]
+)
+RENDER_EXECUTOR_TASKS = metrics_registry.gauge(
+    "render_executor_tasks", "Render executor tasks in the pool or waiting for a slot", ["state"]
+)
+
+
+def refresh_runtime_gauges(queue_counts: Dict[str, int], render_stats: Dict[str, Any]) -> None:
+    """Обновление gauges, которые считываются в момент запроса /metrics"""
+    for status in ("queued", "processing", "completed", "failed", "cancelled"):
+        QUEUE_TASKS.set(queue_counts.get(status, 0), status=status)
+    RENDER_EXECUTOR_TASKS.set(render_stats.get("in_flight", 0), state="in_flight")
+    RENDER_EXECUTOR_TASKS.set(render_stats.get("waiting", 0), state="waiting")
+
+
+# Разбивка стадий текущей генерации (stage -> секунды)
+_current_stages: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "generation_stages", default=None
+)
+
+
+@contextmanager
+def track_stages(stages: Optional[Dict[str, float]] = None) -> Iterator[Dict[str, float]]:
+    """
+    Сбор разбивки стадий для одной генерации.
+
+    Без аргумента вложенный вызов использует разбивку внешнего (стадии API и
+    ProfileGenerator попадают в одну задачу). Явно переданный словарь всегда
+    становится текущей разбивкой (отдельные должности одного пакета).
+    """
+    current = _current_stages.get()
+    if stages is None and current is not None:
+        yield current
+        return
+    stages = {} if stages is None else stages
+    token = _current_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _current_stages.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Замер стадии: гистограмма STAGE_SECONDS и разбивка текущей генерации"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=name)
+    stages = _current_stages.get()
+    if stages is not None:
+        stages[name] = round(stages.get(name, 0.0) + seconds, 4)
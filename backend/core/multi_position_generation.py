@@ -0,0 +1,201 @@
+"""
+@doc
+Пакетная генерация: несколько должностей одного подразделения в одном запросе.
+
+Должности одного подразделения ("Специалист", "Главный специалист",
+"Руководитель управления") используют один и тот же тяжелый контекст:
+карту компании, OrgStructure, KPI и ИТ-системы (~100K токенов).
+Вместо N запросов отправляется один: общий контекст + список должностей
+с их позиционными данными, а модель возвращает массив из N профилей.
+
+Examples:
+  python> positions = chunk_positions(all_positions, config.MULTI_POSITION_BATCH_SIZE)
+  python> response_format = build_batch_response_format(response_format, len(batch))
+  python> messages = build_batch_messages(base_messages, positions_context)
+  python> profiles = split_batch_profiles(batch_json, [p["position"] for p in positions_context])
+"""
+
+import copy
+import json
+from typing import Any, Dict, List, Optional
+
+from .profile_schema import unwrap_schema
+
+# Переменные промпта, которые различаются между должностями одного подразделения.
+# Все остальные переменные (company_map, OrgStructure, kpi_data, it_systems...) общие.
+POSITION_VARIABLE_KEYS: List[str] = [
+    "position",
+    "subordinates_calculation",
+    "subordinates_departments",
+    "subordinates_direct_reports",
+    "business_block",
+    "department_unit",
+    "section_unit",
+    "group_unit",
+    "sub_section_unit",
+    "final_group_unit",
+    "hierarchy_level",
+    "full_hierarchy_path",
+    "hierarchy_levels_list",
+    "hierarchy_current_level",
+    "hierarchy_final_unit",
+    "position_location",
+]
+
+# Значение, подставляемое в общий промпт вместо различающихся позиционных данных
+BATCH_PLACEHOLDER = "[пакетная генерация: см. список должностей в конце]"
+
+MULTI_POSITION_INSTRUCTION = (
+    "РЕЖИМ ПАКЕТНОЙ ГЕНЕРАЦИИ. Сгенерируй {count} отдельных профилей должностей "
+    "одного подразделения - по одному на каждую должность из списка ниже, "
+    "в том же порядке. Контекст выше общий для всех должностей; данные, "
+    "отличающиеся между должностями, указаны в списке. Каждый профиль должен быть "
+    "полным и самостоятельным (не ссылайся на другие профили пакета), "
+    "поле position_title - точное название должности из списка. "
+    "Верни JSON-объект вида {{\"profiles\": [...]}} строго по схеме.\n\n"
+    "Должности пакета:\n{positions}"
+)
+
+
+def chunk_positions(positions: List[str], batch_size: int) -> List[List[str]]:
+    """
+    Разбиение списка должностей на пакеты (с сохранением порядка, без дубликатов).
+
+    Args:
+        positions: Должности подразделения
+        batch_size: Максимальное количество должностей в одном запросе
+
+    Returns:
+        Список пакетов должностей
+    """
+    unique_positions = list(dict.fromkeys(positions))
+    batch_size = max(1, batch_size)
+    return [
+        unique_positions[i : i + batch_size]
+        for i in range(0, len(unique_positions), batch_size)
+    ]
+
+
+def merge_shared_variables(
+    base_variables: Dict[str, Any], positions_context: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Общие переменные промпта для пакета.
+
+    Позиционная переменная сохраняет свое значение, если оно одинаково у всех
+    должностей пакета (например, путь подразделения), иначе заменяется
+    на BATCH_PLACEHOLDER - конкретные значения передаются в списке должностей.
+
+    Args:
+        base_variables: Полные переменные, подготовленные для первой должности
+        positions_context: Позиционные переменные каждой должности пакета
+
+    Returns:
+        Переменные для компиляции общего промпта
+    """
+    shared = dict(base_variables)
+    for key in POSITION_VARIABLE_KEYS:
+        values = {
+            json.dumps(context.get(key), ensure_ascii=False, sort_keys=True)
+            for context in positions_context
+        }
+        if len(values) > 1:
+            shared[key] = BATCH_PLACEHOLDER
+    return shared
+
+
+def build_batch_response_format(
+    response_format: Optional[Dict[str, Any]], positions_count: int
+) -> Optional[Dict[str, Any]]:
+    """
+    response_format для пакета: объект с массивом profiles из N профилей.
+
+    Args:
+        response_format: response_format одиночного профиля (json_schema)
+        positions_count: Количество должностей в пакете
+
+    Returns:
+        response_format пакета (или исходный, если structured output выключен)
+    """
+    if not response_format or "json_schema" not in response_format:
+        return response_format
+
+    profile_schema = copy.deepcopy(unwrap_schema(response_format))
+    batch_schema = {
+        "type": "object",
+        "properties": {
+            "profiles": {
+                "type": "array",
+                "minItems": positions_count,
+                "maxItems": positions_count,
+                "items": profile_schema,
+            }
+        },
+        "required": ["profiles"],
+        "additionalProperties": False,
+    }
+
+    json_schema = {k: v for k, v in response_format["json_schema"].items() if k != "schema"}
+    json_schema["name"] = f"{json_schema.get('name', 'profile')}_batch"[:64]
+    json_schema["schema"] = batch_schema
+    return {**response_format, "json_schema": json_schema}
+
+
+def build_batch_messages(
+    messages: List[Dict[str, str]], positions_context: List[Dict[str, Any]]
+) -> List[Dict[str, str]]:
+    """
+    Messages пакета: общий промпт + инструкция со списком должностей в конце.
+
+    Args:
+        messages: Скомпилированный общий промпт
+        positions_context: Позиционные переменные каждой должности пакета
+
+    Returns:
+        Messages для запроса
+    """
+    positions_text = "\n".join(
+        f"{index}. {json.dumps(context, ensure_ascii=False)}"
+        for index, context in enumerate(positions_context, start=1)
+    )
+    instruction = MULTI_POSITION_INSTRUCTION.format(
+        count=len(positions_context), positions=positions_text
+    )
+    return [*messages, {"role": "user", "content": instruction}]
+
+
+def split_batch_profiles(
+    batch_json: Dict[str, Any], positions: List[str]
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Разбиение ответа пакета на профили, сопоставленные с должностями.
+
+    Профиль сопоставляется по position_title; профили без точного совпадения
+    распределяются по оставшимся должностям в порядке ответа.
+
+    Args:
+        batch_json: Распарсенный ответ модели ({"profiles": [...]})
+        positions: Должности пакета в порядке запроса
+
+    Returns:
+        Список той же длины, что positions; None - профиль для должности не получен
+    """
+    profiles = batch_json.get("profiles") if isinstance(batch_json, dict) else None
+    if not isinstance(profiles, list):
+        return [None] * len(positions)
+
+    candidates = [p for p in profiles if isinstance(p, dict)]
+    matched: List[Optional[Dict[str, Any]]] = [None] * len(positions)
+
+    for index, position in enumerate(positions):
+        for candidate in candidates:
+            if candidate.get("position_title") == position:
+                matched[index] = candidate
+                candidates.remove(candidate)
+                break
+
+    for index in range(len(positions)):
+        if matched[index] is None and candidates:
+            matched[index] = candidates.pop(0)
+
+    return matched
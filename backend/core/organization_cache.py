@@ -12,7 +12,7 @@ import json
 import logging
 import threading
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from collections import defaultdict
 
 logger = logging.getLogger(__name__)
@@ -293,6 +293,35 @@ class OrganizationCacheManager:
         """
         return self._path_index.get(full_path)
 
+    def get_unit_positions(
+        self, unit_path: str, include_children: bool = True
+    ) -> List[Tuple[str, str]]:
+        """
+        @doc
+        Должности бизнес-единицы (и ее дочерних подразделений) с путями.
+
+        Args:
+            unit_path: Полный путь бизнес-единицы
+            include_children: Включать ли дочерние подразделения
+
+        Returns:
+            List[Tuple[str, str]]: [(department_path, position_name)] в порядке обхода
+
+        Examples:
+            python> cache.get_unit_positions("Блок ТД/Департамент строительства")
+            python> # [('Блок ТД/Департамент строительства', 'Директор'), ...]
+        """
+        positions: List[Tuple[str, str]] = []
+        prefix = unit_path + "/"
+        for path, unit_data in self._path_index.items():
+            if path == unit_path or (include_children and path.startswith(prefix)):
+                positions.extend(
+                    (path, position)
+                    for position in unit_data.get("positions", [])
+                    if position and position.strip()
+                )
+        return positions
+
     def find_all_paths_for_name(self, name: str) -> List[str]:
         """
         @doc
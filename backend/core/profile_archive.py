@@ -0,0 +1,118 @@
+"""
+@doc
+Потоковый ZIP архив профилей без временных файлов.
+
+Архив собирается по мере отправки: каждый файл сжимается отдельным шагом
+в пуле потоков, готовые байты сразу уходят клиенту (StreamingResponse), в
+памяти держится только сжатый текущий файл. ZipFile пишет в приемник без
+seek/tell, поэтому размеры и CRC записываются в data descriptor после
+каждого файла - так поддерживаются все распространенные архиваторы.
+
+Examples:
+  python> async def entries():
+  python>     yield "Блок/Департамент/Аналитик_4aec3e73/Аналитик_4aec3e73.json", Path("profile.json")
+  python>     yield "_errors.txt", b"..."
+  python> return StreamingResponse(stream_zip(entries()), media_type="application/zip")
+"""
+
+import asyncio
+import time
+import zipfile
+from pathlib import Path
+from typing import AsyncIterator, List, Set, Tuple, Union
+
+# Размер блока чтения исходных файлов
+ARCHIVE_CHUNK_SIZE = 64 * 1024
+
+ArchiveSource = Union[Path, bytes]
+
+
+class _ZipStreamSink:
+    """Приемник байтов ZipFile без seek/tell (ZipFile переходит в потоковый режим)"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ProfileZipStream:
+    """
+    @doc Пошаговая запись ZIP: каждый вызов возвращает байты, готовые к отправке.
+
+    Examples:
+        python>
+        archive = ProfileZipStream()
+        chunk = archive.add_file("ДИТ/Аналитик/Аналитик.docx", docx_path)
+        chunk += archive.add_bytes("_errors.txt", b"...")
+        tail = archive.close()
+    """
+
+    def __init__(self):
+        self._sink = _ZipStreamSink()
+        self._zip = zipfile.ZipFile(self._sink, mode="w", compression=zipfile.ZIP_DEFLATED)
+        self._names: Set[str] = set()
+        self.entries = 0
+
+    def add_file(self, arcname: str, path: Path) -> bytes:
+        """Добавление файла с диска (читается блоками, дата изменения сохраняется)"""
+        info = self._info(arcname, time.localtime(Path(path).stat().st_mtime)[:6])
+        with open(path, "rb") as source, self._zip.open(info, "w") as target:
+            for chunk in iter(lambda: source.read(ARCHIVE_CHUNK_SIZE), b""):
+                target.write(chunk)
+        self.entries += 1
+        return self._sink.drain()
+
+    def add_bytes(self, arcname: str, data: bytes) -> bytes:
+        """Добавление содержимого из памяти (отчеты, сгенерированные файлы)"""
+        with self._zip.open(self._info(arcname, time.localtime()[:6]), "w") as target:
+            target.write(data)
+        self.entries += 1
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """Центральный каталог архива"""
+        self._zip.close()
+        return self._sink.drain()
+
+    def _info(self, arcname: str, date_time: Tuple[int, ...]) -> zipfile.ZipInfo:
+        # Одинаковые имена (тезки в одном подразделении) получают суффикс
+        name, counter = arcname, 1
+        while name in self._names:
+            counter += 1
+            stem, dot, suffix = arcname.rpartition(".")
+            name = f"{stem}_{counter}.{suffix}" if dot else f"{arcname}_{counter}"
+        self._names.add(name)
+        info = zipfile.ZipInfo(name, date_time=max(date_time, (1980, 1, 1, 0, 0, 0)))
+        info.compress_type = zipfile.ZIP_DEFLATED
+        return info
+
+
+async def stream_zip(
+    entries: AsyncIterator[Tuple[str, ArchiveSource]],
+) -> AsyncIterator[bytes]:
+    """
+    Потоковая отдача ZIP архива: (имя в архиве, путь или байты) -> блоки архива.
+
+    Сжатие и чтение файлов выполняются в пуле потоков, event loop не блокируется.
+    """
+    archive = ProfileZipStream()
+    async for arcname, source in entries:
+        if isinstance(source, bytes):
+            chunk = await asyncio.to_thread(archive.add_bytes, arcname, source)
+        else:
+            chunk = await asyncio.to_thread(archive.add_file, arcname, source)
+        if chunk:
+            yield chunk
+    yield await asyncio.to_thread(archive.close)
@@ -8,20 +8,23 @@
 - Интеграция с Langfuse для мониторинга
 """
 
-import json
+import asyncio
+import functools
 import logging
 import uuid
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List
 from pathlib import Path
 
 from .data_loader import DataLoader
 from .llm_client import LLMClient
+from .metrics import stage, track_stages
+from .multi_position_generation import chunk_positions
 from .prompt_manager import PromptManager
 from .config import config
-from .markdown_service import ProfileMarkdownService
-from .storage_service import ProfileStorageService
-from .docx_service import initialize_docx_service
+from .file_write_queue import file_write_queue
+from .profile_renderer import ProfileRenderer, render_profile_files
+from .render_executor import render_executor
 
 # from langfuse.decorators import observe  # Временно убрали из-за проблем с версией
 
@@ -58,11 +61,11 @@ class ProfileGenerator:
 
         # Инициализируем компоненты
         self.data_loader = DataLoader(str(self.base_data_path))
-        self.md_generator = ProfileMarkdownService()
-        self.docx_service = initialize_docx_service()
-        self.storage_service = ProfileStorageService(
-            str(self.base_data_path / "generated_profiles")
-        )
+        # Рендеринг файлов (MD/DOCX/JSON) выполняется в пуле render_executor
+        self.renderer = ProfileRenderer(self.base_data_path)
+        self.md_generator = self.renderer.md_generator
+        self.docx_service = self.renderer.docx_service
+        self.storage_service = self.renderer.storage_service
 
         # Логируем состояние DOCX сервиса
         if self.docx_service:
@@ -95,6 +98,8 @@ class ProfileGenerator:
         temperature: float = 0.1,
         save_result: bool = True,
         profile_id: Optional[str] = None,
+        generation_mode: Optional[str] = None,
+        cancel_check: Optional[Callable[[], bool]] = None,
     ) -> Dict[str, Any]:
         """
         Генерация профиля должности
@@ -105,106 +110,361 @@ class ProfileGenerator:
             employee_name: ФИО сотрудника (опционально)
             temperature: Температура генерации LLM
             save_result: Сохранять ли результат в файл
+            generation_mode: "single" (один completion) или "sectional"
+                (параллельные запросы по группам секций); по умолчанию из config
+            cancel_check: Возвращает True, если генерация отменена - тогда
+                результат не сохраняется (asyncio.CancelledError)
 
         Returns:
             Полный результат генерации с метаданными
+
+        Raises:
+            asyncio.CancelledError: Генерация отменена (задача asyncio или cancel_check)
         """
         generation_start = datetime.now()
+        generation_mode = generation_mode or config.PROFILE_GENERATION_MODE
 
         # LLMClient теперь сам создает traces в Langfuse
 
-        try:
-            logger.info(f"Starting profile generation: {department} - {position}")
+        with track_stages() as stages:
+            try:
+                logger.info(f"Starting profile generation: {department} - {position}")
 
-            # 1. Подготовка данных через DataLoader
-            logger.info("📊 Preparing data with deterministic logic...")
-            variables = self.data_loader.prepare_langfuse_variables(
-                department=department, position=position, employee_name=employee_name
-            )
+                # 1. Подготовка данных через DataLoader
+                logger.info("📊 Preparing data with deterministic logic...")
+                with stage("prepare_variables"):
+                    variables = self.data_loader.prepare_langfuse_variables(
+                        department=department, position=position, employee_name=employee_name
+                    )
 
-            # 2. Данные готовы, переходим к генерации через LLM
-            logger.info("🤖 Generating profile through Langfuse LLM client...")
+                # 2. Данные готовы, переходим к генерации через LLM
+                logger.info("🤖 Generating profile through Langfuse LLM client...")
 
-            # 3. Генерация через LLMClient с полной Langfuse интеграцией
-            if not self.llm_client:
-                raise ValueError(
-                    "LLMClient not initialized - Langfuse credentials required"
-                )
+                # 3. Генерация через LLMClient с полной Langfuse интеграцией
+                if not self.llm_client:
+                    raise ValueError(
+                        "LLMClient not initialized - Langfuse credentials required"
+                    )
 
-            llm_result = await self.llm_client.generate_profile_from_langfuse(
-                prompt_name="a101-hr-profile-gemini-v3-simple",
-                variables=variables,
-                user_id=employee_name or f"user_{department}_{position}",
-                session_id=f"session_{generation_start.timestamp()}",
-            )
+                if generation_mode == "sectional":
+                    generate = self.llm_client.generate_profile_sectional
+                else:
+                    generate = self.llm_client.generate_profile_from_langfuse
+
+                with stage("llm"):
+                    llm_result = await generate(
+                        prompt_name="a101-hr-profile-gemini-v3-simple",
+                        variables=variables,
+                        user_id=employee_name or f"user_{department}_{position}",
+                        session_id=f"session_{generation_start.timestamp()}",
+                    )
 
-            # 4. Валидация результата
-            logger.info("✅ Validating generated profile...")
-            validation_result = self._validate_and_enhance_profile(llm_result)
-
-            # 5. Подготовка финального результата
-            final_result = {
-                "success": validation_result["success"],
-                "profile": validation_result["profile"],
-                "metadata": {
-                    "generation": {
-                        "department": department,
-                        "position": position,
-                        "employee_name": employee_name,
-                        "timestamp": generation_start.isoformat(),
-                        "duration": (datetime.now() - generation_start).total_seconds(),
-                        "temperature": temperature,
-                    },
-                    "llm": llm_result["metadata"],
-                    "validation": validation_result["validation"],
-                    "data_sources": variables.get("estimated_input_tokens", 0),
-                },
-                "errors": validation_result.get("errors", []),
-                "warnings": validation_result.get("warnings", []),
-            }
+                # 4. Валидация результата
+                logger.info("✅ Validating generated profile...")
+                with stage("validation"):
+                    validation_result = self._validate_and_enhance_profile(llm_result)
+
+                    # 5-6. Подготовка финального результата и сохранение
+                    final_result = self._build_final_result(
+                        validation_result,
+                        llm_result["metadata"],
+                        variables,
+                        department=department,
+                        position=position,
+                        employee_name=employee_name,
+                        generation_start=generation_start,
+                        temperature=temperature,
+                        generation_mode=generation_mode,
+                    )
+                if cancel_check and cancel_check():
+                    raise asyncio.CancelledError("Generation cancelled before saving")
+                if save_result and final_result["success"]:
+                    with stage("render"):
+                        await self._attach_saved_files(
+                            final_result, department, position, profile_id, cancel_check
+                        )
+                # Разбивка по стадиям (словарь дополняется стадиями API, например db_save)
+                final_result["metadata"]["generation"]["stages"] = stages
+
+                # 7. Трейсинг уже выполнен в LLMClient
+
+                duration = final_result["metadata"]["generation"]["duration"]
+                success_emoji = "✅" if final_result["success"] else "❌"
+
+                logger.info(
+                    f"{success_emoji} Profile generation completed in {duration:.2f}s"
+                )
+
+                return final_result
 
-            # 6. Сохранение результата
-            if save_result and final_result["success"]:
-                saved_path, md_content = self._save_result(
-                    final_result, department, position, profile_id
+            except Exception as e:
+                logger.error(f"❌ Profile generation failed: {e}")
+                return self._build_error_result(
+                    e, department, position, employee_name, generation_start
                 )
-                final_result["metadata"]["saved_path"] = str(saved_path)
-                final_result["markdown_content"] = md_content
-                logger.info(f"💾 Result saved to: {saved_path}")
 
-            # 7. Трейсинг уже выполнен в LLMClient
+    async def generate_profiles_for_unit(
+        self,
+        department: str,
+        positions: List[str],
+        employee_name: Optional[str] = None,
+        temperature: float = 0.1,
+        save_result: bool = True,
+        profile_ids: Optional[Dict[str, str]] = None,
+        cancel_check: Optional[Callable[[str], bool]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Пакетная генерация профилей нескольких должностей одного подразделения.
 
-            duration = final_result["metadata"]["generation"]["duration"]
-            success_emoji = "✅" if final_result["success"] else "❌"
+        Общий контекст подготавливается один раз, должности отправляются пакетами
+        по config.MULTI_POSITION_BATCH_SIZE (один запрос на пакет). Каждый
+        полученный профиль валидируется и сохраняется как обычный профиль.
 
+        Args:
+            department: Название департамента
+            positions: Должности подразделения
+            employee_name: ФИО сотрудника (опционально)
+            temperature: Температура генерации LLM
+            save_result: Сохранять ли результаты в файлы
+            profile_ids: Идентификаторы профилей по должностям (для сохранения)
+            cancel_check: cancel_check(position) - True, если должность отменена
+                (ее профиль не сохраняется)
+
+        Returns:
+            Результаты генерации в формате generate_profile, по одному на должность
+        """
+        generation_start = datetime.now()
+        positions = list(dict.fromkeys(positions))
+        profile_ids = profile_ids or {}
+
+        try:
             logger.info(
-                f"{success_emoji} Profile generation completed in {duration:.2f}s"
+                f"Starting unit generation: {department} - {len(positions)} positions"
             )
+            if not self.llm_client:
+                raise ValueError(
+                    "LLMClient not initialized - Langfuse credentials required"
+                )
 
-            return final_result
-
+            # Общие стадии пакета входят в разбивку каждой должности
+            with track_stages({}) as shared_stages:
+                with stage("prepare_variables"):
+                    variables, positions_context = self.data_loader.prepare_unit_variables(
+                        department=department, positions=positions, employee_name=employee_name
+                    )
+                context_by_position = dict(zip(positions, positions_context))
+
+                batches = chunk_positions(positions, config.MULTI_POSITION_BATCH_SIZE)
+                with stage("llm"):
+                    batch_results = await asyncio.gather(
+                        *[
+                            self.llm_client.generate_profiles_batch(
+                                prompt_name="a101-hr-profile-gemini-v3-simple",
+                                variables=variables,
+                                positions_context=[context_by_position[p] for p in batch],
+                                user_id=employee_name or f"user_{department}_batch",
+                                session_id=f"session_{generation_start.timestamp()}",
+                            )
+                            for batch in batches
+                        ]
+                    )
         except Exception as e:
-            error_result = {
-                "success": False,
-                "profile": None,
-                "metadata": {
-                    "generation": {
-                        "department": department,
-                        "position": position,
-                        "employee_name": employee_name,
-                        "timestamp": generation_start.isoformat(),
-                        "duration": (datetime.now() - generation_start).total_seconds(),
-                        "error": str(e),
-                    }
-                },
-                "errors": [f"Generation failed: {str(e)}"],
-                "warnings": [],
+            logger.error(f"❌ Unit generation failed: {e}")
+            return [
+                self._build_error_result(
+                    e, department, position, employee_name, generation_start
+                )
+                for position in positions
+            ]
+
+        results: List[Dict[str, Any]] = []
+        for batch, batch_result in zip(batches, batch_results):
+            for index, position in enumerate(batch):
+                llm_result = self._split_batch_llm_result(batch_result, index, len(batch))
+                with track_stages({}) as position_stages:
+                    with stage("validation"):
+                        validation_result = self._validate_and_enhance_profile(llm_result)
+
+                        final_result = self._build_final_result(
+                            validation_result,
+                            llm_result["metadata"],
+                            variables,
+                            department=department,
+                            position=position,
+                            employee_name=employee_name,
+                            generation_start=generation_start,
+                            temperature=temperature,
+                            generation_mode="multi_position",
+                        )
+                    cancelled = bool(cancel_check and cancel_check(position))
+                    if save_result and final_result["success"] and not cancelled:
+                        with stage("render"):
+                            await self._attach_saved_files(
+                                final_result, department, position, profile_ids.get(position)
+                            )
+                final_result["metadata"]["generation"]["stages"] = {
+                    **shared_stages,
+                    **position_stages,
+                }
+                results.append(final_result)
+
+        succeeded = sum(1 for r in results if r["success"])
+        logger.info(
+            f"✅ Unit generation completed: {succeeded}/{len(results)} profiles "
+            f"in {(datetime.now() - generation_start).total_seconds():.2f}s "
+            f"({len(batches)} requests)"
+        )
+        return results
+
+    def _split_batch_llm_result(
+        self, batch_result: Dict[str, Any], index: int, batch_size: int
+    ) -> Dict[str, Any]:
+        """
+        Результат LLM для одной должности пакета (в формате generate_profile_from_langfuse).
+
+        Токены пакета делятся поровну между должностями, полные значения
+        сохраняются в metadata["batch"].
+        """
+        batch_metadata = batch_result["metadata"]
+        profile = batch_result["profiles"][index]
+
+        metadata = {k: v for k, v in batch_metadata.items() if k != "batch_positions"}
+        metadata["batch"] = {
+            "size": batch_size,
+            "index": index,
+            "positions": batch_metadata.get("batch_positions", []),
+            "tokens": batch_metadata.get("tokens"),
+        }
+        if "tokens" in batch_metadata:
+            metadata["tokens"] = {
+                key: value // batch_size for key, value in batch_metadata["tokens"].items()
             }
+        metadata["schema_errors"] = batch_result["schema_errors"][index]
+
+        if batch_metadata.get("success") and profile is None:
+            metadata["success"] = False
+            metadata["error"] = "Profile for position is missing in batch response"
+
+        return {"profile": profile, "metadata": metadata}
 
-            # trace handling removed as it's not available in this context
+    def _build_final_result(
+        self,
+        validation_result: Dict[str, Any],
+        llm_metadata: Dict[str, Any],
+        variables: Dict[str, Any],
+        department: str,
+        position: str,
+        employee_name: Optional[str],
+        generation_start: datetime,
+        temperature: float,
+        generation_mode: str,
+    ) -> Dict[str, Any]:
+        """Подготовка финального результата генерации одного профиля"""
+        return {
+            "success": validation_result["success"],
+            "profile": validation_result["profile"],
+            "metadata": {
+                "generation": {
+                    "department": department,
+                    "position": position,
+                    "employee_name": employee_name,
+                    "timestamp": generation_start.isoformat(),
+                    "duration": (datetime.now() - generation_start).total_seconds(),
+                    "temperature": temperature,
+                    "generation_mode": generation_mode,
+                },
+                "llm": llm_metadata,
+                "validation": validation_result["validation"],
+                "data_sources": variables.get("estimated_input_tokens", 0),
+            },
+            "errors": validation_result.get("errors", []),
+            "warnings": validation_result.get("warnings", []),
+        }
+
+    def _build_error_result(
+        self,
+        error: Exception,
+        department: str,
+        position: str,
+        employee_name: Optional[str],
+        generation_start: datetime,
+    ) -> Dict[str, Any]:
+        """Результат неуспешной генерации одного профиля"""
+        return {
+            "success": False,
+            "profile": None,
+            "metadata": {
+                "generation": {
+                    "department": department,
+                    "position": position,
+                    "employee_name": employee_name,
+                    "timestamp": generation_start.isoformat(),
+                    "duration": (datetime.now() - generation_start).total_seconds(),
+                    "error": str(error),
+                }
+            },
+            "errors": [f"Generation failed: {str(error)}"],
+            "warnings": [],
+        }
 
-            logger.error(f"❌ Profile generation failed: {e}")
-            return error_result
+    async def _attach_saved_files(
+        self,
+        final_result: Dict[str, Any],
+        department: str,
+        position: str,
+        profile_id: Optional[str],
+        cancel_check: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        """
+        Рендеринг файлов результата и постановка их в очередь записи.
+
+        Записи индекса файлов (metadata.files) сохраняются в profile_files
+        вместе с профилем (save_generation_to_db). При LAZY_DOCUMENT_RENDERING
+        рендерится только JSON, MD/DOCX создаются при первом скачивании.
+
+        Рендеринг выполняется в пуле render_executor (в памяти); при
+        заполненной очереди рендеринга корутина ждет свободного места
+        (backpressure). Запись на диск идет через file_write_queue в фоне,
+        save_generation_to_db ждет ее барьером перед INSERT. Отмена
+        (cancel_check), пришедшая во время рендеринга, прерывает генерацию до
+        постановки файлов в очередь.
+
+        Ошибки рендеринга не отменяют уже оплаченный результат LLM: если
+        рендеринг не удался целиком, сохраняется только JSON
+        (render_json_fallback), а ошибки MD/DOCX записываются в
+        metadata.render_errors.
+
+        Raises:
+            asyncio.CancelledError: Генерация отменена во время рендеринга
+        """
+        if render_executor.uses_processes:
+            render = functools.partial(render_profile_files, str(self.base_data_path))
+        else:
+            render = self.renderer.render_files
+        try:
+            rendered = await render_executor.run(
+                render,
+                final_result,
+                department,
+                position,
+                profile_id,
+                not config.LAZY_DOCUMENT_RENDERING,
+            )
+        except Exception as e:
+            logger.error(f"❌ Profile rendering failed, saving JSON only: {e}")
+            rendered = self.renderer.render_json_fallback(
+                final_result, department, position, profile_id
+            )
+            rendered["errors"] = {"render": str(e)}
+        if cancel_check and cancel_check():
+            raise asyncio.CancelledError("Generation cancelled before saving files")
+        file_write_queue.submit(rendered["contents"])
+        final_result["metadata"]["saved_path"] = str(rendered["json_path"])
+        final_result["metadata"]["files"] = rendered["files"]
+        final_result["markdown_content"] = rendered["markdown_content"]
+        if rendered["errors"]:
+            final_result["metadata"]["render_errors"] = rendered["errors"]
+        logger.info(f"💾 Result queued for saving: {rendered['json_path']}")
 
     def _validate_and_enhance_profile(
         self, llm_result: Dict[str, Any]
@@ -280,137 +540,6 @@ class ProfileGenerator:
 
         return enhanced
 
-    def _save_result(
-        self, result: Dict[str, Any], department: str, position: str, profile_id: str
-    ) -> Path:
-        """
-        Сохранение результата генерации в новую иерархическую структуру файлов.
-
-        Создает полную структуру: Блок/Департамент/Отдел/Группа/Должность/Экземпляр/
-        """
-        generation_timestamp = datetime.now()
-
-        try:
-            logger.info(
-                f"💾 Creating hierarchical directory structure for: {department} -> {position}"
-            )
-
-            # 1. Создаем иерархическую структуру папок
-            profile_dir = self.storage_service.create_profile_directory(
-                department=department,
-                position=position,
-                timestamp=generation_timestamp,
-                profile_id=profile_id,
-            )
-
-            # 2. Генерируем MD файл
-            logger.info("📝 Auto-generating Markdown profile...")
-            md_content = self.md_generator.generate_from_json(result["profile"])
-
-            # 3. Генерируем DOCX файл
-            docx_temp_path = None
-            if self.docx_service:
-                logger.info("📄 Auto-generating DOCX profile...")
-                import tempfile
-                import os
-
-                # Создаем временный файл без контекстного менеджера
-                temp_fd, temp_docx_path = tempfile.mkstemp(suffix=".docx")
-                os.close(temp_fd)  # Закрываем файловый дескriptor, но файл остается
-
-                try:
-                    docx_temp_path = self.docx_service.create_docx_from_json(
-                        json_data=result, output_path=temp_docx_path
-                    )
-                    logger.info(f"✅ DOCX временный файл создан: {docx_temp_path}")
-                except Exception as e:
-                    logger.error(f"❌ Ошибка создания DOCX: {e}")
-                    # Удаляем временный файл в случае ошибки
-                    try:
-                        os.unlink(temp_docx_path)
-                    except:
-                        pass
-                    docx_temp_path = None
-
-            # 4. Сохраняем JSON, MD и DOCX файлы в одну папку
-            json_path, md_path, docx_path = self.storage_service.save_profile_files(
-                directory=profile_dir,
-                json_content=result,
-                md_content=md_content,
-                docx_content=docx_temp_path,
-                profile_id=profile_id,
-            )
-
-            logger.info(f"✅ Profile saved to hierarchical structure:")
-            logger.info(f"  📁 Directory: {profile_dir}")
-            logger.info(f"  📄 JSON: {json_path.name}")
-            logger.info(f"  📝 MD: {md_path.name}")
-            if docx_temp_path:
-                logger.info(f"  📋 DOCX: {docx_path.name}")
-            else:
-                logger.info("  📋 DOCX: not generated")
-
-            # Очищаем временный DOCX файл
-            if docx_temp_path:
-                try:
-                    if os.path.exists(docx_temp_path):
-                        os.unlink(docx_temp_path)
-                        logger.debug(f"🧹 Cleaned up temp DOCX: {docx_temp_path}")
-                except Exception as e:
-                    logger.warning(f"⚠️ Failed to cleanup temp DOCX: {e}")
-
-            # Возвращаем путь к JSON файлу и MD контент для обратной совместимости
-            return json_path, md_content
-
-        except Exception as e:
-            logger.error(f"❌ Error saving profile to hierarchical structure: {e}")
-
-            # Fallback к старой системе в случае ошибки
-            logger.warning("⚠️ Falling back to legacy file structure...")
-            legacy_path = self._save_result_legacy(result, department, position)
-            return legacy_path, None  # No MD content in legacy mode
-
-    def _save_result_legacy(
-        self, result: Dict[str, Any], department: str, position: str
-    ) -> Path:
-        """Fallback к старой системе сохранения файлов"""
-
-        # Создаем папку для результатов если не существует
-        results_dir = self.base_data_path / "generated_profiles"
-        results_dir.mkdir(exist_ok=True)
-
-        # Создаем подпапку по департаментам
-        dept_dir = results_dir / self._sanitize_filename(department)
-        dept_dir.mkdir(exist_ok=True)
-
-        # Формируем имя файла
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{self._sanitize_filename(position)}_{timestamp}.json"
-
-        file_path = dept_dir / filename
-
-        # Сохраняем результат
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
-
-        logger.info(f"💾 Legacy save completed: {file_path}")
-        return file_path
-
-    def _sanitize_filename(self, name: str) -> str:
-        """Санитизация имени файла"""
-        # Заменяем проблемные символы
-        sanitized = name.replace(" ", "_")
-        sanitized = sanitized.replace("/", "_")
-        sanitized = sanitized.replace("\\", "_")
-        sanitized = sanitized.replace(":", "_")
-        sanitized = sanitized.replace("*", "_")
-        sanitized = sanitized.replace("?", "_")
-        sanitized = sanitized.replace("<", "_")
-        sanitized = sanitized.replace(">", "_")
-        sanitized = sanitized.replace("|", "_")
-
-        return sanitized
-
     def get_available_departments(self) -> List[str]:
         """Получение списка доступных департаментов"""
         return self.data_loader.get_available_departments()
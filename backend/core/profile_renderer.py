@@ -0,0 +1,175 @@
+"""
+@doc
+Рендеринг и сохранение файлов профиля (JSON, Markdown, DOCX).
+
+CPU-bound стадия генерации вынесена из ProfileGenerator, чтобы выполняться
+в пуле RenderExecutor (потоки или процессы) и не блокировать event loop API.
+При render_documents=False (LAZY_DOCUMENT_RENDERING) сохраняется только JSON,
+а MD/DOCX создаются при первом скачивании (см. render_cache).
+render_files только рендерит: возвращает содержимое файлов в памяти и записи
+индекса (путь, размер, SHA-256), а запись на диск выполняет file_write_queue
+(атомарно, пачками, вне критического пути генерации).
+Ошибки рендеринга MD/DOCX не прерывают сохранение: JSON сохраняется всегда,
+ошибки возвращаются в errors. Если рендеринг не удался целиком, генератор
+сохраняет только JSON через render_json_fallback (плоская структура по
+департаментам).
+Для пула процессов используется render_profile_files - функция уровня модуля
+(передается в дочерний процесс по pickle), рендерер создается в процессе один раз.
+
+Examples:
+  python> renderer = ProfileRenderer(Path("data"))
+  python> rendered = renderer.render_files(result, "ДИТ", "Программист", profile_id)
+  python> file_write_queue.submit(rendered["contents"])
+  python> rendered["errors"]  # {"docx": "..."} - форматы, которые не удалось создать
+  python> await render_executor.run(render_profile_files, "data", result, "ДИТ", "Программист", profile_id)
+"""
+
+import io
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .docx_service import initialize_docx_service
+from .markdown_service import ProfileMarkdownService
+from .render_cache import RENDER_KINDS, RENDERER_VERSION
+from .storage_service import ProfileStorageService
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileRenderer:
+    """
+    @doc Рендеринг профиля в Markdown/DOCX и запись файлов в иерархическую структуру.
+
+    Examples:
+        python>
+        renderer = ProfileRenderer(Path("data"))
+        rendered = renderer.render_files(result, department, position, profile_id)
+        file_write_queue.submit(rendered["contents"])
+    """
+
+    def __init__(self, base_data_path: Path):
+        self.base_data_path = Path(base_data_path)
+        self.md_generator = ProfileMarkdownService()
+        self.docx_service = initialize_docx_service()
+        self.storage_service = ProfileStorageService(
+            str(self.base_data_path / "generated_profiles")
+        )
+
+    def render_files(
+        self,
+        result: Dict[str, Any],
+        department: str,
+        position: str,
+        profile_id: Optional[str],
+        render_documents: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Рендеринг файлов профиля в память без записи на диск.
+
+        Путь: Блок/Департамент/Отдел/Группа/Должность/Экземпляр/ (директория не создается).
+
+        Returns:
+          Dict: json_path, markdown_content (None без render_documents или при ошибке),
+          contents (kind -> (путь, байты)), files (kind -> путь/размер/SHA-256)
+          и errors (kind -> ошибка рендеринга MD/DOCX)
+        """
+        profile_dir = self.storage_service.profile_directory_path(
+            department=department,
+            position=position,
+            timestamp=datetime.now(),
+            profile_id=profile_id,
+        )
+
+        # MD и DOCX (при ленивом рендеринге - при первом скачивании)
+        md_content = None
+        docx_content = None
+        errors: Dict[str, str] = {}
+        if render_documents:
+            logger.info("📝 Auto-generating Markdown profile...")
+            try:
+                md_content = self.md_generator.generate_from_json(result["profile"])
+            except Exception as e:
+                logger.error(f"❌ Ошибка создания Markdown: {e}")
+                errors["md"] = str(e)
+            if self.docx_service:
+                logger.info("📄 Auto-generating DOCX profile...")
+                try:
+                    buffer = io.BytesIO()
+                    self.docx_service.create_docx_from_json(json_data=result, output_path=buffer)
+                    docx_content = buffer.getvalue()
+                except Exception as e:
+                    logger.error(f"❌ Ошибка создания DOCX: {e}")
+                    errors["docx"] = str(e)
+
+        contents = self.storage_service.profile_file_contents(
+            profile_dir, result, md_content, docx_content
+        )
+        files = {
+            kind: self.storage_service.describe_content(path, data)
+            for kind, (path, data) in contents.items()
+        }
+        for kind in RENDER_KINDS:
+            if kind in files:
+                files[kind]["renderer_version"] = RENDERER_VERSION
+        logger.info(
+            f"🎨 Rendered profile files for {department} -> {position}: {', '.join(files)}"
+        )
+        return {
+            "json_path": contents["json"][0],
+            "markdown_content": md_content,
+            "contents": contents,
+            "files": files,
+            "errors": errors,
+        }
+
+    def render_json_fallback(
+        self,
+        result: Dict[str, Any],
+        department: str,
+        position: str,
+        profile_id: Optional[str],
+    ) -> Dict[str, Any]:
+        """
+        Только JSON в плоской структуре generated_profiles/Департамент/ - когда
+        render_files не удался целиком (оргструктура, пул рендеринга).
+        Результат в формате render_files.
+        """
+        sanitize = self.storage_service.sanitize_path_component
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        suffix = f"_{profile_id[:8]}" if profile_id else ""
+        json_path = (
+            self.storage_service.base_path
+            / sanitize(department)
+            / f"{sanitize(position)}_{timestamp}{suffix}.json"
+        )
+        data = json.dumps(result, ensure_ascii=False, indent=2).encode("utf-8")
+        logger.warning(f"⚠️ Falling back to JSON-only save: {json_path}")
+        return {
+            "json_path": json_path,
+            "markdown_content": None,
+            "contents": {"json": (json_path, data)},
+            "files": {"json": self.storage_service.describe_content(json_path, data)},
+            "errors": {},
+        }
+
+
+# Рендереры процессов пула (по base_data_path), создаются при первом вызове
+_process_renderers: Dict[str, ProfileRenderer] = {}
+
+
+def render_profile_files(
+    base_data_path: str,
+    result: Dict[str, Any],
+    department: str,
+    position: str,
+    profile_id: Optional[str],
+    render_documents: bool = True,
+) -> Dict[str, Any]:
+    """Точка входа для пула процессов RenderExecutor (см. ProfileRenderer.render_files)"""
+    renderer = _process_renderers.get(base_data_path)
+    if renderer is None:
+        renderer = _process_renderers[base_data_path] = ProfileRenderer(Path(base_data_path))
+    return renderer.render_files(result, department, position, profile_id, render_documents)
@@ -0,0 +1,149 @@
+"""
+@doc
+Загрузка JSON схемы профиля должности и валидация профилей по ней.
+
+Схема хранится в templates/job_profile_schema.json в обертке response_format
+(как ее ожидает OpenRouter structured output). Валидатор поддерживает
+подмножество JSON Schema, которое реально используется в наших схемах:
+type, properties, required, items, enum, minimum/maximum, minItems/maxItems.
+
+Examples:
+  python> schema = load_profile_schema()
+  python> errors = validate_against_schema(profile, schema)
+  python> if not errors: print("Профиль соответствует схеме")
+"""
+
+import json
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SCHEMA_PATH = Path(config.PROJECT_ROOT) / "templates" / "job_profile_schema.json"
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "integer": int,
+    "number": (int, float),
+    "null": type(None),
+}
+
+
+def unwrap_schema(document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Извлечение JSON схемы из обертки response_format / json_schema.
+
+    Args:
+        document: Содержимое config.json, response_format или сама схема
+
+    Returns:
+        Схема объекта профиля
+    """
+    if "response_format" in document:
+        document = document["response_format"]
+    if "json_schema" in document:
+        document = document["json_schema"]
+    if "schema" in document:
+        document = document["schema"]
+    return document
+
+
+@lru_cache(maxsize=4)
+def load_profile_schema(schema_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Загрузка схемы профиля (кешируется на процесс).
+
+    Args:
+        schema_path: Путь к файлу схемы (по умолчанию templates/job_profile_schema.json)
+
+    Returns:
+        JSON схема профиля
+    """
+    path = Path(schema_path) if schema_path else PROFILE_SCHEMA_PATH
+    with open(path, "r", encoding="utf-8") as f:
+        return unwrap_schema(json.load(f))
+
+
+def _matches_type(value: Any, expected: Any) -> bool:
+    """Проверка JSON типа (type может быть строкой или списком)"""
+    expected_types = expected if isinstance(expected, list) else [expected]
+    for type_name in expected_types:
+        python_type = _JSON_TYPES.get(type_name)
+        if python_type is None:
+            return True  # Неизвестный тип - не валидируем
+        # bool является подклассом int - исключаем явно
+        if type_name in ("integer", "number") and isinstance(value, bool):
+            continue
+        if isinstance(value, python_type):
+            return True
+    return False
+
+
+def validate_against_schema(
+    instance: Any, schema: Dict[str, Any], path: str = "$", max_errors: int = 50
+) -> List[str]:
+    """
+    Валидация значения по JSON схеме (поддерживаемое подмножество).
+
+    Args:
+        instance: Проверяемое значение (обычно профиль)
+        schema: JSON схема
+        path: JSON path текущего узла (для сообщений об ошибках)
+        max_errors: Ограничение количества собираемых ошибок
+
+    Returns:
+        Список ошибок; пустой список означает, что значение валидно
+
+    Examples:
+        >>> validate_against_schema({"a": 1}, {"type": "object", "required": ["b"]})
+        ["$: missing required property 'b'"]
+    """
+    errors: List[str] = []
+    _validate_node(instance, schema, path, errors, max_errors)
+    return errors
+
+
+def _validate_node(
+    instance: Any, schema: Dict[str, Any], path: str, errors: List[str], max_errors: int
+) -> None:
+    if len(errors) >= max_errors or not isinstance(schema, dict):
+        return
+
+    expected_type = schema.get("type")
+    if expected_type and not _matches_type(instance, expected_type):
+        errors.append(f"{path}: expected {expected_type}, got {type(instance).__name__}")
+        return
+
+    if "enum" in schema and instance not in schema["enum"]:
+        errors.append(f"{path}: value {instance!r} not in enum")
+
+    if isinstance(instance, (int, float)) and not isinstance(instance, bool):
+        if "minimum" in schema and instance < schema["minimum"]:
+            errors.append(f"{path}: {instance} < minimum {schema['minimum']}")
+        if "maximum" in schema and instance > schema["maximum"]:
+            errors.append(f"{path}: {instance} > maximum {schema['maximum']}")
+
+    if isinstance(instance, dict):
+        for required in schema.get("required", []):
+            if required not in instance:
+                errors.append(f"{path}: missing required property '{required}'")
+        for name, sub_schema in schema.get("properties", {}).items():
+            if name in instance:
+                _validate_node(instance[name], sub_schema, f"{path}.{name}", errors, max_errors)
+
+    if isinstance(instance, list):
+        if "minItems" in schema and len(instance) < schema["minItems"]:
+            errors.append(f"{path}: expected at least {schema['minItems']} items")
+        if "maxItems" in schema and len(instance) > schema["maxItems"]:
+            errors.append(f"{path}: expected at most {schema['maxItems']} items")
+        item_schema = schema.get("items")
+        if isinstance(item_schema, dict):
+            for index, item in enumerate(instance):
+                _validate_node(item, item_schema, f"{path}[{index}]", errors, max_errors)
@@ -0,0 +1,165 @@
+"""
+@doc
+Кешированная готовность системы к генерации (вместо validate_system на каждую задачу).
+
+ReadinessMonitor выполняет полную проверку (ProfileGenerator.validate_system)
+один раз при старте и хранит вердикт. Фоновый цикл раз в READINESS_POLL_INTERVAL
+сравнивает mtime/размер источников данных (один stat на путь) и перепроверяет
+систему, только если файлы изменились или вердикт старше READINESS_MAX_AGE.
+Генерация и /health получают готовый вердикт без обращений к файловой системе.
+
+Examples:
+  python> monitor = ReadinessMonitor(check=validate, watch_paths=[Path("data/structure.json")])
+  python> verdict = await monitor.get()  # первая проверка, дальше - из кеша
+  python> verdict["system_ready"]
+  python> monitor.invalidate()           # следующий get() перепроверит систему
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+ReadinessCheck = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+def _path_signature(path: Path) -> Tuple[Any, ...]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return (str(path), None)
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+class ReadinessMonitor:
+    """
+    @doc Вердикт готовности системы с фоновой перепроверкой по изменениям файлов.
+
+    Examples:
+        python>
+        monitor = ReadinessMonitor(check, watch_paths=[Path("data"), Path("data/KPI")])
+        await monitor.start()
+        verdict = await monitor.get()
+        await monitor.stop()
+    """
+
+    def __init__(
+        self,
+        check: ReadinessCheck,
+        watch_paths: Iterable[Path] = (),
+        poll_interval: Optional[float] = None,
+        max_age: Optional[float] = None,
+    ):
+        self.check = check
+        self.watch_paths = [Path(path) for path in watch_paths]
+        self.poll_interval = poll_interval or config.READINESS_POLL_INTERVAL
+        self.max_age = config.READINESS_MAX_AGE if max_age is None else max_age
+        self._verdict: Optional[Dict[str, Any]] = None
+        self._checked_at: Optional[float] = None
+        self._checked_at_wall: Optional[datetime] = None
+        self._signature: Optional[Tuple[Any, ...]] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.validations = 0
+
+    async def get(self) -> Dict[str, Any]:
+        """Кешированный вердикт (проверка выполняется, если его еще нет)"""
+        if self._verdict is None:
+            return await self.refresh()
+        return self._verdict
+
+    async def refresh(self) -> Dict[str, Any]:
+        """
+        Полная перепроверка. Одновременные вызовы ждут одну проверку.
+        """
+        lock = self._get_lock()
+        requested_at = time.monotonic()
+        async with lock:
+            # Пока ждали блокировку, другой вызов уже перепроверил систему
+            if self._verdict is not None and self._checked_at and self._checked_at >= requested_at:
+                return self._verdict
+            signature = self._current_signature()
+            try:
+                verdict = await self.check()
+            except Exception as e:
+                logger.error(f"❌ System readiness check failed: {e}")
+                verdict = {
+                    "system_ready": False,
+                    "components": {},
+                    "warnings": [],
+                    "errors": [f"Readiness check failed: {e}"],
+                }
+            if self._verdict is None or verdict.get("system_ready") != self._verdict.get("system_ready"):
+                status = "ready" if verdict.get("system_ready") else "NOT ready"
+                logger.info(f"🩺 System readiness: {status} {verdict.get('errors') or ''}")
+            self._verdict = verdict
+            self._signature = signature
+            self._checked_at = time.monotonic()
+            self._checked_at_wall = datetime.now()
+            self.validations += 1
+            return verdict
+
+    def invalidate(self) -> None:
+        """Сброс вердикта: следующий get() выполнит проверку"""
+        self._verdict = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Текущий вердикт для /health (без проверки)"""
+        if self._verdict is None:
+            return {"system_ready": None, "checked_at": None, "validations": self.validations}
+        return {
+            "system_ready": self._verdict.get("system_ready"),
+            "checked_at": self._checked_at_wall.isoformat(),
+            "age_seconds": round(time.monotonic() - self._checked_at, 1),
+            "errors": self._verdict.get("errors", []),
+            "warnings": self._verdict.get("warnings", []),
+            "validations": self.validations,
+        }
+
+    async def start(self) -> None:
+        """Первая проверка и фоновый цикл перепроверки"""
+        await self.refresh()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._watch_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _current_signature(self) -> Tuple[Any, ...]:
+        return tuple(_path_signature(path) for path in self.watch_paths)
+
+    def _is_stale(self) -> bool:
+        if self._verdict is None or self._checked_at is None:
+            return True
+        if self.max_age and time.monotonic() - self._checked_at > self.max_age:
+            return True
+        return self._current_signature() != self._signature
+
+    async def _watch_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                if self._is_stale():
+                    await self.refresh()
+            except Exception as e:
+                logger.warning(f"⚠️ Readiness watch failed: {e}")
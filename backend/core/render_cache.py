@@ -0,0 +1,357 @@
+"""
+@doc
+Ленивый рендеринг Markdown/DOCX профиля с кешем на диске.
+
+Генерация сохраняет только JSON (LAZY_DOCUMENT_RENDERING=true), а MD и DOCX
+создаются при первом скачивании. Готовые файлы хранятся в RENDER_CACHE_DIR
+под ключом (SHA-256 содержимого профиля, версия рендерера):
+
+    render_cache/{kind}/{hash[:2]}/{hash}_v{RENDERER_VERSION}.{md|docx}
+
+Одинаковое содержимое рендерится один раз; изменение markdown_service.py или
+docx_service.py требует увеличить RENDERER_VERSION - старые файлы перестают
+совпадать с ключом. Одновременные первые запросы одного файла ждут один
+рендеринг (single-flight), сам рендеринг выполняется в render_executor,
+файл появляется атомарно (временный файл + os.replace).
+
+Индекс profile_files хранит версию рендерера каждого MD/DOCX: файлы прежних
+версий считаются устаревшими - скачивание рендерит их заново, а массовый
+перерендеринг (prerender_profiles: CLI python -m backend.prerender, POST
+/api/profiles/rerender) перестраивает только их, без обращения к LLM.
+
+Examples:
+  python> document = profile_document(row["profile_data"], row["metadata_json"])
+  python> path = await render_cache.get_or_render("docx", document)
+  python> render_cache.get_stats()
+  python> await prerender_profiles(conn, kinds=("md", "docx"), department="ДИТ")
+  python> await prerender_profiles(conn, cache=RenderCache(executor=RenderExecutor(mode="process")))
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from .config import config
+from .metrics import metrics_registry
+from .render_executor import RenderExecutor, render_executor
+from .storage_service import ProfileStorageService, index_profile_files
+
+logger = logging.getLogger(__name__)
+
+# Версия рендереров MD/DOCX: увеличить при изменении форматирования документов
+RENDERER_VERSION = "2"
+
+# Форматы, которые рендерятся из JSON профиля (kind -> расширение файла)
+RENDER_KINDS = {"md": ".md", "docx": ".docx"}
+
+RENDER_CACHE_REQUESTS = metrics_registry.counter(
+    "render_cache_requests_total",
+    "Lazy MD/DOCX render requests by result (hit, miss, coalesced)",
+    ["kind", "result"],
+)
+
+
+def profile_document(
+    profile_data: Union[str, Dict[str, Any]], metadata: Union[str, Dict[str, Any], None]
+) -> Dict[str, Any]:
+    """Документ для рендеринга из полей profiles.profile_data и profiles.metadata_json"""
+    if isinstance(profile_data, str):
+        profile_data = json.loads(profile_data)
+    if isinstance(metadata, str):
+        metadata = json.loads(metadata)
+    return {"profile": profile_data, "metadata": metadata or {}}
+
+
+def document_hash(document: Dict[str, Any]) -> str:
+    """SHA-256 канонического JSON документа (не зависит от порядка ключей)"""
+    canonical = json.dumps(document, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def artifact_path(
+    cache_dir: Union[str, Path], kind: str, content_hash: str, version: str = RENDERER_VERSION
+) -> Path:
+    """Путь к файлу кеша для (kind, hash, версия рендерера)"""
+    if kind not in RENDER_KINDS:
+        raise ValueError(f"Unsupported render kind: {kind}")
+    return Path(cache_dir) / kind / content_hash[:2] / f"{content_hash}_v{version}{RENDER_KINDS[kind]}"
+
+
+# Сервисы рендеринга процесса (в пуле процессов создаются в каждом дочернем один раз)
+_process_services: Dict[str, Any] = {}
+
+
+def _render_service(kind: str) -> Any:
+    service = _process_services.get(kind)
+    if service is None:
+        if kind == "md":
+            from .markdown_service import ProfileMarkdownService
+
+            service = ProfileMarkdownService()
+        else:
+            from .docx_service import initialize_docx_service
+
+            service = initialize_docx_service()
+            if service is None:
+                raise RuntimeError("DOCX rendering is unavailable (python-docx is not installed)")
+        _process_services[kind] = service
+    return service
+
+
+def render_artifact(
+    cache_dir: str, kind: str, document: Dict[str, Any], content_hash: str, force: bool = False
+) -> str:
+    """
+    Рендеринг документа в файл кеша (точка входа для пула RenderExecutor).
+
+    Уже существующий файл не перерисовывается (force=True - перерисовывается
+    поверх); запись атомарна, поэтому конкурирующие процессы (API и
+    backend.worker) не видят частичных файлов.
+    """
+    target = artifact_path(cache_dir, kind, content_hash)
+    if target.exists() and not force:
+        return str(target)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        service = _render_service(kind)
+        if kind == "md":
+            temp_path.write_text(service.generate_from_json(document["profile"]), encoding="utf-8")
+        else:
+            service.create_docx_from_json(json_data=document, output_path=str(temp_path))
+        os.replace(temp_path, target)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+    logger.info(f"🎨 Rendered {kind.upper()} into cache: {target.name}")
+    return str(target)
+
+
+class RenderCache:
+    """
+    @doc Кеш отрендеренных MD/DOCX с single-flight защитой первых запросов.
+
+    Examples:
+        python>
+        cache = RenderCache("/app/render_cache")
+        path = await cache.get_or_render("md", document)
+        cache.get_stats()  # {"hits": 10, "misses": 1, "coalesced": 3, ...}
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Union[str, Path]] = None,
+        executor: Optional[RenderExecutor] = None,
+    ):
+        self.cache_dir = Path(cache_dir or config.RENDER_CACHE_DIR)
+        self.executor = executor or render_executor
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def lookup(self, kind: str, document: Dict[str, Any]) -> Optional[Path]:
+        """Готовый файл из кеша без рендеринга (None, если его еще нет)"""
+        path = artifact_path(self.cache_dir, kind, document_hash(document))
+        return path if path.exists() else None
+
+    async def get_or_render(
+        self, kind: str, document: Dict[str, Any], force: bool = False
+    ) -> Path:
+        """
+        Путь к отрендеренному файлу: из кеша или после рендеринга в render_executor.
+        Одновременные запросы одного (kind, hash) ждут один рендеринг.
+        force=True рендерит заново и заменяет уже существующий файл кеша.
+        """
+        content_hash = document_hash(document)
+        path = artifact_path(self.cache_dir, kind, content_hash)
+        if path.exists() and not force:
+            self.hits += 1
+            RENDER_CACHE_REQUESTS.inc(kind=kind, result="hit")
+            return path
+
+        key = (kind, content_hash)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            RENDER_CACHE_REQUESTS.inc(kind=kind, result="coalesced")
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        RENDER_CACHE_REQUESTS.inc(kind=kind, result="miss")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            rendered = Path(
+                await self.executor.run(
+                    render_artifact, str(self.cache_dir), kind, document, content_hash, force
+                )
+            )
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.failed += 1
+            future.set_exception(e)
+            future.exception()  # ошибка уже передана вызывающему, ожидающие получат ее сами
+            raise
+        else:
+            future.set_result(rendered)
+            return rendered
+        finally:
+            self._inflight.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "renderer_version": RENDERER_VERSION,
+            "cache_dir": str(self.cache_dir),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "rendering": len(self._inflight),
+        }
+
+
+# Глобальный кеш рендеринга
+render_cache = RenderCache()
+
+
+async def prerender_profiles(
+    conn: sqlite3.Connection,
+    kinds: Iterable[str] = tuple(RENDER_KINDS),
+    department: Optional[str] = None,
+    limit: Optional[int] = None,
+    include_archived: bool = False,
+    cache: Optional[RenderCache] = None,
+    profile_ids: Optional[Iterable[str]] = None,
+    force: bool = False,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    @doc
+    Рендеринг MD/DOCX сохраненных профилей из profiles.profile_data: предварительный
+    (перед массовой выгрузкой) и массовый перерендеринг после изменения рендереров.
+
+    Пропускаются профили, у которых файл формата есть в индексе profile_files и
+    отрендерен текущей версией (RENDERER_VERSION); force=True заново рендерит все
+    выбранные файлы, в том числе уже готовые в кеше.
+    Рендеринг идет пачками по емкости пула cache.executor (процессы - см.
+    RenderExecutor), результаты индексируются с версией рендерера.
+
+    Args:
+      profile_ids: Только указанные профили (иначе - фильтры department/include_archived)
+      on_progress: Вызывается со статистикой после каждой пачки
+
+    Returns:
+      Dict: profiles, rendered, cached, skipped, failed, seconds, profiles_per_second,
+      artifacts_per_second
+
+    Examples:
+      python> stats = await prerender_profiles(conn, kinds=["docx"], limit=100)
+      python> stats = await prerender_profiles(conn, department="ДИТ", force=True)
+    """
+    cache = cache or render_cache
+    kinds = [kind for kind in kinds if kind in RENDER_KINDS]
+    storage = ProfileStorageService()
+    started = time.perf_counter()
+    stats: Dict[str, Any] = {
+        "renderer_version": RENDERER_VERSION,
+        "profiles": 0,
+        "rendered": 0,
+        "cached": 0,
+        "skipped": 0,
+        "failed": 0,
+    }
+
+    query = "SELECT id FROM profiles WHERE 1 = 1"
+    params: list = []
+    if profile_ids is not None:
+        profile_ids = list(profile_ids)
+        query += f" AND id IN ({','.join('?' * len(profile_ids))})"
+        params.extend(profile_ids)
+    elif not include_archived:
+        query += " AND status != 'archived'"
+    if department:
+        query += " AND department = ?"
+        params.append(department)
+    query += " ORDER BY created_at"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    selected_ids = [row["id"] for row in conn.execute(query, params).fetchall()]
+
+    # Актуальные файлы: проиндексированы текущей версией рендерера и есть на диске
+    current = set()
+    if not force:
+        current = {
+            (row["profile_id"], row["kind"])
+            for row in conn.execute(
+                "SELECT profile_id, kind, path FROM profile_files WHERE renderer_version = ?",
+                (RENDERER_VERSION,),
+            )
+            if Path(row["path"]).exists()
+        }
+
+    async def render_one(profile_id: str, kind: str, document: Dict[str, Any]) -> None:
+        cached = not force and cache.lookup(kind, document) is not None
+        try:
+            path = await cache.get_or_render(kind, document, force=force)
+        except Exception as e:
+            stats["failed"] += 1
+            logger.error(f"❌ Render {kind.upper()} failed for profile {profile_id}: {e}")
+            return
+        stats["cached" if cached else "rendered"] += 1
+        files = storage.describe_profile_files({kind: path})
+        files[kind]["renderer_version"] = RENDERER_VERSION
+        index_profile_files(conn, profile_id, files)
+
+    def update_throughput() -> None:
+        seconds = time.perf_counter() - started
+        stats["seconds"] = round(seconds, 2)
+        stats["profiles_per_second"] = round(stats["profiles"] / seconds, 2) if seconds else 0.0
+        stats["artifacts_per_second"] = (
+            round((stats["rendered"] + stats["cached"]) / seconds, 2) if seconds else 0.0
+        )
+
+    # Пачками по емкости пула: профили не загружаются в память все сразу
+    batch_size = max(1, cache.executor.capacity)
+    for offset in range(0, len(selected_ids), batch_size):
+        batch_ids = selected_ids[offset : offset + batch_size]
+        pending = [
+            (profile_id, kind)
+            for profile_id in batch_ids
+            for kind in kinds
+            if (profile_id, kind) not in current
+        ]
+        stats["profiles"] += len(batch_ids)
+        stats["skipped"] += len(batch_ids) * len(kinds) - len(pending)
+        if pending:
+            placeholders = ",".join("?" * len(batch_ids))
+            documents = {
+                row["id"]: profile_document(row["profile_data"], row["metadata_json"])
+                for row in conn.execute(
+                    f"SELECT id, profile_data, metadata_json FROM profiles WHERE id IN ({placeholders})",
+                    batch_ids,
+                )
+            }
+            await asyncio.gather(
+                *[render_one(profile_id, kind, documents[profile_id]) for profile_id, kind in pending]
+            )
+            conn.commit()
+        update_throughput()
+        if on_progress is not None:
+            on_progress(dict(stats, total=len(selected_ids)))
+
+    update_throughput()
+    logger.info(f"🎨 Render of stored profiles completed: {stats}")
+    return stats
@@ -0,0 +1,181 @@
+"""
+@doc
+Пул рендеринга профилей (Markdown, DOCX, JSON и запись файлов).
+
+Рендеринг - CPU-bound и блокирующий I/O, поэтому он выполняется вне event
+loop: в пуле потоков (по умолчанию) или процессов (RENDER_EXECUTOR_MODE=process,
+обходит GIL для python-docx). Очередь ограничена: одновременно в пуле не больше
+RENDER_WORKERS + RENDER_QUEUE_SIZE задач, остальные корутины ждут свободного
+места (backpressure) - воркер генерации не берет новые задачи, пока его
+результат не отрендерен, и рендеринг не накапливается в памяти.
+
+Examples:
+  python> rendered = await render_executor.run(renderer.render_files, result, dept, pos, pid)
+  python> render_executor.get_stats()["waiting"]
+  python> render_executor.shutdown()
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+RENDER_MODES = ("thread", "process")
+
+
+class RenderExecutor:
+    """
+    @doc Ограниченный пул потоков/процессов для рендеринга с backpressure.
+
+    В режиме process функция и аргументы передаются по pickle - используйте
+    функции уровня модуля (render_profile_files), а не методы объектов.
+
+    Examples:
+        python>
+        executor = RenderExecutor(mode="thread", workers=2, queue_size=8)
+        result = await executor.run(render_profile_files, base_path, result, dept, pos, pid)
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ):
+        self.mode = (mode or config.RENDER_EXECUTOR_MODE).lower()
+        if self.mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render executor mode: {self.mode}")
+        self.workers = max(1, workers or config.RENDER_WORKERS)
+        self.queue_size = max(0, config.RENDER_QUEUE_SIZE if queue_size is None else queue_size)
+
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        # Семафор привязан к event loop; в процессе может быть несколько loop (тесты, воркеры)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+        self._waiting = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "render_seconds_total": 0.0,
+        }
+
+    @property
+    def uses_processes(self) -> bool:
+        return self.mode == "process"
+
+    @property
+    def capacity(self) -> int:
+        """Задач в пуле одновременно: выполняемые + ожидающие в очереди"""
+        return self.workers + self.queue_size
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Выполнение fn(*args) в пуле. Ждет свободного места, если очередь заполнена.
+
+        Raises:
+            Исключение fn; asyncio.CancelledError при отмене ожидающей корутины
+            (уже начатый рендеринг дорабатывает в пуле)
+        """
+        semaphore = self._get_semaphore()
+        wait_start = time.monotonic()
+        self._waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        waited = time.monotonic() - wait_start
+        self._stats["wait_seconds_total"] += waited
+        self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+
+        self._in_flight += 1
+        self._stats["submitted"] += 1
+        render_start = time.monotonic()
+        try:
+            executor = self._get_executor()
+            future = executor.submit(fn, *args)
+            result = await asyncio.wrap_future(future)
+            self._stats["completed"] += 1
+            return result
+        except BrokenProcessPool:
+            logger.error("❌ Render process pool is broken, it will be recreated")
+            self._reset_executor()
+            self._stats["failed"] += 1
+            raise
+        except BaseException:
+            self._stats["failed"] += 1
+            raise
+        finally:
+            self._stats["render_seconds_total"] += time.monotonic() - render_start
+            self._in_flight -= 1
+            semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Метрики пула для /health"""
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            **{
+                key: round(value, 3) if isinstance(value, float) else value
+                for key, value in self._stats.items()
+            },
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Остановка пула (новый пул создается при следующем run)"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+            logger.info(f"🛑 Render executor ({self.mode}) stopped")
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.capacity)
+        return self._semaphore
+
+    def _get_executor(self) -> Executor:
+        with self._executor_lock:
+            if self._executor is None:
+                if self.uses_processes:
+                    # spawn: fork процесса с event loop, потоками и SQLite небезопасен
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="render"
+                    )
+                logger.info(
+                    f"🖨️ Render executor started: {self.workers} {self.mode} workers, "
+                    f"queue {self.queue_size}"
+                )
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Глобальный пул рендеринга процесса
+render_executor = RenderExecutor()
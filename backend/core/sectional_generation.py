@@ -0,0 +1,185 @@
+"""
+@doc
+Секционная генерация профиля: разбиение схемы на независимые группы секций.
+
+Вместо одного большого completion (ограниченного max_tokens) профиль
+генерируется несколькими параллельными запросами. Все запросы начинаются
+с одинаковых messages (общий кешируемый префикс ~100K токенов) и отличаются
+только финальной инструкцией и урезанной схемой structured output.
+Время генерации профиля = время самой медленной секции.
+
+Examples:
+  python> sections = plan_sections(response_format)
+  python> messages = build_section_messages(base_messages, sections[0])
+  python> profile = merge_sections({s.name: data for s, data in results}, sections)
+"""
+
+import copy
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .profile_schema import unwrap_schema
+
+# Группы секций профиля. Внутри группы поля связаны логически
+# (reasoning-поле и поле, которое оно обосновывает), между группами - независимы.
+SECTION_GROUPS: List[tuple] = [
+    (
+        "position_overview",
+        [
+            "reasoning_context_analysis",
+            "position_title",
+            "department_broad",
+            "department_specific",
+            "position_classification_reasoning",
+            "position_category",
+            "direct_manager",
+            "subordinates",
+            "primary_activity_type",
+        ],
+    ),
+    ("responsibilities", ["responsibility_areas_reasoning", "responsibility_areas"]),
+    (
+        "skills_and_qualifications",
+        [
+            "professional_skills_reasoning",
+            "professional_skills",
+            "corporate_competencies",
+            "personal_qualities",
+            "experience_and_education",
+        ],
+    ),
+    ("careerogram", ["careerogram_reasoning", "careerogram"]),
+    (
+        "provisioning_and_kpi",
+        [
+            "workplace_provisioning",
+            "performance_metrics_reasoning",
+            "performance_metrics",
+            "additional_information",
+            "quality_verification",
+            "metadata",
+        ],
+    ),
+]
+
+SECTION_INSTRUCTION = (
+    "РЕЖИМ СЕКЦИОННОЙ ГЕНЕРАЦИИ. Профиль собирается из нескольких частей, "
+    "которые генерируются параллельно. Сейчас сгенерируй ТОЛЬКО следующие поля "
+    "профиля: {fields}. Все остальные поля будут сгенерированы отдельно - "
+    "не включай их в ответ. Верни только JSON-объект с указанными полями, "
+    "строго по схеме."
+)
+
+
+@dataclass
+class SectionPlan:
+    """Одна группа секций для отдельного запроса"""
+
+    name: str
+    properties: List[str]
+    response_format: Optional[Dict[str, Any]] = None
+    schema: Dict[str, Any] = field(default_factory=dict)
+
+
+def plan_sections(
+    response_format: Optional[Dict[str, Any]],
+    groups: Optional[List[tuple]] = None,
+) -> List[SectionPlan]:
+    """
+    Разбиение схемы structured output на группы секций.
+
+    Поля схемы, не упомянутые в группах (например, после обновления схемы),
+    добавляются в первую группу - так ни одно поле не теряется.
+
+    Args:
+        response_format: response_format из конфигурации промпта (json_schema)
+        groups: Группы секций (по умолчанию SECTION_GROUPS)
+
+    Returns:
+        Список секций с урезанными response_format
+    """
+    groups = groups or SECTION_GROUPS
+    full_schema = unwrap_schema(response_format) if response_format else {}
+    schema_properties = list(full_schema.get("properties", {}).keys())
+
+    plans: List[SectionPlan] = []
+    assigned = set()
+    for name, properties in groups:
+        if schema_properties:
+            properties = [p for p in properties if p in schema_properties]
+        if properties:
+            plans.append(SectionPlan(name=name, properties=list(properties)))
+            assigned.update(properties)
+
+    unassigned = [p for p in schema_properties if p not in assigned]
+    if unassigned and plans:
+        plans[0].properties.extend(unassigned)
+
+    for plan in plans:
+        plan.schema = _subset_schema(full_schema, plan.properties)
+        plan.response_format = _subset_response_format(
+            response_format, plan.schema, plan.name
+        )
+    return plans
+
+
+def _subset_schema(schema: Dict[str, Any], properties: List[str]) -> Dict[str, Any]:
+    """Схема объекта, ограниченная заданными полями"""
+    if not schema:
+        return {}
+    subset = {k: v for k, v in schema.items() if k not in ("properties", "required", "propertyOrdering")}
+    subset["properties"] = {
+        name: copy.deepcopy(schema["properties"][name])
+        for name in properties
+        if name in schema.get("properties", {})
+    }
+    subset["required"] = [p for p in schema.get("required", []) if p in properties]
+    if "propertyOrdering" in schema:
+        subset["propertyOrdering"] = [p for p in schema["propertyOrdering"] if p in properties]
+    return subset
+
+
+def _subset_response_format(
+    response_format: Optional[Dict[str, Any]],
+    section_schema: Dict[str, Any],
+    section_name: str,
+) -> Optional[Dict[str, Any]]:
+    """response_format c урезанной схемой (или None, если structured output выключен)"""
+    if not response_format or "json_schema" not in response_format:
+        return response_format
+
+    json_schema = {k: v for k, v in response_format["json_schema"].items() if k != "schema"}
+    json_schema["name"] = f"{json_schema.get('name', 'profile')}_{section_name}"[:64]
+    json_schema["schema"] = section_schema
+    return {**response_format, "json_schema": json_schema}
+
+
+def build_section_messages(
+    messages: List[Dict[str, str]], section: SectionPlan
+) -> List[Dict[str, str]]:
+    """
+    Messages для секции: общий префикс + инструкция секции в конце.
+
+    Префикс не изменяется, поэтому провайдер может переиспользовать
+    кеш промпта между параллельными запросами секций.
+    """
+    instruction = SECTION_INSTRUCTION.format(fields=", ".join(section.properties))
+    return [*messages, {"role": "user", "content": instruction}]
+
+
+def merge_sections(
+    section_results: Dict[str, Dict[str, Any]], sections: List[SectionPlan]
+) -> Dict[str, Any]:
+    """
+    Объединение результатов секций в единый профиль в порядке полей схемы.
+
+    Лишние поля, которые модель вернула вне своей секции, игнорируются -
+    каждое поле берется только из секции, которая за него отвечает.
+    """
+    merged: Dict[str, Any] = {}
+    for section in sections:
+        data = section_results.get(section.name) or {}
+        for prop in section.properties:
+            if prop in data:
+                merged[prop] = data[prop]
+    return merged
@@ -9,15 +9,23 @@ Core service для управления файловой структурой 
 - Блок/Департамент/Отдел/Группа/Должность/ВремяСоздания/файлы
 - Связывает файлы с записями в базе данных через уникальные ID
 - Управляет версионностью профилей
+- Индексирует фактические пути, размеры и SHA-256 файлов в таблице profile_files,
+  поэтому скачивание - один поиск по первичному ключу без пересчета путей
 
 Examples:
   python> storage = ProfileStorageService()
   python> path = storage.create_profile_path("Группа анализа данных", "Аналитик BI", "v1.0")
   python> storage.save_profile_files(path, json_data, md_content)
+  python> files = storage.describe_profile_files({"json": json_path, "md": md_path})
+  python> index_profile_files(conn, profile_id, files)
+  python> record = lookup_profile_file(conn, profile_id, "docx")
 """
 
+import hashlib
 import os
 import json
+import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple, List
@@ -25,6 +33,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Форматы файлов профиля (значения profile_files.kind)
+PROFILE_FILE_KINDS = ("json", "md", "docx")
+
 
 class ProfileStorageService:
     """
@@ -191,7 +202,7 @@ class ProfileStorageService:
 
         return sanitized
 
-    def create_profile_directory(
+    def profile_directory_path(
         self,
         department: str,
         position: str,
@@ -200,7 +211,7 @@ class ProfileStorageService:
     ) -> Path:
         """
         @doc
-        Создает полную структуру директорий для профиля должности.
+        Путь к директории экземпляра профиля (без создания на диске).
 
         Args:
           department: Департамент/группа из оргструктуры
@@ -209,10 +220,10 @@ class ProfileStorageService:
           profile_id: Уникальный ID профиля (для связи с БД)
 
         Returns:
-          Path: Путь к созданной директории профиля
+          Path: Путь к директории профиля
 
         Examples:
-          python> path = storage.create_profile_directory("Группа анализа данных", "Аналитик BI")
+          python> path = storage.profile_directory_path("Группа анализа данных", "Аналитик BI")
         """
         if timestamp is None:
             timestamp = datetime.now()
@@ -241,6 +252,32 @@ class ProfileStorageService:
         full_path = self.base_path
         for component in path_components:
             full_path = full_path / component
+        return full_path
+
+    def create_profile_directory(
+        self,
+        department: str,
+        position: str,
+        timestamp: Optional[datetime] = None,
+        profile_id: Optional[str] = None,
+    ) -> Path:
+        """
+        @doc
+        Создает полную структуру директорий для профиля должности.
+
+        Args:
+          department: Департамент/группа из оргструктуры
+          position: Название должности
+          timestamp: Время создания (по умолчанию - текущее)
+          profile_id: Уникальный ID профиля (для связи с БД)
+
+        Returns:
+          Path: Путь к созданной директории профиля
+
+        Examples:
+          python> path = storage.create_profile_directory("Группа анализа данных", "Аналитик BI")
+        """
+        full_path = self.profile_directory_path(department, position, timestamp, profile_id)
 
         # Создаем директории
         try:
@@ -251,87 +288,233 @@ class ProfileStorageService:
             logger.error(f"❌ Error creating directory {full_path}: {e}")
             raise
 
+    def profile_file_contents(
+        self,
+        directory: Path,
+        json_content: Dict[str, Any],
+        md_content: Optional[str],
+        docx_content: Optional[bytes] = None,
+    ) -> Dict[str, Tuple[Path, bytes]]:
+        """
+        @doc
+        Пути и содержимое файлов профиля в памяти (kind -> (путь, байты)).
+
+        Имена файлов совпадают с именем директории экземпляра. Форматы без
+        содержимого (MD/DOCX при ленивом рендеринге) пропускаются.
+
+        Examples:
+          python> contents = storage.profile_file_contents(directory, result, md, docx_bytes)
+          python> contents["json"][0].name
+        """
+        instance_name = directory.name
+        contents = {
+            "json": (
+                directory / f"{instance_name}.json",
+                json.dumps(json_content, ensure_ascii=False, indent=2).encode("utf-8"),
+            )
+        }
+        if md_content is not None:
+            contents["md"] = (directory / f"{instance_name}.md", md_content.encode("utf-8"))
+        if docx_content:
+            contents["docx"] = (directory / f"{instance_name}.docx", docx_content)
+        return contents
+
     def save_profile_files(
         self,
         directory: Path,
         json_content: Dict[str, Any],
-        md_content: str,
-        docx_content: Optional[str] = None,
+        md_content: Optional[str],
+        docx_content: Optional[bytes] = None,
         profile_id: Optional[str] = None,
     ) -> Tuple[Path, Path, Path]:
         """
         @doc
         Сохраняет JSON, MD и DOCX файлы профиля в указанную директорию.
 
+        Каждый файл записывается атомарно (временный файл в той же директории +
+        rename): после сбоя на диске либо старая, либо полная новая версия.
+        Генерация использует отложенную запись через file_write_queue.
+
         Args:
           directory: Путь к директории профиля
           json_content: Содержимое JSON профиля
-          md_content: Содержимое MD файла
-          docx_content: Путь к созданному DOCX файлу (optional)
+          md_content: Содержимое MD файла (None - MD не сохраняется, ленивый рендеринг)
+          docx_content: Содержимое DOCX файла (optional)
           profile_id: ID профиля для связи с БД
 
         Returns:
           Tuple[Path, Path, Path]: Пути к JSON, MD и DOCX файлам
 
         Examples:
-          python> json_path, md_path = storage.save_profile_files(dir_path, data, md)
+          python> json_path, md_path, docx_path = storage.save_profile_files(dir_path, data, md)
         """
+        instance_name = directory.name
+        contents = self.profile_file_contents(directory, json_content, md_content, docx_content)
         try:
-            # Извлекаем имя из папки для файлов
-            instance_name = directory.name
-
-            # Пути к файлам
-            json_path = directory / f"{instance_name}.json"
-            md_path = directory / f"{instance_name}.md"
-            docx_path = directory / f"{instance_name}.docx"
-
-            # Метаинформация о файловых путях теперь не сохраняется -
-            # пути вычисляются детерминистически через get_profile_paths()
-
-            # Сохраняем JSON
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(json_content, f, ensure_ascii=False, indent=2)
-
-            # Сохраняем MD
-            with open(md_path, "w", encoding="utf-8") as f:
-                f.write(md_content)
-
-            # Сохраняем DOCX если предоставлен
-            if docx_content:
-                import shutil
-                import os
-
-                logger.info(f"📄 Copying DOCX from {docx_content} to {docx_path}")
-
-                if not os.path.exists(docx_content):
-                    logger.error(f"❌ Source DOCX file does not exist: {docx_content}")
-                    raise FileNotFoundError(
-                        f"Source DOCX file not found: {docx_content}"
-                    )
-
-                source_size = os.path.getsize(docx_content)
-                logger.info(f"📊 Source DOCX size: {source_size} bytes")
-
-                shutil.copy2(docx_content, docx_path)
-
-                if os.path.exists(docx_path):
-                    dest_size = os.path.getsize(docx_path)
-                    logger.info(
-                        f"✅ DOCX copied successfully: {docx_path.name} ({dest_size} bytes)"
-                    )
-                else:
-                    logger.error(f"❌ DOCX copy failed: destination file not created")
-                    raise FileNotFoundError(f"Failed to copy DOCX to {docx_path}")
-
-            logger.info(
-                f"✅ Saved profile files: {json_path.name}, {md_path.name}, {docx_path.name if docx_content else 'no DOCX'}"
+            directory.mkdir(parents=True, exist_ok=True)
+            for path, data in contents.values():
+                atomic_write_bytes(path, data)
+
+            saved_names = ", ".join(path.name for path, _ in contents.values())
+            logger.info(f"✅ Saved profile files: {saved_names}")
+            return (
+                directory / f"{instance_name}.json",
+                directory / f"{instance_name}.md",
+                directory / f"{instance_name}.docx",
             )
-            return json_path, md_path, docx_path
 
         except Exception as e:
             logger.error(f"❌ Error saving profile files: {e}")
             raise
 
+    def describe_content(self, path: Path, data: bytes) -> Dict[str, Any]:
+        """
+        @doc
+        Запись индекса для содержимого, которое еще будет записано (без чтения с диска).
+
+        Examples:
+          python> storage.describe_content(json_path, payload)
+        """
+        return {
+            "path": str(Path(path).resolve()),
+            "size_bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+
+    def describe_file(self, path: Path) -> Dict[str, Any]:
+        """
+        @doc
+        Запись индекса для файла: абсолютный путь, размер и SHA-256.
+
+        Examples:
+          python> storage.describe_file(json_path)
+          python> # {'path': '/app/generated_profiles/.../x.json', 'size_bytes': 15420, 'sha256': '...'}
+        """
+        path = Path(path).resolve()
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return {
+            "path": str(path),
+            "size_bytes": path.stat().st_size,
+            "sha256": digest.hexdigest(),
+        }
+
+    def describe_profile_files(
+        self, paths: Dict[str, Optional[Path]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        @doc
+        Записи индекса для сохраненных файлов профиля (kind -> запись).
+
+        Несуществующие и не созданные (None) файлы пропускаются.
+
+        Examples:
+          python> storage.describe_profile_files({"json": json_path, "md": md_path, "docx": None})
+        """
+        files = {}
+        for kind, path in paths.items():
+            if path is not None and Path(path).exists():
+                files[kind] = self.describe_file(Path(path))
+        return files
+
+
+def atomic_write_bytes(path: Path, data: bytes, fsync: bool = False) -> None:
+    """
+    @doc
+    Атомарная запись файла: временный файл в той же директории и os.replace.
+
+    Читатели видят либо прежний файл, либо новый целиком, но не частично
+    записанный. fsync=True дополнительно сбрасывает данные на диск до rename.
+
+    Examples:
+      python> atomic_write_bytes(Path("profile.json"), payload, fsync=True)
+    """
+    path = Path(path)
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+def index_profile_files(
+    conn: sqlite3.Connection, profile_id: str, files: Optional[Dict[str, Dict[str, Any]]]
+) -> int:
+    """
+    @doc
+    Запись файлов профиля в индекс profile_files (без commit - в транзакции вызывающего).
+
+    Args:
+      conn: Соединение с БД
+      profile_id: ID профиля
+      files: kind -> {"path", "size_bytes", "sha256"} (см. describe_profile_files),
+        для MD/DOCX - необязательный "renderer_version"
+
+    Returns:
+      int: Количество проиндексированных файлов
+
+    Examples:
+      python> index_profile_files(conn, profile_id, result["metadata"]["files"])
+    """
+    rows = [
+        (
+            profile_id,
+            kind,
+            info["path"],
+            info["size_bytes"],
+            info["sha256"],
+            datetime.now().isoformat(),
+            info.get("renderer_version"),
+        )
+        for kind, info in (files or {}).items()
+        if kind in PROFILE_FILE_KINDS
+    ]
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO profile_files
+            (profile_id, kind, path, size_bytes, sha256, created_at, renderer_version)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """,
+        rows,
+    )
+    return len(rows)
+
+
+def lookup_profile_file(
+    conn: sqlite3.Connection, profile_id: str, kind: str
+) -> Optional[Dict[str, Any]]:
+    """
+    @doc
+    Профиль и его файл указанного формата одним запросом по первичному ключу.
+
+    Returns:
+      Optional[Dict]: None, если профиля нет; path = None, если файл не проиндексирован
+      (профили, сохраненные до появления индекса)
+
+    Examples:
+      python> record = lookup_profile_file(conn, profile_id, "md")
+      python> record["path"], record["position"]
+    """
+    row = conn.execute(
+        """
+        SELECT p.id, p.department, p.position, p.created_at,
+               f.path, f.size_bytes, f.sha256, f.renderer_version
+        FROM profiles p
+        LEFT JOIN profile_files f ON f.profile_id = p.id AND f.kind = ?
+        WHERE p.id = ?
+    """,
+        (kind, profile_id),
+    ).fetchone()
+    return dict(row) if row is not None else None
+
 
 # Методы find_profile_files() и get_profile_versions() удалены -
 # теперь информация о профилях получается из базы данных через API
@@ -0,0 +1,308 @@
+"""
+@doc
+Фасад трейсинга вне горячего пути генерации.
+
+События трейсинга (метаданные генераций, ошибки вызовов) складываются
+в ограниченную очередь в памяти процесса и отправляются пачками фоновым
+потоком. Генерация профиля никогда не ждет бэкенд наблюдаемости:
+- emit() не блокирует - при переполнении очереди событие отбрасывается (счетчик dropped)
+- ошибки экспорта только считаются и логируются
+- сэмплирование: все неуспешные вызовы, заданная доля успешных (решение по trace_id)
+- режим null (TRACING_MODE=null) для нагрузочных тестов - события не отправляются
+
+Получение промпта из Langfuse тоже вынесено в поток с таймаутом
+(fetch_prompt_nonblocking), чтобы медленный Langfuse не задерживал запросы.
+
+Examples:
+  python> tracing.attach_langfuse(langfuse_client)
+  python> tracing.emit(TraceEvent(name="llm_generation", success=True, metadata={...}))
+  python> tracing.get_stats()  # {"queued": 0, "exported": 10, "dropped": 0, ...}
+"""
+
+import asyncio
+import hashlib
+import logging
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+TRACING_MODES = ("langfuse", "null")
+
+
+@dataclass
+class TraceEvent:
+    """Событие трейсинга, привязанное к trace (если он известен на момент вызова)"""
+
+    name: str
+    success: bool = True
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    usage_details: Optional[Dict[str, int]] = None
+    trace_id: Optional[str] = None
+    parent_observation_id: Optional[str] = None
+    level: str = "DEFAULT"
+    status_message: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+
+class TraceSampler:
+    """
+    Сэмплирование событий: неуспешные - с failure_rate (обычно 100%),
+    успешные - с success_rate. Решение детерминировано по trace_id,
+    поэтому все события одного trace сохраняются или отбрасываются вместе.
+    """
+
+    def __init__(self, success_rate: float = 1.0, failure_rate: float = 1.0):
+        self.success_rate = max(0.0, min(1.0, success_rate))
+        self.failure_rate = max(0.0, min(1.0, failure_rate))
+
+    def should_sample(self, event: TraceEvent) -> bool:
+        rate = self.success_rate if event.success else self.failure_rate
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        if event.trace_id:
+            bucket = int(hashlib.sha256(event.trace_id.encode("utf-8")).hexdigest()[:8], 16)
+            return (bucket % 10_000) < rate * 10_000
+        return random.random() < rate
+
+
+class NullExporter:
+    """Экспортер, который ничего не отправляет (нагрузочные тесты, Langfuse не настроен)"""
+
+    name = "null"
+
+    def export(self, events: List[TraceEvent]) -> None:
+        return None
+
+    def flush(self) -> None:
+        return None
+
+
+class LangfuseExporter:
+    """Отправка событий в Langfuse как events внутри соответствующих trace"""
+
+    name = "langfuse"
+
+    def __init__(self, langfuse_client: Any):
+        self.langfuse = langfuse_client
+
+    def export(self, events: List[TraceEvent]) -> None:
+        for event in events:
+            trace_context = None
+            if event.trace_id:
+                trace_context = {"trace_id": event.trace_id}
+                if event.parent_observation_id:
+                    trace_context["parent_span_id"] = event.parent_observation_id
+
+            metadata = dict(event.metadata)
+            if event.usage_details:
+                metadata["usage_details"] = event.usage_details
+
+            self.langfuse.create_event(
+                trace_context=trace_context,
+                name=event.name,
+                metadata=metadata,
+                level=event.level,
+                status_message=event.status_message,
+            )
+
+    def flush(self) -> None:
+        self.langfuse.flush()
+
+
+class TracingFacade:
+    """
+    @doc Ограниченная очередь событий трейсинга с фоновой отправкой пачками.
+
+    Examples:
+        python>
+        facade = TracingFacade(max_queue_size=1000, batch_size=50)
+        facade.attach_langfuse(langfuse)
+        facade.emit(TraceEvent(name="llm_generation", metadata={"model": "..."}))
+        facade.shutdown(timeout=5.0)
+    """
+
+    def __init__(
+        self,
+        mode: str = "langfuse",
+        max_queue_size: int = 1000,
+        batch_size: int = 50,
+        flush_interval: float = 2.0,
+        sampler: Optional[TraceSampler] = None,
+    ):
+        if mode not in TRACING_MODES:
+            raise ValueError(f"Unsupported tracing mode '{mode}', expected one of {TRACING_MODES}")
+
+        self.mode = mode
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.sampler = sampler or TraceSampler()
+        self.exporter: Any = NullExporter()
+
+        self._queue: "queue.Queue[TraceEvent]" = queue.Queue(maxsize=max(1, max_queue_size))
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stats = {"emitted": 0, "sampled_out": 0, "dropped": 0, "exported": 0, "export_errors": 0, "batches": 0}
+
+    @classmethod
+    def from_config(cls) -> "TracingFacade":
+        """Фасад с настройками TRACING_* из config"""
+        return cls(
+            mode=config.TRACING_MODE,
+            max_queue_size=config.TRACING_QUEUE_SIZE,
+            batch_size=config.TRACING_BATCH_SIZE,
+            flush_interval=config.TRACING_FLUSH_INTERVAL,
+            sampler=TraceSampler(
+                success_rate=config.TRACING_SUCCESS_SAMPLE_RATE,
+                failure_rate=config.TRACING_FAILURE_SAMPLE_RATE,
+            ),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Отправляются ли события куда-либо (иначе emit - почти бесплатный no-op)"""
+        return self.mode != "null" and not isinstance(self.exporter, NullExporter)
+
+    def attach_langfuse(self, langfuse_client: Any) -> None:
+        """Подключение Langfuse экспортера (игнорируется в режиме null)"""
+        if self.mode == "null" or langfuse_client is None:
+            return
+        self.exporter = LangfuseExporter(langfuse_client)
+
+    def emit(self, event: TraceEvent) -> bool:
+        """
+        Постановка события в очередь без блокировки.
+
+        Returns:
+            True если событие принято в очередь
+        """
+        if not self.enabled:
+            return False
+
+        with self._lock:
+            self._stats["emitted"] += 1
+            if not self.sampler.should_sample(event):
+                self._stats["sampled_out"] += 1
+                return False
+
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            return False
+
+    def _ensure_worker(self) -> None:
+        if self._worker and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(
+                target=self._run, name="tracing-exporter", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self) -> None:
+        """Цикл фонового потока: собрать пачку (до batch_size или flush_interval) и отправить"""
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._collect_batch()
+            if batch:
+                self._export_batch(batch)
+
+    def _collect_batch(self) -> List[TraceEvent]:
+        batch: List[TraceEvent] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+            if self._stop.is_set():
+                # При остановке дочитываем очередь без ожидания
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                break
+        return batch
+
+    def _export_batch(self, batch: List[TraceEvent]) -> None:
+        try:
+            self.exporter.export(batch)
+            self.exporter.flush()
+            with self._lock:
+                self._stats["exported"] += len(batch)
+                self._stats["batches"] += 1
+        except Exception as e:
+            with self._lock:
+                self._stats["export_errors"] += len(batch)
+            logger.warning(f"⚠️ Tracing export failed for {len(batch)} events: {e}")
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Остановка фонового потока с попыткой отправить оставшиеся события"""
+        self._stop.set()
+        if self._worker and self._worker.is_alive():
+            self._worker.join(timeout=timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Счетчики фасада для health/метрик"""
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "exporter": self.exporter.name,
+                "queued": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                **self._stats,
+            }
+
+
+async def fetch_prompt_nonblocking(
+    langfuse_client: Any, prompt_name: str, label: str = "production", timeout: Optional[float] = None
+) -> Optional[Any]:
+    """
+    Получение промпта из Langfuse в отдельном потоке с ограничением по времени.
+
+    SDK Langfuse кеширует промпты и обновляет их в фоне, но первый запрос
+    (и запросы после истечения кеша без stale-копии) выполняется синхронно.
+
+    Returns:
+        Объект промпта или None (таймаут / ошибка - используется локальный fallback)
+    """
+    timeout = config.TRACING_PROMPT_FETCH_TIMEOUT if timeout is None else timeout
+    try:
+        return await asyncio.wait_for(
+            asyncio.to_thread(langfuse_client.get_prompt, prompt_name, label=label),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"⚠️ Langfuse prompt fetch exceeded {timeout}s, using local fallback",
+            extra={"prompt_name": prompt_name},
+        )
+    except Exception as e:
+        logger.warning(
+            "Failed to get prompt from Langfuse",
+            extra={"error": str(e), "prompt_name": prompt_name, "error_type": type(e).__name__},
+        )
+    return None
+
+
+# Глобальный фасад трейсинга (один фоновый поток на процесс)
+tracing = TracingFacade.from_config()
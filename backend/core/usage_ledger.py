@@ -0,0 +1,306 @@
+"""
+@doc
+Журнал использования LLM: одна строка на каждый вызов модели.
+
+Append-only таблица llm_usage_ledger в SQLite хранит модель, версию промпта,
+токены по категориям (prompt / cached / completion / reasoning), задержку,
+количество повторов и стоимость. Контекст вызова (задача, пользователь,
+профиль) задается через bind_usage_context() на уровне API и автоматически
+подхватывается LLMClient для всех вызовов внутри генерации.
+
+Rollup агрегирует журнал по пути бизнес-единицы, пользователю, дню,
+версии промпта или модели.
+
+Examples:
+  python> with bind_usage_context(task_id=task_id, user_id=user_id):
+  python>     await generator.generate_profile(...)
+  python> usage_ledger.rollup(group_by="unit", unit_depth=2)
+"""
+
+import contextvars
+import logging
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_GROUPS = ("unit", "user", "day", "prompt_version", "model")
+
+# Контекст текущей генерации (task_id, user_id, profile_id), наследуется asyncio задачами
+_usage_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar(
+    "llm_usage_context", default={}
+)
+
+
+@contextmanager
+def bind_usage_context(**fields: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Привязка контекста к вызовам LLM внутри блока.
+
+    Args:
+        **fields: task_id, user_id, profile_id и т.п.
+    """
+    context = {**_usage_context.get(), **fields}
+    token = _usage_context.set(context)
+    try:
+        yield context
+    finally:
+        _usage_context.reset(token)
+
+
+def get_usage_context() -> Dict[str, Any]:
+    """Текущий контекст вызовов LLM"""
+    return dict(_usage_context.get())
+
+
+@dataclass
+class UsageRecord:
+    """Одна запись журнала (один вызов LLM)"""
+
+    model: str
+    prompt_name: Optional[str] = None
+    prompt_version: Optional[str] = None
+    generation_mode: str = "single"
+    section: Optional[str] = None
+    department: Optional[str] = None
+    department_path: Optional[str] = None
+    position: Optional[str] = None
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    reasoning_tokens: int = 0
+    total_tokens: int = 0
+    cost_usd: Optional[float] = None
+    latency_ms: float = 0.0
+    retries: int = 0
+    finish_reason: Optional[str] = None
+    success: bool = True
+    error_type: Optional[str] = None
+    response_id: Optional[str] = None
+    task_id: Optional[str] = None
+    user_id: Optional[int] = None
+    profile_id: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    @property
+    def cache_hit(self) -> bool:
+        return self.cached_tokens > 0
+
+    @classmethod
+    def from_response(
+        cls,
+        response: Any,
+        model: str,
+        latency_seconds: float,
+        retries: int = 0,
+        **fields: Any,
+    ) -> "UsageRecord":
+        """
+        Построение записи из ChatCompletion ответа OpenAI SDK.
+
+        Детали токенов (cached, reasoning) - объявленные поля CompletionUsage;
+        model_extra используется только как запасной вариант. cost OpenRouter
+        лежит в model_extra.
+        """
+        usage = getattr(response, "usage", None)
+        extra = (getattr(usage, "model_extra", None) or {}) if usage else {}
+        prompt_details = _usage_details(usage, extra, "prompt_tokens_details")
+        completion_details = _usage_details(usage, extra, "completion_tokens_details")
+        choices = getattr(response, "choices", None) or []
+
+        return cls(
+            model=getattr(response, "model", None) or model,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            cached_tokens=_detail(prompt_details, "cached_tokens"),
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            reasoning_tokens=_detail(completion_details, "reasoning_tokens"),
+            total_tokens=getattr(usage, "total_tokens", 0) or 0,
+            cost_usd=extra.get("cost", getattr(usage, "cost", None)),
+            latency_ms=round(latency_seconds * 1000, 1),
+            retries=retries,
+            finish_reason=choices[0].finish_reason if choices else None,
+            response_id=getattr(response, "id", None),
+            **fields,
+        )
+
+
+def _usage_details(usage: Any, extra: Dict[str, Any], name: str) -> Any:
+    """Детали токенов: атрибут CompletionUsage, затем model_extra"""
+    details = getattr(usage, name, None)
+    if details is None:
+        details = extra.get(name)
+    return details
+
+
+def _detail(details: Any, name: str) -> int:
+    """Счетчик из деталей токенов (pydantic модель или dict)"""
+    if details is None:
+        return 0
+    if isinstance(details, dict):
+        return details.get(name) or 0
+    return getattr(details, name, None) or 0
+
+
+class UsageLedger:
+    """
+    @doc Append-only журнал вызовов LLM в SQLite с rollup запросами.
+
+    Запись в журнал никогда не прерывает генерацию: ошибки БД только логируются.
+    Если DatabaseManager не инициализирован (CLI скрипты), запись пропускается.
+
+    Examples:
+        python>
+        ledger = UsageLedger()
+        ledger.record(UsageRecord(model="google/gemini-2.5-flash", prompt_tokens=1000))
+        ledger.rollup(group_by="day")
+    """
+
+    def __init__(self, db_manager: Optional[Any] = None):
+        self._db_manager = db_manager
+
+    def _get_db(self) -> Optional[Any]:
+        if self._db_manager is not None:
+            return self._db_manager
+        from ..models.database import db_manager
+
+        return db_manager
+
+    def record(self, entry: UsageRecord) -> bool:
+        """
+        Добавление записи в журнал.
+
+        Поля контекста (task_id, user_id, profile_id), не заданные явно,
+        берутся из bind_usage_context().
+
+        Returns:
+            True если запись сохранена
+        """
+        db = self._get_db()
+        if db is None:
+            return False
+
+        for key, value in get_usage_context().items():
+            if hasattr(entry, key) and getattr(entry, key) is None:
+                setattr(entry, key, value)
+
+        try:
+            data = asdict(entry)
+            data["cache_hit"] = entry.cache_hit
+            columns = ", ".join(data)
+            placeholders = ", ".join("?" for _ in data)
+            conn = db.get_connection()
+            conn.execute(
+                f"INSERT INTO llm_usage_ledger ({columns}) VALUES ({placeholders})",
+                tuple(data.values()),
+            )
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to record LLM usage: {e}")
+            return False
+
+    def rollup(
+        self,
+        group_by: str = "day",
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        unit_prefix: Optional[str] = None,
+        unit_depth: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Агрегация журнала.
+
+        Args:
+            group_by: unit | user | day | prompt_version | model
+            date_from: Начало периода (ISO дата, включительно)
+            date_to: Конец периода (ISO дата, включительно)
+            unit_prefix: Только бизнес-единицы внутри этого пути
+            unit_depth: Для group_by=unit - глубина пути (1 = блок, 2 = департамент...)
+
+        Returns:
+            Список групп с суммами токенов, стоимостью, задержками и долей кеш-попаданий
+        """
+        if group_by not in ROLLUP_GROUPS:
+            raise ValueError(f"Unsupported group_by '{group_by}', expected one of {ROLLUP_GROUPS}")
+
+        db = self._get_db()
+        if db is None:
+            return []
+
+        key_sql = {
+            "unit": "COALESCE(department_path, department, '')",
+            "user": "COALESCE(CAST(user_id AS TEXT), '')",
+            "day": "DATE(created_at)",
+            "prompt_version": "COALESCE(prompt_name, '') || ':' || COALESCE(prompt_version, '')",
+            "model": "model",
+        }[group_by]
+
+        conditions, params = [], []
+        if date_from:
+            conditions.append("DATE(created_at) >= DATE(?)")
+            params.append(date_from)
+        if date_to:
+            conditions.append("DATE(created_at) <= DATE(?)")
+            params.append(date_to)
+        if unit_prefix:
+            conditions.append("(department_path = ? OR department_path LIKE ?)")
+            params.extend([unit_prefix, f"{unit_prefix}/%"])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        cursor = db.get_connection().execute(
+            f"""
+            SELECT
+                {key_sql} AS group_key,
+                COUNT(*) AS calls,
+                SUM(CASE WHEN success THEN 0 ELSE 1 END) AS failed_calls,
+                SUM(prompt_tokens) AS prompt_tokens,
+                SUM(cached_tokens) AS cached_tokens,
+                SUM(completion_tokens) AS completion_tokens,
+                SUM(reasoning_tokens) AS reasoning_tokens,
+                SUM(total_tokens) AS total_tokens,
+                SUM(COALESCE(cost_usd, 0)) AS cost_usd,
+                SUM(latency_ms) AS latency_ms_sum,
+                MAX(latency_ms) AS latency_ms_max,
+                SUM(retries) AS retries,
+                SUM(CASE WHEN cache_hit THEN 1 ELSE 0 END) AS cache_hits,
+                COUNT(DISTINCT profile_id) AS profiles
+            FROM llm_usage_ledger
+            {where}
+            GROUP BY group_key
+            """,
+            params,
+        )
+        rows = [dict(row) for row in cursor.fetchall()]
+
+        if group_by == "unit" and unit_depth:
+            rows = self._collapse_unit_depth(rows, unit_depth)
+
+        for row in rows:
+            calls = row["calls"] or 1
+            row["avg_latency_ms"] = round(row.pop("latency_ms_sum") / calls, 1)
+            row["cache_hit_ratio"] = round(row["cache_hits"] / calls, 3)
+            row["cost_usd"] = round(row["cost_usd"], 6)
+
+        return sorted(rows, key=lambda r: r["cost_usd"], reverse=True)
+
+    @staticmethod
+    def _collapse_unit_depth(rows: List[Dict[str, Any]], depth: int) -> List[Dict[str, Any]]:
+        """Объединение путей бизнес-единиц до заданной глубины дерева"""
+        summed = ("calls", "failed_calls", "prompt_tokens", "cached_tokens", "completion_tokens",
+                  "reasoning_tokens", "total_tokens", "cost_usd", "latency_ms_sum", "retries",
+                  "cache_hits", "profiles")
+        collapsed: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            parts = [p for p in (row["group_key"] or "").split("/") if p]
+            key = "/".join(parts[:depth])
+            target = collapsed.setdefault(key, {"group_key": key, "latency_ms_max": 0.0, **{k: 0 for k in summed}})
+            for name in summed:
+                target[name] += row[name] or 0
+            target["latency_ms_max"] = max(target["latency_ms_max"], row["latency_ms_max"] or 0.0)
+        return list(collapsed.values())
+
+
+# Глобальный экземпляр журнала
+usage_ledger = UsageLedger()
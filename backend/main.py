@@ -17,22 +17,34 @@ import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 # Импорты для аутентификации, каталога, генерации и управления профилями
 from .api.auth import auth_router
 from .api.catalog import catalog_router
 from .api.organization import organization_router
-from .api.generation import router as generation_router, initialize_generation_system
+from .api.generation import (
+    router as generation_router,
+    initialize_generation_system,
+    readiness_monitor,
+    shutdown_generation_system,
+)
 from .api.profiles import router as profiles_router
 from .api.dashboard import dashboard_router
+from .api.usage import usage_router
 from .api.middleware import RequestLoggingMiddleware, SecurityHeadersMiddleware
 from .utils.exception_handlers import setup_exception_handlers
 from .core.config import config
 from .core.organization_cache import organization_cache
+from .core.tracing import tracing
+from .core.metrics import metrics_registry, refresh_runtime_gauges
+from .core.file_write_queue import file_write_queue
+from .core.render_cache import render_cache
+from .core.render_executor import render_executor
 from .models.database import initialize_db_manager
 from .services.auth_service import initialize_auth_service
 from .services.catalog_service import initialize_catalog_service
+from .services.generation_queue import generation_queue
 
 # Настройка логирования
 logging.basicConfig(
@@ -87,6 +99,10 @@ async def lifespan(app: FastAPI):
 
     # Shutdown: Очистка ресурсов
     logger.info("🛑 Shutting down HR Profile Generator API...")
+    await shutdown_generation_system()
+    render_executor.shutdown()
+    file_write_queue.shutdown()
+    tracing.shutdown(timeout=5.0)
     app_components.clear()
 
 
@@ -186,6 +202,12 @@ async def health_check() -> Dict[str, Any]:
                 "openrouter_configured": config.openrouter_configured,
                 "langfuse_configured": config.langfuse_configured,
             },
+            "system_readiness": readiness_monitor.snapshot(),
+            "tracing": tracing.get_stats(),
+            "generation_result_store": generation_queue.result_store.get_stats(),
+            "render_executor": render_executor.get_stats(),
+            "render_cache": render_cache.get_stats(),
+            "file_write_queue": file_write_queue.get_stats(),
         }
 
         logger.info("💚 Health check successful")
@@ -204,6 +226,22 @@ async def health_check() -> Dict[str, Any]:
         )
 
 
+# Метрики Prometheus
+@app.get("/metrics", tags=["System Health"], response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """
+    Метрики конвейера генерации в формате Prometheus (text exposition 0.0.4).
+
+    Гистограммы стадий (profile_generation_stage_seconds), ожидания в очереди,
+    длительности задач и запросов к LLM, gauges выполняемых задач и счетчики токенов.
+    Метрики в памяти процесса: процессы backend.worker считают свои задачи отдельно.
+    """
+    refresh_runtime_gauges(generation_queue.count_by_status(), render_executor.get_stats())
+    return PlainTextResponse(
+        metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 # Root endpoint с информацией о API
 @app.get("/", tags=["Root"])
 async def root() -> Dict[str, Any]:
@@ -239,6 +277,7 @@ app.include_router(organization_router)  # НОВЫЙ: path-based endpoints дл
 app.include_router(generation_router)
 app.include_router(profiles_router)
 app.include_router(dashboard_router)
+app.include_router(usage_router)
 
 
 if __name__ == "__main__":
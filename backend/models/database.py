@@ -8,6 +8,12 @@ SQLite модели базы данных для системы генераци
 - organization_cache: Кеш организационной структуры
 - users: Пользователи системы (простая аутентификация)
 - user_sessions: Активные сессии пользователей
+- llm_usage_ledger: Журнал вызовов LLM (токены, стоимость, задержки)
+- generation_workers: Воркеры очереди генерации и их health
+- generation_batches: Пакетные генерации бизнес-юнитов (группы задач)
+- generation_idempotency_keys: Ключи идемпотентности запуска генерации
+- profile_files: Индекс файлов профилей (фактические пути, размеры, хеши)
+- profile_rerender_jobs: Массовые перерендеринги MD/DOCX (состояние для всех воркеров API)
 
 Thread Safety:
 - Uses threading.local() for per-thread connections
@@ -28,6 +34,27 @@ import uuid
 logger = logging.getLogger(__name__)
 
 
+# Колонки очереди генерации, добавляемые в generation_tasks старых баз
+GENERATION_TASK_QUEUE_COLUMNS = {
+    "attempts": "INTEGER DEFAULT 0",
+    "max_attempts": "INTEGER DEFAULT 3",
+    "lease_owner": "TEXT",
+    "lease_expires_at": "DATETIME",
+    "heartbeat_at": "DATETIME",
+    "available_at": "DATETIME",
+    "result_json": "TEXT",
+    "priority_class": "TEXT DEFAULT 'interactive'",
+    "batch_id": "TEXT",
+    "result_gz": "BLOB",
+    "stage_timings": "TEXT",
+}
+
+# Колонки profile_files, добавленные после создания таблицы
+PROFILE_FILES_COLUMNS = {
+    "renderer_version": "TEXT",
+}
+
+
 class DatabaseManager:
     """
     @doc Менеджер базы данных SQLite с thread-safe connection pooling.
@@ -163,6 +190,9 @@ class DatabaseManager:
         cursor = conn.cursor()
 
         try:
+            # WAL: читатели не блокируют писателя (несколько uvicorn воркеров и процессов очереди)
+            cursor.execute("PRAGMA journal_mode=WAL")
+
             # 1. Таблица пользователей (простая аутентификация)
             cursor.execute(
                 """
@@ -259,11 +289,25 @@ class DatabaseManager:
                     -- Пользователь
                     created_by INTEGER,
 
+                    -- Очередь: аренда задачи воркером, повторы, видимость
+                    attempts INTEGER DEFAULT 0,
+                    max_attempts INTEGER DEFAULT 3,
+                    lease_owner TEXT,  -- ID воркера, выполняющего задачу
+                    lease_expires_at DATETIME,  -- После истечения задачу может забрать другой воркер
+                    heartbeat_at DATETIME,
+                    available_at DATETIME,  -- Задача не выдается воркерам раньше этого времени
+                    result_json TEXT,  -- Результат генерации (без профиля, если он сохранен в profiles)
+                    priority_class TEXT DEFAULT 'interactive',  -- interactive | bulk (планировщик очереди)
+                    batch_id TEXT,  -- generation_batches.id для задач пакетной генерации
+                    result_gz BLOB,  -- Сжатый (gzip) result_json для больших результатов
+                    stage_timings TEXT,  -- JSON: длительность стадий выполнения (секунды)
+
                     FOREIGN KEY (created_by) REFERENCES users (id),
                     FOREIGN KEY (result_profile_id) REFERENCES profiles (id)
                 )
             """
             )
+            self._migrate_columns(cursor, "generation_tasks", GENERATION_TASK_QUEUE_COLUMNS)
 
             # 5. История всех генераций (для аналитики)
             cursor.execute(
@@ -318,6 +362,148 @@ class DatabaseManager:
             """
             )
 
+            # 7. Журнал использования LLM (append-only, одна строка на вызов модели)
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_usage_ledger (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at DATETIME NOT NULL,
+
+                    -- Модель и промпт
+                    model TEXT NOT NULL,
+                    prompt_name TEXT,
+                    prompt_version TEXT,
+                    generation_mode TEXT,  -- single, sectional, multi_position
+                    section TEXT,  -- Группа секций для sectional режима
+
+                    -- Для кого генерировали
+                    department TEXT,
+                    department_path TEXT,  -- Полный путь бизнес-единицы
+                    position TEXT,
+
+                    -- Токены по категориям
+                    prompt_tokens INTEGER DEFAULT 0,
+                    cached_tokens INTEGER DEFAULT 0,
+                    completion_tokens INTEGER DEFAULT 0,
+                    reasoning_tokens INTEGER DEFAULT 0,
+                    total_tokens INTEGER DEFAULT 0,
+                    cost_usd REAL,
+
+                    -- Производительность
+                    latency_ms REAL DEFAULT 0,
+                    retries INTEGER DEFAULT 0,
+                    cache_hit BOOLEAN DEFAULT FALSE,
+                    finish_reason TEXT,
+
+                    -- Результат
+                    success BOOLEAN DEFAULT TRUE,
+                    error_type TEXT,
+                    response_id TEXT,
+
+                    -- Контекст
+                    task_id TEXT,
+                    user_id INTEGER,
+                    profile_id TEXT
+                )
+            """
+            )
+
+            # 8. Воркеры очереди генерации (health: heartbeat, счетчики выполненных задач)
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS generation_workers (
+                    worker_id TEXT PRIMARY KEY,  -- host:pid:suffix
+                    hostname TEXT,
+                    pid INTEGER,
+                    mode TEXT,  -- embedded (в процессе API) или standalone (backend.worker)
+                    status TEXT,  -- running, draining, stopped
+                    concurrency INTEGER,
+                    running_tasks INTEGER DEFAULT 0,
+                    completed_tasks INTEGER DEFAULT 0,
+                    failed_tasks INTEGER DEFAULT 0,
+                    started_at DATETIME,
+                    heartbeat_at DATETIME
+                )
+            """
+            )
+
+            # 9. Пакетные генерации бизнес-юнитов (задачи ссылаются через generation_tasks.batch_id)
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS generation_batches (
+                    id TEXT PRIMARY KEY,  -- UUID4 batch ID
+                    unit_path TEXT NOT NULL,
+                    include_children BOOLEAN DEFAULT 1,
+                    filters_json TEXT,  -- Фильтры должностей из запроса
+                    priority_class TEXT DEFAULT 'bulk',
+                    total_tasks INTEGER DEFAULT 0,
+                    status TEXT DEFAULT 'active',  -- active, cancelled
+                    created_by INTEGER,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    cancelled_at DATETIME,
+
+                    FOREIGN KEY (created_by) REFERENCES users (id)
+                )
+            """
+            )
+
+            # 10. Ключи идемпотентности POST /api/generation/start (повторы клиента -> та же задача)
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS generation_idempotency_keys (
+                    user_id INTEGER NOT NULL,
+                    idempotency_key TEXT NOT NULL,
+                    request_hash TEXT NOT NULL,  -- SHA-256 параметров генерации
+                    task_id TEXT NOT NULL,
+                    created_at DATETIME NOT NULL,
+                    expires_at DATETIME NOT NULL,
+
+                    PRIMARY KEY (user_id, idempotency_key),
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            """
+            )
+
+            # 11. Индекс файлов профилей: фактические пути на момент сохранения
+            # (скачивание - поиск по первичному ключу, без пересчета путей по оргструктуре)
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS profile_files (
+                    profile_id TEXT NOT NULL,
+                    kind TEXT NOT NULL CHECK (kind IN ('json', 'md', 'docx')),
+                    path TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    created_at DATETIME NOT NULL,
+                    renderer_version TEXT,  -- Версия рендерера MD/DOCX (NULL - неизвестна, устарел)
+
+                    PRIMARY KEY (profile_id, kind),
+                    FOREIGN KEY (profile_id) REFERENCES profiles (id) ON DELETE CASCADE
+                )
+            """
+            )
+            self._migrate_columns(cursor, "profile_files", PROFILE_FILES_COLUMNS)
+
+            # 12. Массовые перерендеринги MD/DOCX (POST /api/profiles/rerender): состояние
+            # общее для всех воркеров uvicorn, одновременно выполняется не более одного
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS profile_rerender_jobs (
+                    id TEXT PRIMARY KEY,  -- UUID4 job ID
+                    status TEXT NOT NULL,  -- running, completed, failed
+                    renderer_version TEXT,
+                    request_json TEXT,  -- Параметры ProfileRerenderRequest
+                    progress_json TEXT,  -- Статистика после последней пачки
+                    stats_json TEXT,  -- Итог prerender_profiles
+                    error TEXT,
+                    started_by TEXT,
+                    started_at DATETIME NOT NULL,
+                    heartbeat_at DATETIME NOT NULL,  -- Обновляется после каждой пачки
+                    finished_at DATETIME
+                )
+            """
+            )
+
             # Создание индексов для оптимизации запросов
             self._create_indexes(cursor)
 
@@ -332,6 +518,16 @@ class DatabaseManager:
             conn.rollback()
             raise
 
+    def _migrate_columns(
+        self, cursor: sqlite3.Cursor, table: str, columns: Dict[str, str]
+    ) -> None:
+        """Добавление недостающих колонок в существующую таблицу (ALTER TABLE ADD COLUMN)"""
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        for name, ddl in columns.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+                logger.info(f"🔧 Migrated {table}: added column {name}")
+
     def _create_indexes(self, cursor: sqlite3.Cursor):
         """Создание индексов для оптимизации производительности"""
         indexes = [
@@ -345,6 +541,8 @@ class DatabaseManager:
             "CREATE INDEX IF NOT EXISTS idx_tasks_status ON generation_tasks (status)",
             "CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON generation_tasks (created_at)",
             "CREATE INDEX IF NOT EXISTS idx_tasks_created_by ON generation_tasks (created_by)",
+            "CREATE INDEX IF NOT EXISTS idx_tasks_claim ON generation_tasks (status, available_at)",
+            "CREATE INDEX IF NOT EXISTS idx_tasks_batch ON generation_tasks (batch_id)",
             # Индексы для generation_history
             "CREATE INDEX IF NOT EXISTS idx_history_department ON generation_history (department)",
             "CREATE INDEX IF NOT EXISTS idx_history_created_at ON generation_history (created_at)",
@@ -357,6 +555,15 @@ class DatabaseManager:
             "CREATE INDEX IF NOT EXISTS idx_cache_key ON organization_cache (cache_key)",
             "CREATE INDEX IF NOT EXISTS idx_cache_type ON organization_cache (cache_type)",
             "CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON organization_cache (expires_at)",
+            # Индексы для llm_usage_ledger
+            "CREATE INDEX IF NOT EXISTS idx_usage_created_at ON llm_usage_ledger (created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_usage_department_path ON llm_usage_ledger (department_path)",
+            "CREATE INDEX IF NOT EXISTS idx_usage_user_id ON llm_usage_ledger (user_id)",
+            "CREATE INDEX IF NOT EXISTS idx_usage_prompt ON llm_usage_ledger (prompt_name, prompt_version)",
+            # Индексы для generation_idempotency_keys
+            "CREATE INDEX IF NOT EXISTS idx_idempotency_expires_at ON generation_idempotency_keys (expires_at)",
+            # Индексы для profile_rerender_jobs
+            "CREATE INDEX IF NOT EXISTS idx_rerender_jobs_started_at ON profile_rerender_jobs (started_at)",
         ]
 
         for index_sql in indexes:
@@ -10,7 +10,7 @@ Pydantic модели для API запросов и ответов систем
 """
 
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Literal, Optional, List, Union
 from enum import Enum
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 import uuid
@@ -410,6 +410,47 @@ class ProfileUpdateRequest(BaseModel):
         return v
 
 
+class ProfileExportRequest(BaseModel):
+    """Запрос потоковой выгрузки профилей в ZIP (по ID, пути подразделения или фильтрам)"""
+
+    profile_ids: Optional[List[str]] = Field(
+        None, max_length=10000, description="ID профилей для выгрузки"
+    )
+    unit_path: Optional[str] = Field(
+        None,
+        max_length=1000,
+        description="Путь подразделения (Блок/Департамент/...): все профили внутри него",
+    )
+    department: Optional[str] = Field(None, max_length=200, description="Фильтр по департаменту")
+    position: Optional[str] = Field(None, max_length=200, description="Фильтр по должности")
+    search: Optional[str] = Field(None, max_length=200, description="Текстовый поиск")
+    status: Optional[str] = Field(
+        None, description="Фильтр по статусу (по умолчанию - все, кроме архивных)"
+    )
+    formats: List[Literal["json", "md", "docx"]] = Field(
+        default_factory=lambda: ["json", "md", "docx"],
+        min_length=1,
+        description="Форматы файлов в архиве",
+    )
+
+
+class ProfileRerenderRequest(BaseModel):
+    """Запрос массового перерендеринга MD/DOCX сохраненных профилей (без LLM)"""
+
+    profile_ids: Optional[List[str]] = Field(
+        None, max_length=10000, description="ID профилей (по умолчанию - все)"
+    )
+    department: Optional[str] = Field(None, max_length=200, description="Фильтр по департаменту")
+    include_archived: bool = Field(False, description="Перерендерить и архивные профили")
+    limit: Optional[int] = Field(None, ge=1, description="Максимум профилей")
+    formats: List[Literal["md", "docx"]] = Field(
+        default_factory=lambda: ["md", "docx"], min_length=1, description="Форматы"
+    )
+    force: bool = Field(
+        False, description="Перестроить и файлы текущей версии рендерера (по умолчанию - только устаревшие)"
+    )
+
+
 # ================================
 # WEBHOOK MODELS (для будущего использования)
 # ================================
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+@doc
+Массовый рендеринг MD/DOCX сохраненных профилей из profiles.profile_data.
+
+При ленивом рендеринге (LAZY_DOCUMENT_RENDERING=true) MD и DOCX создаются
+при первом скачивании. Перед массовой выгрузкой или для часто скачиваемых
+подразделений их можно подготовить заранее: файлы попадают в тот же кеш
+(RENDER_CACHE_DIR) и в индекс profile_files.
+
+После изменения markdown_service.py/docx_service.py (RENDERER_VERSION)
+команда перестраивает устаревшие файлы без обращения к LLM: пропускаются
+только файлы, уже отрендеренные текущей версией. Рендеринг идет в
+отдельном пуле процессов (--workers), по ходу печатается пропускная способность.
+
+Examples:
+  python -m backend.prerender                                  # MD и DOCX всех активных профилей
+  python -m backend.prerender --formats docx --department "ДИТ"
+  python -m backend.prerender --limit 100 --include-archived
+  python -m backend.prerender --workers 8 --force              # перестроить все файлы
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict
+
+from .core.config import config
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("backend.prerender")
+
+
+def log_progress(progress: Dict[str, Any]) -> None:
+    logger.info(
+        f"🎨 {progress['profiles']}/{progress['total']} profiles: "
+        f"rendered={progress['rendered']} cached={progress['cached']} "
+        f"skipped={progress['skipped']} failed={progress['failed']} "
+        f"({progress['profiles_per_second']} profiles/s)"
+    )
+
+
+async def run_prerender(args: argparse.Namespace) -> Dict[str, Any]:
+    from .core.render_cache import RenderCache, prerender_profiles
+    from .core.render_executor import RenderExecutor
+    from .models.database import initialize_db_manager
+
+    executor = RenderExecutor(mode=args.mode, workers=args.workers)
+    db_manager = initialize_db_manager(config.database_path)
+    db_manager.create_schema()
+    try:
+        return await prerender_profiles(
+            db_manager.get_connection(),
+            kinds=args.formats,
+            department=args.department,
+            limit=args.limit,
+            include_archived=args.include_archived,
+            cache=RenderCache(executor=executor),
+            profile_ids=args.profile_ids,
+            force=args.force,
+            on_progress=log_progress,
+        )
+    finally:
+        executor.shutdown()
+        db_manager.close_connection()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Предварительный рендеринг MD/DOCX профилей")
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=["md", "docx"],
+        default=["md", "docx"],
+        help="Форматы для рендеринга",
+    )
+    parser.add_argument("--department", help="Только профили указанного департамента")
+    parser.add_argument("--limit", type=int, help="Максимум профилей")
+    parser.add_argument(
+        "--include-archived", action="store_true", help="Рендерить и архивные профили"
+    )
+    parser.add_argument("--profile-ids", nargs="+", help="Только указанные профили")
+    parser.add_argument(
+        "--force", action="store_true", help="Перестроить и файлы текущей версии рендерера"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="Размер пула рендеринга"
+    )
+    parser.add_argument(
+        "--mode", choices=["process", "thread"], default="process", help="Тип пула рендеринга"
+    )
+    args = parser.parse_args()
+
+    stats = asyncio.run(run_prerender(args))
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
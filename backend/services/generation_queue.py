@@ -0,0 +1,1384 @@
+"""
+@doc
+Персистентная очередь генерации профилей на таблице generation_tasks.
+
+Задачи переживают рестарт и --reload, а статус виден любому uvicorn
+воркеру, так как единственный источник правды - SQLite. Выполнение:
+- claim(): атомарная аренда задачи (BEGIN IMMEDIATE) с lease_expires_at
+- heartbeat(): продление аренды и обновление прогресса; False если аренда
+  потеряна или задача отменена - воркер должен прекратить работу
+- complete() / fail(): завершение; fail() с retryable=True возвращает
+  задачу в очередь с задержкой, пока не исчерпаны max_attempts
+- истекшая аренда (воркер упал) делает задачу снова видимой для claim()
+
+Планирование: у задачи есть класс приоритета (interactive - запросы из UI,
+bulk - массовая генерация). claim() выбирает класс с наименьшей долей
+занятых слотов относительно веса класса (при равенстве - более тяжелый),
+с учетом лимита одновременных задач класса, а внутри класса - пользователя
+с наименьшим числом выполняемых задач (fair share), затем старейшую задачу.
+Так пачка из сотен bulk задач не блокирует одиночную генерацию из UI.
+
+GenerationWorkerPool выполняет задачи в N asyncio слотах процесса.
+
+Examples:
+  python> task_id = generation_queue.enqueue({"department": "ДИТ", "position": "Аналитик"}, user_id=1)
+  python> pool = GenerationWorkerPool(generation_queue, handler, concurrency=4)
+  python> await pool.start()
+  python> generation_queue.get_task(task_id)["status"]  # queued -> processing -> completed
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from ..core.config import config
+from ..core.metrics import (
+    QUEUE_WAIT_SECONDS,
+    TASK_SECONDS,
+    TASKS_IN_FLIGHT,
+    TASKS_TOTAL,
+)
+from .task_result_store import TaskResultStore, decode_result, encode_result
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+ACTIVE_STATUSES = ("queued", "processing")
+PRIORITY_CLASSES = ("interactive", "bulk")
+
+# Максимальная длина ключа идемпотентности
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class IdempotencyKeyConflict(ValueError):
+    """Ключ идемпотентности уже использован с другими параметрами генерации"""
+
+
+def request_fingerprint(request: Dict[str, Any]) -> str:
+    """SHA-256 параметров генерации (порядок ключей не важен)"""
+    canonical = json.dumps(request, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# Сколько последних завершенных задач учитывать в средней длительности для ETA
+ETA_SAMPLE_SIZE = 50
+
+# Обработчик задачи: (task, report(progress, step)) -> (result, profile_id сохраненного профиля)
+ProgressReporter = Callable[[int, str], bool]
+TaskHandler = Callable[[Dict[str, Any], ProgressReporter], Awaitable[Tuple[Dict[str, Any], Optional[str]]]]
+# Обработчик группы задач одного пакета и подразделения: результаты в порядке задач
+GroupTaskHandler = Callable[
+    [List[Dict[str, Any]], ProgressReporter],
+    Awaitable[List[Tuple[Dict[str, Any], Optional[str]]]],
+]
+
+
+def _now() -> datetime:
+    return datetime.now()
+
+
+def _ts(moment: datetime) -> str:
+    return moment.isoformat(timespec="microseconds")
+
+
+_INSERT_TASK_SQL = """
+    INSERT INTO generation_tasks (
+        id, department, position, employee_name, generation_params,
+        status, progress, current_step, created_at, available_at,
+        created_by, attempts, max_attempts, priority_class, batch_id
+    ) VALUES (?, ?, ?, ?, ?, 'queued', 0, ?, ?, ?, ?, 0, ?, ?, ?)
+"""
+
+_LEASE_TASK_SQL = """
+    UPDATE generation_tasks
+    SET status = 'processing', lease_owner = ?, lease_expires_at = ?,
+        heartbeat_at = ?, attempts = attempts + 1,
+        started_at = COALESCE(started_at, ?),
+        progress = 5, current_step = 'Инициализация генератора профилей'
+    WHERE id = ?
+"""
+
+
+class GenerationQueue:
+    """
+    @doc Очередь задач генерации поверх generation_tasks (SQLite).
+
+    Все методы синхронные и короткие: одна транзакция на вызов.
+
+    Examples:
+        python>
+        queue = GenerationQueue(db_manager)
+        task_id = queue.enqueue(request_dict, user_id=1)
+        task = queue.claim("host:123/0")
+        queue.heartbeat(task["task_id"], "host:123/0", progress=30, current_step="LLM")
+        queue.complete(task["task_id"], "host:123/0", result, profile_id)
+    """
+
+    def __init__(
+        self,
+        db_manager: Optional[Any] = None,
+        lease_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        retry_delay: Optional[float] = None,
+        class_weights: Optional[Dict[str, int]] = None,
+        class_caps: Optional[Dict[str, int]] = None,
+        result_store: Optional[TaskResultStore] = None,
+    ):
+        self._db_manager = db_manager
+        self.result_store = result_store or TaskResultStore()
+        self.lease_seconds = lease_seconds or config.GENERATION_LEASE_SECONDS
+        self.max_attempts = max_attempts or config.GENERATION_MAX_ATTEMPTS
+        self.retry_delay = config.GENERATION_RETRY_DELAY if retry_delay is None else retry_delay
+        self.class_weights = class_weights or {
+            "interactive": config.GENERATION_INTERACTIVE_WEIGHT,
+            "bulk": config.GENERATION_BULK_WEIGHT,
+        }
+        # 0 / отсутствие ключа - без лимита
+        self.class_caps = (
+            class_caps
+            if class_caps is not None
+            else {
+                "interactive": config.GENERATION_INTERACTIVE_MAX_CONCURRENCY,
+                "bulk": config.GENERATION_BULK_MAX_CONCURRENCY,
+            }
+        )
+        self._listeners: List[Callable[[str], None]] = []
+
+    def _conn(self):
+        if self._db_manager is not None:
+            return self._db_manager.get_connection()
+        from ..models.database import get_db_manager
+
+        return get_db_manager().get_connection()
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """
+        Подписка на изменения задач, сделанные через этот экземпляр очереди
+        (callback(task_id) вызывается после commit; изменения из других процессов
+        видны только при чтении таблицы)
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, task_id: str) -> None:
+        for callback in self._listeners:
+            try:
+                callback(task_id)
+            except Exception as e:
+                logger.warning(f"⚠️ Task change listener failed: {e}")
+
+    def _begin_immediate(self):
+        """Соединение с открытой write-транзакцией (блокирует конкурентные claim)"""
+        conn = self._conn()
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    # ------------------------------------------------------------------
+    # Постановка и чтение
+    # ------------------------------------------------------------------
+
+    def enqueue(
+        self,
+        request: Dict[str, Any],
+        user_id: int,
+        task_id: Optional[str] = None,
+        priority_class: str = "interactive",
+    ) -> str:
+        """
+        Постановка задачи в очередь.
+
+        Args:
+            request: Параметры генерации (GenerationRequest.dict())
+            user_id: Владелец задачи
+            task_id: ID задачи (по умолчанию UUID4)
+            priority_class: interactive или bulk
+
+        Returns:
+            task_id
+        """
+        if priority_class not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority_class}")
+        task_id = task_id or str(uuid.uuid4())
+        conn = self._conn()
+        conn.execute(
+            _INSERT_TASK_SQL,
+            self._task_row(task_id, request, user_id, priority_class, None, _ts(_now())),
+        )
+        conn.commit()
+        return task_id
+
+    def enqueue_idempotent(
+        self,
+        request: Dict[str, Any],
+        user_id: int,
+        idempotency_key: str,
+        priority_class: str = "interactive",
+        ttl_seconds: Optional[float] = None,
+    ) -> Tuple[str, bool]:
+        """
+        Постановка задачи с ключом идемпотентности.
+
+        Повтор с тем же ключом (в течение ttl_seconds, по умолчанию
+        GENERATION_IDEMPOTENCY_TTL) возвращает уже созданную задачу, а не новую:
+        повторы клиента при таймаутах не запускают повторную генерацию.
+
+        Returns:
+            (task_id, created) - created=False, если задача уже существовала
+
+        Raises:
+            IdempotencyKeyConflict: Ключ уже использован с другими параметрами
+        """
+        if priority_class not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority_class}")
+        ttl_seconds = config.GENERATION_IDEMPOTENCY_TTL if ttl_seconds is None else ttl_seconds
+        fingerprint = request_fingerprint({**request, "priority_class": priority_class})
+        now = _now()
+
+        conn = self._begin_immediate()
+        try:
+            row = conn.execute(
+                """
+                SELECT k.task_id, k.request_hash, t.id AS existing_task
+                FROM generation_idempotency_keys k
+                LEFT JOIN generation_tasks t ON t.id = k.task_id
+                WHERE k.user_id = ? AND k.idempotency_key = ? AND k.expires_at > ?
+                """,
+                (user_id, idempotency_key, _ts(now)),
+            ).fetchone()
+            if row is not None and row["existing_task"] is not None:
+                conn.commit()
+                if row["request_hash"] != fingerprint:
+                    raise IdempotencyKeyConflict(
+                        f"Idempotency key '{idempotency_key}' was used with different parameters"
+                    )
+                return row["task_id"], False
+
+            task_id = str(uuid.uuid4())
+            conn.execute(
+                _INSERT_TASK_SQL,
+                self._task_row(task_id, request, user_id, priority_class, None, _ts(now)),
+            )
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO generation_idempotency_keys
+                    (user_id, idempotency_key, request_hash, task_id, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    user_id,
+                    idempotency_key,
+                    fingerprint,
+                    task_id,
+                    _ts(now),
+                    _ts(now + timedelta(seconds=ttl_seconds)),
+                ),
+            )
+            conn.commit()
+        except IdempotencyKeyConflict:
+            raise
+        except Exception:
+            conn.rollback()
+            raise
+        return task_id, True
+
+    def enqueue_batch(
+        self,
+        requests: List[Dict[str, Any]],
+        user_id: int,
+        unit_path: str,
+        include_children: bool = True,
+        filters: Optional[Dict[str, Any]] = None,
+        priority_class: str = "bulk",
+    ) -> Tuple[str, List[str]]:
+        """
+        Постановка пакета задач одной транзакцией.
+
+        Args:
+            requests: Параметры генерации каждой должности
+            user_id: Владелец пакета
+            unit_path: Путь бизнес-юнита, из которого развернуты должности
+            include_children: Включены ли дочерние подразделения
+            filters: Фильтры должностей (сохраняются для истории)
+            priority_class: Класс приоритета всех задач пакета
+
+        Returns:
+            (batch_id, task_ids в порядке requests)
+        """
+        if priority_class not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority_class}")
+        batch_id = str(uuid.uuid4())
+        task_ids = [str(uuid.uuid4()) for _ in requests]
+        now = _ts(_now())
+
+        conn = self._begin_immediate()
+        try:
+            conn.execute(
+                """
+                INSERT INTO generation_batches (
+                    id, unit_path, include_children, filters_json, priority_class,
+                    total_tasks, status, created_by, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, 'active', ?, ?)
+                """,
+                (
+                    batch_id,
+                    unit_path,
+                    include_children,
+                    json.dumps(filters or {}, ensure_ascii=False),
+                    priority_class,
+                    len(requests),
+                    user_id,
+                    now,
+                ),
+            )
+            conn.executemany(
+                _INSERT_TASK_SQL,
+                [
+                    self._task_row(task_id, request, user_id, priority_class, batch_id, now)
+                    for task_id, request in zip(task_ids, requests)
+                ],
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return batch_id, task_ids
+
+    def _task_row(
+        self,
+        task_id: str,
+        request: Dict[str, Any],
+        user_id: int,
+        priority_class: str,
+        batch_id: Optional[str],
+        now: str,
+    ) -> Tuple[Any, ...]:
+        return (
+            task_id,
+            request.get("department"),
+            request.get("position"),
+            request.get("employee_name"),
+            json.dumps(request, ensure_ascii=False),
+            "В очереди на обработку",
+            now,
+            now,
+            user_id,
+            self.max_attempts,
+            priority_class,
+            batch_id,
+        )
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Пакет с агрегированным состоянием задач.
+
+        Returns:
+            Поля generation_batches + counts (по статусам), finished, progress (0-100)
+        """
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT * FROM generation_batches WHERE id = ?", (batch_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        counts = {
+            r["status"]: r["n"]
+            for r in conn.execute(
+                """
+                SELECT status, COUNT(*) AS n FROM generation_tasks
+                WHERE batch_id = ? GROUP BY status
+                """,
+                (batch_id,),
+            ).fetchall()
+        }
+        progress_sum = conn.execute(
+            """
+            SELECT COALESCE(SUM(CASE WHEN status IN ('completed', 'failed', 'cancelled')
+                                     THEN 100 ELSE progress END), 0)
+            FROM generation_tasks WHERE batch_id = ?
+            """,
+            (batch_id,),
+        ).fetchone()[0]
+
+        total = row["total_tasks"] or 0
+        finished = sum(counts.get(status, 0) for status in TERMINAL_STATUSES)
+        if row["status"] == "cancelled":
+            status = "cancelled"
+        elif finished >= total:
+            status = "completed"
+        elif counts.get("processing") or finished:
+            status = "processing"
+        else:
+            status = "queued"
+
+        return {
+            "batch_id": row["id"],
+            "unit_path": row["unit_path"],
+            "include_children": bool(row["include_children"]),
+            "filters": json.loads(row["filters_json"] or "{}"),
+            "priority_class": row["priority_class"],
+            "user_id": row["created_by"],
+            "created_at": row["created_at"],
+            "cancelled_at": row["cancelled_at"],
+            "status": status,
+            "total_tasks": total,
+            "finished_tasks": finished,
+            "counts": counts,
+            "progress": int(progress_sum / total) if total else 100,
+        }
+
+    def list_batch_tasks(
+        self,
+        batch_id: str,
+        status: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Задачи пакета (опционально - только в статусе status) в порядке постановки"""
+        query = "SELECT * FROM generation_tasks WHERE batch_id = ?"
+        params: List[Any] = [batch_id]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY created_at, rowid LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        rows = self._conn().execute(query, params).fetchall()
+        return [self._row_to_task(row) for row in rows]
+
+    def cancel_batch(self, batch_id: str) -> int:
+        """
+        Отмена пакета: все незавершенные задачи отменяются (выполняемые
+        останавливаются на ближайшем heartbeat).
+
+        Returns:
+            Количество отмененных задач
+        """
+        now = _ts(_now())
+        conn = self._begin_immediate()
+        try:
+            task_ids = [
+                row["id"]
+                for row in conn.execute(
+                    """
+                    SELECT id FROM generation_tasks
+                    WHERE batch_id = ? AND status IN ('queued', 'processing')
+                    """,
+                    (batch_id,),
+                ).fetchall()
+            ]
+            conn.execute(
+                """
+                UPDATE generation_tasks
+                SET status = 'cancelled', completed_at = ?, current_step = 'Отменено пользователем',
+                    error_message = 'Пакет отменен пользователем'
+                WHERE batch_id = ? AND status IN ('queued', 'processing')
+                """,
+                (now, batch_id),
+            )
+            conn.execute(
+                """
+                UPDATE generation_batches SET status = 'cancelled', cancelled_at = ?
+                WHERE id = ? AND status = 'active'
+                """,
+                (now, batch_id),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        for task_id in task_ids:
+            self._notify(task_id)
+        return len(task_ids)
+
+    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Задача в формате API (task_id, status, progress, request, user_id...)"""
+        row = self._conn().execute(
+            "SELECT * FROM generation_tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+        return self._row_to_task(row) if row else None
+
+    def get_tasks(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        """Несколько задач одним запросом (порциями по 500 id)"""
+        tasks: List[Dict[str, Any]] = []
+        for start in range(0, len(task_ids), 500):
+            chunk = task_ids[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn().execute(
+                f"SELECT * FROM generation_tasks WHERE id IN ({placeholders})", chunk
+            ).fetchall()
+            tasks.extend(self._row_to_task(row) for row in rows)
+        return tasks
+
+    def cancelled_ids(self, task_ids: List[str]) -> Set[str]:
+        """ID задач из task_ids, отмененных пользователем"""
+        if not task_ids:
+            return set()
+        placeholders = ",".join("?" * len(task_ids))
+        rows = self._conn().execute(
+            f"SELECT id FROM generation_tasks WHERE id IN ({placeholders}) AND status = 'cancelled'",
+            task_ids,
+        ).fetchall()
+        return {row["id"] for row in rows}
+
+    def list_tasks(
+        self, user_id: int, finished_since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Активные задачи пользователя и завершенные после finished_since"""
+        finished_since = finished_since or _now() - timedelta(hours=1)
+        rows = self._conn().execute(
+            """
+            SELECT * FROM generation_tasks
+            WHERE created_by = ?
+              AND (status IN ('queued', 'processing') OR completed_at >= ?)
+            ORDER BY created_at
+            """,
+            (user_id, _ts(finished_since)),
+        ).fetchall()
+        return [self._row_to_task(row) for row in rows]
+
+    def get_result(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Результат задачи. Если профиль сохранен в profiles, он берется оттуда
+        (в result_json хранится только метаданные результата).
+
+        Собранный результат кешируется в result_store (ограниченный LRU/TTL);
+        после вытеснения он снова читается из БД.
+        """
+        cached = self.result_store.get(task_id)
+        if cached is not None:
+            return cached
+
+        row = self._conn().execute(
+            "SELECT result_json, result_gz, result_profile_id FROM generation_tasks WHERE id = ?",
+            (task_id,),
+        ).fetchone()
+        if not row:
+            return None
+        result = decode_result(row["result_json"], row["result_gz"])
+        if result is None:
+            return None
+
+        if "profile" not in result and row["result_profile_id"]:
+            profile_row = self._conn().execute(
+                "SELECT profile_data FROM profiles WHERE id = ?", (row["result_profile_id"],)
+            ).fetchone()
+            result["profile"] = json.loads(profile_row["profile_data"]) if profile_row else None
+        self.result_store.put(task_id, result)
+        return result
+
+    # ------------------------------------------------------------------
+    # Выполнение
+    # ------------------------------------------------------------------
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Аренда следующей доступной задачи.
+
+        Доступны задачи в статусе queued (после available_at) и processing
+        с истекшей арендой. Задачи с истекшей арендой и исчерпанными
+        попытками помечаются failed. Выбор задачи - _select_next().
+
+        Returns:
+            Задача или None, если очередь пуста
+        """
+        now = _now()
+        conn = self._begin_immediate()
+        try:
+            conn.execute(
+                """
+                UPDATE generation_tasks
+                SET status = 'failed', completed_at = ?, lease_owner = NULL,
+                    current_step = 'Ошибка генерации',
+                    error_message = COALESCE(error_message, 'Воркер не завершил задачу: аренда истекла')
+                WHERE status = 'processing' AND lease_expires_at < ? AND attempts >= max_attempts
+                """,
+                (_ts(now), _ts(now)),
+            )
+            row = self._select_next(conn, now)
+            if row is None:
+                conn.commit()
+                return None
+
+            conn.execute(
+                _LEASE_TASK_SQL,
+                (
+                    worker_id,
+                    _ts(now + timedelta(seconds=self.lease_seconds)),
+                    _ts(now),
+                    _ts(now),
+                    row["id"],
+                ),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        self._notify(row["id"])
+        task = self.get_task(row["id"])
+        logger.info(
+            f"📥 Worker {worker_id} claimed task {row['id']} (attempt {task['attempts']})"
+        )
+        return task
+
+    def claim_siblings(
+        self, task: Dict[str, Any], worker_id: str, limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Аренда дополнительных задач того же пакета и подразделения, что и task,
+        для генерации одним multi-position запросом (общий контекст подразделения).
+
+        Returns:
+            До limit задач (без task), арендованных тем же worker_id
+        """
+        if not task.get("batch_id") or limit <= 0:
+            return []
+        now = _now()
+        conn = self._begin_immediate()
+        try:
+            rows = conn.execute(
+                """
+                SELECT id FROM generation_tasks
+                WHERE batch_id = ? AND department = ? AND id != ?
+                  AND status = 'queued' AND available_at <= ?
+                ORDER BY created_at, rowid
+                LIMIT ?
+                """,
+                (task["batch_id"], task["request"].get("department"), task["task_id"], _ts(now), limit),
+            ).fetchall()
+            for row in rows:
+                conn.execute(
+                    _LEASE_TASK_SQL,
+                    (
+                        worker_id,
+                        _ts(now + timedelta(seconds=self.lease_seconds)),
+                        _ts(now),
+                        _ts(now),
+                        row["id"],
+                    ),
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        for row in rows:
+            self._notify(row["id"])
+        if rows:
+            logger.info(
+                f"📥 Worker {worker_id} claimed {len(rows)} sibling tasks of batch {task['batch_id']}"
+            )
+        siblings = {t["task_id"]: t for t in self.get_tasks([row["id"] for row in rows])}
+        return [siblings[row["id"]] for row in rows if row["id"] in siblings]
+
+    def _select_next(self, conn: Any, now: datetime) -> Optional[Any]:
+        """
+        Выбор следующей задачи: класс -> пользователь -> старейшая задача.
+
+        Класс: наименьшее running / weight среди классов с доступными задачами
+        и не достигших лимита (при равенстве - больший вес). Пользователь:
+        наименьшее число выполняемых задач этого класса, затем самая старая задача.
+        """
+        running = conn.execute(
+            """
+            SELECT COALESCE(priority_class, 'interactive') AS priority_class,
+                   created_by, COUNT(*) AS n
+            FROM generation_tasks
+            WHERE status = 'processing' AND lease_expires_at >= ?
+            GROUP BY 1, 2
+            """,
+            (_ts(now),),
+        ).fetchall()
+        running_by_class: Dict[str, int] = {}
+        running_by_user: Dict[Tuple[str, Any], int] = {}
+        for row in running:
+            running_by_class[row["priority_class"]] = (
+                running_by_class.get(row["priority_class"], 0) + row["n"]
+            )
+            running_by_user[(row["priority_class"], row["created_by"])] = row["n"]
+
+        # Старейшая доступная задача каждой пары (класс, пользователь)
+        candidates = conn.execute(
+            """
+            SELECT id, COALESCE(priority_class, 'interactive') AS priority_class,
+                   created_by, MIN(created_at) AS created_at
+            FROM generation_tasks
+            WHERE (status = 'queued' AND available_at <= ?)
+               OR (status = 'processing' AND lease_expires_at < ?)
+            GROUP BY 2, 3
+            """,
+            (_ts(now), _ts(now)),
+        ).fetchall()
+
+        open_classes = {
+            row["priority_class"]
+            for row in candidates
+            if not self.class_caps.get(row["priority_class"])
+            or running_by_class.get(row["priority_class"], 0)
+            < self.class_caps[row["priority_class"]]
+        }
+        if not open_classes:
+            return None
+
+        def class_share(name: str) -> Tuple[float, int]:
+            weight = max(self.class_weights.get(name, 1), 1)
+            return running_by_class.get(name, 0) / weight, -weight
+
+        chosen_class = min(open_classes, key=class_share)
+        return min(
+            (row for row in candidates if row["priority_class"] == chosen_class),
+            key=lambda row: (
+                running_by_user.get((chosen_class, row["created_by"]), 0),
+                row["created_at"],
+            ),
+        )
+
+    def queue_position(
+        self, task_id: str, default_duration: float, total_slots: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Оценка позиции задачи в очереди и времени до старта/завершения.
+
+        Оценка приблизительная: внутри класса задачи пользователей чередуются
+        (round-robin), все задачи interactive считаются идущими раньше bulk.
+
+        Args:
+            task_id: ID задачи в статусе queued
+            default_duration: Длительность генерации, если нет статистики
+            total_slots: Всего слотов воркеров (по умолчанию - живые воркеры)
+
+        Returns:
+            {"queue_position", "estimated_start_seconds", "estimated_completion_seconds"}
+            или None, если задача не ожидает в очереди
+        """
+        task = self.get_task(task_id)
+        if task is None or task["status"] != "queued":
+            return None
+        conn = self._conn()
+        priority_class = task["priority_class"]
+
+        queued = conn.execute(
+            """
+            SELECT id, created_by FROM generation_tasks
+            WHERE status = 'queued' AND COALESCE(priority_class, 'interactive') = ?
+            ORDER BY created_at
+            """,
+            (priority_class,),
+        ).fetchall()
+        per_user: Dict[Any, int] = {}
+        own_index = 0
+        for row in queued:
+            if row["id"] == task_id:
+                own_index = per_user.get(row["created_by"], 0)
+            per_user[row["created_by"]] = per_user.get(row["created_by"], 0) + 1
+
+        # Round-robin: до нашей задачи каждый другой пользователь успеет own_index + 1 задач
+        ahead = own_index + sum(
+            min(count, own_index + 1)
+            for user_id, count in per_user.items()
+            if user_id != task["user_id"]
+        )
+        if priority_class != "interactive":
+            ahead += conn.execute(
+                """
+                SELECT COUNT(*) FROM generation_tasks
+                WHERE status = 'queued' AND COALESCE(priority_class, 'interactive') = 'interactive'
+                """
+            ).fetchone()[0]
+
+        if total_slots is None:
+            total_slots = sum(
+                w["concurrency"] or 0 for w in self.list_workers() if w["alive"]
+            ) or config.GENERATION_WORKER_CONCURRENCY
+        cap = self.class_caps.get(priority_class) or total_slots
+        slots = max(min(cap, total_slots), 1)
+
+        duration = self.average_duration() or default_duration
+        waves = ahead // slots
+        return {
+            "queue_position": ahead + 1,
+            "estimated_start_seconds": int(waves * duration),
+            "estimated_completion_seconds": int((waves + 1) * duration),
+        }
+
+    def average_duration(self) -> Optional[float]:
+        """Средняя длительность последних успешных задач (секунды)"""
+        row = self._conn().execute(
+            """
+            SELECT AVG((julianday(completed_at) - julianday(started_at)) * 86400) AS avg_seconds
+            FROM (
+                SELECT started_at, completed_at FROM generation_tasks
+                WHERE status = 'completed' AND started_at IS NOT NULL
+                ORDER BY completed_at DESC
+                LIMIT ?
+            )
+            """,
+            (ETA_SAMPLE_SIZE,),
+        ).fetchone()
+        return row["avg_seconds"] if row and row["avg_seconds"] else None
+
+    def heartbeat(
+        self,
+        task_id: str,
+        worker_id: str,
+        progress: Optional[int] = None,
+        current_step: Optional[str] = None,
+    ) -> bool:
+        """
+        Продление аренды (и обновление прогресса).
+
+        Returns:
+            False если задача отменена или аренду перехватил другой воркер
+        """
+        now = _now()
+        conn = self._conn()
+        cursor = conn.execute(
+            """
+            UPDATE generation_tasks
+            SET heartbeat_at = ?, lease_expires_at = ?,
+                progress = COALESCE(?, progress), current_step = COALESCE(?, current_step)
+            WHERE id = ? AND lease_owner = ? AND status = 'processing'
+            """,
+            (
+                _ts(now),
+                _ts(now + timedelta(seconds=self.lease_seconds)),
+                progress,
+                current_step,
+                task_id,
+                worker_id,
+            ),
+        )
+        conn.commit()
+        if progress is not None or current_step is not None:
+            self._notify(task_id)
+        return cursor.rowcount == 1
+
+    def complete(
+        self,
+        task_id: str,
+        worker_id: str,
+        result: Dict[str, Any],
+        profile_id: Optional[str] = None,
+        stages: Optional[Dict[str, float]] = None,
+    ) -> bool:
+        """
+        Завершение задачи с результатом генерации.
+
+        Если профиль сохранен в profiles (profile_id), в result_json он не дублируется.
+        Статус completed/failed определяется по result["success"].
+        stages - длительность стадий задачи (секунды) для статуса задачи.
+        """
+        stored = {k: v for k, v in result.items() if k != "profile"} if profile_id else result
+        result_json, result_gz = encode_result(stored)
+        success = bool(result.get("success"))
+        conn = self._conn()
+        cursor = conn.execute(
+            """
+            UPDATE generation_tasks
+            SET status = ?, completed_at = ?, progress = 100, current_step = 'Завершено',
+                result_json = ?, result_gz = ?, result_profile_id = ?, error_message = ?,
+                stage_timings = ?, lease_owner = NULL, lease_expires_at = NULL
+            WHERE id = ? AND lease_owner = ? AND status = 'processing'
+            """,
+            (
+                "completed" if success else "failed",
+                _ts(_now()),
+                result_json,
+                result_gz,
+                profile_id,
+                None if success else "; ".join(result.get("errors", [])) or None,
+                json.dumps(stages) if stages else None,
+                task_id,
+                worker_id,
+            ),
+        )
+        conn.commit()
+        self._notify(task_id)
+        return cursor.rowcount == 1
+
+    def fail(
+        self, task_id: str, worker_id: str, error: str, retryable: bool = True
+    ) -> str:
+        """
+        Ошибка выполнения задачи.
+
+        Retryable ошибка возвращает задачу в очередь с экспоненциальной
+        задержкой, пока attempts < max_attempts.
+
+        Returns:
+            Новый статус задачи (queued / failed) или "" если аренда уже потеряна
+        """
+        conn = self._begin_immediate()
+        try:
+            row = conn.execute(
+                """
+                SELECT attempts, max_attempts FROM generation_tasks
+                WHERE id = ? AND lease_owner = ? AND status = 'processing'
+                """,
+                (task_id, worker_id),
+            ).fetchone()
+            if row is None:
+                conn.commit()
+                return ""
+
+            now = _now()
+            if retryable and row["attempts"] < row["max_attempts"]:
+                delay = self.retry_delay * (2 ** (row["attempts"] - 1))
+                conn.execute(
+                    """
+                    UPDATE generation_tasks
+                    SET status = 'queued', available_at = ?, lease_owner = NULL,
+                        lease_expires_at = NULL, progress = 0, error_message = ?,
+                        current_step = 'Повтор после ошибки'
+                    WHERE id = ?
+                    """,
+                    (_ts(now + timedelta(seconds=delay)), error, task_id),
+                )
+                status = "queued"
+            else:
+                conn.execute(
+                    """
+                    UPDATE generation_tasks
+                    SET status = 'failed', completed_at = ?, lease_owner = NULL,
+                        lease_expires_at = NULL, progress = 0, error_message = ?,
+                        current_step = 'Ошибка генерации'
+                    WHERE id = ?
+                    """,
+                    (_ts(now), error, task_id),
+                )
+                status = "failed"
+            conn.commit()
+            self._notify(task_id)
+            return status
+        except Exception:
+            conn.rollback()
+            raise
+
+    def release(self, task_id: str, worker_id: str) -> bool:
+        """Возврат арендованной задачи в очередь без траты попытки (остановка воркера)"""
+        conn = self._conn()
+        cursor = conn.execute(
+            """
+            UPDATE generation_tasks
+            SET status = 'queued', available_at = ?, lease_owner = NULL, lease_expires_at = NULL,
+                attempts = MAX(attempts - 1, 0), progress = 0, current_step = 'В очереди на обработку'
+            WHERE id = ? AND lease_owner = ? AND status = 'processing'
+            """,
+            (_ts(_now()), task_id, worker_id),
+        )
+        conn.commit()
+        self._notify(task_id)
+        return cursor.rowcount == 1
+
+    def cancel(self, task_id: str) -> bool:
+        """Отмена задачи в статусе queued/processing (воркер узнает об этом на heartbeat)"""
+        conn = self._conn()
+        cursor = conn.execute(
+            """
+            UPDATE generation_tasks
+            SET status = 'cancelled', completed_at = ?, current_step = 'Отменено пользователем',
+                error_message = 'Задача отменена пользователем'
+            WHERE id = ? AND status IN ('queued', 'processing')
+            """,
+            (_ts(_now()), task_id),
+        )
+        conn.commit()
+        self._notify(task_id)
+        return cursor.rowcount == 1
+
+    def cleanup(self, older_than: timedelta = timedelta(hours=24)) -> int:
+        """Удаление завершенных задач старше older_than"""
+        conn = self._conn()
+        cursor = conn.execute(
+            """
+            DELETE FROM generation_tasks
+            WHERE status IN ('completed', 'failed', 'cancelled') AND completed_at < ?
+            """,
+            (_ts(_now() - older_than),),
+        )
+        conn.execute(
+            "DELETE FROM generation_idempotency_keys WHERE expires_at <= ?", (_ts(_now()),)
+        )
+        conn.commit()
+        return cursor.rowcount
+
+    def count_by_status(self) -> Dict[str, int]:
+        """Количество задач по статусам"""
+        rows = self._conn().execute(
+            "SELECT status, COUNT(*) AS n FROM generation_tasks GROUP BY status"
+        ).fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def record_worker_health(self, health: Dict[str, Any]) -> None:
+        """Запись состояния воркера (upsert по worker_id)"""
+        conn = self._conn()
+        conn.execute(
+            """
+            INSERT INTO generation_workers (
+                worker_id, hostname, pid, mode, status, concurrency, running_tasks,
+                completed_tasks, failed_tasks, started_at, heartbeat_at
+            ) VALUES (:worker_id, :hostname, :pid, :mode, :status, :concurrency, :running_tasks,
+                      :completed_tasks, :failed_tasks, :started_at, :heartbeat_at)
+            ON CONFLICT(worker_id) DO UPDATE SET
+                status = excluded.status, running_tasks = excluded.running_tasks,
+                completed_tasks = excluded.completed_tasks, failed_tasks = excluded.failed_tasks,
+                heartbeat_at = excluded.heartbeat_at
+            """,
+            health,
+        )
+        conn.commit()
+
+    def list_workers(self, stale_after: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Воркеры с признаком alive (heartbeat не старше stale_after секунд).
+        Остановленные более суток назад не возвращаются.
+        """
+        stale_after = stale_after or config.GENERATION_WORKER_HEALTH_INTERVAL * 3
+        now = _now()
+        rows = self._conn().execute(
+            "SELECT * FROM generation_workers WHERE heartbeat_at >= ? ORDER BY started_at",
+            (_ts(now - timedelta(days=1)),),
+        ).fetchall()
+        workers = []
+        for row in rows:
+            worker = dict(row)
+            worker["alive"] = worker["status"] != "stopped" and worker["heartbeat_at"] >= _ts(
+                now - timedelta(seconds=stale_after)
+            )
+            workers.append(worker)
+        return workers
+
+    @staticmethod
+    def _row_to_task(row: Any) -> Dict[str, Any]:
+        return {
+            "task_id": row["id"],
+            "status": row["status"],
+            "progress": row["progress"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "completed_at": row["completed_at"],
+            "current_step": row["current_step"],
+            "error_message": row["error_message"],
+            "user_id": row["created_by"],
+            "request": json.loads(row["generation_params"] or "{}"),
+            "attempts": row["attempts"],
+            "max_attempts": row["max_attempts"],
+            "lease_owner": row["lease_owner"],
+            "result_profile_id": row["result_profile_id"],
+            "priority_class": row["priority_class"] or "interactive",
+            "batch_id": row["batch_id"],
+            "stages": json.loads(row["stage_timings"]) if row["stage_timings"] else None,
+        }
+
+
+class GenerationWorkerPool:
+    """
+    @doc Пул asyncio воркеров, выполняющих задачи из GenerationQueue.
+
+    Каждый слот в цикле арендует задачу, запускает обработчик и продлевает
+    аренду heartbeat-ом каждые lease_seconds/3. Если heartbeat вернул False
+    (задача отменена или аренда перехвачена), обработчик отменяется.
+
+    Отмена: отдельный цикл раз в GENERATION_CANCEL_POLL_INTERVAL одним запросом
+    проверяет, не отменены ли выполняемые задачи (а при отмене через очередь
+    этого процесса - сразу), и отменяет asyncio задачу обработчика.
+    CancelledError доходит до HTTP запроса к LLM, который прерывается,
+    а результат не сохраняется.
+
+    Если задан group_handler, задача пакета с request["multi_position"]
+    забирает до group_size - 1 соседних задач того же подразделения, и
+    группа генерируется одним вызовом group_handler.
+
+    Examples:
+        python>
+        pool = GenerationWorkerPool(generation_queue, run_generation_task, concurrency=4)
+        await pool.start()
+        ...
+        await pool.stop(timeout=30)
+    """
+
+    def __init__(
+        self,
+        queue: GenerationQueue,
+        handler: TaskHandler,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        mode: str = "embedded",
+        health_interval: Optional[float] = None,
+        group_handler: Optional[GroupTaskHandler] = None,
+        group_size: Optional[int] = None,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.group_handler = group_handler
+        self.group_size = group_size or config.MULTI_POSITION_BATCH_SIZE
+        self.concurrency = concurrency or config.GENERATION_WORKER_CONCURRENCY
+        self.poll_interval = (
+            config.GENERATION_POLL_INTERVAL if poll_interval is None else poll_interval
+        )
+        self.health_interval = health_interval or config.GENERATION_WORKER_HEALTH_INTERVAL
+        self.mode = mode
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.status = "created"
+        self.started_at = _now()
+        self.completed_tasks = 0
+        self.failed_tasks = 0
+        self._slots: List[asyncio.Task] = []
+        self._health_task: Optional[asyncio.Task] = None
+        self._cancel_watch_task: Optional[asyncio.Task] = None
+        self._cancel_wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = asyncio.Event()
+        self.running_tasks: Dict[str, asyncio.Task] = {}
+        # Незавершенные (не отмененные и не перехваченные) задачи каждого job, общий set на группу
+        self._active_sets: Dict[str, Set[str]] = {}
+        self.queue.add_listener(self._on_queue_change)
+
+    async def start(self) -> None:
+        """Запуск слотов воркера в текущем event loop"""
+        self._stopping.clear()
+        self.status = "running"
+        self.started_at = _now()
+        self._slots = [
+            asyncio.create_task(self._slot_loop(f"{self.worker_id}/{slot}"))
+            for slot in range(self.concurrency)
+        ]
+        self._health_task = asyncio.create_task(self._health_loop())
+        self._loop = asyncio.get_running_loop()
+        self._cancel_wake = asyncio.Event()
+        self._cancel_watch_task = asyncio.create_task(self._cancellation_loop())
+        logger.info(
+            f"👷 Generation worker pool {self.worker_id} started with {self.concurrency} slots"
+        )
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """
+        Остановка (drain): новые задачи не берутся, текущие дорабатывают до timeout.
+        Незавершенные отменяются и возвращаются в очередь для другого воркера.
+        """
+        self._stopping.set()
+        self.status = "draining"
+        self._report_health()
+        pending: set = set()
+        if self._slots:
+            _, pending = await asyncio.wait(self._slots, timeout=timeout)
+            for slot in pending:
+                slot.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        self._slots = []
+        for helper in (self._health_task, self._cancel_watch_task):
+            if helper:
+                helper.cancel()
+        self._health_task = None
+        self._cancel_watch_task = None
+        self.status = "stopped"
+        self._report_health()
+        logger.info(
+            f"🛑 Generation worker pool {self.worker_id} stopped "
+            f"({len(pending)} tasks interrupted)"
+        )
+
+    def get_health(self) -> Dict[str, Any]:
+        """Состояние пула для таблицы generation_workers и /health"""
+        return {
+            "worker_id": self.worker_id,
+            "hostname": socket.gethostname(),
+            "pid": os.getpid(),
+            "mode": self.mode,
+            "status": self.status,
+            "concurrency": self.concurrency,
+            "running_tasks": len(self.running_tasks),
+            "completed_tasks": self.completed_tasks,
+            "failed_tasks": self.failed_tasks,
+            "started_at": _ts(self.started_at),
+            "heartbeat_at": _ts(_now()),
+        }
+
+    def _report_health(self) -> None:
+        try:
+            self.queue.record_worker_health(self.get_health())
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to record worker health: {e}")
+
+    async def _health_loop(self) -> None:
+        while not self._stopping.is_set():
+            self._report_health()
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.health_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _slot_loop(self, lease_owner: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                task = self.queue.claim(lease_owner)
+            except Exception as e:
+                logger.error(f"❌ Failed to claim generation task: {e}")
+                task = None
+
+            if task is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            tasks = [task]
+            if self.group_handler and task["request"].get("multi_position"):
+                try:
+                    tasks += self.queue.claim_siblings(task, lease_owner, self.group_size - 1)
+                except Exception as e:
+                    logger.warning(f"⚠️ Failed to claim sibling tasks: {e}")
+            await self._run_tasks(tasks, lease_owner)
+
+    async def _run_tasks(self, tasks: List[Dict[str, Any]], lease_owner: str) -> None:
+        """Выполнение задачи (или группы задач одним вызовом group_handler)"""
+        task_ids = [task["task_id"] for task in tasks]
+        active = set(task_ids)
+        for task_id in task_ids:
+            self._active_sets[task_id] = active
+
+        def report(progress: int, current_step: str) -> bool:
+            for task_id in list(active):
+                if not self.queue.heartbeat(task_id, lease_owner, progress, current_step):
+                    active.discard(task_id)
+            return bool(active)
+
+        claimed_at = _now()
+        for task in tasks:
+            QUEUE_WAIT_SECONDS.observe(
+                max(0.0, (claimed_at - datetime.fromisoformat(task["created_at"])).total_seconds()),
+                priority_class=task.get("priority_class") or "interactive",
+            )
+        TASKS_IN_FLIGHT.inc(len(tasks))
+        run_start = time.perf_counter()
+
+        if len(tasks) == 1:
+            async def run_single() -> List[Tuple[Dict[str, Any], Optional[str]]]:
+                return [await self.handler(tasks[0], report)]
+
+            job = asyncio.create_task(run_single())
+        else:
+            job = asyncio.create_task(self.group_handler(tasks, report))
+        for task_id in task_ids:
+            self.running_tasks[task_id] = job
+        heartbeat = asyncio.create_task(self._heartbeat_loop(active, lease_owner, job))
+        try:
+            outcomes = await job
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                # Останавливается сам слот (shutdown) - задачи возвращаются в очередь
+                for task_id in task_ids:
+                    self.queue.release(task_id, lease_owner)
+                raise
+            # Отменен только job: задачи отменены пользователем или аренда перехвачена
+            logger.warning(f"🛑 Task {', '.join(task_ids)} stopped: cancelled or lease lost")
+            self._record_finished(tasks, "cancelled", run_start)
+            return
+        except Exception as e:
+            for task_id in task_ids:
+                self.failed_tasks += 1
+                status = self.queue.fail(task_id, lease_owner, str(e), retryable=True)
+                logger.error(f"❌ Generation task {task_id} failed ({status or 'lease lost'}): {e}")
+            self._record_finished(tasks, "error", run_start)
+        else:
+            for task, (result, profile_id) in zip(tasks, outcomes):
+                task_id = task["task_id"]
+                status = "completed" if result.get("success") else "failed"
+                if status == "completed":
+                    self.completed_tasks += 1
+                else:
+                    self.failed_tasks += 1
+                stages = dict(result.get("metadata", {}).get("generation", {}).get("stages") or {})
+                stages["queue_wait"] = round(
+                    max(0.0, (claimed_at - datetime.fromisoformat(task["created_at"])).total_seconds()),
+                    4,
+                )
+                if self.queue.complete(task_id, lease_owner, result, profile_id, stages=stages):
+                    logger.info(f"✅ Generation task {task_id} completed successfully")
+                else:
+                    logger.warning(f"⚠️ Task {task_id} finished after cancellation or lease loss")
+                self._record_finished([task], status, run_start)
+        finally:
+            TASKS_IN_FLIGHT.dec(len(tasks))
+            heartbeat.cancel()
+            for task_id in task_ids:
+                self.running_tasks.pop(task_id, None)
+                self._active_sets.pop(task_id, None)
+
+    @staticmethod
+    def _record_finished(tasks: List[Dict[str, Any]], status: str, run_start: float) -> None:
+        elapsed = time.perf_counter() - run_start
+        for _ in tasks:
+            TASK_SECONDS.observe(elapsed, status=status)
+        TASKS_TOTAL.inc(len(tasks), status=status)
+
+    async def _heartbeat_loop(
+        self, active: Set[str], lease_owner: str, job: asyncio.Task
+    ) -> None:
+        """
+        Продление аренды задач active. Отмененные/перехваченные задачи
+        убираются из active; если не осталось ни одной, job отменяется.
+        """
+        interval = max(self.queue.lease_seconds / 3, 0.05)
+        while not job.done():
+            await asyncio.sleep(interval)
+            for task_id in list(active):
+                try:
+                    if not self.queue.heartbeat(task_id, lease_owner):
+                        active.discard(task_id)
+                except Exception as e:
+                    logger.warning(f"⚠️ Heartbeat failed for task {task_id}: {e}")
+            if not active:
+                job.cancel()
+                return
+
+    def _on_queue_change(self, task_id: str) -> None:
+        """Изменение задачи через очередь этого процесса - проверить отмену сразу"""
+        if task_id in self.running_tasks and self._loop and self._cancel_wake:
+            try:
+                self._loop.call_soon_threadsafe(self._cancel_wake.set)
+            except RuntimeError:
+                pass  # event loop уже закрыт
+
+    async def _cancellation_loop(self) -> None:
+        interval = config.GENERATION_CANCEL_POLL_INTERVAL
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._cancel_wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._cancel_wake.clear()
+            if not self.running_tasks:
+                continue
+            try:
+                cancelled = self.queue.cancelled_ids(list(self.running_tasks))
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to check task cancellations: {e}")
+                continue
+            for task_id in cancelled:
+                self._cancel_job(task_id)
+
+    def _cancel_job(self, task_id: str) -> None:
+        """Отмена задачи; job группы отменяется, когда отменены все ее задачи"""
+        active = self._active_sets.get(task_id)
+        job = self.running_tasks.get(task_id)
+        if active is None or job is None:
+            return
+        active.discard(task_id)
+        if not active and not job.done():
+            logger.info(f"🛑 Cancelling in-flight generation for task {task_id}")
+            job.cancel()
+
+
+# Глобальная очередь (БД берется из get_db_manager() при первом обращении)
+generation_queue = GenerationQueue()
@@ -0,0 +1,205 @@
+"""
+@doc
+Push-канал состояния задач генерации (Server-Sent Events).
+
+Вместо опроса /api/generation/{task_id}/status каждым клиентом один
+TaskEventBroker на процесс следит за всеми задачами, на которые есть
+подписки: одним запросом к generation_tasks за такт (GENERATION_EVENTS_POLL_INTERVAL)
+и сразу по сигналу очереди, если задачу выполняет воркер этого процесса.
+Изменения (статус, прогресс, шаг) рассылаются подписчикам.
+
+Подписка мультиплексирует любое число task_id. Медленный клиент не
+накапливает очередь: для каждой задачи хранится только последнее состояние.
+
+Examples:
+  python> subscription = task_event_broker.subscribe(["id-1", "id-2"])
+  python> async for event in subscription.events():
+  python>     print(event["task_id"], event["status"], event["progress"])
+  python> task_event_broker.unsubscribe(subscription)
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set
+
+from ..core.config import config
+from .generation_queue import TERMINAL_STATUSES, GenerationQueue, generation_queue
+
+logger = logging.getLogger(__name__)
+
+# Поля задачи, изменение которых порождает событие
+EVENT_FIELDS = (
+    "status",
+    "progress",
+    "current_step",
+    "error_message",
+    "started_at",
+    "completed_at",
+    "result_profile_id",
+)
+
+
+def _task_event(task: Dict[str, Any]) -> Dict[str, Any]:
+    event = {"task_id": task["task_id"]}
+    event.update({field: task.get(field) for field in EVENT_FIELDS})
+    return event
+
+
+class TaskSubscription:
+    """
+    @doc Подписка одного клиента на набор задач.
+
+    Хранит последнее неотправленное состояние каждой задачи (coalescing) и
+    завершается, когда все задачи дошли до терминального статуса.
+    """
+
+    def __init__(self, task_ids: Iterable[str]):
+        self.task_ids: Set[str] = set(task_ids)
+        self.finished: Set[str] = set()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    @property
+    def done(self) -> bool:
+        return self.finished >= self.task_ids
+
+    def push(self, event: Dict[str, Any]) -> None:
+        """Новое состояние задачи (заменяет неотправленное предыдущее)"""
+        self._pending[event["task_id"]] = event
+        self._ready.set()
+
+    def close(self) -> None:
+        self._closed = True
+        self._ready.set()
+
+    async def events(
+        self, keepalive: Optional[float] = None
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        События до завершения всех задач. None - keepalive (нет изменений за keepalive секунд).
+        """
+        while True:
+            if not self._pending:
+                if self._closed or self.done:
+                    return
+                try:
+                    await asyncio.wait_for(self._ready.wait(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+            self._ready.clear()
+            pending, self._pending = self._pending, {}
+            for event in pending.values():
+                if event["status"] in TERMINAL_STATUSES:
+                    self.finished.add(event["task_id"])
+                yield event
+
+
+class TaskEventBroker:
+    """
+    @doc Рассылка изменений задач всем подписчикам процесса.
+
+    Цикл опроса запускается при первой подписке и останавливается, когда
+    подписок не осталось.
+
+    Examples:
+        python>
+        subscription = task_event_broker.subscribe(task_ids)
+        try:
+            async for event in subscription.events(keepalive=15):
+                ...
+        finally:
+            task_event_broker.unsubscribe(subscription)
+    """
+
+    def __init__(self, queue: GenerationQueue, poll_interval: Optional[float] = None):
+        self.queue = queue
+        self.poll_interval = poll_interval or config.GENERATION_EVENTS_POLL_INTERVAL
+        self._subscriptions: Set[TaskSubscription] = set()
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.queue.add_listener(self._on_queue_change)
+
+    def subscribe(self, task_ids: Iterable[str]) -> TaskSubscription:
+        """
+        Подписка на задачи. Текущее состояние каждой задачи отправляется сразу.
+        """
+        subscription = TaskSubscription(task_ids)
+        self._subscriptions.add(subscription)
+
+        for task in self.queue.get_tasks(list(subscription.task_ids)):
+            event = _task_event(task)
+            self._snapshots[task["task_id"]] = event
+            subscription.push(event)
+
+        self._ensure_running()
+        return subscription
+
+    def unsubscribe(self, subscription: TaskSubscription) -> None:
+        subscription.close()
+        self._subscriptions.discard(subscription)
+        watched = self._watched()
+        for task_id in list(self._snapshots):
+            if task_id not in watched:
+                del self._snapshots[task_id]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "subscriptions": len(self._subscriptions),
+            "watched_tasks": len(self._watched()),
+        }
+
+    def _watched(self) -> Set[str]:
+        watched: Set[str] = set()
+        for subscription in self._subscriptions:
+            watched |= subscription.task_ids - subscription.finished
+        return watched
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._wake = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    def _on_queue_change(self, task_id: str) -> None:
+        """Сигнал очереди (может прийти из другого потока)"""
+        if self._loop is None or self._wake is None or task_id not in self._snapshots:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:
+            pass  # event loop уже закрыт
+
+    async def _run(self) -> None:
+        while self._subscriptions:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                self._publish_changes()
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to poll task events: {e}")
+        self._task = None
+
+    def _publish_changes(self) -> None:
+        watched = self._watched()
+        if not watched:
+            return
+        for task in self.queue.get_tasks(list(watched)):
+            event = _task_event(task)
+            if self._snapshots.get(task["task_id"]) == event:
+                continue
+            self._snapshots[task["task_id"]] = event
+            for subscription in list(self._subscriptions):
+                if task["task_id"] in subscription.task_ids:
+                    subscription.push(event)
+
+
+# Глобальный брокер процесса API
+task_event_broker = TaskEventBroker(generation_queue)
@@ -0,0 +1,163 @@
+"""
+@doc
+Ограниченный кеш результатов задач генерации (LRU + TTL + бюджет в байтах).
+
+Источник правды - SQLite (generation_tasks.result_json / result_gz и profiles),
+кеш только избавляет повторные GET /result от чтения и разбора JSON. Записи
+хранятся сериализованными (размер считается точно), старейшие по
+использованию вытесняются при превышении бюджета, устаревшие - по TTL.
+После вытеснения /result продолжает работать: результат читается из БД.
+
+Большие результаты пишутся в БД сжатыми (encode_result / decode_result).
+
+Examples:
+  python> store = TaskResultStore(max_bytes=64 * 1024 * 1024, ttl_seconds=3600)
+  python> store.put(task_id, result)
+  python> store.get(task_id)  # None после вытеснения или TTL
+  python> store.get_stats()["bytes"]
+"""
+
+import gzip
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from ..core.config import config
+from ..core.json_repair import fast_loads
+
+# Как часто put() удаляет устаревшие записи, которые никто не запрашивает
+SWEEP_INTERVAL_SECONDS = 60.0
+
+
+def encode_result(
+    result: Dict[str, Any], spill_threshold: Optional[int] = None
+) -> Tuple[Optional[str], Optional[bytes]]:
+    """
+    Сериализация результата для БД.
+
+    Returns:
+        (result_json, None) для небольших результатов или
+        (None, gzip bytes) если JSON больше spill_threshold байт
+    """
+    spill_threshold = (
+        config.GENERATION_RESULT_SPILL_BYTES if spill_threshold is None else spill_threshold
+    )
+    text = json.dumps(result, ensure_ascii=False, default=str)
+    data = text.encode("utf-8")
+    if spill_threshold and len(data) > spill_threshold:
+        return None, gzip.compress(data, compresslevel=6)
+    return text, None
+
+
+def decode_result(result_json: Optional[str], result_gz: Optional[bytes]) -> Optional[Dict[str, Any]]:
+    """Обратное преобразование encode_result"""
+    if result_gz:
+        return fast_loads(gzip.decompress(result_gz))
+    if result_json:
+        return fast_loads(result_json)
+    return None
+
+
+class TaskResultStore:
+    """
+    @doc Потокобезопасный LRU кеш сериализованных результатов с TTL.
+
+    Examples:
+        python>
+        store = TaskResultStore(max_bytes=1024 * 1024, ttl_seconds=60)
+        store.put("task-1", {"success": True, "profile": {...}})
+        result = store.get("task-1")
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_bytes = (
+            config.GENERATION_RESULT_CACHE_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        )
+        self.ttl_seconds = (
+            config.GENERATION_RESULT_CACHE_TTL if ttl_seconds is None else ttl_seconds
+        )
+        # task_id -> (сериализованный результат, момент записи)
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._stats = {"hits": 0, "misses": 0, "evictions_lru": 0, "evictions_ttl": 0, "rejected": 0}
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Результат из кеша (None - промах или запись устарела)"""
+        with self._lock:
+            entry = self._entries.get(task_id)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            data, stored_at = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                self._remove(task_id)
+                self._stats["evictions_ttl"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(task_id)
+            self._stats["hits"] += 1
+        return fast_loads(data)
+
+    def put(self, task_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Запись результата. Результат больше всего бюджета не кешируется.
+
+        Returns:
+            True если результат помещен в кеш
+        """
+        if time.monotonic() - self._last_sweep > SWEEP_INTERVAL_SECONDS:
+            self._last_sweep = time.monotonic()
+            self.sweep()
+
+        data = json.dumps(result, ensure_ascii=False, default=str).encode("utf-8")
+        with self._lock:
+            if task_id in self._entries:
+                self._remove(task_id)
+            if len(data) > self.max_bytes:
+                self._stats["rejected"] += 1
+                return False
+            self._entries[task_id] = (data, time.monotonic())
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions_lru"] += 1
+        return True
+
+    def discard(self, task_id: str) -> None:
+        with self._lock:
+            if task_id in self._entries:
+                self._remove(task_id)
+
+    def sweep(self) -> int:
+        """Удаление устаревших по TTL записей; возвращает их количество"""
+        if not self.ttl_seconds:
+            return 0
+        deadline = time.monotonic() - self.ttl_seconds
+        removed = 0
+        with self._lock:
+            # Порядок LRU не равен порядку записи - проверяются все записи
+            for task_id in [k for k, (_, at) in self._entries.items() if at < deadline]:
+                self._remove(task_id)
+                removed += 1
+            self._stats["evictions_ttl"] += removed
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Метрики кеша для /health"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                **self._stats,
+            }
+
+    def _remove(self, task_id: str) -> None:
+        data, _ = self._entries.pop(task_id)
+        self._bytes -= len(data)
@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+@doc
+Локальный OpenAI-совместимый mock LLM сервер для нагрузочного и перф-тестирования.
+
+Реализует chat.completions (обычный и streaming ответ) c учетом response_format:
+для json_schema возвращается профиль, валидный по запрошенной схеме
+(значения берутся из fixture-профилей, недостающие синтезируются по схеме).
+Это работает и для урезанных схем секционной генерации, и для пакетной схемы
+{"profiles": [...]}. Задержки, доля ошибок и 429 настраиваются; usage
+оценивается по длине сообщений, повторный префикс учитывается как cached_tokens.
+Ответ длиннее max_tokens обрывается (finish_reason=length), а запрос-продолжение
+с оборванным текстом в сообщении assistant получает недостающий хвост.
+
+Запуск и подключение LLMClient:
+  python -m backend.tools.mock_llm_server --port 8089 --latency-dist lognormal --latency-mean 3
+  OPENROUTER_BASE_URL=http://localhost:8089/api/v1 python -m backend.main
+
+Examples:
+  python> app = create_app(MockLLMSettings(latency_mean=0.0, seed=1))
+  python> settings.rate_limit_rate = 0.1  # 10% ответов 429 с Retry-After
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_FIXTURES_DIR = Path(__file__).parent / "mock_llm_fixtures"
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+# Грубая оценка: ~3 символа кириллического текста на токен
+CHARS_PER_TOKEN = 3.0
+
+
+@dataclass
+class MockLLMSettings:
+    """Настройки поведения mock сервера (можно менять на лету через POST /mock/config)"""
+
+    latency_dist: str = "lognormal"
+    latency_mean: float = 2.0  # Секунды до ответа (медиана для lognormal)
+    latency_spread: float = 0.5  # sigma для normal/lognormal, ширина для uniform
+    output_tokens_per_second: float = 0.0  # 0 - без учета скорости генерации
+    error_rate: float = 0.0  # Доля ответов 500
+    rate_limit_rate: float = 0.0  # Доля ответов 429
+    retry_after: float = 1.0  # Значение заголовка Retry-After для 429
+    price_per_million_input: float = 0.10
+    price_per_million_output: float = 0.40
+    seed: Optional[int] = None
+    fixtures_dir: str = str(DEFAULT_FIXTURES_DIR)
+
+    @classmethod
+    def from_env(cls) -> "MockLLMSettings":
+        """Настройки из переменных окружения MOCK_LLM_*"""
+        seed = os.getenv("MOCK_LLM_SEED")
+        return cls(
+            latency_dist=os.getenv("MOCK_LLM_LATENCY_DIST", "lognormal"),
+            latency_mean=float(os.getenv("MOCK_LLM_LATENCY_MEAN", "2.0")),
+            latency_spread=float(os.getenv("MOCK_LLM_LATENCY_SPREAD", "0.5")),
+            output_tokens_per_second=float(os.getenv("MOCK_LLM_OUTPUT_TPS", "0")),
+            error_rate=float(os.getenv("MOCK_LLM_ERROR_RATE", "0")),
+            rate_limit_rate=float(os.getenv("MOCK_LLM_RATE_LIMIT_RATE", "0")),
+            retry_after=float(os.getenv("MOCK_LLM_RETRY_AFTER", "1.0")),
+            seed=int(seed) if seed else None,
+            fixtures_dir=os.getenv("MOCK_LLM_FIXTURES_DIR", str(DEFAULT_FIXTURES_DIR)),
+        )
+
+
+@dataclass
+class MockLLMStats:
+    """Счетчики обработанных запросов"""
+
+    requests: int = 0
+    streamed: int = 0
+    errors_injected: int = 0
+    rate_limited: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    by_status: Dict[int, int] = field(default_factory=dict)
+
+
+def load_fixtures(fixtures_dir: str) -> List[Dict[str, Any]]:
+    """
+    Загрузка fixture-профилей (*.json) из директории.
+
+    Поддерживаются как "голые" профили, так и результаты генерации
+    с полем "profile" (формат сохраненных JSON файлов).
+    """
+    fixtures: List[Dict[str, Any]] = []
+    directory = Path(fixtures_dir)
+    if not directory.is_dir():
+        return fixtures
+    for path in sorted(directory.glob("*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            document = json.load(f)
+        profile = document.get("profile", document) if isinstance(document, dict) else None
+        if isinstance(profile, dict):
+            fixtures.append(profile)
+    return fixtures
+
+
+def synthesize_from_schema(
+    schema: Dict[str, Any], fixture: Any, rng: random.Random, path: str = "$"
+) -> Any:
+    """
+    Построение значения, валидного по схеме, с приоритетом значений из fixture.
+
+    Значение fixture используется, если оно подходит по типу/enum/границам;
+    иначе синтезируется детерминированно (через rng).
+
+    Args:
+        schema: JSON схема узла
+        fixture: Значение из fixture-профиля для этого узла (или None)
+        rng: Генератор случайных чисел сервера
+        path: JSON path узла (используется в синтезированных строках)
+
+    Returns:
+        Значение, соответствующее схеме
+    """
+    if not isinstance(schema, dict):
+        return fixture
+
+    if "enum" in schema:
+        return fixture if fixture in schema["enum"] else rng.choice(schema["enum"])
+
+    expected = schema.get("type", "object" if "properties" in schema else "string")
+    if isinstance(expected, list):
+        expected = next((t for t in expected if t != "null"), "null")
+
+    if expected == "object":
+        fixture = fixture if isinstance(fixture, dict) else {}
+        return {
+            name: synthesize_from_schema(sub_schema, fixture.get(name), rng, f"{path}.{name}")
+            for name, sub_schema in schema.get("properties", {}).items()
+        }
+
+    if expected == "array":
+        return _synthesize_array(schema, fixture, rng, path)
+
+    if expected == "string":
+        return fixture if isinstance(fixture, str) and fixture else f"Тестовое значение {path}"
+
+    if expected in ("integer", "number"):
+        minimum = schema.get("minimum", 0 if expected == "integer" else 0.0)
+        maximum = schema.get("maximum", minimum + 10)
+        if isinstance(fixture, (int, float)) and not isinstance(fixture, bool):
+            if minimum <= fixture <= maximum and (expected == "number" or isinstance(fixture, int)):
+                return fixture
+        value = rng.uniform(minimum, maximum)
+        return int(value) if expected == "integer" else round(value, 2)
+
+    if expected == "boolean":
+        return fixture if isinstance(fixture, bool) else True
+
+    return None
+
+
+def _synthesize_array(
+    schema: Dict[str, Any], fixture: Any, rng: random.Random, path: str
+) -> List[Any]:
+    """Массив с учетом minItems/maxItems/uniqueItems"""
+    item_schema = schema.get("items", {})
+    fixture_items = fixture if isinstance(fixture, list) else []
+    min_items = schema.get("minItems", 1)
+    max_items = schema.get("maxItems", max(min_items, len(fixture_items), 1))
+    count = min(max(len(fixture_items), min_items), max_items)
+
+    if schema.get("uniqueItems") and isinstance(item_schema, dict) and "enum" in item_schema:
+        allowed = [v for v in fixture_items if v in item_schema["enum"]]
+        remaining = [v for v in item_schema["enum"] if v not in allowed]
+        rng.shuffle(remaining)
+        return list(dict.fromkeys(allowed + remaining))[:count]
+
+    items = []
+    for index in range(count):
+        item_fixture = fixture_items[index % len(fixture_items)] if fixture_items else None
+        items.append(synthesize_from_schema(item_schema, item_fixture, rng, f"{path}[{index}]"))
+    return items
+
+
+def estimate_tokens(text: str) -> int:
+    """Оценка количества токенов по длине текста"""
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class MockLLMBackend:
+    """Логика mock сервера: задержки, инъекция ошибок, генерация ответов, usage"""
+
+    def __init__(self, settings: MockLLMSettings):
+        self.settings = settings
+        self.stats = MockLLMStats()
+        self.rng = random.Random(settings.seed)
+        self.fixtures = load_fixtures(settings.fixtures_dir)
+        self._seen_prefixes: set = set()
+        # Недоотданные хвосты оборванных ответов: hash(выданный текст) -> остаток
+        self._pending_tails: Dict[str, str] = {}
+
+    def sample_latency(self) -> float:
+        """Задержка ответа по настроенному распределению (секунды)"""
+        s = self.settings
+        if s.latency_mean <= 0:
+            return 0.0
+        if s.latency_dist == "uniform":
+            value = self.rng.uniform(s.latency_mean - s.latency_spread, s.latency_mean + s.latency_spread)
+        elif s.latency_dist == "normal":
+            value = self.rng.gauss(s.latency_mean, s.latency_spread)
+        elif s.latency_dist == "lognormal":
+            value = self.rng.lognormvariate(math.log(s.latency_mean), s.latency_spread)
+        else:
+            value = s.latency_mean
+        return max(0.0, value)
+
+    def inject_failure(self) -> Optional[JSONResponse]:
+        """Случайная ошибка 429/500 согласно настройкам (или None)"""
+        roll = self.rng.random()
+        if roll < self.settings.rate_limit_rate:
+            self.stats.rate_limited += 1
+            return self._error_response(
+                429,
+                "Rate limit exceeded (mock)",
+                headers={"Retry-After": str(self.settings.retry_after)},
+            )
+        if roll < self.settings.rate_limit_rate + self.settings.error_rate:
+            self.stats.errors_injected += 1
+            return self._error_response(500, "Internal server error (mock)")
+        return None
+
+    def _error_response(
+        self, status: int, message: str, headers: Optional[Dict[str, str]] = None
+    ) -> JSONResponse:
+        self.stats.by_status[status] = self.stats.by_status.get(status, 0) + 1
+        return JSONResponse(
+            status_code=status,
+            content={"error": {"message": message, "code": status, "type": "mock_error"}},
+            headers=headers,
+        )
+
+    def build_content(self, body: Dict[str, Any]) -> str:
+        """Текст ответа модели с учетом response_format"""
+        response_format = body.get("response_format") or {}
+        fixture = self.rng.choice(self.fixtures) if self.fixtures else {}
+
+        if response_format.get("type") == "json_schema":
+            schema = response_format.get("json_schema", {}).get("schema", {})
+            profiles_schema = schema.get("properties", {}).get("profiles")
+            if profiles_schema and profiles_schema.get("type") == "array":
+                # Пакетная схема: по fixture на каждый профиль
+                count = profiles_schema.get("minItems", 1)
+                item_schema = profiles_schema.get("items", {})
+                data = {
+                    "profiles": [
+                        synthesize_from_schema(
+                            item_schema,
+                            self.rng.choice(self.fixtures) if self.fixtures else {},
+                            self.rng,
+                            f"$.profiles[{i}]",
+                        )
+                        for i in range(count)
+                    ]
+                }
+            else:
+                data = synthesize_from_schema(schema, fixture, self.rng)
+            return json.dumps(data, ensure_ascii=False)
+
+        if response_format.get("type") == "json_object":
+            return json.dumps(fixture, ensure_ascii=False)
+
+        return "Это ответ mock LLM сервера."
+
+    def build_usage(self, messages: List[Dict[str, Any]], completion_tokens: int) -> Dict[str, Any]:
+        """usage в формате OpenRouter (включая cached_tokens и cost)"""
+        prompt_text = "".join(str(m.get("content", "")) for m in messages)
+        prompt_tokens = estimate_tokens(prompt_text)
+
+        # Общий префикс (все сообщения кроме последнего) считается закешированным при повторе
+        prefix = "".join(str(m.get("content", "")) for m in messages[:-1]) or prompt_text
+        prefix_hash = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        cached_tokens = estimate_tokens(prefix) if prefix_hash in self._seen_prefixes else 0
+        self._seen_prefixes.add(prefix_hash)
+        cached_tokens = min(cached_tokens, prompt_tokens)
+
+        self.stats.prompt_tokens += prompt_tokens
+        self.stats.completion_tokens += completion_tokens
+        self.stats.cached_tokens += cached_tokens
+
+        cost = (
+            prompt_tokens * self.settings.price_per_million_input
+            + completion_tokens * self.settings.price_per_million_output
+        ) / 1_000_000
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            "completion_tokens_details": {"reasoning_tokens": 0, "image_tokens": 0},
+            "cost": round(cost, 8),
+        }
+
+    def complete(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Полный ответ chat.completion (без задержки)"""
+        messages = body.get("messages", [])
+        emitted = ""
+        # Запрос-продолжение: предпоследнее сообщение - ранее оборванный ответ
+        if len(messages) >= 2 and messages[-2].get("role") == "assistant":
+            emitted = str(messages[-2].get("content", ""))
+        tail = self._pending_tails.pop(_text_hash(emitted), None) if emitted else None
+        content = tail if tail is not None else self.build_content(body)
+        completion_tokens = estimate_tokens(content)
+        finish_reason = "stop"
+
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+        if max_tokens and completion_tokens > max_tokens:
+            cut = int(max_tokens * CHARS_PER_TOKEN)
+            prefix = (emitted if tail is not None else "") + content[:cut]
+            self._pending_tails[_text_hash(prefix)] = content[cut:]
+            content = content[:cut]
+            completion_tokens = max_tokens
+            finish_reason = "length"
+
+        return {
+            "id": f"gen-mock-{uuid.uuid4().hex[:16]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock/model"),
+            "provider": "mock",
+            "system_fingerprint": "mock",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason,
+                }
+            ],
+            "usage": self.build_usage(body.get("messages", []), completion_tokens),
+        }
+
+    def generation_time(self, completion: Dict[str, Any]) -> float:
+        """Время генерации ответа: задержка + время на вывод токенов"""
+        latency = self.sample_latency()
+        tps = self.settings.output_tokens_per_second
+        if tps > 0:
+            latency += completion["usage"]["completion_tokens"] / tps
+        return latency
+
+
+def _stream_chunks(completion: Dict[str, Any], chunk_chars: int = 400) -> List[Dict[str, Any]]:
+    """Разбиение ответа на chunk-и chat.completion.chunk"""
+    content = completion["choices"][0]["message"]["content"]
+    base = {k: completion[k] for k in ("id", "created", "model", "system_fingerprint")}
+    base["object"] = "chat.completion.chunk"
+
+    chunks = [
+        {**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]}
+    ]
+    for start in range(0, len(content), chunk_chars):
+        chunks.append(
+            {
+                **base,
+                "choices": [
+                    {"index": 0, "delta": {"content": content[start : start + chunk_chars]}, "finish_reason": None}
+                ],
+            }
+        )
+    chunks.append(
+        {
+            **base,
+            "choices": [
+                {"index": 0, "delta": {}, "finish_reason": completion["choices"][0]["finish_reason"]}
+            ],
+        }
+    )
+    return chunks
+
+
+def create_app(settings: Optional[MockLLMSettings] = None) -> FastAPI:
+    """
+    Создание FastAPI приложения mock сервера.
+
+    Endpoints:
+        POST /v1/chat/completions, /api/v1/chat/completions - chat.completions
+        GET  /v1/models, /api/v1/models - список моделей
+        GET  /mock/stats - счетчики запросов и токенов
+        POST /mock/config - изменение настроек на лету
+    """
+    backend = MockLLMBackend(settings or MockLLMSettings.from_env())
+    app = FastAPI(title="Mock LLM Server", version="1.0.0")
+    app.state.backend = backend
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        backend.stats.requests += 1
+
+        failure = backend.inject_failure()
+        if failure is not None:
+            await asyncio.sleep(min(backend.sample_latency(), 1.0))
+            return failure
+
+        completion = backend.complete(body)
+        delay = backend.generation_time(completion)
+        backend.stats.by_status[200] = backend.stats.by_status.get(200, 0) + 1
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay)
+            return JSONResponse(content=completion)
+
+        backend.stats.streamed += 1
+        chunks = _stream_chunks(completion)
+        include_usage = (body.get("stream_options") or {}).get("include_usage", True)
+
+        async def event_stream():
+            # Первый токен после половины задержки, остальное равномерно
+            await asyncio.sleep(delay / 2)
+            step = (delay / 2) / max(1, len(chunks))
+            for chunk in chunks:
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                await asyncio.sleep(step)
+            if include_usage:
+                usage_chunk = {**chunks[-1], "choices": [], "usage": completion["usage"]}
+                yield f"data: {json.dumps(usage_chunk, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    async def list_models():
+        return {"object": "list", "data": [{"id": "mock/model", "object": "model", "owned_by": "mock"}]}
+
+    for prefix in ("/v1", "/api/v1"):
+        app.add_api_route(f"{prefix}/chat/completions", chat_completions, methods=["POST"])
+        app.add_api_route(f"{prefix}/models", list_models, methods=["GET"])
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return {"settings": asdict(backend.settings), "stats": asdict(backend.stats)}
+
+    @app.post("/mock/config")
+    async def mock_config(request: Request):
+        updates = await request.json()
+        for name, value in updates.items():
+            if hasattr(backend.settings, name):
+                setattr(backend.settings, name, value)
+        if "seed" in updates:
+            backend.rng = random.Random(backend.settings.seed)
+        if "fixtures_dir" in updates:
+            backend.fixtures = load_fixtures(backend.settings.fixtures_dir)
+        return {"settings": asdict(backend.settings)}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default=None)
+    parser.add_argument("--latency-mean", type=float, default=None, help="Секунды (медиана для lognormal)")
+    parser.add_argument("--latency-spread", type=float, default=None)
+    parser.add_argument("--output-tps", type=float, default=None, help="Скорость вывода, токенов/сек")
+    parser.add_argument("--error-rate", type=float, default=None, help="Доля ответов 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=None, help="Доля ответов 429")
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--fixtures", default=None, help="Директория с fixture-профилями")
+    args = parser.parse_args()
+
+    settings = MockLLMSettings.from_env()
+    overrides = {
+        "latency_dist": args.latency_dist,
+        "latency_mean": args.latency_mean,
+        "latency_spread": args.latency_spread,
+        "output_tokens_per_second": args.output_tps,
+        "error_rate": args.error_rate,
+        "rate_limit_rate": args.rate_limit_rate,
+        "retry_after": args.retry_after,
+        "seed": args.seed,
+        "fixtures_dir": args.fixtures,
+    }
+    for name, value in overrides.items():
+        if value is not None:
+            setattr(settings, name, value)
+
+    import uvicorn
+
+    print(f"🧪 Mock LLM server: http://{args.host}:{args.port}/api/v1")
+    print(f"   Settings: {json.dumps(asdict(settings), ensure_ascii=False)}")
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
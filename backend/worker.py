@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+@doc
+Отдельные процессы воркеров генерации профилей.
+
+Каждый процесс запускает GenerationWorkerPool с N asyncio слотами и забирает
+задачи из общей очереди generation_tasks (SQLite). Родительский процесс
+поднимает M таких процессов, перезапускает упавшие и при SIGTERM/SIGINT
+передает сигнал детям: они перестают брать новые задачи и дорабатывают
+текущие (до --drain-timeout), незавершенные возвращаются в очередь.
+
+Состояние каждого процесса пишется в generation_workers и доступно через
+GET /api/generation/workers. Чтобы API не выполнял генерацию сам, задайте
+GENERATION_EMBEDDED_WORKERS=false.
+
+Examples:
+  python -m backend.worker                                # 1 процесс x GENERATION_WORKER_CONCURRENCY
+  python -m backend.worker --processes 4 --concurrency 8  # 32 параллельных генерации
+  kill -TERM <pid>                                         # graceful drain
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+import sys
+import time
+from typing import List
+
+from .core.config import config
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("backend.worker")
+
+# Пауза перед перезапуском упавшего процесса (секунды)
+RESTART_BACKOFF_SECONDS = 5.0
+
+
+async def run_worker_process(concurrency: int, drain_timeout: float) -> None:
+    """Один процесс воркера: пул слотов до сигнала остановки"""
+    from .api.generation import readiness_monitor, run_generation_group, run_generation_task
+    from .models.database import initialize_db_manager
+    from .services.generation_queue import GenerationWorkerPool, generation_queue
+
+    db_manager = initialize_db_manager(config.database_path)
+    db_manager.create_schema()
+
+    pool = GenerationWorkerPool(
+        generation_queue,
+        run_generation_task,
+        concurrency=concurrency,
+        mode="standalone",
+        group_handler=run_generation_group,
+    )
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    await readiness_monitor.start()
+    await pool.start()
+    await stop_event.wait()
+
+    logger.info(f"⏳ Draining worker {pool.worker_id} (timeout {drain_timeout:.0f}s)...")
+    await pool.stop(timeout=drain_timeout)
+    await readiness_monitor.stop()
+
+    from .core.file_write_queue import file_write_queue
+    from .core.render_executor import render_executor
+    from .core.tracing import tracing
+
+    render_executor.shutdown()
+    file_write_queue.shutdown()
+
+    tracing.shutdown(timeout=5.0)
+
+
+def _process_main(concurrency: int, drain_timeout: float) -> None:
+    asyncio.run(run_worker_process(concurrency, drain_timeout))
+
+
+def supervise(processes: int, concurrency: int, drain_timeout: float) -> int:
+    """
+    Запуск и надзор за процессами воркеров.
+
+    Returns:
+        Код выхода
+    """
+    context = multiprocessing.get_context("spawn")
+    stopping = False
+
+    def spawn() -> multiprocessing.Process:
+        process = context.Process(
+            target=_process_main, args=(concurrency, drain_timeout), daemon=False
+        )
+        process.start()
+        logger.info(f"👷 Started worker process pid={process.pid} ({concurrency} slots)")
+        return process
+
+    def handle_signal(signum, frame):
+        nonlocal stopping
+        if stopping:
+            return
+        stopping = True
+        logger.info(f"🛑 Received signal {signum}, draining {len(children)} worker processes")
+        for child in children:
+            if child.is_alive():
+                child.terminate()  # SIGTERM - ребенок выполняет drain
+
+    children: List[multiprocessing.Process] = [spawn() for _ in range(processes)]
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    while not stopping:
+        time.sleep(1.0)
+        for index, child in enumerate(children):
+            if not child.is_alive() and not stopping:
+                logger.error(
+                    f"❌ Worker process pid={child.pid} exited with code {child.exitcode}, restarting"
+                )
+                time.sleep(RESTART_BACKOFF_SECONDS)
+                children[index] = spawn()
+
+    deadline = time.monotonic() + drain_timeout + 10
+    for child in children:
+        child.join(timeout=max(0.0, deadline - time.monotonic()))
+        if child.is_alive():
+            logger.warning(f"⚠️ Worker process pid={child.pid} did not drain in time, killing")
+            child.kill()
+            child.join()
+
+    logger.info("✅ All worker processes stopped")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Воркеры очереди генерации профилей")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=config.GENERATION_WORKER_PROCESSES,
+        help="Количество процессов (M)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=config.GENERATION_WORKER_CONCURRENCY,
+        help="Параллельных генераций на процесс (N)",
+    )
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=config.GENERATION_DRAIN_TIMEOUT,
+        help="Сколько секунд дорабатывать текущие задачи после SIGTERM",
+    )
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        # Один процесс - без супервизора (удобно для docker/systemd, которые сами перезапускают)
+        _process_main(args.concurrency, args.drain_timeout)
+        return 0
+    return supervise(args.processes, args.concurrency, args.drain_timeout)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -685,50 +685,37 @@ class FilesManagerComponent:
     async def download_multiple_files(self, profile_ids: list[str], format_type: str):
         """
         @doc
-        Скачивание нескольких файлов профилей.
+        Скачивание нескольких файлов профилей одним ZIP архивом.
+
+        Архив формируется сервером потоково (POST /api/profiles/export) с
+        иерархией папок подразделений - один запрос вместо запроса на файл.
 
         Args:
             profile_ids: Список ID профилей
-            format_type: Формат файлов
+            format_type: Формат файлов (json, markdown, docx)
 
         Examples:
           python> await files_manager.download_multiple_files(["123", "456"], "json")
-          python> # Несколько JSON файлов скачано
+          python> # Скачан архив profiles_20250110_143022.zip
         """
         if not profile_ids:
             self._safe_notify("❌ Нет профилей для скачивания", "negative")
             return
 
-        self._safe_notify(f"📥 Начинается скачивание {len(profile_ids)} файлов...", "info")
-
-        success_count = 0
-        for i, profile_id in enumerate(profile_ids, 1):
-            try:
-                self._safe_notify(
-                    f"📥 Скачивание {i}/{len(profile_ids)}: {profile_id[:8]}...",
-                    "info",
-                )
-                await self.download_file(profile_id, format_type)
-                success_count += 1
-
-                # Небольшая пауза между скачиваниями
-                if i < len(profile_ids):
-                    await asyncio.sleep(1)
+        file_format = "md" if format_type == "markdown" else format_type
+        self._safe_notify(f"📦 Подготовка архива из {len(profile_ids)} профилей...", "info")
 
-            except Exception as e:
-                logger.error(f"Error downloading file {profile_id}: {e}")
-                self._safe_notify(
-                    f"❌ Ошибка скачивания {profile_id[:8]}: {str(e)}", "negative"
-                )
-
-        # Итоговое уведомление
-        if success_count == len(profile_ids):
-            self._safe_notify(f"✅ Все {success_count} файлов успешно скачаны", "positive")
-        else:
-            self._safe_notify(
-                f"⚠️ Скачано {success_count} из {len(profile_ids)} файлов",
-                "warning",
+        try:
+            archive = await self.api_client.export_profiles_zip(
+                profile_ids=profile_ids, formats=[file_format]
             )
+            filename = f"profiles_{time.strftime('%Y%m%d_%H%M%S')}.zip"
+            ui.download(archive, filename, media_type="application/zip")
+            logger.info(f"✅ Archive download initiated: {filename} ({len(archive)} bytes)")
+            self._safe_notify(f"✅ Архив {filename} скачан", "positive")
+        except Exception as e:
+            logger.error(f"Error downloading profiles archive: {e}")
+            self._safe_notify(f"❌ Ошибка скачивания архива: {str(e)}", "negative")
 
     async def preview_markdown(self, profile_id: str):
         """
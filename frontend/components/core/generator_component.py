@@ -18,6 +18,7 @@ Examples:
 import asyncio
 import logging
 import time
+import uuid
 from typing import Dict, Any, Optional, Callable
 
 from nicegui import ui
@@ -259,6 +260,8 @@ class GeneratorComponent:
                 "department": self.selected_department,
                 "position": self.selected_position,
                 "save_result": True,
+                # Один ключ на запуск: повторы _safe_generation_api_call не создают новых задач
+                "idempotency_key": str(uuid.uuid4()),
             }
 
             logger.info(f"Starting generation with data: {generation_data}")
@@ -395,9 +398,10 @@ class GeneratorComponent:
     ):
         """
         @doc
-        Опрос статуса генерации каждые 5 секунд.
+        Отслеживание статуса генерации.
 
-        Обновляет прогресс-бар и статус до завершения генерации.
+        Основной канал - поток событий сервера (SSE): прогресс и завершение
+        приходят сразу. Если поток недоступен, опрос статуса каждые 5 секунд.
 
         Args:
             dialog: Диалог прогресса
@@ -409,6 +413,19 @@ class GeneratorComponent:
           python> await generator._poll_generation_status(dialog, status, bar, pct)
           python> # Статус отслеживается до завершения
         """
+        try:
+            async for task_data in self.api_client.stream_generation_events(
+                [self.current_task_id]
+            ):
+                if not dialog.value:  # Диалог закрыт пользователем
+                    return
+                if await self._apply_generation_update(
+                    task_data, dialog, status_label, progress_bar, progress_percentage
+                ):
+                    return
+        except Exception as e:
+            logger.warning(f"Generation event stream unavailable, falling back to polling: {e}")
+
         max_attempts = 60  # 5 минут максимум
         attempt = 0
 
@@ -428,48 +445,13 @@ class GeneratorComponent:
                     attempt += 1
                     continue
 
-                task_data = status_response["task"]
-                status = task_data["status"]
-                progress = task_data.get("progress", 0)
-                current_step = task_data.get("current_step", "Обработка...")
-
-                # Обновляем UI с улучшенной информацией
-                status_emoji_map = {
-                    "Анализ": "🔍",
-                    "Генерация": "🤖",
-                    "Валидация": "✅",
-                    "Сохранение": "💾",
-                    "Обработка": "⚙️",
-                    "Завершение": "🎉",
-                }
-
-                # Добавляем эмодзи к статусу
-                enhanced_status = current_step
-                for key, emoji in status_emoji_map.items():
-                    if key.lower() in current_step.lower():
-                        enhanced_status = f"{emoji} {current_step}"
-                        break
-
-                status_label.text = enhanced_status
-                progress_bar.value = progress / 100.0
-                progress_percentage.text = f"{progress}% завершено"
-
-                if status == "completed":
-                    dialog.close()
-                    # Reset error state on success
-                    self.generation_attempts = 0
-                    self.last_generation_error = None
-                    self.recovery_mode = False
-                    await self._show_generation_success()
-                    break
-                elif status == "failed":
-                    dialog.close()
-                    error_msg = task_data.get("error_message", "Неизвестная ошибка")
-                    await self._handle_generation_failure(error_msg, allow_retry=True)
-                    break
-                elif status == "cancelled":
-                    dialog.close()
-                    ui.notify("Генерация отменена", type="warning")
+                if await self._apply_generation_update(
+                    status_response["task"],
+                    dialog,
+                    status_label,
+                    progress_bar,
+                    progress_percentage,
+                ):
                     break
 
                 await asyncio.sleep(5)  # Проверяем каждые 5 секунд
@@ -499,6 +481,63 @@ class GeneratorComponent:
                 "Превышено время ожидания генерации", allow_retry=True
             )
 
+    async def _apply_generation_update(
+        self, task_data, dialog, status_label, progress_bar, progress_percentage
+    ) -> bool:
+        """
+        @doc
+        Обновление диалога прогресса по состоянию задачи.
+
+        Returns:
+            True если задача завершена (диалог закрыт)
+
+        Examples:
+          python> finished = await generator._apply_generation_update(task, dialog, status, bar, pct)
+        """
+        status = task_data["status"]
+        progress = task_data.get("progress") or 0
+        current_step = task_data.get("current_step") or "Обработка..."
+
+        # Обновляем UI с улучшенной информацией
+        status_emoji_map = {
+            "Анализ": "🔍",
+            "Генерация": "🤖",
+            "Валидация": "✅",
+            "Сохранение": "💾",
+            "Обработка": "⚙️",
+            "Завершение": "🎉",
+        }
+
+        # Добавляем эмодзи к статусу
+        enhanced_status = current_step
+        for key, emoji in status_emoji_map.items():
+            if key.lower() in current_step.lower():
+                enhanced_status = f"{emoji} {current_step}"
+                break
+
+        status_label.text = enhanced_status
+        progress_bar.value = progress / 100.0
+        progress_percentage.text = f"{progress}% завершено"
+
+        if status == "completed":
+            dialog.close()
+            # Reset error state on success
+            self.generation_attempts = 0
+            self.last_generation_error = None
+            self.recovery_mode = False
+            await self._show_generation_success()
+            return True
+        elif status == "failed":
+            dialog.close()
+            error_msg = task_data.get("error_message") or "Неизвестная ошибка"
+            await self._handle_generation_failure(error_msg, allow_retry=True)
+            return True
+        elif status == "cancelled":
+            dialog.close()
+            ui.notify("Генерация отменена", type="warning")
+            return True
+        return False
+
     async def _show_generation_success(self):
         """
         @doc
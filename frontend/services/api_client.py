@@ -14,7 +14,7 @@ Examples:
 import asyncio
 import json
 import logging
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List
 from datetime import datetime, timedelta
 
 import httpx
@@ -776,6 +776,49 @@ class APIClient:
         except Exception as e:
             raise APIError(f"Ошибка сети при скачивании: {e}")
 
+    async def export_profiles_zip(
+        self,
+        profile_ids: Optional[List[str]] = None,
+        unit_path: Optional[str] = None,
+        formats: Optional[List[str]] = None,
+    ) -> bytes:
+        """
+        @doc
+        Выгрузка нескольких профилей одним ZIP архивом (потоковый ответ сервера).
+
+        Args:
+            profile_ids: ID профилей
+            unit_path: Путь подразделения (Блок/Департамент/...) вместо списка ID
+            formats: Форматы файлов (json, md, docx)
+
+        Returns:
+            bytes: Содержимое ZIP архива
+
+        Examples:
+          python> data = await client.export_profiles_zip(["id1", "id2"], formats=["docx"])
+        """
+        url = f"{self.base_url}/api/profiles/export"
+        headers = await self._get_auth_headers_async()
+        payload: Dict[str, Any] = {"formats": formats or ["json", "md", "docx"]}
+        if profile_ids:
+            payload["profile_ids"] = profile_ids
+        if unit_path:
+            payload["unit_path"] = unit_path
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    url, json=payload, headers=headers, timeout=self.timeout
+                )
+                response.raise_for_status()
+                return response.content
+        except httpx.HTTPStatusError as e:
+            raise APIError(
+                f"Ошибка выгрузки архива: {e.response.status_code}",
+                status_code=e.response.status_code,
+            )
+        except Exception as e:
+            raise APIError(f"Ошибка сети при выгрузке архива: {e}")
+
     async def start_profile_generation(
         self,
         department: str,
@@ -783,13 +826,17 @@ class APIClient:
         employee_name: Optional[str] = None,
         temperature: float = 0.1,
         save_result: bool = True,
+        idempotency_key: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         @doc
         Запуск генерации профиля должности.
 
+        Повторы с тем же idempotency_key возвращают уже созданную задачу
+        (ключ генерируется один раз на действие пользователя).
+
         Examples:
-          python> task = await client.start_profile_generation("IT", "Developer")
+          python> task = await client.start_profile_generation("IT", "Developer", idempotency_key=str(uuid.uuid4()))
           python> print(f"Task ID: {task['task_id']}")
         """
         data = {
@@ -800,6 +847,8 @@ class APIClient:
         }
         if employee_name:
             data["employee_name"] = employee_name
+        if idempotency_key:
+            data["idempotency_key"] = idempotency_key
 
         return await self._make_request("POST", "/api/generation/start", data=data)
 
@@ -814,6 +863,51 @@ class APIClient:
         """
         return await self._make_request("GET", f"/api/generation/{task_id}/status")
 
+    async def stream_generation_events(
+        self, task_ids: List[str]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        @doc
+        Поток изменений состояния задач генерации (SSE) вместо опроса статуса.
+
+        Возвращает события до завершения всех задач. При ошибке соединения
+        выбрасывает APIError - вызывающий код может перейти на опрос.
+
+        Examples:
+          python> async for event in client.stream_generation_events([task_id]):
+          python>     print(event["status"], event["progress"])
+        """
+        headers = await self._get_auth_headers_async()
+        if not headers:
+            raise APIError("Не удалось получить валидный токен авторизации", 401)
+        headers["Accept"] = "text/event-stream"
+
+        try:
+            async with self.client.stream(
+                "POST",
+                f"{self.base_url}/api/generation/events",
+                json={"task_ids": task_ids},
+                headers=headers,
+                # Между событиями может пройти до keepalive (15с) - read таймаут с запасом
+                timeout=httpx.Timeout(self.timeout, read=60.0),
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    raise APIError(
+                        f"HTTP {response.status_code}", status_code=response.status_code
+                    )
+
+                event_name = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event:"):
+                        event_name = line[6:].strip()
+                    elif line.startswith("data:") and event_name == "task":
+                        yield json.loads(line[5:])
+                    elif line.startswith("data:") and event_name == "end":
+                        return
+        except (httpx.TimeoutException, httpx.NetworkError) as e:
+            raise APIError(f"Поток событий прерван: {e}")
+
     async def get_generation_task_result(self, task_id: str) -> Dict[str, Any]:
         """
         @doc
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark: DOCX rendering - prebuilt template + XML fragments vs python-docx object model.
+
+Рендерит одни и те же профили двумя путями ProfileDocxService (fast_render=True
+и False), сравнивает время и проверяет, что документы совпадают по содержанию
+(тексты абзацев, стили и ячейки таблиц). Без --profiles используется
+синтетический профиль с крупными таблицами навыков.
+
+Usage:
+    python scripts/benchmark_docx_rendering.py --runs 50
+    python scripts/benchmark_docx_rendering.py --profiles data/generated_profiles/**/*.json
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document  # noqa: E402
+
+from backend.core.docx_service import ProfileDocxService  # noqa: E402
+
+MODES = {"object-model": False, "template+xml": True}
+
+
+def synthetic_profile(skill_categories: int = 6, skills_per_category: int = 12) -> Dict[str, Any]:
+    """Профиль с типичной для генерации структурой и объемом"""
+    return {
+        "profile": {
+            "position_title": "Ведущий аналитик данных",
+            "department_broad": "Блок ИТ",
+            "department_specific": "Группа анализа данных",
+            "position_category": "Специалист",
+            "direct_manager": "Руководитель группы анализа данных",
+            "primary_activity_type": "Аналитическая",
+            "subordinates": {"departments": 0, "direct_reports": 2},
+            "responsibility_areas": [
+                {"area": [f"Область {i}"], "tasks": [f"Задача {i}.{j} & <детали>" for j in range(8)]}
+                for i in range(1, 7)
+            ],
+            "professional_skills": [
+                {
+                    "skill_category": f"Категория навыков {c}",
+                    "specific_skills": [
+                        {
+                            "skill_name": f"Навык {c}.{s}",
+                            "proficiency_level": (s % 4) + 1,
+                            "proficiency_description": "Уверенно применяет на практике\nи обучает коллег",
+                        }
+                        for s in range(skills_per_category)
+                    ],
+                }
+                for c in range(1, skill_categories + 1)
+            ],
+            "personal_qualities": ["аналитичность", "ответственность", "коммуникабельность"],
+            "corporate_competencies": [{"competency": "Клиентоориентированность"}, "Командная работа"],
+            "experience_and_education": {
+                "education_level": "Высшее",
+                "field_of_study": "Прикладная математика",
+                "total_work_experience": "от 3 лет",
+            },
+            "careerogram": {"source_positions": {"direct_predecessors": ["Аналитик данных"]}},
+            "workplace_provisioning": {"software": {"standard_package": ["MS Office", "Python", "SQL"]}},
+            "performance_metrics": {
+                "evaluation_methodology": "Ежеквартальная оценка по KPI",
+                "success_indicators": [f"Показатель {i}" for i in range(10)],
+            },
+            "additional_information": {"working_conditions": {"work_schedule": "5/2"}},
+        },
+        "metadata": {
+            "generation": {"timestamp": "2025-01-10T14:30:00", "duration": 42.5},
+            "llm": {"model": "google/gemini-2.5-flash"},
+        },
+    }
+
+
+def document_signature(data: bytes) -> List[Tuple[str, ...]]:
+    """Содержание документа для сравнения путей (без строки 'DOCX создан')"""
+    doc = Document(io.BytesIO(data))
+    signature: List[Tuple[str, ...]] = [("p", p.style.name, p.text) for p in doc.paragraphs]
+    for table in doc.tables:
+        signature.append(("table", table.style.name))
+        for row in table.rows:
+            cells = tuple(cell.text for cell in row.cells)
+            if cells[0] != "DOCX создан":
+                signature.append(("row", *cells))
+    return signature
+
+
+def render(service: ProfileDocxService, profile: Dict[str, Any]) -> bytes:
+    buffer = io.BytesIO()
+    service.create_docx_from_json(profile, buffer)
+    return buffer.getvalue()
+
+
+def run_mode(fast_render: bool, profiles: List[Dict[str, Any]], runs: int) -> Dict[str, Any]:
+    """Прогон одного пути: первый рендеринг (с построением шаблона) отдельно"""
+    ProfileDocxService._template = None
+    service = ProfileDocxService(fast_render=fast_render)
+
+    start = time.perf_counter()
+    render(service, profiles[0])
+    first = time.perf_counter() - start
+
+    durations: List[float] = []
+    for _ in range(runs):
+        for profile in profiles:
+            start = time.perf_counter()
+            render(service, profile)
+            durations.append(time.perf_counter() - start)
+
+    return {
+        "first_ms": first * 1000,
+        "documents": len(durations),
+        "mean_ms": statistics.mean(durations) * 1000,
+        "p50_ms": statistics.median(durations) * 1000,
+        "max_ms": max(durations) * 1000,
+        "docs_per_s": len(durations) / sum(durations),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark DOCX rendering paths")
+    parser.add_argument("--profiles", nargs="*", help="JSON файлы профилей (по умолчанию - синтетический)")
+    parser.add_argument("--runs", type=int, default=20, help="Количество прогонов набора")
+    args = parser.parse_args()
+
+    profiles = []
+    for path in args.profiles or []:
+        with open(path, encoding="utf-8") as f:
+            profiles.append(json.load(f))
+    profiles = profiles or [synthetic_profile()]
+
+    mismatches = sum(
+        document_signature(render(ProfileDocxService(fast_render=False), profile))
+        != document_signature(render(ProfileDocxService(fast_render=True), profile))
+        for profile in profiles
+    )
+
+    print(f"\n📊 DOCX RENDERING BENCHMARK ({len(profiles)} profiles x {args.runs} runs)")
+    print("-" * 78)
+    print(f"{'path':<14} {'first ms':>9} {'docs':>6} {'mean ms':>9} {'p50 ms':>9} {'max ms':>9} {'docs/s':>9}")
+    results = {}
+    for name, fast_render in MODES.items():
+        r = results[name] = run_mode(fast_render, profiles, args.runs)
+        print(
+            f"{name:<14} {r['first_ms']:>9.1f} {r['documents']:>6} {r['mean_ms']:>9.2f} "
+            f"{r['p50_ms']:>9.2f} {r['max_ms']:>9.2f} {r['docs_per_s']:>9.1f}"
+        )
+
+    speedup = results["object-model"]["mean_ms"] / results["template+xml"]["mean_ms"]
+    print(f"\n⚡ Template+XML speedup (mean): {speedup:.2f}x")
+    print(f"{'✅' if not mismatches else '❌'} Content mismatches between paths: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-call vs sectional generation of job profiles.
+
+Сравнивает wall time и расход токенов двух режимов ProfileGenerator на одном
+и том же наборе должностей. Работает с любым OpenAI-совместимым endpoint,
+заданным через OPENROUTER_BASE_URL (реальный OpenRouter или локальный mock).
+
+Usage:
+    python scripts/benchmark_generation_modes.py \\
+        --department "Группа анализа данных" \\
+        --positions "Аналитик данных" "Ведущий аналитик данных" \\
+        --runs 2
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core.profile_generator import ProfileGenerator  # noqa: E402
+
+MODES = ("single", "sectional")
+
+
+async def run_mode(
+    generator: ProfileGenerator, mode: str, department: str, positions: List[str], runs: int
+) -> Dict[str, Any]:
+    """Прогон одного режима: последовательные генерации, метрики по каждой"""
+    durations: List[float] = []
+    input_tokens: List[int] = []
+    output_tokens: List[int] = []
+    failures = 0
+
+    for _ in range(runs):
+        for position in positions:
+            start = time.perf_counter()
+            result = await generator.generate_profile(
+                department=department,
+                position=position,
+                save_result=False,
+                generation_mode=mode,
+            )
+            durations.append(time.perf_counter() - start)
+
+            if not result["success"]:
+                failures += 1
+                continue
+
+            tokens = result["metadata"]["llm"].get("tokens", {})
+            input_tokens.append(tokens.get("input", 0))
+            output_tokens.append(tokens.get("output", 0))
+
+    return {
+        "mode": mode,
+        "profiles": len(durations),
+        "failures": failures,
+        "wall_mean": statistics.mean(durations) if durations else 0.0,
+        "wall_p50": statistics.median(durations) if durations else 0.0,
+        "wall_max": max(durations) if durations else 0.0,
+        "input_tokens_mean": statistics.mean(input_tokens) if input_tokens else 0,
+        "output_tokens_mean": statistics.mean(output_tokens) if output_tokens else 0,
+    }
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    """Печать сравнительной таблицы"""
+    print("\n📊 GENERATION MODE BENCHMARK")
+    print("-" * 86)
+    print(
+        f"{'mode':<10} {'profiles':>8} {'failed':>6} {'mean s':>8} {'p50 s':>8} "
+        f"{'max s':>8} {'in tok':>12} {'out tok':>10}"
+    )
+    for r in results:
+        print(
+            f"{r['mode']:<10} {r['profiles']:>8} {r['failures']:>6} {r['wall_mean']:>8.2f} "
+            f"{r['wall_p50']:>8.2f} {r['wall_max']:>8.2f} "
+            f"{r['input_tokens_mean']:>12.0f} {r['output_tokens_mean']:>10.0f}"
+        )
+
+    by_mode = {r["mode"]: r for r in results}
+    if all(m in by_mode for m in MODES) and by_mode["sectional"]["wall_mean"]:
+        speedup = by_mode["single"]["wall_mean"] / by_mode["sectional"]["wall_mean"]
+        print(f"\n⚡ Sectional speedup (mean wall time): {speedup:.2f}x")
+        if by_mode["single"]["input_tokens_mean"]:
+            ratio = by_mode["sectional"]["input_tokens_mean"] / by_mode["single"]["input_tokens_mean"]
+            print(f"💰 Sectional input tokens vs single: {ratio:.2f}x (before prompt cache discount)")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark single vs sectional generation")
+    parser.add_argument("--department", required=True, help="Департамент (имя или полный путь)")
+    parser.add_argument("--positions", nargs="+", required=True, help="Должности для генерации")
+    parser.add_argument("--runs", type=int, default=1, help="Количество прогонов набора")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    args = parser.parse_args()
+
+    generator = ProfileGenerator()
+    results = []
+    for mode in args.modes:
+        print(f"🚀 Running mode '{mode}' ({len(args.positions)} positions x {args.runs} runs)...")
+        results.append(
+            await run_mode(generator, mode, args.department, args.positions, args.runs)
+        )
+
+    print_report(results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -24,6 +24,7 @@ import logging
 import os
 import sys
 import time
+import uuid
 import zipfile
 from datetime import datetime
 from pathlib import Path
@@ -259,7 +260,10 @@ class APIClient:
             "position": position,
             "employee_name": f"Сотрудник {position}",
             "temperature": 0.1,
-            "save_result": True
+            "save_result": True,
+            "priority": "bulk",
+            # Повтор при сетевой ошибке вернет ту же задачу, а не запустит новую генерацию
+            "idempotency_key": str(uuid.uuid4()),
         }
 
         try:
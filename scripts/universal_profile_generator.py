@@ -27,7 +27,7 @@ import logging
 import os
 import sys
 import time
-import zipfile
+import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple, Set
@@ -540,6 +540,35 @@ class UniversalAPIClient:
             logger.error(f"❌ Ошибка получения токена: {e}")
             return False
 
+    async def download_profiles_archive(self, payload: Dict[str, Any], destination: Path) -> Optional[int]:
+        """
+        Потоковая загрузка ZIP архива профилей (POST /api/profiles/export) в файл
+
+        Returns:
+            Размер архива в байтах или None при ошибке
+        """
+        headers = {"Authorization": f"Bearer {self.auth_token}"}
+        # Архив большого юнита формируется долго - общий таймаут не ограничиваем
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=REQUEST_TIMEOUT)
+        async with self.session.post(
+            f"{self.base_url}/api/profiles/export", json=payload, headers=headers, timeout=timeout
+        ) as resp:
+            if resp.status == 404:
+                logger.warning(f"⚠️ Не найдено профилей для архива: {payload}")
+                return None
+            if resp.status != 200:
+                logger.error(f"❌ Ошибка выгрузки архива: HTTP {resp.status} {await resp.text()}")
+                return None
+
+            size = 0
+            partial_path = destination.with_suffix(destination.suffix + ".part")
+            with open(partial_path, "wb") as f:
+                async for chunk in resp.content.iter_chunked(64 * 1024):
+                    f.write(chunk)
+                    size += len(chunk)
+            partial_path.replace(destination)
+            return size
+
     async def start_generation(self, department_path: str, position: str, max_retries: int = 3) -> Optional[str]:
         """
         Запускает генерацию профиля через API (поддерживает любые пути департаментов)
@@ -562,7 +591,10 @@ class UniversalAPIClient:
             "position": position,
             "employee_name": f"Сотрудник {position}",
             "temperature": 0.1,
-            "save_result": True
+            "save_result": True,
+            "priority": "bulk",  # Не вытесняет интерактивные генерации из UI
+            # Повтор при сетевой ошибке вернет ту же задачу, а не запустит новую генерацию
+            "idempotency_key": str(uuid.uuid4()),
         }
 
         # Retry logic для обработки транзиентных ошибок сети
@@ -652,6 +684,39 @@ class UniversalAPIClient:
         return {"status": "error", "error": "Max retries exceeded"}
 
 
+    async def stream_task_events(self, task_ids: List[str]):
+        """
+        Поток изменений задач (SSE) - одно соединение на весь пакет
+
+        Yields:
+            Состояние задачи при каждом изменении (task_id, status, progress, error_message...)
+        """
+        headers = {
+            "Authorization": f"Bearer {self.auth_token}",
+            "Accept": "text/event-stream",
+        }
+        async with self.session.post(
+            f"{self.base_url}/api/generation/events",
+            json={"task_ids": task_ids},
+            headers=headers,
+            # Поток живет до конца пакета; keepalive приходит каждые 15с
+            timeout=aiohttp.ClientTimeout(total=None, connect=30, sock_read=60),
+        ) as resp:
+            if resp.status != 200:
+                raise aiohttp.ClientResponseError(
+                    resp.request_info, resp.history, status=resp.status, message=await resp.text()
+                )
+            event_name = None
+            async for raw_line in resp.content:
+                line = raw_line.decode("utf-8").rstrip("\r\n")
+                if line.startswith("event:"):
+                    event_name = line[6:].strip()
+                elif line.startswith("data:") and event_name == "task":
+                    yield json.loads(line[5:])
+                elif line.startswith("data:") and event_name == "end":
+                    return
+
+
 class UniversalBatchProcessor:
     """
     Универсальный обработчик пакетов для любого объема позиций
@@ -767,11 +832,45 @@ class UniversalBatchProcessor:
             "departments_processed": len(departments_in_batch)
         }
 
+    def _apply_task_status(self, task: Dict, task_data: Dict[str, Any]) -> bool:
+        """Обновляет задачу пакета по статусу из API; True если задача завершена"""
+        api_status = task_data["status"]
+        task["api_status"] = api_status
+
+        if api_status == "completed":
+            task["status"] = "completed"
+            logger.info(f"✅ Завершено: {task['position']} ({task['department'].split('/')[-1]})")
+            return True
+        if api_status in ["failed", "cancelled"]:
+            task["status"] = "failed"
+            task["error"] = task_data.get("error_message") or "API reported failure"
+            logger.error(f"❌ Ошибка: {task['position']} - {task['error']}")
+            return True
+        return False
+
     async def _wait_for_completion(self, tasks: List[Dict]) -> List[Dict]:
-        """Ждет завершения всех задач в пакете"""
-        pending_tasks = [task for task in tasks if task["task_id"] is not None]
+        """
+        Ждет завершения всех задач в пакете
+
+        Основной путь - один SSE поток на весь пакет; при его недоступности
+        (старый сервер, обрыв соединения) - опрос статуса оставшихся задач.
+        """
+        pending = {task["task_id"]: task for task in tasks if task["task_id"] is not None}
         max_wait_time = 600  # 10 минут на задачу максимум
 
+        if pending:
+            try:
+                await asyncio.wait_for(
+                    self._follow_task_events(pending), timeout=max_wait_time
+                )
+            except Exception as e:
+                logger.warning(
+                    f"⚠️ Поток событий недоступен ({type(e).__name__}: {e}), "
+                    f"перехожу на опрос {len(pending)} задач"
+                )
+
+        pending_tasks = list(pending.values())
+
         while pending_tasks:
             # Проверяем статус каждой задачи
             for task in pending_tasks[:]:  # создаем копию для безопасного удаления
@@ -789,18 +888,8 @@ class UniversalBatchProcessor:
                 status_result = await self.api_client.get_task_status(task["task_id"])
 
                 if "task" in status_result:
-                    api_status = status_result["task"]["status"]
-                    task["api_status"] = api_status
-
-                    if api_status == "completed":
-                        task["status"] = "completed"
-                        pending_tasks.remove(task)
-                        logger.info(f"✅ Завершено: {task['position']} ({task['department'].split('/')[-1]})")
-                    elif api_status in ["failed", "cancelled"]:
-                        task["status"] = "failed"
-                        task["error"] = status_result["task"].get("error_message", "API reported failure")
+                    if self._apply_task_status(task, status_result["task"]):
                         pending_tasks.remove(task)
-                        logger.error(f"❌ Ошибка: {task['position']} - {task['error']}")
                 else:
                     # Ошибка получения статуса, но не критичная
                     logger.debug(f"⚠️ Не удалось получить статус для {task['position']}")
@@ -811,6 +900,15 @@ class UniversalBatchProcessor:
 
         return tasks
 
+    async def _follow_task_events(self, pending: Dict[str, Dict]) -> None:
+        """Применяет события SSE потока к задачам пакета, удаляя завершенные из pending"""
+        async for task_data in self.api_client.stream_task_events(list(pending)):
+            task = pending.get(task_data["task_id"])
+            if task and self._apply_task_status(task, task_data):
+                del pending[task_data["task_id"]]
+                if pending and len(pending) % 10 == 0:
+                    logger.info(f"⏳ Ожидание завершения {len(pending)} задач...")
+
 
 class UniversalArchiveBuilder:
     """
@@ -820,16 +918,19 @@ class UniversalArchiveBuilder:
     - Сохраняет иерархическую структуру выбранного юнита
     - Поддерживает архивы от 1 файла до тысяч
     - Интеллектуальное именование архивов
+    - Архив собирается сервером (POST /api/profiles/export) и пишется на диск
+      потоково, без временных файлов и запросов на каждый файл
     """
 
     @staticmethod
-    def create_unit_archive(unit_path: str, unit_name: str) -> bool:
+    async def create_unit_archive(unit_path: str, unit_name: str, api_url: str = API_BASE_URL) -> bool:
         """
         Создание архива для конкретного бизнес-юнита
 
         Args:
             unit_path: Полный путь выбранного юнита
             unit_name: Название юнита для архива
+            api_url: URL API сервера
 
         Returns:
             True если архив создан успешно
@@ -844,56 +945,20 @@ class UniversalArchiveBuilder:
             archive_dir.mkdir(exist_ok=True)
             archive_path = archive_dir / archive_name
 
-            generated_dir = Path("generated_profiles")
-            if not generated_dir.exists():
-                logger.error("❌ Директория generated_profiles не найдена")
-                return False
+            async with UniversalAPIClient(api_url) as api_client:
+                if not await api_client.authenticate():
+                    logger.error("❌ Не удалось аутентифицироваться для выгрузки архива")
+                    return False
+                archive_size = await api_client.download_profiles_archive(
+                    {"unit_path": unit_path}, archive_path
+                )
 
-            # Находим все файлы, связанные с выбранным юнитом
-            unit_files = []
-            for root, _, files in os.walk(generated_dir):
-                root_path = Path(root)
-
-                # Проверяем что путь содержит компоненты выбранного юнита
-                root_str = str(root_path).replace("\\", "/")
-                unit_components = [comp.replace(" ", "_") for comp in unit_path.split("/")]
-
-                # Если хотя бы один компонент есть в пути файла
-                if any(comp in root_str for comp in unit_components):
-                    for file in files:
-                        file_path = root_path / file
-                        if file_path.suffix.lower() in ['.json', '.md', '.docx']:
-                            if file_path.exists() and os.access(file_path, os.R_OK):
-                                unit_files.append(file_path)
-
-            if not unit_files:
-                logger.warning(f"⚠️ Не найдено файлов для юнита {unit_name}")
+            if archive_size is None:
                 return False
 
-            logger.info(f"📁 Найдено {len(unit_files)} файлов для архива {unit_name}")
-
-            # Создаем архив
-            with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for file_path in unit_files:
-                    try:
-                        # Сохраняем структуру относительно generated_profiles
-                        arcname = file_path.relative_to(generated_dir)
-                        zipf.write(file_path, arcname)
-                        logger.debug(f"📄 Добавлен: {arcname}")
-                    except Exception as file_error:
-                        logger.error(f"❌ Ошибка добавления файла {file_path}: {file_error}")
-                        continue
-
-            # Проверяем результат
-            if archive_path.exists():
-                archive_size = archive_path.stat().st_size
-                size_mb = archive_size / 1024 / 1024
-
-                logger.info(f"✅ Архив создан: {archive_path} ({size_mb:.2f} MB)")
-                return True
-            else:
-                logger.error("❌ Архив не был создан")
-                return False
+            size_mb = archive_size / 1024 / 1024
+            logger.info(f"✅ Архив создан: {archive_path} ({size_mb:.2f} MB)")
+            return True
 
         except Exception as e:
             logger.error(f"❌ Ошибка создания архива для {unit_name}: {e}")
@@ -998,7 +1063,7 @@ async def _main_async(dry_run: bool, batch_size: int, api_url: str, unit_path: O
         if not remaining_positions:
             print("🎉 Все профили уже сгенерированы!")
             if click.confirm("Создать архив?"):
-                if UniversalArchiveBuilder.create_unit_archive(selected_unit_path, unit_info['name']):
+                if await UniversalArchiveBuilder.create_unit_archive(selected_unit_path, unit_info['name'], api_url):
                     print("✅ Архив успешно создан")
             return 0
 
@@ -1105,7 +1170,7 @@ async def _main_async(dry_run: bool, batch_size: int, api_url: str, unit_path: O
 
         # Предлагаем создать архив
         if total_successful > 0 and click.confirm("\n📦 Создать ZIP архив?"):
-            if UniversalArchiveBuilder.create_unit_archive(selected_unit_path, unit_info['name']):
+            if await UniversalArchiveBuilder.create_unit_archive(selected_unit_path, unit_info['name'], api_url):
                 print(f"✅ Архив создан для {unit_info['name']}")
             else:
                 print("❌ Ошибка создания архива")
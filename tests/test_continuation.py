@@ -0,0 +1,143 @@
+"""
+@doc Tests for continuation of truncated LLM responses
+
+Examples:
+    python> pytest tests/test_continuation.py -v
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.core.config import config  # noqa: E402
+from backend.core.continuation import build_continuation_messages, stitch_continuation  # noqa: E402
+from backend.tools.mock_llm_server import MockLLMSettings, create_app  # noqa: E402
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+class TestStitchContinuation:
+    def test_repeated_tail_is_removed(self):
+        partial = '{"position_title": "Ведущий аналитик", "tasks": ["Отчеты'
+        continuation = '"tasks": ["Отчеты", "Дашборды"]}'
+
+        assert json.loads(stitch_continuation(partial, continuation))["tasks"] == ["Отчеты", "Дашборды"]
+
+    def test_code_fence_and_short_overlap(self):
+        partial = '{"a": [[1, 2]'
+
+        assert stitch_continuation(partial, '```json\n], "b": 1}\n```') == '{"a": [[1, 2]], "b": 1}'
+
+    def test_prefix_messages_are_kept(self):
+        base = [{"role": "system", "content": "s"}, {"role": "user", "content": "u"}]
+
+        messages = build_continuation_messages(base, "{")
+
+        assert messages[:2] == base
+        assert messages[2] == {"role": "assistant", "content": "{"}
+
+
+class TestContinueTruncatedResponse:
+    @pytest.mark.asyncio
+    async def test_empty_choices_are_handled(self):
+        from types import SimpleNamespace
+
+        from backend.core.llm_client import LLMClient
+
+        client = LLMClient(openrouter_api_key="sk-or-test-key-12345678901234567890")
+
+        text, finish_reason, usage, meta = await client._continue_truncated_response(
+            SimpleNamespace(choices=[], usage=None), [], "model", 0.1, 100, None, {}, {}
+        )
+
+        assert (text, finish_reason, usage.total_tokens) == ("", None, 0)
+        assert meta == {"continuations": 0, "retries": 0}
+
+
+class TestContinuationAgainstMock:
+    @pytest.mark.asyncio
+    async def test_truncated_profile_is_completed(self, monkeypatch):
+        from langfuse.openai import AsyncOpenAI
+
+        from backend.core.llm_client import LLMClient
+
+        with open(PROJECT_ROOT / "templates" / "prompts" / "production" / "config.json", encoding="utf-8") as f:
+            prompt_config = {**json.load(f), "max_tokens": 1500}
+
+        client = LLMClient(openrouter_api_key="sk-or-test-key-12345678901234567890")
+        client.langfuse = None
+        client.prompt_manager.langfuse_client = None
+        transport = httpx.ASGITransport(app=create_app(MockLLMSettings(latency_mean=0.0, seed=1)))
+        client.client = AsyncOpenAI(
+            api_key="mock", base_url="http://mock/api/v1", max_retries=0,
+            http_client=httpx.AsyncClient(transport=transport),
+        )
+
+        async def fake_prompt_and_config(prompt_name):
+            return None, prompt_config
+
+        monkeypatch.setattr(client, "_get_prompt_and_config", fake_prompt_and_config)
+        monkeypatch.setattr(config, "LLM_MAX_CONTINUATIONS", 20)
+
+        result = await client.generate_profile_from_langfuse(
+            prompt_name="a101-hr-profile-gemini-v3-simple",
+            variables={"position": "Аналитик", "department": "ДИТ"},
+        )
+
+        metadata = result["metadata"]
+        assert metadata["continuations"] > 0
+        assert metadata["finish_reason"] == "stop"
+        assert metadata["schema_errors"] == []
+        assert "json_repair" not in metadata
+
+    @pytest.mark.asyncio
+    async def test_truncated_sections_are_completed(self, monkeypatch):
+        from langfuse.openai import AsyncOpenAI
+
+        from backend.core.llm_client import LLMClient
+
+        with open(PROJECT_ROOT / "templates" / "prompts" / "production" / "config.json", encoding="utf-8") as f:
+            prompt_config = {**json.load(f), "max_tokens": 400}
+
+        client = LLMClient(openrouter_api_key="sk-or-test-key-12345678901234567890")
+        client.langfuse = None
+        client.prompt_manager.langfuse_client = None
+        transport = httpx.ASGITransport(app=create_app(MockLLMSettings(latency_mean=0.0, seed=1)))
+        client.client = AsyncOpenAI(
+            api_key="mock", base_url="http://mock/api/v1", max_retries=0,
+            http_client=httpx.AsyncClient(transport=transport),
+        )
+
+        async def fake_prompt_and_config(prompt_name):
+            return None, prompt_config
+
+        monkeypatch.setattr(client, "_get_prompt_and_config", fake_prompt_and_config)
+        monkeypatch.setattr(config, "LLM_MAX_CONTINUATIONS", 20)
+
+        result = await client.generate_profile_sectional(
+            prompt_name="a101-hr-profile-gemini-v3-simple",
+            variables={"position": "Аналитик", "department": "ДИТ"},
+        )
+
+        sections = result["metadata"]["sections"]
+        assert result["metadata"]["success"]
+        assert any(meta.get("continuations") for meta in sections.values())
+        assert all(meta["finish_reason"] == "stop" for meta in sections.values())
+        assert not any("json_repair" in meta for meta in sections.values())
+
+        # Секция, оставшаяся оборванной, не сливается частичными данными
+        monkeypatch.setattr(config, "LLM_MAX_CONTINUATIONS", 0)
+        truncated = await client.generate_profile_sectional(
+            prompt_name="a101-hr-profile-gemini-v3-simple",
+            variables={"position": "Аналитик", "department": "ДИТ"},
+        )
+        assert not truncated["metadata"]["success"]
@@ -0,0 +1,76 @@
+"""
+@doc Tests for DOCX rendering from the prebuilt template with bulk XML tables and lists
+
+Examples:
+    python> pytest tests/test_docx_service.py -v
+"""
+
+import io
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from docx import Document  # noqa: E402
+
+from backend.core.docx_service import ProfileDocxService  # noqa: E402
+
+PROFILE = {
+    "profile": {
+        "position_title": "Аналитик данных",
+        "department_specific": "Группа анализа данных",
+        "responsibility_areas": [{"area": ["Отчетность"], "tasks": ["Сбор данных & <очистка>"]}],
+        "professional_skills": [
+            {
+                "skill_category": "Аналитика",
+                "specific_skills": [
+                    {"skill_name": "SQL", "proficiency_level": 3, "proficiency_description": "Сложные\nзапросы"},
+                    {"skill_name": "Python", "proficiency_level": "Средний"},
+                ],
+            }
+        ],
+    },
+    "metadata": {"generation": {"timestamp": "2025-01-10T14:30:00", "duration": 12.5}},
+}
+
+
+def render(service: ProfileDocxService) -> Document:
+    buffer = io.BytesIO()
+    service.create_docx_from_json(PROFILE, buffer)
+    return Document(io.BytesIO(buffer.getvalue()))
+
+
+def content(doc: Document):
+    paragraphs = [(p.style.name, p.text) for p in doc.paragraphs]
+    tables = [
+        (t.style.name, [[c.text for c in row.cells] for row in t.rows if row.cells[0].text != "DOCX создан"])
+        for t in doc.tables
+    ]
+    return paragraphs, tables
+
+
+class TestProfileDocxService:
+    def test_template_path_matches_object_model_path(self):
+        fast, legacy = render(ProfileDocxService()), render(ProfileDocxService(fast_render=False))
+
+        assert content(fast) == content(legacy)
+        paragraphs, tables = content(fast)
+        assert ("List Bullet", "Сбор данных & <очистка>") in paragraphs
+        assert tables[1] == (
+            "Table Grid",
+            [
+                ["Навык", "Уровень", "Описание"],
+                ["SQL", "Продвинутый", "Сложные\nзапросы"],
+                ["Python", "Средний", "Описание отсутствует"],
+            ],
+        )
+
+    def test_empty_sections_use_italic_style(self):
+        paragraphs, _ = content(render(ProfileDocxService()))
+
+        assert ("Italic", "Личностные качества не определены") in paragraphs
+        assert ProfileDocxService._template is not None
@@ -0,0 +1,67 @@
+"""
+@doc Tests for the write-behind profile file queue (atomic batched writes, durability barrier)
+
+Examples:
+    python> pytest tests/test_file_write_queue.py -v
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.core.file_write_queue import FileWriteQueue  # noqa: E402
+
+
+class TestFileWriteQueue:
+    @pytest.mark.asyncio
+    async def test_batch_is_written_atomically_before_barrier_returns(self, tmp_path):
+        writes = FileWriteQueue(fsync=True, batch_size=8, batch_window=0.05)
+        directory = tmp_path / "ДИТ" / "Аналитик_20250110_143000"
+        json_path, md_path = directory / "profile.json", directory / "profile.md"
+        json_path.parent.mkdir(parents=True)
+        json_path.write_bytes(b'{"old": true}')
+
+        writes.submit({"json": (json_path, b'{"profile": {}}'), "md": (md_path, "# Профиль".encode())})
+        failed = await writes.barrier([str(json_path), str(md_path)], timeout=5)
+
+        assert failed == {}
+        assert json_path.read_bytes() == b'{"profile": {}}'
+        assert md_path.read_text(encoding="utf-8") == "# Профиль"
+        assert sorted(p.name for p in directory.iterdir()) == ["profile.json", "profile.md"]
+        assert writes.get_stats()["written"] == 2 and writes.get_stats()["pending"] == 0
+        writes.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_failed_write_is_reported_by_barrier(self, tmp_path):
+        writes = FileWriteQueue(fsync=False, batch_window=0)
+        blocker = tmp_path / "not_a_directory"
+        blocker.write_text("x")
+        ok_path, bad_path = tmp_path / "ok.json", blocker / "profile.json"
+
+        writes.submit({"json": (ok_path, b"{}"), "md": (bad_path, b"# x")})
+        writes.flush(timeout=5)
+        failed = await writes.barrier([str(ok_path), str(bad_path)])
+
+        assert list(failed) == [str(bad_path.resolve())]
+        assert ok_path.read_bytes() == b"{}"
+        assert writes.get_stats()["failed"] == 1
+        writes.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_discard_removes_queued_files_after_they_are_written(self, tmp_path):
+        writes = FileWriteQueue(fsync=False, batch_window=0.05)
+        json_path, md_path = tmp_path / "profile.json", tmp_path / "profile.md"
+
+        writes.submit({"json": (json_path, b"{}"), "md": (md_path, b"# x")})
+        removed = await writes.discard([str(json_path), str(md_path)])
+
+        assert removed == 2
+        assert not json_path.exists() and not md_path.exists()
+        writes.shutdown()
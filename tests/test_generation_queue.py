@@ -0,0 +1,377 @@
+"""
+@doc Tests for the SQLite-backed generation queue and worker pool
+
+Examples:
+    python> pytest tests/test_generation_queue.py -v
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.models.database import DatabaseManager  # noqa: E402
+from backend.services.generation_queue import (  # noqa: E402
+    GenerationQueue,
+    GenerationWorkerPool,
+    IdempotencyKeyConflict,
+)
+from backend.services.task_result_store import TaskResultStore  # noqa: E402
+
+REQUEST = {"department": "ДИТ", "position": "Аналитик данных", "employee_name": None}
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "queue.db"))
+    manager.create_schema()
+    conn = manager.get_connection()
+    conn.execute(
+        "INSERT INTO users (id, username, password_hash, full_name) VALUES (1, 'hr', 'x', 'HR')"
+    )
+    conn.commit()
+    yield manager
+    manager.close_connection()
+
+
+@pytest.fixture
+def queue(db):
+    return GenerationQueue(db, lease_seconds=60, max_attempts=2, retry_delay=0)
+
+
+class TestGenerationQueue:
+    def test_task_is_visible_to_a_second_queue_instance(self, db, queue):
+        task_id = queue.enqueue(REQUEST, user_id=1)
+
+        other_worker_view = GenerationQueue(db)
+        task = other_worker_view.get_task(task_id)
+
+        assert task["status"] == "queued"
+        assert task["request"]["position"] == "Аналитик данных"
+
+    def test_claim_is_exclusive(self, queue):
+        task_id = queue.enqueue(REQUEST, user_id=1)
+
+        assert queue.claim("w1")["task_id"] == task_id
+        assert queue.claim("w2") is None
+
+    def test_expired_lease_is_reclaimed(self, db):
+        queue = GenerationQueue(db, lease_seconds=0.01, max_attempts=3)
+        task_id = queue.enqueue(REQUEST, user_id=1)
+        queue.claim("w1")
+        time.sleep(0.02)
+
+        task = queue.claim("w2")
+
+        assert task["task_id"] == task_id
+        assert task["attempts"] == 2
+        assert queue.heartbeat(task_id, "w1") is False
+
+    def test_retryable_failure_until_max_attempts(self, queue):
+        task_id = queue.enqueue(REQUEST, user_id=1)
+
+        queue.claim("w1")
+        assert queue.fail(task_id, "w1", "boom") == "queued"
+        queue.claim("w1")
+        assert queue.fail(task_id, "w1", "boom") == "failed"
+        assert queue.get_task(task_id)["error_message"] == "boom"
+
+    def test_result_profile_is_read_from_profiles_table(self, db, queue):
+        task_id = queue.enqueue(REQUEST, user_id=1)
+        queue.claim("w1")
+        conn = db.get_connection()
+        conn.execute(
+            "INSERT INTO profiles (id, department, position, profile_data, metadata_json, generation_time_seconds)"
+            " VALUES (?, ?, ?, ?, ?, 1.0)",
+            ("p-1", "ДИТ", "Аналитик данных", json.dumps({"position_title": "Аналитик данных"}), "{}"),
+        )
+        conn.commit()
+
+        queue.complete(task_id, "w1", {"success": True, "profile": {"x": 1}, "metadata": {}}, "p-1")
+
+        stored = conn.execute("SELECT result_json FROM generation_tasks WHERE id = ?", (task_id,)).fetchone()
+        assert "profile" not in json.loads(stored["result_json"])
+        assert queue.get_result(task_id)["profile"] == {"position_title": "Аналитик данных"}
+
+
+class TestGenerationWorkerPool:
+    @pytest.mark.asyncio
+    async def test_pool_runs_task_to_completion(self, queue):
+        async def handler(task, report):
+            report(50, "LLM")
+            return {"success": True, "profile": {"position_title": task["request"]["position"]}}, None
+
+        task_id = queue.enqueue(REQUEST, user_id=1)
+        pool = GenerationWorkerPool(queue, handler, concurrency=2, poll_interval=0.01)
+        await pool.start()
+        for _ in range(100):
+            if queue.get_task(task_id)["status"] == "completed":
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop(timeout=1)
+
+        assert queue.get_task(task_id)["status"] == "completed"
+        assert queue.get_result(task_id)["profile"]["position_title"] == "Аналитик данных"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_task_stops_on_heartbeat(self, db):
+        queue = GenerationQueue(db, lease_seconds=0.15)
+        started = asyncio.Event()
+
+        async def handler(task, report):
+            started.set()
+            await asyncio.sleep(10)
+            return {"success": True}, None
+
+        task_id = queue.enqueue(REQUEST, user_id=1)
+        pool = GenerationWorkerPool(queue, handler, concurrency=1, poll_interval=0.01)
+        await pool.start()
+        await asyncio.wait_for(started.wait(), timeout=1)
+
+        queue.cancel(task_id)
+        await asyncio.sleep(0.3)
+
+        assert task_id not in pool.running_tasks
+        assert queue.get_task(task_id)["status"] == "cancelled"
+        await pool.stop(timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_pool_reports_health_until_stopped(self, queue):
+        async def handler(task, report):
+            return {"success": True}, None
+
+        pool = GenerationWorkerPool(queue, handler, concurrency=3, poll_interval=0.01, mode="standalone")
+        await pool.start()
+        await asyncio.sleep(0.05)
+
+        worker = next(w for w in queue.list_workers() if w["worker_id"] == pool.worker_id)
+        assert worker["alive"] and worker["concurrency"] == 3 and worker["mode"] == "standalone"
+
+        await pool.stop(timeout=1)
+        worker = next(w for w in queue.list_workers() if w["worker_id"] == pool.worker_id)
+        assert worker["status"] == "stopped"
+        assert not worker["alive"]
+
+
+class TestScheduling:
+    @pytest.fixture
+    def users(self, db):
+        conn = db.get_connection()
+        conn.execute(
+            "INSERT INTO users (id, username, password_hash, full_name) VALUES (2, 'hr2', 'x', 'HR 2')"
+        )
+        conn.commit()
+
+    def test_interactive_overtakes_older_bulk_backlog(self, queue):
+        for _ in range(3):
+            queue.enqueue(REQUEST, user_id=1, priority_class="bulk")
+        interactive_id = queue.enqueue(REQUEST, user_id=1)
+
+        assert queue.claim("w1")["task_id"] == interactive_id
+        assert queue.claim("w2")["priority_class"] == "bulk"
+
+    def test_bulk_cap_keeps_slots_free(self, db):
+        queue = GenerationQueue(db, class_caps={"bulk": 1})
+        for _ in range(3):
+            queue.enqueue(REQUEST, user_id=1, priority_class="bulk")
+
+        assert queue.claim("w1") is not None
+        assert queue.claim("w2") is None
+
+    def test_fair_share_between_users(self, queue, users):
+        for _ in range(3):
+            queue.enqueue(REQUEST, user_id=1, priority_class="bulk")
+        second_user_task = queue.enqueue(REQUEST, user_id=2, priority_class="bulk")
+
+        assert queue.claim("w1")["user_id"] == 1
+        assert queue.claim("w2")["task_id"] == second_user_task
+
+    def test_queue_position_and_eta(self, queue):
+        bulk_id = queue.enqueue(REQUEST, user_id=1, priority_class="bulk")
+        queue.enqueue(REQUEST, user_id=1)
+        queue.enqueue(REQUEST, user_id=1)
+
+        position = queue.queue_position(bulk_id, default_duration=40, total_slots=2)
+
+        assert position["queue_position"] == 3
+        assert position["estimated_start_seconds"] == 40
+        assert position["estimated_completion_seconds"] == 80
+
+
+class TestBatches:
+    def _requests(self, department, positions):
+        return [
+            {"department": department, "position": p, "multi_position": True} for p in positions
+        ]
+
+    def test_batch_progress_and_cancellation(self, queue):
+        batch_id, task_ids = queue.enqueue_batch(
+            self._requests("ДИТ", ["Аналитик", "Разработчик", "Тестировщик"]),
+            user_id=1,
+            unit_path="Блок ИТ/ДИТ",
+        )
+        task = queue.claim("w1")
+        queue.complete(task["task_id"], "w1", {"success": True})
+
+        batch = queue.get_batch(batch_id)
+        assert batch["status"] == "processing"
+        assert batch["counts"] == {"completed": 1, "queued": 2}
+        assert batch["progress"] == 33
+
+        assert queue.cancel_batch(batch_id) == 2
+        batch = queue.get_batch(batch_id)
+        assert batch["status"] == "cancelled"
+        assert batch["finished_tasks"] == 3
+        assert [t["status"] for t in queue.list_batch_tasks(batch_id, status="completed")] == ["completed"]
+
+    def test_siblings_share_batch_and_department(self, queue):
+        batch_id, _ = queue.enqueue_batch(
+            self._requests("ДИТ", ["Аналитик", "Разработчик", "Тестировщик"])
+            + self._requests("ДИТ/Группа данных", ["Инженер данных"]),
+            user_id=1,
+            unit_path="Блок ИТ/ДИТ",
+        )
+        first = queue.claim("w1")
+
+        siblings = queue.claim_siblings(first, "w1", limit=5)
+
+        assert [t["request"]["position"] for t in siblings] == ["Разработчик", "Тестировщик"]
+        assert all(t["status"] == "processing" for t in siblings)
+        queued = queue.list_batch_tasks(batch_id, status="queued")
+        assert [t["request"]["department"] for t in queued] == ["ДИТ/Группа данных"]
+
+    @pytest.mark.asyncio
+    async def test_pool_runs_batch_group_in_one_call(self, queue):
+        calls = []
+
+        async def group_handler(tasks, report):
+            calls.append([t["request"]["position"] for t in tasks])
+            return [({"success": True}, None) for _ in tasks]
+
+        async def handler(task, report):
+            calls.append([task["request"]["position"]])
+            return {"success": True}, None
+
+        batch_id, _ = queue.enqueue_batch(
+            self._requests("ДИТ", ["Аналитик", "Разработчик", "Тестировщик"]),
+            user_id=1,
+            unit_path="Блок ИТ/ДИТ",
+        )
+        pool = GenerationWorkerPool(
+            queue, handler, concurrency=1, poll_interval=0.01, group_handler=group_handler, group_size=2
+        )
+        await pool.start()
+        for _ in range(100):
+            if queue.get_batch(batch_id)["status"] == "completed":
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop(timeout=1)
+
+        assert calls == [["Аналитик", "Разработчик"], ["Тестировщик"]]
+        assert queue.get_batch(batch_id)["counts"] == {"completed": 3}
+
+
+class TestCancellation:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("same_process", [True, False])
+    async def test_in_flight_generation_is_cancelled(self, db, monkeypatch, same_process):
+        from backend.core.config import config
+
+        monkeypatch.setattr(config, "GENERATION_CANCEL_POLL_INTERVAL", 0.05)
+        queue = GenerationQueue(db, lease_seconds=60)
+        started = asyncio.Event()
+        interrupted = asyncio.Event()
+
+        async def handler(task, report):
+            started.set()
+            try:
+                await asyncio.sleep(10)  # "HTTP запрос к LLM"
+            except asyncio.CancelledError:
+                interrupted.set()
+                raise
+            return {"success": True}, None
+
+        task_id = queue.enqueue(REQUEST, user_id=1)
+        pool = GenerationWorkerPool(queue, handler, concurrency=1, poll_interval=0.01)
+        await pool.start()
+        await asyncio.wait_for(started.wait(), timeout=1)
+
+        (queue if same_process else GenerationQueue(db)).cancel(task_id)
+        await asyncio.wait_for(interrupted.wait(), timeout=1)
+        await asyncio.sleep(0.01)
+
+        assert task_id not in pool.running_tasks
+        assert queue.get_task(task_id)["status"] == "cancelled"
+        # Слот продолжает работать после отмены задачи
+        started.clear()
+        next_id = queue.enqueue(REQUEST, user_id=1)
+        await asyncio.wait_for(started.wait(), timeout=1)
+        await pool.stop(timeout=0.1)
+        assert queue.get_task(next_id)["status"] == "queued"
+
+
+class TestTaskResultStore:
+    def test_lru_eviction_keeps_byte_budget(self):
+        store = TaskResultStore(max_bytes=300, ttl_seconds=60)
+        for index in range(10):
+            store.put(f"t{index}", {"profile": "x" * 50, "index": index})
+
+        stats = store.get_stats()
+        assert stats["bytes"] <= 300
+        assert stats["evictions_lru"] > 0
+        assert store.get("t0") is None
+        assert store.get("t9")["index"] == 9
+
+    def test_ttl_expiry(self):
+        store = TaskResultStore(max_bytes=10_000, ttl_seconds=0.01)
+        store.put("t1", {"success": True})
+        time.sleep(0.02)
+
+        assert store.get("t1") is None
+        assert store.get_stats()["evictions_ttl"] == 1
+
+    def test_large_result_is_compressed_and_survives_eviction(self, db):
+        queue = GenerationQueue(db, result_store=TaskResultStore(max_bytes=0))
+        task_id = queue.enqueue(REQUEST, user_id=1)
+        queue.claim("w1")
+        big_result = {"success": True, "profile": {"text": "Профиль " * 20000}, "metadata": {}}
+        queue.complete(task_id, "w1", big_result)
+
+        row = db.get_connection().execute(
+            "SELECT result_json, length(result_gz) AS gz FROM generation_tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+        assert row["result_json"] is None
+        assert 0 < row["gz"] < 10_000
+        assert queue.get_result(task_id) == big_result
+
+
+class TestIdempotency:
+    def test_retry_with_same_key_returns_original_task(self, db, queue):
+        task_id, created = queue.enqueue_idempotent(REQUEST, 1, "key-1")
+        # Повтор клиента через другой экземпляр очереди (другой процесс API)
+        retry_id, retry_created = GenerationQueue(db).enqueue_idempotent(dict(REQUEST), 1, "key-1")
+
+        assert created is True and retry_created is False
+        assert retry_id == task_id
+        assert queue.count_by_status()["queued"] == 1
+
+    def test_key_reuse_with_different_request_is_rejected(self, queue):
+        queue.enqueue_idempotent(REQUEST, 1, "key-1")
+
+        with pytest.raises(IdempotencyKeyConflict):
+            queue.enqueue_idempotent({**REQUEST, "position": "Другая должность"}, 1, "key-1")
+
+    def test_expired_key_creates_new_task(self, queue):
+        first_id, _ = queue.enqueue_idempotent(REQUEST, 1, "key-1", ttl_seconds=0)
+        second_id, created = queue.enqueue_idempotent(REQUEST, 1, "key-1")
+
+        assert created is True and second_id != first_id
@@ -0,0 +1,85 @@
+"""
+@doc Tests for JSON extraction and repair of LLM responses
+
+Examples:
+    python> pytest tests/test_json_repair.py -v
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.core.json_repair import JSONRepairError, close_truncated_json, parse_llm_json  # noqa: E402
+
+SCHEMA = {
+    "type": "object",
+    "required": ["position_title", "responsibility_areas", "careerogram"],
+    "properties": {
+        "position_title": {"type": "string"},
+        "responsibility_areas": {
+            "type": "array",
+            "items": {"type": "object", "required": ["area", "tasks"]},
+        },
+        "careerogram": {"type": "object"},
+    },
+}
+
+
+class TestParseLlmJson:
+    def test_clean_json_needs_no_repairs(self):
+        result = parse_llm_json('```json\n{"position_title": "Аналитик"}\n```', schema=SCHEMA)
+
+        assert result.data == {"position_title": "Аналитик"}
+        assert not result.repaired
+
+    def test_prose_and_trailing_commas(self):
+        text = 'Вот профиль:\n{"position_title": "Аналитик", "responsibility_areas": [],}\nГотово.'
+
+        result = parse_llm_json(text, schema=SCHEMA)
+
+        assert result.data["position_title"] == "Аналитик"
+        assert {"extracted_object", "trailing_commas"} <= set(result.repairs)
+
+    def test_smart_quotes_used_as_delimiters(self):
+        result = parse_llm_json('{“position_title”: "Аналитик «данных»"}')
+
+        assert result.data == {"position_title": "Аналитик «данных»"}
+        assert "smart_quotes" in result.repairs
+
+    def test_truncated_profile_reports_salvaged_fields(self):
+        full = {
+            "position_title": "Ведущий аналитик",
+            "responsibility_areas": [
+                {"area": ["Аналитика"], "tasks": ["Отчеты", "Дашборды"]},
+                {"area": ["Данные"], "tasks": ["Качество данных"]},
+            ],
+            "careerogram": {"source_positions": ["Аналитик"]},
+        }
+        text = json.dumps(full, ensure_ascii=False)
+        truncated = text[: text.index("Данные") + 2]
+
+        result = parse_llm_json(truncated, schema=SCHEMA, finish_reason="length")
+
+        assert result.truncated
+        assert result.data["position_title"] == "Ведущий аналитик"
+        assert result.data["responsibility_areas"][0]["tasks"] == ["Отчеты", "Дашборды"]
+        assert "careerogram" in result.missing_fields
+        assert "position_title" in result.salvaged_fields
+        assert "responsibility_areas" in result.partial_fields
+
+    def test_no_object_raises(self):
+        with pytest.raises(JSONRepairError):
+            parse_llm_json("Извините, не могу помочь")
+
+
+class TestCloseTruncatedJson:
+    def test_dangling_key_is_dropped(self):
+        assert json.loads(close_truncated_json('{"a": [1, 2], "b": {"c": tr')) == {"a": [1, 2], "b": {}}
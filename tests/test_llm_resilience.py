@@ -0,0 +1,153 @@
+"""
+@doc Tests for backend LLM resilience (retry policy, circuit breaker, retry budget)
+
+Examples:
+    python> pytest tests/test_llm_resilience.py -v
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.core.llm_resilience import (  # noqa: E402
+    CircuitState,
+    LLMCircuitOpenError,
+    LLMResilienceManager,
+    LLMRetryPolicy,
+    ModelCircuitBreaker,
+    ModelCircuitConfig,
+    RetryBudget,
+    is_retryable_error,
+)
+
+
+def _status_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://openrouter.ai/api/v1/chat/completions")
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def _manager(max_retries: int = 3, failure_threshold: int = 5) -> LLMResilienceManager:
+    return LLMResilienceManager(
+        retry_policy=LLMRetryPolicy(max_retries=max_retries, base_delay=0, max_delay=0),
+        retry_budget=RetryBudget(ratio=0.2, min_retries=10),
+        circuit_config=ModelCircuitConfig(failure_threshold=failure_threshold),
+    )
+
+
+class TestRetryableErrors:
+    def test_transient_errors_are_retryable(self):
+        assert is_retryable_error(httpx.ReadTimeout("timeout"))
+        assert is_retryable_error(httpx.ConnectError("refused"))
+        assert is_retryable_error(_status_error(429))
+        assert is_retryable_error(_status_error(503))
+
+    def test_request_errors_are_not_retryable(self):
+        assert not is_retryable_error(_status_error(400))
+        assert not is_retryable_error(_status_error(401))
+        assert not is_retryable_error(ValueError("bad json"))
+
+
+class TestRetryPolicy:
+    def test_delay_is_capped_and_jittered(self):
+        policy = LLMRetryPolicy(base_delay=1.0, max_delay=5.0, jitter=True)
+        for attempt in range(10):
+            assert 0 <= policy.compute_delay(attempt) <= 5.0
+
+    def test_retry_after_has_priority(self):
+        policy = LLMRetryPolicy(base_delay=1.0, max_delay=30.0)
+        assert policy.compute_delay(0, retry_after=7) == 7
+
+
+class TestManagerExecute:
+    @pytest.mark.asyncio
+    async def test_transient_failure_costs_one_extra_call(self):
+        manager = _manager()
+        calls = []
+
+        async def call():
+            calls.append(1)
+            if len(calls) == 1:
+                raise _status_error(502)
+            return "ok"
+
+        result, retries = await manager.execute("model-a", call)
+
+        assert result == "ok"
+        assert retries == 1
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_non_retryable_error_raises_immediately(self):
+        manager = _manager()
+        calls = []
+
+        async def call():
+            calls.append(1)
+            raise _status_error(400)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await manager.execute("model-a", call)
+        assert len(calls) == 1
+        assert manager.get_breaker("model-a").state == CircuitState.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_circuit_opens_after_threshold(self):
+        manager = _manager(max_retries=0, failure_threshold=2)
+
+        async def call():
+            raise httpx.ConnectError("refused")
+
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await manager.execute("model-b", call)
+
+        with pytest.raises(LLMCircuitOpenError):
+            await manager.execute("model-b", call)
+
+        # Другие модели не затронуты
+        assert manager.get_breaker("model-c").state == CircuitState.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_retry_budget_exhaustion_fails_fast(self):
+        manager = LLMResilienceManager(
+            retry_policy=LLMRetryPolicy(max_retries=5, base_delay=0, max_delay=0),
+            retry_budget=RetryBudget(ratio=0.0, min_retries=1),
+            circuit_config=ModelCircuitConfig(failure_threshold=100),
+        )
+        calls = []
+
+        async def call():
+            calls.append(1)
+            raise _status_error(503)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await manager.execute("model-d", call)
+
+        # Первичный вызов + единственный повтор из бюджета
+        assert len(calls) == 2
+
+
+class TestCircuitBreaker:
+    def test_half_open_probe_success_closes_circuit(self):
+        breaker = ModelCircuitBreaker(
+            "model-e", ModelCircuitConfig(failure_threshold=1, reset_timeout_seconds=0)
+        )
+        breaker.record_failure()
+        assert breaker.state == CircuitState.OPEN
+
+        breaker.before_call()
+        assert breaker.state == CircuitState.HALF_OPEN
+        with pytest.raises(LLMCircuitOpenError):
+            breaker.before_call()
+
+        breaker.record_success()
+        assert breaker.state == CircuitState.CLOSED
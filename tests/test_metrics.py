@@ -0,0 +1,97 @@
+"""
+@doc Tests for pipeline metrics (Prometheus exposition, stage breakdown, worker pool instrumentation)
+
+Examples:
+    python> pytest tests/test_metrics.py -v
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.core.metrics import (  # noqa: E402
+    STAGE_SECONDS,
+    TASKS_TOTAL,
+    MetricsRegistry,
+    stage,
+    track_stages,
+)
+from backend.models.database import DatabaseManager  # noqa: E402
+from backend.services.generation_queue import GenerationQueue, GenerationWorkerPool  # noqa: E402
+
+REQUEST = {"department": "ДИТ", "position": "Аналитик данных", "employee_name": None}
+
+
+class TestMetrics:
+    def test_histogram_is_rendered_in_prometheus_format(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("demo_seconds", "Demo latency", ["stage"], buckets=(0.1, 1))
+        latency.observe(0.05, stage="llm")
+        latency.observe(0.5, stage="llm")
+        registry.counter("demo_total", "Demo counter").inc(3)
+
+        text = registry.render()
+
+        assert "# TYPE demo_seconds histogram" in text
+        assert 'demo_seconds_bucket{stage="llm",le="0.1"} 1' in text
+        assert 'demo_seconds_bucket{stage="llm",le="+Inf"} 2' in text
+        assert 'demo_seconds_count{stage="llm"} 2' in text
+        assert "demo_total 3" in text
+
+    def test_nested_tracking_shares_breakdown(self):
+        before = STAGE_SECONDS.count(stage="unit_test_stage")
+        with track_stages() as outer:
+            with stage("unit_test_stage"):
+                pass
+            with track_stages() as inner:
+                with stage("unit_test_stage"):
+                    pass
+            with track_stages({}) as separate:
+                with stage("other_stage"):
+                    pass
+
+        assert inner is outer
+        assert set(outer) == {"unit_test_stage"}
+        assert set(separate) == {"other_stage"}
+        assert STAGE_SECONDS.count(stage="unit_test_stage") == before + 2
+
+    @pytest.mark.asyncio
+    async def test_task_status_includes_stage_breakdown(self, tmp_path):
+        db = DatabaseManager(str(tmp_path / "metrics.db"))
+        db.create_schema()
+        conn = db.get_connection()
+        conn.execute(
+            "INSERT INTO users (id, username, password_hash, full_name) VALUES (1, 'hr', 'x', 'HR')"
+        )
+        conn.commit()
+        queue = GenerationQueue(db, lease_seconds=60)
+
+        async def handler(task, report):
+            with track_stages() as stages:
+                with stage("llm"):
+                    await asyncio.sleep(0.01)
+            return {"success": True, "metadata": {"generation": {"stages": stages}}}, None
+
+        completed_before = TASKS_TOTAL.get(status="completed")
+        task_id = queue.enqueue(REQUEST, user_id=1)
+        pool = GenerationWorkerPool(queue, handler, concurrency=1, poll_interval=0.01)
+        await pool.start()
+        for _ in range(100):
+            if queue.get_task(task_id)["status"] == "completed":
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop(timeout=1)
+
+        stages = queue.get_task(task_id)["stages"]
+        assert stages["llm"] >= 0.01
+        assert "queue_wait" in stages
+        assert TASKS_TOTAL.get(status="completed") == completed_before + 1
+        db.close_connection()
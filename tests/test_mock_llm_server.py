@@ -0,0 +1,121 @@
+"""
+@doc Tests for the local OpenAI-compatible mock LLM server
+
+Examples:
+    python> pytest tests/test_mock_llm_server.py -v
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.core.profile_schema import unwrap_schema, validate_against_schema  # noqa: E402
+from backend.core.sectional_generation import plan_sections  # noqa: E402
+from backend.tools.mock_llm_server import MockLLMSettings, create_app  # noqa: E402
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def _response_format():
+    with open(PROJECT_ROOT / "templates" / "prompts" / "production" / "config.json", encoding="utf-8") as f:
+        return json.load(f)["response_format"]
+
+
+def _client(**settings) -> TestClient:
+    return TestClient(create_app(MockLLMSettings(latency_mean=0.0, seed=42, **settings)))
+
+
+def _request(response_format=None, **extra):
+    return {
+        "model": "google/gemini-2.5-flash",
+        "messages": [{"role": "system", "content": "контекст " * 500}, {"role": "user", "content": "профиль"}],
+        "response_format": response_format,
+        **extra,
+    }
+
+
+class TestChatCompletions:
+    def test_json_schema_response_is_schema_valid(self):
+        response_format = _response_format()
+        response = _client().post("/api/v1/chat/completions", json=_request(response_format))
+
+        assert response.status_code == 200
+        body = response.json()
+        profile = json.loads(body["choices"][0]["message"]["content"])
+        assert validate_against_schema(profile, unwrap_schema(response_format)) == []
+        assert body["usage"]["total_tokens"] == body["usage"]["prompt_tokens"] + body["usage"]["completion_tokens"]
+
+    def test_section_schema_returns_only_section_fields(self):
+        section = next(s for s in plan_sections(_response_format()) if s.name == "careerogram")
+        response = _client().post("/v1/chat/completions", json=_request(section.response_format))
+
+        content = json.loads(response.json()["choices"][0]["message"]["content"])
+        assert set(content) == set(section.properties)
+
+    def test_repeated_prefix_is_reported_as_cached(self):
+        client = _client()
+        first = client.post("/v1/chat/completions", json=_request()).json()
+        second = client.post("/v1/chat/completions", json=_request()).json()
+
+        assert first["usage"]["prompt_tokens_details"]["cached_tokens"] == 0
+        assert second["usage"]["prompt_tokens_details"]["cached_tokens"] > 0
+
+    def test_max_tokens_truncates_with_length_finish_reason(self):
+        response = _client().post("/v1/chat/completions", json=_request(_response_format(), max_tokens=50))
+
+        choice = response.json()["choices"][0]
+        assert choice["finish_reason"] == "length"
+        assert response.json()["usage"]["completion_tokens"] == 50
+
+
+class TestFaultInjection:
+    def test_rate_limit_injection_sets_retry_after(self):
+        response = _client(rate_limit_rate=1.0, retry_after=2.5).post("/v1/chat/completions", json=_request())
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "2.5"
+
+    def test_streaming_ends_with_usage_and_done(self):
+        with _client().stream("POST", "/v1/chat/completions", json=_request(stream=True)) as response:
+            events = [line[len("data: "):] for line in response.iter_lines() if line.startswith("data: ")]
+
+        assert events[-1] == "[DONE]"
+        assert "usage" in json.loads(events[-2])
+
+
+class TestLLMClientAgainstMock:
+    @pytest.mark.asyncio
+    async def test_generate_profile_through_mock(self):
+        from langfuse.openai import AsyncOpenAI
+
+        from backend.core.llm_client import LLMClient
+
+        client = LLMClient(openrouter_api_key="sk-or-test-key-12345678901234567890")
+        client.langfuse = None
+        client.prompt_manager.langfuse_client = None
+        transport = httpx.ASGITransport(app=create_app(MockLLMSettings(latency_mean=0.0, seed=1)))
+        client.client = AsyncOpenAI(
+            api_key="mock",
+            base_url="http://mock/api/v1",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=transport),
+        )
+
+        result = await client.generate_profile_from_langfuse(
+            prompt_name="a101-hr-profile-gemini-v3-simple",
+            variables={"position": "Аналитик", "department": "ДИТ"},
+        )
+
+        assert result["metadata"]["success"] is True
+        assert result["metadata"]["tokens"]["output"] > 0
+        assert "position_title" in result["profile"]
@@ -0,0 +1,103 @@
+"""
+@doc Tests for multi-position batched generation (batch schema, split, token accounting)
+
+Examples:
+    python> pytest tests/test_multi_position_generation.py -v
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.core.multi_position_generation import (  # noqa: E402
+    BATCH_PLACEHOLDER,
+    build_batch_messages,
+    build_batch_response_format,
+    chunk_positions,
+    merge_shared_variables,
+    split_batch_profiles,
+)
+from backend.core.profile_generator import ProfileGenerator  # noqa: E402
+from backend.core.profile_schema import unwrap_schema  # noqa: E402
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def _production_response_format():
+    with open(PROJECT_ROOT / "templates" / "prompts" / "production" / "config.json", encoding="utf-8") as f:
+        return json.load(f)["response_format"]
+
+
+class TestBatchPlanning:
+    def test_chunks_preserve_order_and_drop_duplicates(self):
+        chunks = chunk_positions(["A", "B", "A", "C", "D"], 2)
+        assert chunks == [["A", "B"], ["C", "D"]]
+
+    def test_batch_response_format_wraps_profile_schema(self):
+        response_format = _production_response_format()
+        batch = build_batch_response_format(response_format, 3)
+        profiles = batch["json_schema"]["schema"]["properties"]["profiles"]
+
+        assert profiles["minItems"] == profiles["maxItems"] == 3
+        assert profiles["items"] == unwrap_schema(response_format)
+
+    def test_only_differing_position_variables_are_replaced(self):
+        base = {"position": "Специалист", "company_map": "карта", "business_block": "Блок"}
+        contexts = [
+            {"position": "Специалист", "business_block": "Блок"},
+            {"position": "Главный специалист", "business_block": "Блок"},
+        ]
+
+        shared = merge_shared_variables(base, contexts)
+
+        assert shared["position"] == BATCH_PLACEHOLDER
+        assert shared["business_block"] == "Блок"
+        assert shared["company_map"] == "карта"
+
+    def test_positions_are_listed_after_shared_prefix(self):
+        base = [{"role": "user", "content": "контекст"}]
+        messages = build_batch_messages(base, [{"position": "Специалист"}, {"position": "Руководитель"}])
+
+        assert messages[0] == base[0]
+        assert "Руководитель" in messages[-1]["content"]
+
+
+class TestSplitProfiles:
+    def test_profiles_matched_by_title_then_order(self):
+        batch = {
+            "profiles": [
+                {"position_title": "Руководитель управления"},
+                {"position_title": "Специалист по ошибке"},
+            ]
+        }
+
+        profiles = split_batch_profiles(batch, ["Специалист", "Руководитель управления", "Главный специалист"])
+
+        assert profiles[0] == {"position_title": "Специалист по ошибке"}
+        assert profiles[1] == {"position_title": "Руководитель управления"}
+        assert profiles[2] is None
+
+    def test_batch_tokens_are_split_per_profile(self):
+        generator = ProfileGenerator.__new__(ProfileGenerator)
+        batch_result = {
+            "profiles": [{"position_title": "A"}, None],
+            "schema_errors": [[], []],
+            "metadata": {
+                "success": True,
+                "tokens": {"input": 100, "output": 40, "total": 140},
+                "batch_positions": ["A", "B"],
+            },
+        }
+
+        first = generator._split_batch_llm_result(batch_result, 0, 2)
+        missing = generator._split_batch_llm_result(batch_result, 1, 2)
+
+        assert first["metadata"]["tokens"] == {"input": 50, "output": 20, "total": 70}
+        assert first["metadata"]["batch"]["tokens"]["total"] == 140
+        assert missing["metadata"]["success"] is False
@@ -0,0 +1,115 @@
+"""
+@doc Tests for the streaming ZIP export of profiles
+
+Examples:
+    python> pytest tests/test_profile_export.py -v
+"""
+
+import io
+import json
+import os
+import sys
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.api import profiles as profiles_api  # noqa: E402
+from backend.core.profile_archive import stream_zip  # noqa: E402
+from backend.core.storage_service import index_profile_files  # noqa: E402
+from backend.models.database import DatabaseManager  # noqa: E402
+from backend.models.schemas import ProfileExportRequest  # noqa: E402
+
+ORG_PATHS = {
+    "Группа анализа данных": ["Блок ИТ", "Департамент данных", "Группа анализа данных"],
+    "Отдел продаж": ["Коммерческий блок", "Отдел продаж"],
+}
+PROFILES = [
+    ("11111111-aaaa-4bbb-8ccc-000000000001", "Группа анализа данных", "Аналитик данных"),
+    ("11111111-aaaa-4bbb-8ccc-000000000002", "Группа анализа данных", "Инженер данных"),
+    ("11111111-aaaa-4bbb-8ccc-000000000003", "Отдел продаж", "Менеджер"),
+]
+
+
+async def collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+class TestProfileExport:
+    @pytest.mark.asyncio
+    async def test_stream_is_valid_zip_with_unique_names(self, tmp_path):
+        source = tmp_path / "profile.json"
+        source.write_text(json.dumps({"profile": {"x": "данные" * 1000}}), encoding="utf-8")
+
+        async def entries():
+            yield "Блок/Отдел/profile.json", source
+            yield "Блок/Отдел/profile.json", source
+            yield "_errors.txt", "нет файла".encode("utf-8")
+
+        archive = zipfile.ZipFile(io.BytesIO(await collect(stream_zip(entries()))))
+
+        assert archive.testzip() is None
+        assert archive.namelist() == [
+            "Блок/Отдел/profile.json",
+            "Блок/Отдел/profile_2.json",
+            "_errors.txt",
+        ]
+        assert archive.read("Блок/Отдел/profile_2.json") == source.read_bytes()
+
+    @pytest.mark.asyncio
+    async def test_unit_export_keeps_hierarchy_and_reports_missing_files(
+        self, tmp_path, monkeypatch
+    ):
+        db = DatabaseManager(str(tmp_path / "export.db"))
+        db.create_schema()
+        conn = db.get_connection()
+        conn.execute(
+            "INSERT INTO users (id, username, password_hash, full_name) VALUES (1, 'hr', 'x', 'HR')"
+        )
+        for profile_id, department, position in PROFILES:
+            conn.execute(
+                """
+                INSERT INTO profiles (id, department, position, profile_data, metadata_json,
+                                      generation_time_seconds, created_by, created_at, updated_at)
+                VALUES (?, ?, ?, '{}', '{}', 1.0, 1, ?, ?)
+            """,
+                (profile_id, department, position, datetime.now().isoformat(), datetime.now().isoformat()),
+            )
+        json_path = tmp_path / "analyst.json"
+        json_path.write_text('{"profile": {}}', encoding="utf-8")
+        index_profile_files(
+            conn,
+            PROFILES[0][0],
+            profiles_api.storage_service.describe_profile_files({"json": json_path}),
+        )
+        conn.commit()
+
+        monkeypatch.setattr(profiles_api, "get_db_manager", lambda: db)
+        monkeypatch.setattr(
+            profiles_api.storage_service, "find_department_path", ORG_PATHS.get
+        )
+        monkeypatch.setattr(
+            profiles_api.storage_service,
+            "get_profile_paths",
+            lambda **kwargs: (tmp_path / "none.json",) * 3,
+        )
+
+        request = ProfileExportRequest(unit_path="Блок ИТ/Департамент данных", formats=["json"])
+        profiles = profiles_api._select_export_profiles(request)
+        data = await collect(stream_zip(profiles_api._export_entries(profiles, request.formats)))
+        archive = zipfile.ZipFile(io.BytesIO(data))
+
+        assert [p["position"] for p in profiles] == ["Аналитик данных", "Инженер данных"]
+        assert archive.namelist() == [
+            "Блок_ИТ/Департамент_данных/Группа_анализа_данных/"
+            "Аналитик_данных_11111111/Аналитик_данных_11111111.json",
+            "_errors.txt",
+        ]
+        assert "Инженер данных" in archive.read("_errors.txt").decode("utf-8")
+        db.close_connection()
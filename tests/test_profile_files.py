@@ -0,0 +1,142 @@
+"""
+@doc Tests for the profile file index (paths, sizes and hashes recorded at save time)
+and for saving profiles when rendering fails
+
+Examples:
+    python> pytest tests/test_profile_files.py -v
+"""
+
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+import pytest  # noqa: E402
+
+from backend.api import profiles as profiles_api  # noqa: E402
+from backend.core import profile_generator as generator_module  # noqa: E402
+from backend.core.profile_generator import ProfileGenerator  # noqa: E402
+from backend.core.profile_renderer import ProfileRenderer  # noqa: E402
+from backend.core.storage_service import (  # noqa: E402
+    ProfileStorageService,
+    index_profile_files,
+    lookup_profile_file,
+)
+from backend.models.database import DatabaseManager  # noqa: E402
+
+PROFILE_ID = "4aec3e73-c9bd-4d25-a123-456789abcdef"
+
+
+def make_db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "files.db"))
+    db.create_schema()
+    conn = db.get_connection()
+    conn.execute(
+        "INSERT INTO users (id, username, password_hash, full_name) VALUES (1, 'hr', 'x', 'HR')"
+    )
+    conn.execute(
+        """
+        INSERT INTO profiles (id, department, position, profile_data, metadata_json,
+                              generation_time_seconds, created_by, created_at, updated_at)
+        VALUES (?, 'ДИТ', 'Аналитик', '{}', '{}', 1.5, 1, ?, ?)
+    """,
+        (PROFILE_ID, datetime(2025, 1, 10, 14, 30).isoformat(), datetime.now().isoformat()),
+    )
+    conn.commit()
+    return db
+
+
+class TestProfileFileIndex:
+    def test_saved_files_are_indexed_and_found_by_primary_key(self, tmp_path):
+        db = make_db(tmp_path)
+        conn = db.get_connection()
+        storage = ProfileStorageService(str(tmp_path / "generated_profiles"))
+        directory = tmp_path / "generated_profiles" / "Аналитик_20250110_143000"
+        directory.mkdir(parents=True)
+        json_path, md_path, _ = storage.save_profile_files(
+            directory, {"profile": {"position": "Аналитик"}}, "# Аналитик"
+        )
+
+        files = storage.describe_profile_files({"json": json_path, "md": md_path, "docx": None})
+        assert index_profile_files(conn, PROFILE_ID, files) == 2
+        conn.commit()
+
+        record = lookup_profile_file(conn, PROFILE_ID, "md")
+        assert record["path"] == str(md_path.resolve())
+        assert record["size_bytes"] == md_path.stat().st_size
+        assert record["sha256"] == hashlib.sha256(md_path.read_bytes()).hexdigest()
+        assert lookup_profile_file(conn, PROFILE_ID, "docx")["path"] is None
+        assert lookup_profile_file(conn, "missing", "json") is None
+        db.close_connection()
+
+    def test_download_resolution_backfills_legacy_profiles(self, tmp_path, monkeypatch):
+        db = make_db(tmp_path)
+        legacy_json = tmp_path / "legacy.json"
+        legacy_json.write_text("{}", encoding="utf-8")
+        calls = []
+
+        def legacy_paths(**kwargs):
+            calls.append(kwargs)
+            return legacy_json, tmp_path / "legacy.md", tmp_path / "legacy.docx"
+
+        monkeypatch.setattr(profiles_api, "get_db_manager", lambda: db)
+        monkeypatch.setattr(profiles_api.storage_service, "get_profile_paths", legacy_paths)
+
+        _, first = profiles_api._resolve_profile_file(PROFILE_ID, "json")
+        row, second = profiles_api._resolve_profile_file(PROFILE_ID, "json")
+
+        assert first == second == legacy_json
+        assert row["position"] == "Аналитик"
+        assert len(calls) == 1  # второй запрос - из индекса, без пересчета путей
+        db.close_connection()
+
+
+class TestRenderFailures:
+    """Ошибки рендеринга не должны отменять уже оплаченный результат LLM"""
+
+    def test_markdown_error_keeps_json_and_reports_kind(self, tmp_path, monkeypatch):
+        renderer = ProfileRenderer(tmp_path)
+        monkeypatch.setattr(
+            renderer.storage_service, "profile_directory_path", lambda **kw: tmp_path / "p"
+        )
+
+        def broken(profile):
+            raise ValueError("bad template")
+
+        monkeypatch.setattr(renderer.md_generator, "generate_from_json", broken)
+        rendered = renderer.render_files({"profile": {}, "metadata": {}}, "ДИТ", "Аналитик", PROFILE_ID)
+
+        assert rendered["errors"]["md"] == "bad template"
+        assert "json" in rendered["contents"] and "md" not in rendered["contents"]
+        assert rendered["markdown_content"] is None
+
+    @pytest.mark.asyncio
+    async def test_render_failure_falls_back_to_json(self, tmp_path, monkeypatch):
+        generator = ProfileGenerator.__new__(ProfileGenerator)
+        generator.base_data_path = tmp_path
+        generator.renderer = ProfileRenderer(tmp_path)
+        submitted = []
+
+        async def failing_run(func, *args):
+            raise RuntimeError("pool is broken")
+
+        monkeypatch.setattr(generator_module.render_executor, "run", failing_run)
+        monkeypatch.setattr(generator_module.file_write_queue, "submit", submitted.append)
+
+        result = {"profile": {"position_title": "Аналитик"}, "metadata": {}}
+        await generator._attach_saved_files(result, "ДИТ", "Аналитик", PROFILE_ID)
+
+        (contents,) = submitted
+        json_path, data = contents["json"]
+        assert list(contents) == ["json"]
+        assert json.loads(data)["profile"]["position_title"] == "Аналитик"
+        assert result["metadata"]["saved_path"] == str(json_path)
+        assert result["metadata"]["render_errors"] == {"render": "pool is broken"}
+        assert result["markdown_content"] is None
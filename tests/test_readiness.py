@@ -0,0 +1,69 @@
+"""
+@doc Tests for the cached system readiness monitor
+
+Examples:
+    python> pytest tests/test_readiness.py -v
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.core.readiness import ReadinessMonitor  # noqa: E402
+
+
+def make_check(source: Path, calls: list):
+    async def check():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        ready = source.exists()
+        return {"system_ready": ready, "errors": [] if ready else ["Missing data source"]}
+
+    return check
+
+
+class TestReadinessMonitor:
+    @pytest.mark.asyncio
+    async def test_verdict_is_cached_and_checked_once(self, tmp_path):
+        source = tmp_path / "structure.json"
+        source.write_text("{}")
+        calls = []
+        monitor = ReadinessMonitor(make_check(source, calls), watch_paths=[source])
+
+        verdicts = await asyncio.gather(*[monitor.get() for _ in range(20)])
+        for _ in range(100):
+            await monitor.get()
+
+        assert all(verdict["system_ready"] for verdict in verdicts)
+        assert len(calls) == 1
+        assert monitor.snapshot()["system_ready"] is True
+
+    @pytest.mark.asyncio
+    async def test_file_change_triggers_revalidation(self, tmp_path):
+        source = tmp_path / "structure.json"
+        source.write_text("{}")
+        calls = []
+        monitor = ReadinessMonitor(
+            make_check(source, calls), watch_paths=[source], poll_interval=0.02, max_age=0
+        )
+        await monitor.start()
+        await asyncio.sleep(0.1)
+        assert len(calls) == 1  # файлы не менялись - перепроверок нет
+
+        source.unlink()
+        for _ in range(50):
+            if not (await monitor.get())["system_ready"]:
+                break
+            await asyncio.sleep(0.02)
+        await monitor.stop()
+
+        assert (await monitor.get())["errors"] == ["Missing data source"]
+        assert len(calls) == 2
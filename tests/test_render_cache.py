@@ -0,0 +1,208 @@
+"""
+@doc Tests for lazy MD/DOCX rendering (content-hash render cache, single-flight, bulk prerender,
+rerender jobs shared through SQLite)
+
+Examples:
+    python> pytest tests/test_render_cache.py -v
+"""
+
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.api import profiles as profiles_api  # noqa: E402
+from backend.core.config import config  # noqa: E402
+from backend.core.render_cache import (  # noqa: E402
+    RENDERER_VERSION,
+    RenderCache,
+    prerender_profiles,
+    profile_document,
+)
+from backend.core.storage_service import index_profile_files, lookup_profile_file  # noqa: E402
+from backend.models.database import DatabaseManager  # noqa: E402
+from backend.models.schemas import ProfileRerenderRequest  # noqa: E402
+
+PROFILE = {"position_title": "Аналитик данных", "department_specific": "ДИТ"}
+METADATA = {"generation": {"timestamp": "2025-01-10T14:30:00", "duration": 12.5}}
+
+
+def insert_profile(conn, profile_id: str, status: str = "completed") -> None:
+    conn.execute(
+        """
+        INSERT INTO profiles (id, department, position, profile_data, metadata_json,
+                              generation_time_seconds, status, created_by,
+                              created_at, updated_at)
+        VALUES (?, 'ДИТ', 'Аналитик данных', ?, ?, 12.5, ?, 1, ?, ?)
+    """,
+        (
+            profile_id,
+            json.dumps(PROFILE),
+            json.dumps(METADATA),
+            status,
+            datetime.now().isoformat(),
+            datetime.now().isoformat(),
+        ),
+    )
+
+
+class TestRenderCache:
+    @pytest.mark.asyncio
+    async def test_concurrent_first_requests_render_once(self, tmp_path):
+        cache = RenderCache(tmp_path / "render_cache")
+        document = profile_document(json.dumps(PROFILE), json.dumps(METADATA))
+
+        paths = await asyncio.gather(*[cache.get_or_render("md", document) for _ in range(10)])
+        again = await cache.get_or_render("md", profile_document(PROFILE, METADATA))
+
+        assert len(set(paths)) == 1 and again == paths[0]
+        assert paths[0].name.endswith(f"_v{RENDERER_VERSION}.md")
+        assert "Аналитик данных" in paths[0].read_text(encoding="utf-8")
+        assert cache.misses == 1  # остальные ждали тот же рендеринг или нашли готовый файл
+        assert cache.coalesced + cache.hits == 10
+
+    @pytest.mark.asyncio
+    async def test_prerender_indexes_missing_artifacts_only(self, tmp_path):
+        db = DatabaseManager(str(tmp_path / "render.db"))
+        db.create_schema()
+        conn = db.get_connection()
+        conn.execute(
+            "INSERT INTO users (id, username, password_hash, full_name) VALUES (1, 'hr', 'x', 'HR')"
+        )
+        for profile_id, status in (("p-active", "completed"), ("p-archived", "archived")):
+            insert_profile(conn, profile_id, status)
+        conn.commit()
+        cache = RenderCache(tmp_path / "render_cache")
+
+        first = await prerender_profiles(conn, kinds=["md"], cache=cache)
+        second = await prerender_profiles(conn, kinds=["md"], cache=cache)
+
+        assert (first["profiles"], first["rendered"], first["failed"]) == (1, 1, 0)
+        assert (second["rendered"], second["skipped"]) == (0, 1)
+        record = lookup_profile_file(conn, "p-active", "md")
+        assert Path(record["path"]).exists()
+        assert lookup_profile_file(conn, "p-archived", "md")["path"] is None
+        db.close_connection()
+
+    @pytest.mark.asyncio
+    async def test_rerender_rebuilds_only_stale_renderer_versions(self, tmp_path):
+        db = DatabaseManager(str(tmp_path / "render.db"))
+        db.create_schema()
+        conn = db.get_connection()
+        conn.execute(
+            "INSERT INTO users (id, username, password_hash, full_name) VALUES (1, 'hr', 'x', 'HR')"
+        )
+        old_md = tmp_path / "old.md"
+        old_md.write_text("# old", encoding="utf-8")
+        for profile_id, version in (("p-stale", "0"), ("p-current", RENDERER_VERSION)):
+            insert_profile(conn, profile_id)
+            index_profile_files(
+                conn,
+                profile_id,
+                {"md": {"path": str(old_md), "size_bytes": 5, "sha256": "x", "renderer_version": version}},
+            )
+        conn.commit()
+        progress = []
+
+        stats = await prerender_profiles(
+            conn, kinds=["md"], cache=RenderCache(tmp_path / "render_cache"), on_progress=progress.append
+        )
+
+        assert (stats["rendered"], stats["skipped"], stats["failed"]) == (1, 1, 0)
+        assert stats["profiles_per_second"] > 0 and progress[-1]["total"] == 2
+        stale = lookup_profile_file(conn, "p-stale", "md")
+        assert stale["renderer_version"] == RENDERER_VERSION and stale["path"] != str(old_md)
+        assert lookup_profile_file(conn, "p-current", "md")["path"] == str(old_md)
+        db.close_connection()
+
+    @pytest.mark.asyncio
+    async def test_force_rerenders_current_version_artifacts(self, tmp_path):
+        db = DatabaseManager(str(tmp_path / "render.db"))
+        db.create_schema()
+        conn = db.get_connection()
+        conn.execute(
+            "INSERT INTO users (id, username, password_hash, full_name) VALUES (1, 'hr', 'x', 'HR')"
+        )
+        insert_profile(conn, "p-active")
+        conn.commit()
+        cache = RenderCache(tmp_path / "render_cache")
+
+        await prerender_profiles(conn, kinds=["md"], cache=cache)
+        path = Path(lookup_profile_file(conn, "p-active", "md")["path"])
+        path.write_text("# устаревшее содержимое", encoding="utf-8")
+        forced = await prerender_profiles(conn, kinds=["md"], cache=cache, force=True)
+
+        assert (forced["rendered"], forced["cached"], forced["skipped"]) == (1, 0, 0)
+        assert "Аналитик данных" in path.read_text(encoding="utf-8")
+        db.close_connection()
+
+
+class TestRerenderJobs:
+    def test_only_one_job_runs_across_workers(self, tmp_path):
+        db = DatabaseManager(str(tmp_path / "jobs.db"))
+        db.create_schema()
+        conn = db.get_connection()
+        request = ProfileRerenderRequest(formats=["md"])
+
+        first, started = profiles_api._claim_rerender_job(conn, request, "admin")
+        # Второй воркер API видит то же задание в БД и не запускает дубликат
+        second, duplicate = profiles_api._claim_rerender_job(conn, request, "admin")
+
+        assert started and not duplicate
+        assert second["job_id"] == first["job_id"] and second["status"] == "running"
+        assert profiles_api._latest_rerender_job(conn)["request"]["formats"] == ["md"]
+        db.close_connection()
+
+    def test_stale_running_job_does_not_block_new_one(self, tmp_path):
+        db = DatabaseManager(str(tmp_path / "jobs.db"))
+        db.create_schema()
+        conn = db.get_connection()
+        request = ProfileRerenderRequest()
+        stale, _ = profiles_api._claim_rerender_job(conn, request, "admin")
+        conn.execute(
+            "UPDATE profile_rerender_jobs SET heartbeat_at = '2000-01-01T00:00:00' WHERE id = ?",
+            (stale["job_id"],),
+        )
+
+        job, started = profiles_api._claim_rerender_job(conn, request, "admin")
+
+        assert started and job["job_id"] != stale["job_id"]
+        row = conn.execute(
+            "SELECT status FROM profile_rerender_jobs WHERE id = ?", (stale["job_id"],)
+        ).fetchone()
+        assert row["status"] == "failed"
+        db.close_connection()
+
+    @pytest.mark.asyncio
+    async def test_run_records_progress_and_stats_in_db(self, tmp_path, monkeypatch):
+        db = DatabaseManager(str(tmp_path / "jobs.db"))
+        db.create_schema()
+        conn = db.get_connection()
+        conn.execute(
+            "INSERT INTO users (id, username, password_hash, full_name) VALUES (1, 'hr', 'x', 'HR')"
+        )
+        insert_profile(conn, "p1")
+        conn.commit()
+        monkeypatch.setattr(profiles_api, "get_db_manager", lambda: db)
+        monkeypatch.setattr(config, "RENDER_CACHE_DIR", str(tmp_path / "render_cache"))
+        monkeypatch.setattr(config, "PROFILE_RERENDER_WORKERS", 1)
+        request = ProfileRerenderRequest(formats=["md"])
+        job, _ = profiles_api._claim_rerender_job(conn, request, "admin")
+
+        await profiles_api._run_rerender(job["job_id"], request)
+
+        state = profiles_api._latest_rerender_job(conn)
+        assert state["status"] == "completed", state["error"]
+        assert state["stats"]["rendered"] == 1
+        assert state["progress"]["profiles"] == 1
+        assert lookup_profile_file(conn, "p1", "md")["renderer_version"] == RENDERER_VERSION
+        db.close_connection()
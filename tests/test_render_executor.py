@@ -0,0 +1,71 @@
+"""
+@doc Tests for the bounded render executor (backpressure, event loop stays responsive, process mode)
+
+Examples:
+    python> pytest tests/test_render_executor.py -v
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.core.render_executor import RenderExecutor  # noqa: E402
+
+
+class TestRenderExecutor:
+    @pytest.mark.asyncio
+    async def test_queue_is_bounded_and_loop_stays_responsive(self):
+        executor = RenderExecutor(mode="thread", workers=1, queue_size=1)
+        release = threading.Event()
+
+        def render(value):
+            release.wait(timeout=5)
+            time.sleep(0.01)  # блокирующая работа вне event loop
+            return value * 2
+
+        jobs = [asyncio.create_task(executor.run(render, i)) for i in range(5)]
+        started = time.monotonic()
+        await asyncio.sleep(0.05)
+        ticks_delay = time.monotonic() - started
+
+        stats = executor.get_stats()
+        assert stats["in_flight"] == 2  # 1 выполняется + 1 в очереди
+        assert stats["waiting"] == 3
+        assert ticks_delay < 1.0
+
+        release.set()
+        assert await asyncio.gather(*jobs) == [0, 2, 4, 6, 8]
+        stats = executor.get_stats()
+        assert stats["completed"] == 5 and stats["in_flight"] == 0 and stats["waiting"] == 0
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_errors_are_propagated_and_slot_released(self):
+        executor = RenderExecutor(mode="thread", workers=1, queue_size=0)
+
+        def broken():
+            raise RuntimeError("docx failed")
+
+        with pytest.raises(RuntimeError):
+            await executor.run(broken)
+        assert await executor.run(len, "abc") == 3
+        assert executor.get_stats()["failed"] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_process_mode_runs_picklable_functions(self):
+        executor = RenderExecutor(mode="process", workers=1, queue_size=0)
+        try:
+            assert await executor.run(sorted, [3, 1, 2]) == [1, 2, 3]
+        finally:
+            executor.shutdown()
@@ -0,0 +1,97 @@
+"""
+@doc Tests for sectional profile generation (schema split, merge, validation)
+
+Examples:
+    python> pytest tests/test_sectional_generation.py -v
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.core.profile_schema import unwrap_schema, validate_against_schema  # noqa: E402
+from backend.core.sectional_generation import (  # noqa: E402
+    build_section_messages,
+    merge_sections,
+    plan_sections,
+)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def _production_response_format():
+    with open(PROJECT_ROOT / "templates" / "prompts" / "production" / "config.json", encoding="utf-8") as f:
+        return json.load(f)["response_format"]
+
+
+class TestPlanSections:
+    def test_every_schema_property_is_covered_exactly_once(self):
+        response_format = _production_response_format()
+        schema_properties = list(unwrap_schema(response_format)["properties"])
+
+        sections = plan_sections(response_format)
+        planned = [p for s in sections for p in s.properties]
+
+        assert sorted(planned) == sorted(schema_properties)
+        assert len(planned) == len(set(planned))
+
+    def test_section_response_format_is_restricted(self):
+        sections = plan_sections(_production_response_format())
+        careerogram = next(s for s in sections if s.name == "careerogram")
+        schema = careerogram.response_format["json_schema"]["schema"]
+
+        assert set(schema["properties"]) == {"careerogram_reasoning", "careerogram"}
+        assert set(schema["required"]) <= set(schema["properties"])
+
+    def test_unknown_properties_go_to_first_section(self):
+        response_format = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "p",
+                "schema": {"type": "object", "properties": {"position_title": {}, "new_field": {}}},
+            },
+        }
+        sections = plan_sections(response_format)
+        assert "new_field" in sections[0].properties
+
+
+class TestMergeSections:
+    def test_shared_prefix_is_preserved(self):
+        sections = plan_sections(_production_response_format())
+        base = [{"role": "user", "content": "context"}]
+
+        messages = build_section_messages(base, sections[1])
+
+        assert messages[0] == base[0]
+        assert "responsibility_areas" in messages[-1]["content"]
+
+    def test_merge_takes_fields_only_from_owning_section(self):
+        sections = plan_sections(_production_response_format())
+        results = {
+            "position_overview": {"position_title": "Аналитик", "careerogram": "чужое поле"},
+            "careerogram": {"careerogram": {"source_positions": {}}},
+        }
+
+        merged = merge_sections(results, sections)
+
+        assert merged["position_title"] == "Аналитик"
+        assert merged["careerogram"] == {"source_positions": {}}
+
+
+class TestSchemaValidation:
+    def test_reports_missing_and_wrong_types(self):
+        schema = {
+            "type": "object",
+            "required": ["title", "items"],
+            "properties": {"items": {"type": "array", "items": {"type": "integer"}}},
+        }
+        errors = validate_against_schema({"items": [1, "x"]}, schema)
+
+        assert "$: missing required property 'title'" in errors
+        assert any(e.startswith("$.items[1]") for e in errors)
@@ -0,0 +1,94 @@
+"""
+@doc Tests for the task event broker behind the SSE endpoint
+
+Examples:
+    python> pytest tests/test_task_events.py -v
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.models.database import DatabaseManager  # noqa: E402
+from backend.services.generation_queue import GenerationQueue  # noqa: E402
+from backend.services.task_events import TaskEventBroker  # noqa: E402
+
+REQUEST = {"department": "ДИТ", "position": "Аналитик данных", "employee_name": None}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "events.db"))
+    manager.create_schema()
+    conn = manager.get_connection()
+    conn.execute(
+        "INSERT INTO users (id, username, password_hash, full_name) VALUES (1, 'hr', 'x', 'HR')"
+    )
+    conn.commit()
+    yield GenerationQueue(manager, lease_seconds=60)
+    manager.close_connection()
+
+
+async def _collect(subscription, limit=20):
+    events = []
+    async for event in subscription.events(keepalive=2):
+        assert event is not None, "no event before keepalive"
+        events.append(event)
+        if len(events) >= limit:
+            break
+    return events
+
+
+class TestTaskEventBroker:
+    @pytest.mark.asyncio
+    async def test_local_changes_are_pushed_until_all_tasks_finish(self, queue):
+        broker = TaskEventBroker(queue, poll_interval=5)
+        first = queue.enqueue(REQUEST, user_id=1)
+        second = queue.enqueue(REQUEST, user_id=1)
+        subscription = broker.subscribe([first, second])
+
+        async def work():
+            await asyncio.sleep(0.05)
+            queue.claim("w1")
+            queue.heartbeat(first, "w1", progress=50, current_step="LLM")
+            await asyncio.sleep(0.05)
+            queue.complete(first, "w1", {"success": True})
+            queue.cancel(second)
+
+        worker = asyncio.create_task(work())
+        # poll_interval=5: события доставлены по сигналу очереди, а не по опросу
+        events = await asyncio.wait_for(_collect(subscription), timeout=2)
+        await worker
+        broker.unsubscribe(subscription)
+
+        statuses = {(e["task_id"], e["status"]) for e in events}
+        assert (first, "completed") in statuses
+        assert (second, "cancelled") in statuses
+        assert subscription.done
+
+    @pytest.mark.asyncio
+    async def test_changes_from_other_process_are_polled(self, queue):
+        broker = TaskEventBroker(queue, poll_interval=0.05)
+        task_id = queue.enqueue(REQUEST, user_id=1)
+        subscription = broker.subscribe([task_id])
+        other_process = GenerationQueue(queue._db_manager)
+
+        async def work():
+            await asyncio.sleep(0.1)
+            other_process.cancel(task_id)
+
+        worker = asyncio.create_task(work())
+        events = await asyncio.wait_for(_collect(subscription), timeout=2)
+        await worker
+        broker.unsubscribe(subscription)
+
+        assert [e["status"] for e in events] == ["queued", "cancelled"]
+        assert broker.get_stats() == {"subscriptions": 0, "watched_tasks": 0}
@@ -0,0 +1,122 @@
+"""
+@doc Tests for the off-hot-path tracing facade (queue, sampling, null mode)
+
+Examples:
+    python> pytest tests/test_tracing.py -v
+"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.core.tracing import (  # noqa: E402
+    TraceEvent,
+    TraceSampler,
+    TracingFacade,
+    fetch_prompt_nonblocking,
+)
+
+
+class _BlockingExporter:
+    """Экспортер, зависающий до сигнала - имитирует недоступный Langfuse"""
+
+    name = "blocking"
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.exported = []
+
+    def export(self, events):
+        self.release.wait(timeout=5)
+        self.exported.extend(events)
+
+    def flush(self):
+        return None
+
+
+class _FailingExporter:
+    name = "failing"
+
+    def export(self, events):
+        raise ConnectionError("langfuse is down")
+
+    def flush(self):
+        return None
+
+
+def _facade(exporter, **kwargs) -> TracingFacade:
+    facade = TracingFacade(**{"max_queue_size": 10, "batch_size": 5, "flush_interval": 0.05, **kwargs})
+    facade.exporter = exporter
+    return facade
+
+
+class TestTracingFacade:
+    def test_slow_exporter_does_not_block_emit_and_overflow_is_dropped(self):
+        exporter = _BlockingExporter()
+        facade = _facade(exporter, max_queue_size=3, batch_size=1)
+
+        started = time.monotonic()
+        results = [facade.emit(TraceEvent(name="llm_generation")) for _ in range(20)]
+        elapsed = time.monotonic() - started
+
+        assert elapsed < 0.5
+        stats = facade.get_stats()
+        assert stats["dropped"] > 0
+        assert results.count(True) + stats["dropped"] == 20
+
+        exporter.release.set()
+        facade.shutdown(timeout=2)
+
+    def test_export_errors_are_counted_not_raised(self):
+        facade = _facade(_FailingExporter())
+
+        assert facade.emit(TraceEvent(name="llm_call_failed", success=False))
+        facade.shutdown(timeout=2)
+
+        assert facade.get_stats()["export_errors"] == 1
+
+    def test_null_mode_is_noop(self):
+        facade = TracingFacade(mode="null")
+        facade.attach_langfuse(object())
+
+        assert not facade.enabled
+        assert facade.emit(TraceEvent(name="llm_generation")) is False
+        assert facade.get_stats()["emitted"] == 0
+
+
+class TestTraceSampler:
+    def test_failures_kept_when_successes_sampled_out(self):
+        sampler = TraceSampler(success_rate=0.0, failure_rate=1.0)
+
+        assert not sampler.should_sample(TraceEvent(name="ok", success=True, trace_id="t1"))
+        assert sampler.should_sample(TraceEvent(name="fail", success=False, trace_id="t1"))
+
+    def test_decision_is_stable_per_trace(self):
+        sampler = TraceSampler(success_rate=0.5)
+        decisions = {sampler.should_sample(TraceEvent(name="x", trace_id="trace-42")) for _ in range(10)}
+
+        assert len(decisions) == 1
+
+
+class TestPromptFetch:
+    @pytest.mark.asyncio
+    async def test_slow_prompt_fetch_falls_back_after_timeout(self):
+        class SlowLangfuse:
+            def get_prompt(self, name, label=None):
+                time.sleep(0.5)
+                return "prompt"
+
+        started = time.monotonic()
+        prompt = await fetch_prompt_nonblocking(SlowLangfuse(), "a101-hr-profile-gemini-v3-simple", timeout=0.05)
+
+        assert prompt is None
+        assert time.monotonic() - started < 0.4
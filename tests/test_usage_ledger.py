@@ -0,0 +1,103 @@
+"""
+@doc Tests for the LLM usage ledger (recording, context binding, rollups)
+
+Examples:
+    python> pytest tests/test_usage_ledger.py -v
+"""
+
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from openai.types import CompletionUsage
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-test-key-12345678901234567890")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-that-is-long-enough-32-chars")
+
+from backend.core.usage_ledger import UsageLedger, UsageRecord, bind_usage_context  # noqa: E402
+from backend.models.database import DatabaseManager  # noqa: E402
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    db = DatabaseManager(str(tmp_path / "usage.db"))
+    db.create_schema()
+    yield UsageLedger(db)
+    db.close_connection()
+
+
+def _record(path, **fields):
+    defaults = {"model": "google/gemini-2.5-flash", "prompt_tokens": 1000, "completion_tokens": 200,
+                "total_tokens": 1200, "cost_usd": 0.01, "latency_ms": 1000.0}
+    return UsageRecord(department_path=path, **{**defaults, **fields})
+
+
+class TestUsageRecord:
+    def test_from_response_reads_openrouter_token_details(self):
+        usage = CompletionUsage.model_validate({
+            "prompt_tokens": 900, "completion_tokens": 100, "total_tokens": 1000,
+            "prompt_tokens_details": {"cached_tokens": 600},
+            "completion_tokens_details": {"reasoning_tokens": 40},
+            "cost": 0.002,
+        })
+        response = SimpleNamespace(
+            id="gen-1", model="google/gemini-2.5-flash", usage=usage,
+            choices=[SimpleNamespace(finish_reason="stop")],
+        )
+
+        record = UsageRecord.from_response(response, "fallback", 1.5, retries=2)
+
+        assert record.cached_tokens == 600
+        assert record.reasoning_tokens == 40
+        assert record.cost_usd == 0.002
+        assert record.latency_ms == 1500.0
+        assert record.cache_hit
+
+    def test_from_response_falls_back_to_model_extra_details(self):
+        usage = SimpleNamespace(
+            prompt_tokens=900, completion_tokens=100, total_tokens=1000,
+            model_extra={"prompt_tokens_details": {"cached_tokens": 300}},
+        )
+        response = SimpleNamespace(id="gen-2", model=None, usage=usage, choices=[])
+
+        record = UsageRecord.from_response(response, "fallback", 0.5)
+
+        assert record.cached_tokens == 300
+        assert record.reasoning_tokens == 0
+        assert record.model == "fallback"
+
+
+class TestUsageLedger:
+    def test_context_fields_are_applied(self, ledger):
+        with bind_usage_context(task_id="task-1", user_id=7):
+            ledger.record(_record("Блок/Департамент"))
+
+        rows = ledger.rollup(group_by="user")
+        assert rows[0]["group_key"] == "7"
+
+    def test_unit_rollup_collapses_to_depth(self, ledger):
+        ledger.record(_record("Блок А/Департамент 1/Отдел X"))
+        ledger.record(_record("Блок А/Департамент 1/Отдел Y", cost_usd=0.03))
+        ledger.record(_record("Блок Б/Департамент 2", success=False, error_type="APITimeoutError"))
+
+        rows = {r["group_key"]: r for r in ledger.rollup(group_by="unit", unit_depth=2)}
+
+        assert rows["Блок А/Департамент 1"]["calls"] == 2
+        assert rows["Блок А/Департамент 1"]["cost_usd"] == pytest.approx(0.04)
+        assert rows["Блок Б/Департамент 2"]["failed_calls"] == 1
+
+    def test_unit_prefix_filters_subtree(self, ledger):
+        ledger.record(_record("Блок А/Департамент 1"))
+        ledger.record(_record("Блок А2/Департамент 3"))
+
+        rows = ledger.rollup(group_by="unit", unit_prefix="Блок А")
+
+        assert [r["group_key"] for r in rows] == ["Блок А/Департамент 1"]
+
+    def test_unknown_group_is_rejected(self, ledger):
+        with pytest.raises(ValueError):
+            ledger.rollup(group_by="position")